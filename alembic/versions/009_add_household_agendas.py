@@ -0,0 +1,40 @@
+"""Add household_agendas (precomputed per-household agenda).
+
+Revision ID: 009_household_agendas
+Revises: 008_todo_member_id
+Create Date: 2025-01-01 00:00:09.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "009_household_agendas"
+down_revision: Union[str, None] = "008_todo_member_id"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "household_agendas",
+        sa.Column("household_id", sa.Integer(), nullable=False),
+        sa.Column("window_start", sa.Date(), nullable=False),
+        sa.Column("window_end", sa.Date(), nullable=False),
+        sa.Column("events", sa.JSON(), nullable=False),
+        sa.Column("built_at", sa.DateTime(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(
+            ["household_id"],
+            ["households.id"],
+            ondelete="CASCADE",
+        ),
+        sa.PrimaryKeyConstraint("household_id"),
+        if_not_exists=True,
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("household_agendas")
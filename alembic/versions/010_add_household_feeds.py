@@ -0,0 +1,80 @@
+"""Add household_feeds and household_feed_events (.ics feed snapshot).
+
+Revision ID: 010_household_feeds
+Revises: 009_household_agendas
+Create Date: 2025-01-01 00:00:10.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "010_household_feeds"
+down_revision: Union[str, None] = "009_household_agendas"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "household_feeds",
+        sa.Column("household_id", sa.Integer(), nullable=False),
+        sa.Column("token", sa.String(length=64), nullable=False),
+        sa.Column("generation", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("etag", sa.String(length=64), nullable=True),
+        sa.Column("content_updated_at", sa.DateTime(), nullable=True),
+        sa.Column("built_at", sa.DateTime(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(
+            ["household_id"],
+            ["households.id"],
+            ondelete="CASCADE",
+        ),
+        sa.PrimaryKeyConstraint("household_id"),
+        if_not_exists=True,
+    )
+    op.create_index(
+        op.f("ix_household_feeds_token"), "household_feeds", ["token"], unique=True, if_not_exists=True
+    )
+
+    op.create_table(
+        "household_feed_events",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("household_id", sa.Integer(), nullable=False),
+        sa.Column("calendar_id", sa.Integer(), nullable=False),
+        sa.Column("generation", sa.Integer(), nullable=False),
+        sa.Column("uid", sa.String(length=512), nullable=False),
+        sa.Column("start", sa.String(length=40), nullable=False),
+        sa.Column("end", sa.String(length=40), nullable=False),
+        sa.Column("summary", sa.String(length=1024), nullable=False),
+        sa.Column("description", sa.Text(), nullable=True),
+        sa.Column("location", sa.String(length=1024), nullable=True),
+        sa.ForeignKeyConstraint(
+            ["household_id"],
+            ["household_feeds.household_id"],
+            ondelete="CASCADE",
+        ),
+        sa.ForeignKeyConstraint(
+            ["calendar_id"],
+            ["calendars.id"],
+            ondelete="CASCADE",
+        ),
+        sa.PrimaryKeyConstraint("id"),
+        if_not_exists=True,
+    )
+    op.create_index(
+        op.f("ix_household_feed_events_household_id"),
+        "household_feed_events",
+        ["household_id"],
+        unique=False,
+        if_not_exists=True,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_household_feed_events_household_id"), table_name="household_feed_events")
+    op.drop_table("household_feed_events")
+    op.drop_index(op.f("ix_household_feeds_token"), table_name="household_feeds")
+    op.drop_table("household_feeds")
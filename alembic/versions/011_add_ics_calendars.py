@@ -0,0 +1,77 @@
+"""Add ICS subscription calendars: calendars.source_type / ics_* columns and ics_events.
+
+Revision ID: 011_ics_calendars
+Revises: 010_household_feeds
+Create Date: 2025-01-01 00:00:11.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "011_ics_calendars"
+down_revision: Union[str, None] = "010_household_feeds"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # batch mode so google_calendar_id can become nullable on SQLite too
+    with op.batch_alter_table("calendars") as batch_op:
+        batch_op.add_column(
+            sa.Column("source_type", sa.String(length=16), nullable=False, server_default="google")
+        )
+        batch_op.add_column(sa.Column("ics_url", sa.String(length=2048), nullable=True))
+        batch_op.add_column(sa.Column("ics_etag", sa.String(length=255), nullable=True))
+        batch_op.add_column(sa.Column("ics_last_modified", sa.String(length=64), nullable=True))
+        batch_op.add_column(sa.Column("ics_fetched_at", sa.DateTime(), nullable=True))
+        batch_op.alter_column("google_calendar_id", existing_type=sa.String(length=255), nullable=True)
+
+    op.create_table(
+        "ics_events",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("calendar_id", sa.Integer(), nullable=False),
+        sa.Column("instance_key", sa.String(length=512), nullable=False),
+        sa.Column("start", sa.String(length=40), nullable=False),
+        sa.Column("end", sa.String(length=40), nullable=False),
+        sa.Column("start_at", sa.DateTime(), nullable=False),
+        sa.Column("end_at", sa.DateTime(), nullable=False),
+        sa.Column("summary", sa.Text(), nullable=False),
+        sa.Column("description", sa.Text(), nullable=True),
+        sa.Column("location", sa.Text(), nullable=True),
+        sa.ForeignKeyConstraint(
+            ["calendar_id"],
+            ["calendars.id"],
+            ondelete="CASCADE",
+        ),
+        sa.PrimaryKeyConstraint("id"),
+        if_not_exists=True,
+    )
+    op.create_index(op.f("ix_ics_events_id"), "ics_events", ["id"], unique=False, if_not_exists=True)
+    op.create_index(
+        "ix_ics_events_calendar_start", "ics_events", ["calendar_id", "start_at"], unique=False, if_not_exists=True
+    )
+    op.create_index(
+        "ix_ics_events_calendar_instance",
+        "ics_events",
+        ["calendar_id", "instance_key"],
+        unique=False,
+        if_not_exists=True,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_ics_events_calendar_instance", table_name="ics_events")
+    op.drop_index("ix_ics_events_calendar_start", table_name="ics_events")
+    op.drop_index(op.f("ix_ics_events_id"), table_name="ics_events")
+    op.drop_table("ics_events")
+    op.execute("DELETE FROM calendars WHERE source_type <> 'google'")
+    with op.batch_alter_table("calendars") as batch_op:
+        batch_op.alter_column("google_calendar_id", existing_type=sa.String(length=255), nullable=False)
+        batch_op.drop_column("ics_fetched_at")
+        batch_op.drop_column("ics_last_modified")
+        batch_op.drop_column("ics_etag")
+        batch_op.drop_column("ics_url")
+        batch_op.drop_column("source_type")
@@ -0,0 +1,52 @@
+"""Add calendar_snapshots (cached Google events per calendar + watch channel).
+
+Revision ID: 012_calendar_snapshots
+Revises: 011_ics_calendars
+Create Date: 2025-01-01 00:00:12.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "012_calendar_snapshots"
+down_revision: Union[str, None] = "011_ics_calendars"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "calendar_snapshots",
+        sa.Column("calendar_id", sa.Integer(), nullable=False),
+        sa.Column("window_start", sa.DateTime(), nullable=False),
+        sa.Column("window_end", sa.DateTime(), nullable=False),
+        sa.Column("events", sa.JSON(), nullable=False),
+        sa.Column("fetched_at", sa.DateTime(), nullable=False),
+        sa.Column("changed_at", sa.DateTime(), nullable=True),
+        sa.Column("channel_id", sa.String(length=64), nullable=True),
+        sa.Column("channel_token", sa.String(length=64), nullable=True),
+        sa.Column("channel_resource_id", sa.String(length=255), nullable=True),
+        sa.Column("channel_expires_at", sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(
+            ["calendar_id"],
+            ["calendars.id"],
+            ondelete="CASCADE",
+        ),
+        sa.PrimaryKeyConstraint("calendar_id"),
+        if_not_exists=True,
+    )
+    op.create_index(
+        op.f("ix_calendar_snapshots_channel_id"),
+        "calendar_snapshots",
+        ["channel_id"],
+        unique=True,
+        if_not_exists=True,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_calendar_snapshots_channel_id"), table_name="calendar_snapshots")
+    op.drop_table("calendar_snapshots")
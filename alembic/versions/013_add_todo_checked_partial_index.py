@@ -0,0 +1,33 @@
+"""Add partial index on checked todo items for the retention sweeper.
+
+Revision ID: 013_todo_checked_index
+Revises: 012_calendar_snapshots
+Create Date: 2025-01-01 00:00:13.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "013_todo_checked_index"
+down_revision: Union[str, None] = "012_calendar_snapshots"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_todo_items_checked",
+        "todo_items",
+        ["household_id", "checked_at"],
+        unique=False,
+        postgresql_where=sa.text("is_checked"),
+        sqlite_where=sa.text("is_checked = 1"),
+        if_not_exists=True,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_todo_items_checked", table_name="todo_items")
@@ -0,0 +1,75 @@
+"""Replace integer position with lexicographic rank keys on todo_items and grocery_list_items.
+
+Revision ID: 014_item_rank_keys
+Revises: 013_todo_checked_index
+Create Date: 2025-01-01 00:00:14.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "014_item_rank_keys"
+down_revision: Union[str, None] = "013_todo_checked_index"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (table, column holding the list an item belongs to, (list, rank) index)
+TABLES = (
+    ("todo_items", "household_id", "ix_todo_items_household_rank"),
+    ("grocery_list_items", "grocery_list_id", "ix_grocery_list_items_list_rank"),
+)
+
+# Same keys as src.services.ranking.evenly_spaced (copied so the migration does not depend on app code)
+DIGITS = "0123456789abcdefghijklmnopqrstuvwxyz"
+
+
+def _evenly_spaced(count: int) -> list[str]:
+    base = len(DIGITS)
+    width = 1
+    while base**width <= count:
+        width += 1
+    step = base**width // (count + 1)
+    keys = []
+    for i in range(1, count + 1):
+        value, digits = i * step, []
+        for _ in range(width):
+            value, digit = divmod(value, base)
+            digits.append(DIGITS[digit])
+        keys.append("".join(reversed(digits)).rstrip("0"))
+    return keys
+
+
+def _backfill(table: str, scope: str, order_by: str, column: str, values) -> None:
+    """Write values(count) into column for each list, following the current order_by."""
+    conn = op.get_bind()
+    rows = conn.execute(sa.text(f"SELECT id, {scope} FROM {table} ORDER BY {scope}, {order_by}, id")).all()
+    by_scope: dict = {}
+    for row_id, scope_id in rows:
+        by_scope.setdefault(scope_id, []).append(row_id)
+    for ids in by_scope.values():
+        conn.execute(
+            sa.text(f"UPDATE {table} SET {column} = :value WHERE id = :id"),
+            [{"id": i, "value": v} for i, v in zip(ids, values(len(ids)))],
+        )
+
+
+def upgrade() -> None:
+    for table, scope, index in TABLES:
+        op.add_column(table, sa.Column("rank", sa.String(length=255), nullable=True))
+        _backfill(table, scope, "position", "rank", _evenly_spaced)
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.alter_column("rank", existing_type=sa.String(length=255), nullable=False)
+            batch_op.drop_column("position")
+        op.create_index(index, table, [scope, "rank"], unique=False, if_not_exists=True)
+
+
+def downgrade() -> None:
+    for table, scope, index in TABLES:
+        op.drop_index(index, table_name=table)
+        op.add_column(table, sa.Column("position", sa.Integer(), nullable=True))
+        _backfill(table, scope, "rank", "position", lambda count: range(count))
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_column("rank")
@@ -0,0 +1,53 @@
+"""Add per-household change sequence and the household_changes log for delta sync.
+
+Revision ID: 015_household_change_log
+Revises: 014_item_rank_keys
+Create Date: 2025-01-01 00:00:15.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "015_household_change_log"
+down_revision: Union[str, None] = "014_item_rank_keys"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("households", sa.Column("change_seq", sa.Integer(), nullable=False, server_default="0"))
+    op.add_column("households", sa.Column("change_floor_seq", sa.Integer(), nullable=False, server_default="0"))
+    op.create_table(
+        "household_changes",
+        sa.Column("household_id", sa.Integer(), nullable=False),
+        sa.Column("entity", sa.String(length=32), nullable=False),
+        sa.Column("entity_id", sa.Integer(), nullable=False),
+        sa.Column("seq", sa.Integer(), nullable=False),
+        sa.Column("deleted", sa.Boolean(), nullable=False),
+        sa.Column("changed_at", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["household_id"],
+            ["households.id"],
+            ondelete="CASCADE",
+        ),
+        sa.PrimaryKeyConstraint("household_id", "entity", "entity_id"),
+        if_not_exists=True,
+    )
+    op.create_index(
+        "ix_household_changes_household_seq",
+        "household_changes",
+        ["household_id", "seq"],
+        unique=False,
+        if_not_exists=True,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_household_changes_household_seq", table_name="household_changes")
+    op.drop_table("household_changes")
+    with op.batch_alter_table("households") as batch_op:
+        batch_op.drop_column("change_floor_seq")
+        batch_op.drop_column("change_seq")
@@ -0,0 +1,37 @@
+"""Add per-household list revisions (household_revisions) for ETags on list endpoints.
+
+Revision ID: 016_household_revisions
+Revises: 015_household_change_log
+Create Date: 2025-01-01 00:00:16.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "016_household_revisions"
+down_revision: Union[str, None] = "015_household_change_log"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "household_revisions",
+        sa.Column("household_id", sa.Integer(), nullable=False),
+        sa.Column("resource", sa.String(length=32), nullable=False),
+        sa.Column("revision", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["household_id"],
+            ["households.id"],
+            ondelete="CASCADE",
+        ),
+        sa.PrimaryKeyConstraint("household_id", "resource"),
+        if_not_exists=True,
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("household_revisions")
@@ -0,0 +1,44 @@
+"""Add indexes for hot household-scoped queries and foreign keys cascaded on member and slot deletes.
+
+Revision ID: 017_hot_query_indexes
+Revises: 016_household_revisions
+Create Date: 2025-01-01 00:00:17.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "017_hot_query_indexes"
+down_revision: Union[str, None] = "016_household_revisions"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (name, table, columns, partial-index predicate for PostgreSQL / SQLite or None)
+INDEXES = [
+    ("ix_members_household", "members", ["household_id"], None),
+    ("ix_invitations_household_status_email", "invitations", ["household_id", "status", "email"], None),
+    ("ix_invitations_invited_by", "invitations", ["invited_by_member_id"], None),
+    ("ix_todo_items_member", "todo_items", ["member_id"], ("member_id IS NOT NULL", "member_id IS NOT NULL")),
+    ("ix_meal_slots_household_position", "meal_slots", ["household_id", "position"], None),
+    ("ix_planned_meals_member", "planned_meals", ["member_id"], None),
+    ("ix_planned_meals_slot", "planned_meals", ["meal_slot_id"], None),
+    ("ix_grocery_lists_household", "grocery_lists", ["household_id"], None),
+    ("ix_grocery_list_items_member", "grocery_list_items", ["member_id"], ("member_id IS NOT NULL", "member_id IS NOT NULL")),
+    ("ix_household_changes_tombstones", "household_changes", ["household_id", "changed_at"], ("deleted", "deleted = 1")),
+]
+
+
+def upgrade() -> None:
+    for name, table, columns, where in INDEXES:
+        kwargs = {}
+        if where is not None:
+            kwargs = {"postgresql_where": sa.text(where[0]), "sqlite_where": sa.text(where[1])}
+        op.create_index(name, table, columns, unique=False, if_not_exists=True, **kwargs)
+
+
+def downgrade() -> None:
+    for name, table, _, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
@@ -7,6 +7,8 @@ import {
   createGroceryListItem,
   updateGroceryListItem,
   deleteGroceryListItem,
+  subscribeHouseholdChanges,
+  changesTouch,
 } from '../services/api'
 import './GroceryLists.css'
 
@@ -65,6 +67,15 @@ export default function GroceryLists({ householdId, myMemberId }) {
     loadItems()
   }, [loadItems])
 
+  // Pick up other members' edits as they happen
+  useEffect(() => {
+    if (!householdId) return undefined
+    return subscribeHouseholdChanges(householdId, (changes) => {
+      if (changesTouch(changes, 'grocery_lists')) loadLists()
+      if (changesTouch(changes, 'grocery_items', 'members')) loadItems()
+    })
+  }, [householdId, loadLists, loadItems])
+
   // Move focus to the active tab when it changes (e.g. after Arrow key navigation)
   useEffect(() => {
     if (activeListId) {
@@ -175,15 +186,15 @@ export default function GroceryLists({ householdId, myMemberId }) {
     reordered.splice(dropIndex, 0, removed)
     setItems(reordered)
     setError('')
-    const toUpdate = reordered
-      .map((item, idx) => (item.position !== idx ? { item, newPosition: idx } : null))
-      .filter(Boolean)
+    // Only the moved item changes: it gets a rank key between its new neighbours
+    const after = reordered[dropIndex - 1]
+    const before = reordered[dropIndex + 1]
     try {
-      await Promise.all(
-        toUpdate.map(({ item, newPosition }) =>
-          updateGroceryListItem(item.id, { position: newPosition })
-        )
-      )
+      const updated = await updateGroceryListItem(removed.id, {
+        after_id: after?.id ?? null,
+        before_id: before?.id ?? null,
+      })
+      setItems((prev) => prev.map((item) => (item.id === updated.id ? { ...item, rank: updated.rank } : item)))
     } catch (err) {
       setError(err.response?.data?.detail || err.message)
       loadItems()
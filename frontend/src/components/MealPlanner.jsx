@@ -1,10 +1,11 @@
 import React, { useState, useEffect, useRef } from 'react'
 import {
-  listMealSlots,
-  listPlannedMeals,
+  getHouseholdSnapshot,
   updatePlannedMeal,
   deletePlannedMeal,
   swapPlannedMeals,
+  subscribeHouseholdChanges,
+  changesTouch,
 } from '../services/api'
 import './MealPlanner.css'
 
@@ -41,13 +42,13 @@ export default function MealPlanner({ householdId, myMemberId, mealPlannerWeeks
         const start = new Date(startDate)
         const end = new Date(start)
         end.setDate(end.getDate() + numDays - 1)
-        const [slotList, mealList] = await Promise.all([
-          listMealSlots(householdId),
-          listPlannedMeals(householdId, ISO_DATE(start), ISO_DATE(end)),
-        ])
+        const snapshot = await getHouseholdSnapshot(householdId, ['meal_slots', 'planned_meals'], {
+          start_date: ISO_DATE(start),
+          end_date: ISO_DATE(end),
+        })
         if (!cancelled) {
-          setSlots(slotList)
-          setMeals(mealList)
+          setSlots(snapshot.meal_slots)
+          setMeals(snapshot.planned_meals)
         }
       } catch (e) {
         if (!cancelled) setError(e.response?.data?.detail || e.message)
@@ -63,6 +64,14 @@ export default function MealPlanner({ householdId, myMemberId, mealPlannerWeeks
     }
   }, [householdId, startDate.getTime(), numDays])
 
+  // Pick up other members' edits as they happen
+  useEffect(() => {
+    if (!householdId) return undefined
+    return subscribeHouseholdChanges(householdId, (changes) => {
+      if (changesTouch(changes, 'meal_slots', 'planned_meals', 'members')) loadRef.current?.()
+    })
+  }, [householdId])
+
   const getMealFor = (dateStr, slotId) =>
     meals.find((m) => m.meal_date === dateStr && m.meal_slot_id === slotId)
 
@@ -1,5 +1,5 @@
 import React, { useState, useEffect, useCallback } from 'react'
-import { listTodos, createTodo, updateTodo, deleteTodo } from '../services/api'
+import { listTodos, createTodo, updateTodo, deleteTodo, subscribeHouseholdChanges, changesTouch } from '../services/api'
 import './TodoList.css'
 
 export default function TodoList({ householdId, households = [] }) {
@@ -31,6 +31,14 @@ export default function TodoList({ householdId, households = [] }) {
     load()
   }, [load])
 
+  // Pick up other members' edits as they happen
+  useEffect(() => {
+    if (!householdId) return undefined
+    return subscribeHouseholdChanges(householdId, (changes) => {
+      if (changesTouch(changes, 'todos', 'members')) load()
+    })
+  }, [householdId, load])
+
   const handleAddClick = () => {
     setAdding(true)
     setNewContent('')
@@ -125,11 +133,12 @@ export default function TodoList({ householdId, households = [] }) {
     reordered.splice(dropIndex, 0, removed)
     setItems(reordered)
     setError('')
-    const toUpdate = reordered
-      .map((item, idx) => (item.position !== idx ? { item, newPosition: idx } : null))
-      .filter(Boolean)
+    // Only the moved item changes: it gets a rank key between its new neighbours
+    const after = reordered[dropIndex - 1]
+    const before = reordered[dropIndex + 1]
     try {
-      await Promise.all(toUpdate.map(({ item, newPosition }) => updateTodo(item.id, { position: newPosition })))
+      const updated = await updateTodo(removed.id, { after_id: after?.id ?? null, before_id: before?.id ?? null })
+      setItems((prev) => prev.map((item) => (item.id === updated.id ? { ...item, rank: updated.rank } : item)))
     } catch (err) {
       setError(err.response?.data?.detail || err.message)
       load()
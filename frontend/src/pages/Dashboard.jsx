@@ -44,25 +44,25 @@ export default function Dashboard() {
     return () => { document.title = 'Lionfish' }
   }, [])
 
-  const fetchHouseholdMembers = useCallback((options = {}) => {
+  const fetchHouseholdMembers = useCallback(() => {
     const hid = dashboardHouseholdId ?? households[0]?.id
     if (!hid) {
       setHouseholdMembers([])
       return
     }
-    listMembers(hid, options)
+    listMembers(hid)
       .then(setHouseholdMembers)
       .catch(() => setHouseholdMembers([]))
   }, [dashboardHouseholdId, households])
 
   useEffect(() => {
-    fetchHouseholdMembers({ cacheBust: true })
+    fetchHouseholdMembers()
   }, [fetchHouseholdMembers])
 
   // Refetch members when user returns to this tab so colors stay in sync (e.g. housemate changed color in Settings)
   useEffect(() => {
     const onVisibilityChange = () => {
-      if (document.visibilityState === 'visible') fetchHouseholdMembers({ cacheBust: true })
+      if (document.visibilityState === 'visible') fetchHouseholdMembers()
     }
     document.addEventListener('visibilitychange', onVisibilityChange)
     return () => document.removeEventListener('visibilitychange', onVisibilityChange)
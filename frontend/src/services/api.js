@@ -26,13 +26,72 @@ export const createHousehold = (name) => api.post('/api/households', { name }).t
 export const getHousehold = (id) => api.get(`/api/households/${id}`).then((r) => r.data)
 export const updateHousehold = (id, data) => api.patch(`/api/households/${id}`, data).then((r) => r.data)
 export const deleteHousehold = (id) => api.delete(`/api/households/${id}`)
-
-// Members
-export const listMembers = (householdId, opts = {}) => {
-  const params = { ...(householdId != null ? { household_id: householdId } : {}) }
-  if (opts.cacheBust) params._ = Date.now()
-  return api.get('/api/members', { params }).then((r) => r.data)
+// One request for a household's lists; fields: e.g. ['todos', 'meal_slots'] (omit for everything)
+export const getHouseholdSnapshot = (id, fields, params = {}) =>
+  api
+    .get(`/api/households/${id}/snapshot`, { params: { ...params, ...(fields ? { fields: fields.join(',') } : {}) } })
+    .then((r) => r.data)
+// Rows changed since a seq (from the snapshot or the previous response)
+export const getHouseholdChanges = (id, since) =>
+  api.get(`/api/households/${id}/changes`, { params: { since } }).then((r) => r.data)
+// True if a changes response touches any of the given entities (e.g. 'todos', 'grocery_items')
+export const changesTouch = (changes, ...entities) =>
+  changes.reset ||
+  entities.some((e) => changes[e]?.length) ||
+  changes.deleted.some((d) => entities.includes(d.entity))
+// Push updates: calls onChanges(changes) after every change to the household (changes = a /changes
+// response; { reset: true } means reload everything). One event stream per household is shared by all
+// subscribers. Returns an unsubscribe function.
+const householdStreams = new Map()
+export const subscribeHouseholdChanges = (id, onChanges) => {
+  let stream = householdStreams.get(id)
+  if (!stream) {
+    stream = { listeners: new Set(), seq: null, running: false, again: false }
+    const notify = (changes) => stream.listeners.forEach((listener) => listener(changes))
+    const sync = async () => {
+      if (stream.running) {
+        stream.again = true // a fetch is in flight; run once more when it finishes
+        return
+      }
+      stream.running = true
+      try {
+        do {
+          stream.again = false
+          if (stream.seq == null) {
+            stream.seq = (await getHouseholdSnapshot(id, ['household'])).seq
+            continue
+          }
+          let changes
+          do {
+            changes = await getHouseholdChanges(id, stream.seq)
+            stream.seq = changes.seq
+            notify(changes)
+          } while (changes.has_more && !changes.reset)
+        } while (stream.again)
+      } catch {
+        // The next event (or reconnect) retries from the same seq
+      } finally {
+        stream.running = false
+      }
+    }
+    stream.source = new EventSource(`${API_BASE_URL}/api/households/${id}/events`, { withCredentials: true })
+    stream.source.addEventListener('ready', sync)
+    stream.source.addEventListener('change', sync)
+    householdStreams.set(id, stream)
+  }
+  stream.listeners.add(onChanges)
+  return () => {
+    stream.listeners.delete(onChanges)
+    if (stream.listeners.size === 0) {
+      stream.source.close()
+      householdStreams.delete(id)
+    }
+  }
 }
+
+// Members (the browser revalidates list responses with their ETag; an unchanged list costs a 304)
+export const listMembers = (householdId) =>
+  api.get('/api/members', { params: householdId != null ? { household_id: householdId } : {} }).then((r) => r.data)
 export const createMember = (body) => api.post('/api/members', body).then((r) => r.data)
 export const getMember = (id) => api.get(`/api/members/${id}`).then((r) => r.data)
 export const updateMember = (id, data) => api.patch(`/api/members/${id}`, data).then((r) => r.data)
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""Load test: C concurrent clients against a running API server (one uvicorn worker).
+
+Seeds H households (one user and ITEMS to-do items each) into the server's database, then C clients
+(spread over the households) each send N requests: 60% list to-dos, 20% household snapshot, 20% check
+or uncheck a to-do. Reports requests per second, latency percentiles, failed requests (errors and
+non-2xx answers) and the pool's longest checkout wait (from GET /metrics).
+
+By default starts the server itself (uvicorn src.api.main:app, TESTING=1 so no migrations or background
+jobs) on a throwaway SQLite database; --url targets a server already running on the database given by
+DATABASE_URL instead (e.g. an older checkout, for a before/after comparison).
+
+Usage:
+    python scripts/bench_api_load.py [-c CLIENTS] [-n REQUESTS] [--households H] [--url URL]
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+if "DATABASE_URL" not in os.environ:
+    os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/bench_api_load.db"
+os.environ.setdefault("SECRET_KEY", "bench-api-load-secret")
+
+import httpx  # noqa: E402
+
+from src.api.routes.auth import create_access_token  # noqa: E402
+from src.db.session import SessionLocal, engine  # noqa: E402
+from src.models.database import Base, Household, Member, TodoItem, User  # noqa: E402
+from src.services import ranking  # noqa: E402
+
+ITEMS = 50
+
+
+def seed(households: int) -> list[tuple[int, str, list[int]]]:
+    """(household_id, bearer token, to-do ids) per seeded household."""
+    Base.metadata.create_all(engine)
+    db = SessionLocal()
+    tag = f"{time.time_ns()}"
+    seeded = []
+    for i in range(households):
+        user = User(google_sub=f"load-{tag}-{i}", email=f"load-{tag}-{i}@example.com", display_name=f"Load {i}")
+        household = Household(name=f"Load {i}")
+        db.add_all([user, household])
+        db.flush()
+        member = Member(user_id=user.id, household_id=household.id, role="owner")
+        items = [TodoItem(household_id=household.id, content=f"Item {n}", rank=r) for n, r in enumerate(ranking.evenly_spaced(ITEMS))]
+        db.add(member)
+        db.add_all(items)
+        db.commit()
+        seeded.append((household.id, create_access_token(user.id, user.email), [item.id for item in items]))
+    db.close()
+    return seeded
+
+
+async def client_loop(http: httpx.AsyncClient, seed_row, requests: int, rng: random.Random, latencies, failures) -> None:
+    household_id, token, ids = seed_row
+    headers = {"Authorization": f"Bearer {token}"}
+    for _ in range(requests):
+        roll = rng.random()
+        started = time.perf_counter()
+        try:
+            if roll < 0.6:
+                r = await http.get("/api/todos", params={"household_id": household_id}, headers=headers)
+            elif roll < 0.8:
+                r = await http.get(f"/api/households/{household_id}/snapshot", params={"fields": "members,todos"}, headers=headers)
+            else:
+                body = {"is_checked": rng.random() < 0.5}
+                r = await http.patch(f"/api/todos/{rng.choice(ids)}", json=body, headers=headers)
+            ok = r.status_code < 300
+        except httpx.HTTPError:
+            ok = False
+        latencies.append(time.perf_counter() - started)
+        if not ok:
+            failures.append(1)
+
+
+def pool_wait_max(url: str) -> str:
+    try:
+        text = httpx.get(f"{url}/metrics", timeout=10).text
+    except httpx.HTTPError:
+        return "-"
+    waits = [line.rsplit(" ", 1)[1] for line in text.splitlines() if line.startswith("db_pool_checkout_wait_max_seconds")]
+    return " / ".join(f"{float(w) * 1000:.0f}" for w in waits) or "-"
+
+
+async def run(url: str, clients: int, requests: int, seeded) -> None:
+    latencies: list[float] = []
+    failures: list[int] = []
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=120) as http:
+        started = time.perf_counter()
+        await asyncio.gather(*(
+            client_loop(http, seeded[i % len(seeded)], requests, random.Random(i), latencies, failures)
+            for i in range(clients)
+        ))
+        elapsed = time.perf_counter() - started
+    ordered = sorted(latencies)
+    pct = lambda p: ordered[max(int(len(ordered) * p) - 1, 0)] * 1000  # noqa: E731
+    print("| Clients | Requests | Req/s | Latency p50 / p95 / p99 (ms) | Failed | Pool wait max (ms) |")
+    print("|---|---|---|---|---|---|")
+    print(
+        f"| {clients} | {len(latencies)} | {len(latencies) / elapsed:,.0f} | "
+        f"{statistics.median(ordered) * 1000:.0f} / {pct(0.95):.0f} / {pct(0.99):.0f} | {len(failures)} | {pool_wait_max(url)} |"
+    )
+
+
+def start_server(port: int) -> subprocess.Popen:
+    env = {**os.environ, "TESTING": "1"}
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "src.api.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT,
+        env=env,
+    )
+    for _ in range(100):
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/health", timeout=1)
+            return server
+        except httpx.HTTPError:
+            time.sleep(0.1)
+    server.terminate()
+    raise SystemExit("Server did not start")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-c", "--clients", type=int, default=500)
+    parser.add_argument("-n", "--requests", type=int, default=20, help="requests per client")
+    parser.add_argument("--households", type=int, default=50)
+    parser.add_argument("--url", help="server to test (default: start one on a throwaway database)")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    server = None if args.url else start_server(args.port)
+    url = args.url or f"http://127.0.0.1:{args.port}"
+    try:
+        seeded = seed(args.households)
+        asyncio.run(run(url, args.clients, args.requests, seeded))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    main()
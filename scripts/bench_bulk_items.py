@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""Compare per-item PATCH requests with the bulk endpoints for to-do items.
+
+Seeds a throwaway SQLite database with one household and N to-do items, then times (through the
+ASGI app) checking off every item and reversing the list's order, once with one request per item and
+once with a single bulk request. Prints a markdown table of requests, SQL statements and wall time.
+
+Usage:
+    python scripts/bench_bulk_items.py [N]
+"""
+
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+_db_dir = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{_db_dir}/bench_bulk_items.db"
+os.environ["TESTING"] = "1"
+
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import event  # noqa: E402
+
+from src.api.main import app  # noqa: E402
+from src.api.routes.auth import create_access_token  # noqa: E402
+from src.db.session import SessionLocal, engine, init_db  # noqa: E402
+from src.models.database import Household, Member, TodoItem, User  # noqa: E402
+from src.services import ranking  # noqa: E402
+
+
+def seed(count: int) -> tuple[int, list[int], str]:
+    db = SessionLocal()
+    user = User(google_sub=f"bench-{time.time_ns()}", email=f"bench-{time.time_ns()}@example.com", display_name="Bench")
+    household = Household(name="Bench Household")
+    db.add_all([user, household])
+    db.flush()
+    db.add(Member(user_id=user.id, household_id=household.id))
+    items = [
+        TodoItem(household_id=household.id, content=f"Task {i}", rank=rank)
+        for i, rank in enumerate(ranking.evenly_spaced(count))
+    ]
+    db.add_all(items)
+    db.commit()
+    result = household.id, [item.id for item in items], create_access_token(user.id, user.email)
+    db.close()
+    return result
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    init_db()
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+    def per_item_check(client, household_id, ids, headers):
+        for i in ids:
+            client.patch(f"/api/todos/{i}", json={"is_checked": True}, headers=headers).raise_for_status()
+        return len(ids)
+
+    def bulk_check(client, household_id, ids, headers):
+        body = {"household_id": household_id, "items": [{"id": i, "is_checked": True} for i in ids]}
+        client.patch("/api/todos", json=body, headers=headers).raise_for_status()
+        return 1
+
+    def per_item_reverse(client, household_id, ids, headers):
+        # Drag-and-drop one item at a time: each moves to the top of the ones already placed
+        for placed, i in enumerate(ids):
+            body = {"before_id": ids[placed - 1]} if placed else {"after_id": ids[-1]}
+            client.patch(f"/api/todos/{i}", json=body, headers=headers).raise_for_status()
+        return len(ids)
+
+    def bulk_reverse(client, household_id, ids, headers):
+        body = {"household_id": household_id, "ids": list(reversed(ids))}
+        client.put("/api/todos/order", json=body, headers=headers).raise_for_status()
+        return 1
+
+    cases = [
+        ("Check off all", "per-item PATCH", per_item_check),
+        ("Check off all", "bulk PATCH /api/todos", bulk_check),
+        ("Reverse order", "per-item PATCH (after_id/before_id)", per_item_reverse),
+        ("Reverse order", "PUT /api/todos/order", bulk_reverse),
+    ]
+    print(f"| Operation ({count} todos) | Path | Requests | SQL statements | Time (ms) |")
+    print("|---|---|---|---|---|")
+    with TestClient(app) as client:
+        for operation, path, run in cases:
+            household_id, ids, token = seed(count)
+            headers = {"Authorization": f"Bearer {token}"}
+            statements.clear()
+            started = time.perf_counter()
+            requests = run(client, household_id, ids, headers)
+            elapsed = (time.perf_counter() - started) * 1000
+            print(f"| {operation} | {path} | {requests} | {len(statements)} | {elapsed:.0f} |")
+
+
+if __name__ == "__main__":
+    main()
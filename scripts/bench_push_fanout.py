@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""Fan-out throughput of household push updates.
+
+1. Bus only: S subscribers of one household each drain their queue while M messages are published;
+   reports deliveries per second and publish-to-receive latency.
+2. End to end: starts the app under uvicorn on a throwaway SQLite database, opens C event streams
+   (GET /api/households/{id}/events) and has one client PATCH a to-do item W times; reports how long
+   each write takes to reach every stream, next to what polling every 5 s costs (requests per idle
+   minute, and a median delay of half the interval).
+
+Usage:
+    python scripts/bench_push_fanout.py [S] [C]
+"""
+
+import asyncio
+import os
+import socket
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+_db_dir = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{_db_dir}/bench_push_fanout.db"
+os.environ["TESTING"] = "1"
+os.environ["PUBSUB_BACKEND"] = "local"
+
+import httpx  # noqa: E402
+import uvicorn  # noqa: E402
+
+from src.api.main import app  # noqa: E402
+from src.api.routes.auth import create_access_token  # noqa: E402
+from src.db.session import SessionLocal, init_db  # noqa: E402
+from src.models.database import Household, Member, TodoItem, User  # noqa: E402
+from src.services import pubsub  # noqa: E402
+
+MESSAGES = 200
+WRITES = 20
+POLL_SECONDS = 5
+
+
+def _ms(values: list[float]) -> str:
+    values = sorted(values)
+    return f"{statistics.median(values) * 1000:.1f} / {values[int(len(values) * 0.99) - 1] * 1000:.1f}"
+
+
+async def bench_bus(subscribers: int) -> None:
+    bus = pubsub.LocalBackend(queue_size=MESSAGES)
+    subscriptions = [bus.subscribe(1) for _ in range(subscribers)]
+    latencies: list[float] = []
+
+    async def drain(subscription):
+        for _ in range(MESSAGES):
+            message = await subscription.get()
+            latencies.append(time.perf_counter() - message["sent"])
+
+    consumers = [asyncio.create_task(drain(s)) for s in subscriptions]
+    started = time.perf_counter()
+    for seq in range(MESSAGES):
+        bus.publish(1, {"seq": seq, "sent": time.perf_counter()})
+        await asyncio.sleep(0)
+    await asyncio.gather(*consumers)
+    elapsed = time.perf_counter() - started
+    deliveries = subscribers * MESSAGES
+    dropped = sum(s.dropped for s in subscriptions)
+    print(f"| {subscribers} | {MESSAGES} | {deliveries} | {deliveries / elapsed:,.0f} | {_ms(latencies)} | {dropped} |")
+
+
+def seed(clients: int) -> tuple[int, int, list[str]]:
+    db = SessionLocal()
+    household = Household(name="Bench Household")
+    users = [User(google_sub=f"bench-{i}-{time.time_ns()}", email=f"bench-{i}-{time.time_ns()}@example.com") for i in range(clients)]
+    db.add_all([household, *users])
+    db.flush()
+    db.add_all([Member(user_id=u.id, household_id=household.id) for u in users])
+    todo = TodoItem(household_id=household.id, content="Shared task", rank="i")
+    db.add(todo)
+    db.commit()
+    result = household.id, todo.id, [create_access_token(u.id, u.email) for u in users]
+    db.close()
+    return result
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def bench_streams(clients: int) -> None:
+    household_id, todo_id, tokens = seed(clients)
+    port = _free_port()
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        await asyncio.sleep(0.05)
+    base = f"http://127.0.0.1:{port}"
+    headers = {"Authorization": f"Bearer {tokens[0]}"}
+    async with httpx.AsyncClient(base_url=base) as http:
+        r = await http.get(f"/api/households/{household_id}/changes", headers=headers)
+        first_seq = r.json()["seq"] + 1  # each PATCH below advances the seq by one
+    sent: list[float] = []
+    latencies: list[float] = []
+    ready = asyncio.Semaphore(0)
+
+    async def listen(token: str):
+        headers = {"Authorization": f"Bearer {token}"}
+        async with httpx.AsyncClient(base_url=base, timeout=None) as http:
+            async with http.stream("GET", f"/api/households/{household_id}/events", headers=headers) as r:
+                received = 0
+                async for line in r.aiter_lines():
+                    if line == "event: ready":
+                        ready.release()
+                    elif line.startswith("id: "):
+                        write = int(line[4:]) - first_seq
+                        latencies.append(time.perf_counter() - sent[write])
+                        received += 1
+                        if write == WRITES - 1:
+                            return
+
+    listeners = [asyncio.create_task(listen(t)) for t in tokens]
+    for _ in tokens:
+        await ready.acquire()
+    async with httpx.AsyncClient(base_url=base) as http:
+        for i in range(WRITES):
+            sent.append(time.perf_counter())
+            r = await http.patch(f"/api/todos/{todo_id}", json={"content": f"Edit {i}"}, headers=headers)
+            r.raise_for_status()
+            await asyncio.sleep(0.05)
+    await asyncio.wait_for(asyncio.gather(*listeners), 60)
+    server.should_exit = True
+    thread.join()
+    print(
+        f"| {clients} | {WRITES} | {len(latencies)} | {_ms(latencies)} | "
+        f"0 vs {clients * 60 // POLL_SECONDS} | {POLL_SECONDS * 1000 // 2} |"
+    )
+
+
+def main() -> None:
+    subscribers = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    clients = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    init_db()
+    print("| Subscribers | Messages | Deliveries | Deliveries/s | Latency p50 / p99 (ms) | Dropped |")
+    print("|---|---|---|---|---|---|")
+    for count in sorted({10, subscribers // 10, subscribers}):
+        asyncio.run(bench_bus(count))
+    print()
+    print(
+        "| Event streams | Writes | Notifications received | PATCH sent to event received p50 / p99 (ms) "
+        f"| Idle requests/min, push vs {POLL_SECONDS} s polling | Polling p50 delay (ms) |"
+    )
+    print("|---|---|---|---|---|---|")
+    asyncio.run(bench_streams(clients))
+
+
+if __name__ == "__main__":
+    main()
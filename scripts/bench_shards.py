@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""Write throughput with households spread over 1, 2 and 4 SQLite shards.
+
+Each run uses fresh throwaway shard files, set up like DATABASE_SHARD_URLS (src/db/shards.py), with H
+households of 50 to-do items placed round-robin on the shards. P writer processes (one household each)
+check or uncheck random items N times, committing each write (change log included). SQLite has one
+writer per file, so with one shard every process waits for the same lock; each added shard adds a
+writer. Reports writes per second and write latency.
+
+Usage:
+    python scripts/bench_shards.py [P] [N]
+"""
+
+import multiprocessing
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+_db_dir = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{_db_dir}/bench_shards_app.db"
+os.environ["TESTING"] = "1"
+
+from sqlalchemy import create_engine, event  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from src.db import shards  # noqa: E402
+from src.db.session import apply_sqlite_pragmas  # noqa: E402
+from src.models.database import Household, TodoItem  # noqa: E402
+from src.services import change_log, ranking  # noqa: E402
+
+ITEMS = 50
+
+
+def _factory(url: str) -> sessionmaker:
+    engine = create_engine(url, connect_args={"check_same_thread": False})
+    event.listen(engine, "connect", apply_sqlite_pragmas)
+    factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    change_log.install(factory)
+    return factory
+
+
+def _seed(urls: list[str], households: int) -> list[tuple[str, list[int]]]:
+    """(shard URL, to-do ids) per household, placed round-robin."""
+    factories = []
+    for index, url in enumerate(urls):
+        factory = _factory(url)
+        shards.init_shard(factory.kw["bind"], index)
+        factories.append(factory)
+    seeded = []
+    for i in range(households):
+        db = factories[i % len(urls)]()
+        household = Household(name=f"Bench {i}")
+        db.add(household)
+        db.flush()
+        items = [TodoItem(household_id=household.id, content=f"Item {n}", rank=r) for n, r in enumerate(ranking.evenly_spaced(ITEMS))]
+        db.add_all(items)
+        db.commit()
+        seeded.append((urls[i % len(urls)], [item.id for item in items]))
+        db.close()
+    return seeded
+
+
+def _write_loop(url: str, ids: list[int], writes: int, seed: int, results) -> None:
+    rng = random.Random(seed)
+    db = _factory(url)()
+    latencies = []
+    for _ in range(writes):
+        started = time.perf_counter()
+        item = db.get(TodoItem, rng.choice(ids))
+        item.is_checked = not item.is_checked
+        item.checked_at = datetime.utcnow() if item.is_checked else None
+        db.commit()
+        latencies.append(time.perf_counter() - started)
+    db.close()
+    results.put(latencies)
+
+
+def run(shard_count: int, processes: int, writes: int) -> None:
+    run_dir = tempfile.mkdtemp(dir=_db_dir)
+    urls = [f"sqlite:///{run_dir}/shard{index}.db" for index in range(shard_count)]
+    seeded = _seed(urls, processes)
+    results = multiprocessing.Queue()
+    workers = [
+        multiprocessing.Process(target=_write_loop, args=(url, ids, writes, i, results))
+        for i, (url, ids) in enumerate(seeded)
+    ]
+    started = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    latencies = [latency for _ in workers for latency in results.get()]
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - started
+    ordered = sorted(latencies)
+    p99 = ordered[max(int(len(ordered) * 0.99) - 1, 0)]
+    print(
+        f"| {shard_count} | {len(latencies) / elapsed:,.0f} | "
+        f"{statistics.median(ordered) * 1000:.1f} / {p99 * 1000:.1f} |"
+    )
+
+
+def main() -> None:
+    processes = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    writes = int(sys.argv[2]) if len(sys.argv) > 2 else 300
+    print(f"{processes} writer processes x {writes} writes\n")
+    print("| Shards | Writes/s | Write latency p50 / p99 (ms) |")
+    print("|---|---|---|")
+    for shard_count in (1, 2, 4):
+        run(shard_count, processes, writes)
+
+
+if __name__ == "__main__":
+    main()
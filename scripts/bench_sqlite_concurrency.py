@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""Concurrent reads and writes on SQLite: default settings vs the tuned profile vs the writer queue.
+
+Each run uses a fresh throwaway database with one household and 200 to-do items. W writer threads each
+check or uncheck random items (the PATCH /api/todos/{id} write, change log included) N times while
+R reader threads keep listing the household's to-dos until the writers finish. Reports writes and
+reads per second, write latency and how many writes failed with "database is locked".
+
+- default: what the app had before: rollback journal, synchronous=FULL, pysqlite's 5 s lock wait.
+- profile: the SQLite profile of src/db/session.py (WAL, busy_timeout, synchronous=NORMAL, ...).
+- profile + queue: the same, with writes going through src/db/write_queue.py.
+
+Usage:
+    python scripts/bench_sqlite_concurrency.py [W] [R] [N]
+"""
+
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+_db_dir = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{_db_dir}/bench_sqlite_app.db"
+os.environ["TESTING"] = "1"
+
+from sqlalchemy import create_engine, event  # noqa: E402
+from sqlalchemy.exc import OperationalError  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from src.db import write_queue  # noqa: E402
+from src.db.session import apply_sqlite_pragmas  # noqa: E402
+from src.models.database import Base, Household, TodoItem  # noqa: E402
+from src.services import change_log, ranking, todo_retention  # noqa: E402
+
+ITEMS = 200
+
+
+def _setup(name: str, tuned: bool) -> tuple[str, sessionmaker]:
+    url = f"sqlite:///{_db_dir}/bench_{name}.db"
+    engine = create_engine(url, connect_args={"check_same_thread": False}, pool_size=32, max_overflow=0)
+    if tuned:
+        event.listen(engine, "connect", apply_sqlite_pragmas)
+    Base.metadata.create_all(engine)
+    factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    change_log.install(factory)
+    return url, factory
+
+
+def _seed(factory: sessionmaker) -> tuple[int, list[int]]:
+    db = factory()
+    household = Household(name="Bench Household")
+    db.add(household)
+    db.flush()
+    items = [TodoItem(household_id=household.id, content=f"Item {i}", rank=r) for i, r in enumerate(ranking.evenly_spaced(ITEMS))]
+    db.add_all(items)
+    db.commit()
+    result = household.id, [item.id for item in items]
+    db.close()
+    return result
+
+
+def _toggle(item_id: int):
+    def job(session):
+        item = session.get(TodoItem, item_id)
+        item.is_checked = not item.is_checked
+        item.checked_at = datetime.utcnow() if item.is_checked else None
+
+    return job
+
+
+def run(name: str, tuned: bool, queued: bool, writers: int, readers: int, writes: int) -> None:
+    url, factory = _setup(name.replace(" ", "_").replace("+", ""), tuned)
+    household_id, ids = _seed(factory)
+    writer = write_queue.WriteQueue(write_queue.writer_sessionmaker(url)) if queued else None
+    latencies: list[float] = []
+    errors = [0]
+    reads = [0]
+    done = threading.Event()
+    lock = threading.Lock()
+
+    def write_loop(seed: int):
+        rng = random.Random(seed)
+        db = factory()
+        for _ in range(writes):
+            job = _toggle(rng.choice(ids))
+            started = time.perf_counter()
+            try:
+                if writer is not None:
+                    writer.run(job)
+                else:
+                    job(db)
+                    db.commit()
+            except OperationalError:
+                db.rollback()
+                with lock:
+                    errors[0] += 1
+                continue
+            with lock:
+                latencies.append(time.perf_counter() - started)
+        db.close()
+
+    def read_loop():
+        db = factory()
+        while not done.is_set():
+            try:
+                db.query(TodoItem).filter(TodoItem.household_id == household_id, todo_retention.not_expired()).order_by(TodoItem.rank).all()
+                db.rollback()
+                with lock:
+                    reads[0] += 1
+            except OperationalError:
+                db.rollback()
+        db.close()
+
+    reader_threads = [threading.Thread(target=read_loop) for _ in range(readers)]
+    writer_threads = [threading.Thread(target=write_loop, args=(i,)) for i in range(writers)]
+    started = time.perf_counter()
+    for t in reader_threads + writer_threads:
+        t.start()
+    for t in writer_threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+    done.set()
+    for t in reader_threads:
+        t.join()
+    if writer is not None:
+        writer.stop()
+    ordered = sorted(latencies) or [0.0]
+    p99 = ordered[max(int(len(ordered) * 0.99) - 1, 0)]
+    batches = f"{writer.batches}" if writer is not None else "-"
+    print(
+        f"| {name} | {len(latencies) / elapsed:,.0f} | {reads[0] / elapsed:,.0f} | "
+        f"{statistics.median(ordered) * 1000:.1f} / {p99 * 1000:.1f} | {errors[0]} | {batches} |"
+    )
+
+
+def main() -> None:
+    writers = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    readers = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    writes = int(sys.argv[3]) if len(sys.argv) > 3 else 200
+    print(f"{writers} writer threads x {writes} writes, {readers} reader threads\n")
+    print("| Mode | Writes/s | Reads/s | Write latency p50 / p99 (ms) | Locked errors | Write transactions |")
+    print("|---|---|---|---|---|---|")
+    run("default", tuned=False, queued=False, writers=writers, readers=readers, writes=writes)
+    run("profile", tuned=True, queued=False, writers=writers, readers=readers, writes=writes)
+    run("profile + queue", tuned=True, queued=True, writers=writers, readers=readers, writes=writes)
+
+
+if __name__ == "__main__":
+    main()
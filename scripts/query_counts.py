@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""Count the SQL statements each API endpoint runs for one request.
+
+Seeds a throwaway SQLite database with a two-member household (todos, grocery items, meals, ...) and
+calls a set of representative endpoints through the ASGI app, counting statements sent to the engine.
+
+Usage:
+    python scripts/query_counts.py
+"""
+
+import os
+import sys
+import tempfile
+from datetime import date
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+_db_dir = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{_db_dir}/query_counts.db"
+os.environ["TESTING"] = "1"
+
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import event  # noqa: E402
+
+from src.api.main import app  # noqa: E402
+from src.api.routes.auth import create_access_token  # noqa: E402
+from src.db.session import SessionLocal, engine, init_db  # noqa: E402
+from src.models.database import (  # noqa: E402
+    Calendar,
+    GroceryList,
+    GroceryListItem,
+    Household,
+    MealSlot,
+    Member,
+    PlannedMeal,
+    TodoItem,
+    User,
+)
+
+ITEMS = 10
+
+
+def seed() -> dict:
+    init_db()
+    db = SessionLocal()
+    users = [User(google_sub=f"qc-{i}", email=f"qc{i}@example.com", display_name=f"User {i}") for i in range(2)]
+    household = Household(name="Query Count Household")
+    db.add_all([*users, household])
+    db.flush()
+    members = [
+        Member(user_id=u.id, household_id=household.id, role="owner" if i == 0 else "member")
+        for i, u in enumerate(users)
+    ]
+    db.add_all(members)
+    db.flush()
+    db.add(Calendar(member_id=members[0].id, google_calendar_id="primary", name="Family"))
+    grocery_list = GroceryList(household_id=household.id, name="Groceries")
+    slot = MealSlot(household_id=household.id, name="Dinner", position=0)
+    db.add_all([grocery_list, slot])
+    db.flush()
+    for i in range(ITEMS):
+        member = members[i % 2]
+        db.add(TodoItem(household_id=household.id, member_id=member.id, content=f"Todo {i}", rank=f"{i:03d}1"))
+        db.add(GroceryListItem(grocery_list_id=grocery_list.id, member_id=member.id, content=f"Item {i}", rank=f"{i:03d}1"))
+        db.add(PlannedMeal(
+            household_id=household.id,
+            meal_date=date(2025, 1, 1 + i),
+            meal_slot_id=slot.id,
+            member_id=member.id,
+            description=f"Meal {i}",
+        ))
+    db.commit()
+    ids = {
+        "household": household.id,
+        "member": members[1].id,
+        "list": grocery_list.id,
+        "todo": db.query(TodoItem.id).filter(TodoItem.household_id == household.id).first()[0],
+        "token": create_access_token(users[0].id, users[0].email),
+    }
+    db.close()
+    return ids
+
+
+def main() -> None:
+    ids = seed()
+    endpoints = [
+        ("GET", "/api/auth/me"),
+        ("GET", "/api/households"),
+        ("GET", f"/api/households/{ids['household']}"),
+        ("GET", f"/api/households/{ids['household']}/snapshot"),
+        ("GET", f"/api/members?household_id={ids['household']}"),
+        ("GET", f"/api/members/{ids['member']}"),
+        ("GET", f"/api/calendars?household_id={ids['household']}"),
+        ("GET", f"/api/invitations?household_id={ids['household']}"),
+        ("GET", f"/api/todos?household_id={ids['household']}"),
+        ("PATCH", f"/api/todos/{ids['todo']}"),
+        ("GET", f"/api/grocery-lists?household_id={ids['household']}"),
+        ("GET", f"/api/grocery-list-items?grocery_list_id={ids['list']}"),
+        ("GET", f"/api/meal-slots?household_id={ids['household']}"),
+        ("GET", f"/api/planned-meals?household_id={ids['household']}&start_date=2025-01-01&end_date=2025-01-31"),
+        ("GET", f"/api/events/agenda?household_id={ids['household']}"),
+        ("GET", "/api/events/writable-calendars"),
+    ]
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    headers = {"Authorization": f"Bearer {ids['token']}"}
+    print(f"| Endpoint ({ITEMS} todos / grocery items / meals) | Status | Queries |")
+    print("|---|---|---|")
+    with TestClient(app) as client:
+        for method, path in endpoints:
+            statements.clear()
+            body = {"content": "Renamed"} if method == "PATCH" else None
+            resp = client.request(method, path, headers=headers, json=body)
+            print(f"| `{method} {path.split('?')[0]}` | {resp.status_code} | {len(statements)} |")
+
+
+if __name__ == "__main__":
+    main()
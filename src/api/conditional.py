@@ -0,0 +1,28 @@
+"""Conditional GETs for list endpoints (ETag / If-None-Match, see src/services/revisions.py)."""
+
+from fastapi import Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.db.session import per_shard
+from src.services import revisions
+
+
+def not_modified(request: Request, response: Response, tag: str) -> Response | None:
+    """Set the ETag on the response; return a 304 to send instead when the client's copy is current.
+
+    Call before loading the rows, so a 304 costs only the revision lookup.
+    """
+    headers = {"ETag": tag, "Cache-Control": "no-cache"}
+    if revisions.matches(request.headers.get("if-none-match"), tag):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
+
+
+async def household_etag(db: AsyncSession, household_ids: list[int], resources: tuple[str, ...]) -> str:
+    """revisions.etag of household_ids' lists; for a user-level request with sharding on, the tags of
+    the shards holding them, joined."""
+    tags = await per_shard(db, household_ids, lambda shard_db, ids: shard_db.run_sync(revisions.etag, ids, resources))
+    if len(tags) == 1:
+        return tags[0]
+    return 'W/"' + "+".join(tag[3:-1] for tag in tags) + '"'
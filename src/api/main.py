@@ -1,19 +1,31 @@
 """FastAPI application entry point."""
 
+import hmac
 import logging
 import os
 import time
 from pathlib import Path
 
 from contextlib import asynccontextmanager
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, Header, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, PlainTextResponse
 
 from src.config import settings
-from src.api.routes import auth, calendars, events, grocery_lists, households, invitations, meal_planner, members, todos
-from src.db.session import init_db, run_migrations
+from src.api.routes import auth, calendars, events, feeds, grocery_lists, households, invitations, meal_planner, members, todos, webhooks
+from src.db import pool, write_queue
+from src.db.session import (
+    async_engine,
+    async_shard_engines,
+    each_shard,
+    engine,
+    init_db,
+    replica_engine,
+    run_migrations,
+    shard_engines,
+)
+from src.services import agenda, calendar_snapshots, change_log, ics_feed, ics_subscriptions, pubsub, ranking, scheduler, todo_retention
 
 logger = logging.getLogger(__name__)
 
@@ -39,9 +51,22 @@ def _static_dir() -> Path:
 STATIC_DIR = _static_dir()
 
 
+def _background_jobs() -> list[scheduler.Job]:
+    """Periodic jobs run by the API process (see src/services/scheduler.py), each once per shard."""
+    return [
+        scheduler.Job("agenda-refresh", settings.AGENDA_REFRESH_SECONDS, each_shard(agenda.refresh_all_agendas)),
+        scheduler.Job("feed-refresh", settings.FEED_REFRESH_SECONDS, each_shard(ics_feed.refresh_all_feeds)),
+        scheduler.Job("ics-refresh", settings.ICS_REFRESH_SECONDS, each_shard(ics_subscriptions.sync_all_ics_calendars)),
+        scheduler.Job("google-sync", settings.GOOGLE_SYNC_SECONDS, each_shard(calendar_snapshots.sync_all_snapshots)),
+        scheduler.Job("todo-sweep", settings.TODO_SWEEP_SECONDS, each_shard(todo_retention.sweep_expired_todos)),
+        scheduler.Job("rank-rebalance", settings.RANK_REBALANCE_SECONDS, each_shard(ranking.rebalance_all_lists)),
+        scheduler.Job("change-prune", settings.CHANGE_PRUNE_SECONDS, each_shard(change_log.prune_all_tombstones)),
+    ]
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    """Run on startup: apply migrations and create any missing tables."""
+    """Run on startup: apply migrations, create any missing tables and start background jobs."""
     if not os.getenv("TESTING"):
         run_migrations()  # Alembic upgrade head (no-op if no Alembic)
     init_db()  # SQLAlchemy create_all for any missing tables
@@ -49,7 +74,18 @@ async def lifespan(app: FastAPI):
     _dir = STATIC_DIR
     _idx = _dir / "index.html"
     logger.info("Static dir: %s, exists=%s, index.html exists=%s", _dir, _dir.exists(), _idx.exists())
+    tasks = [] if os.getenv("TESTING") else scheduler.start(_background_jobs())
+    pubsub.bus.start()
     yield
+    pubsub.bus.stop()
+    for writer in write_queue.writers:
+        if writer is not None:
+            writer.stop()
+    await scheduler.stop(tasks)
+    for shard_engine in async_shard_engines:
+        await shard_engine.dispose()
+    if replica_engine is not None:
+        await replica_engine.dispose()
 
 
 app = FastAPI(
@@ -104,6 +140,8 @@ app.include_router(members.router)
 app.include_router(calendars.router)
 app.include_router(invitations.router)
 app.include_router(events.router)
+app.include_router(feeds.router)
+app.include_router(webhooks.router)
 app.include_router(todos.router)
 app.include_router(meal_planner.router)
 app.include_router(grocery_lists.router)
@@ -116,6 +154,20 @@ async def health():
     return {"status": "healthy"}
 
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics(authorization: str | None = Header(None)):
+    """Database pool usage and checkout wait times in Prometheus text format (METRICS_TOKEN guards it)."""
+    if settings.METRICS_TOKEN and not hmac.compare_digest(authorization or "", f"Bearer {settings.METRICS_TOKEN}"):
+        raise HTTPException(status_code=401, detail="Invalid metrics token")
+    pools = {"api": async_engine.pool, "jobs": engine.pool}
+    if replica_engine is not None:
+        pools["replica"] = replica_engine.pool
+    for index in range(1, len(async_shard_engines)):
+        pools[f"shard{index}"] = async_shard_engines[index].pool
+        pools[f"shard{index}-jobs"] = shard_engines[index].pool
+    return PlainTextResponse(pool.render_metrics(pools), media_type="text/plain; version=0.0.4")
+
+
 # Serve built frontend when static/ has index.html (single-component deploy)
 _has_static = STATIC_DIR.is_dir() and (STATIC_DIR / "index.html").exists()
 
@@ -4,20 +4,23 @@ import base64
 import hashlib
 import secrets
 import time
+from dataclasses import dataclass, field
 from datetime import datetime, timedelta
 from urllib.parse import urlencode
 
 import httpx
-from fastapi import APIRouter, Depends, Header, HTTPException, Request
+from fastapi import APIRouter, BackgroundTasks, Depends, Header, HTTPException, Query, Request
 from fastapi.responses import RedirectResponse, Response
 from jose import JWTError, jwt
 from pydantic import BaseModel
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.config import settings
-from src.db.session import get_db
-from src.models.database import User
-from src.services import token_encryption
+from src.db.session import copy_user, fan_out, get_db, shard_count, spans_shards, use_primary
+from src.models.database import Member, User
+from src.services import calendar_list_cache, google_tokens, token_encryption
+from src.services.google_tokens import get_decrypted_access_token
 
 router = APIRouter(prefix="/api/auth", tags=["auth"])
 
@@ -66,51 +69,7 @@ def decode_token(token: str) -> dict | None:
         return None
 
 
-def get_decrypted_access_token(user: User) -> str | None:
-    """Return the decrypted access_token for use with Google APIs (e.g. events, calendar list)."""
-    return token_encryption.decrypt_token(user.access_token)
-
-
-def refresh_google_token_if_needed(user: User, db: Session) -> bool:
-    """
-    Refresh the user's Google access token if missing or expired (using refresh_token).
-    Updates user.access_token and user.token_expiry in DB on success.
-    Returns True if we have a valid token to use, False otherwise.
-    """
-    if not user or not user.refresh_token:
-        return False
-    ref_plain = token_encryption.decrypt_token(user.refresh_token)
-    if not ref_plain:
-        return False
-    now = datetime.utcnow()
-    if user.access_token and user.token_expiry and (user.token_expiry - now).total_seconds() > 300:
-        return True
-
-    with httpx.Client() as client:
-        resp = client.post(
-            "https://oauth2.googleapis.com/token",
-            data={
-                "client_id": settings.GOOGLE_CLIENT_ID,
-                "client_secret": settings.GOOGLE_CLIENT_SECRET,
-                "refresh_token": ref_plain,
-                "grant_type": "refresh_token",
-            },
-            headers={"Content-Type": "application/x-www-form-urlencoded"},
-        )
-    if resp.status_code != 200:
-        return False
-    data = resp.json()
-    new_access = data.get("access_token")
-    if new_access:
-        user.access_token = token_encryption.encrypt_token(new_access)
-        user.token_expiry = now + timedelta(seconds=data.get("expires_in", 3600))
-        db.commit()
-        db.refresh(user)
-        return True
-    return False
-
-
-def _token_from_request(request: Request, authorization: str | None) -> str | None:
+def token_from_request(request: Request, authorization: str | None) -> str | None:
     """Get JWT from cookie (preferred) or Authorization header."""
     cookie_token = request.cookies.get(COOKIE_NAME) if request else None
     if cookie_token:
@@ -120,23 +79,92 @@ def _token_from_request(request: Request, authorization: str | None) -> str | No
     return None
 
 
-def get_current_user(
+@dataclass(frozen=True)
+class Membership:
+    """One of the current user's household memberships."""
+
+    member_id: int
+    household_id: int
+    role: str | None
+
+
+@dataclass
+class AuthContext:
+    """The current user plus all of their memberships, loaded in one query once per request."""
+
+    user: User
+    memberships: dict[int, Membership] = field(default_factory=dict)  # household_id -> Membership
+
+    @property
+    def household_ids(self) -> list[int]:
+        return list(self.memberships)
+
+    @property
+    def member_ids(self) -> list[int]:
+        return [m.member_id for m in self.memberships.values()]
+
+    def membership(self, household_id: int) -> Membership | None:
+        return self.memberships.get(household_id)
+
+    def require_member(
+        self, household_id: int, detail: str = "Not a member of this household", status_code: int = 403
+    ) -> Membership:
+        """The user's membership in household_id; raises HTTPException (403 by default) if there is none."""
+        m = self.memberships.get(household_id)
+        if m is None:
+            raise HTTPException(status_code=status_code, detail=detail)
+        return m
+
+
+async def get_auth_context(
     request: Request,
     authorization: str | None = Header(None),
-    db: Session = Depends(get_db),
-) -> User:
-    """Dependency: current user from cookie or Bearer token. Raises 401 if missing or invalid."""
-    token = _token_from_request(request, authorization)
+    db: AsyncSession = Depends(get_db),
+) -> AuthContext:
+    """Dependency: current user and memberships from cookie or Bearer token. Raises 401 if missing or invalid.
+    Cached on request.state, so get_current_user and get_auth_context share one query per request."""
+    cached = getattr(request.state, "auth_context", None)
+    if cached is not None:
+        return cached
+    token = token_from_request(request, authorization)
     if not token:
         raise HTTPException(status_code=401, detail="Missing or invalid Authorization header or cookie")
     payload = decode_token(token)
     if not payload or "sub" not in payload:
         raise HTTPException(status_code=401, detail="Invalid or expired token")
     user_id = int(payload["sub"])
-    user = db.get(User, user_id)
-    if not user:
+    result = await db.execute(
+        select(User, Member.id, Member.household_id, Member.role)
+        .outerjoin(Member, Member.user_id == User.id)
+        .where(User.id == user_id)
+    )
+    rows = result.all()
+    if not rows:
         raise HTTPException(status_code=401, detail="User not found")
-    return user
+    memberships = [row[1:] for row in rows if row[1] is not None]
+    if spans_shards(db):
+        # A user-level request: the memberships of the other shards' households too
+        query = select(Member.id, Member.household_id, Member.role).where(Member.user_id == user_id)
+
+        async def shard_memberships(shard_db: AsyncSession) -> list:
+            return (await shard_db.execute(query)).all()
+
+        for shard_rows in await fan_out(shard_memberships, range(1, shard_count())):
+            memberships.extend(shard_rows)
+    context = AuthContext(
+        user=rows[0][0],
+        memberships={
+            household_id: Membership(member_id=member_id, household_id=household_id, role=role)
+            for member_id, household_id, role in memberships
+        },
+    )
+    request.state.auth_context = context
+    return context
+
+
+async def get_current_user(context: AuthContext = Depends(get_auth_context)) -> User:
+    """Dependency: current user from cookie or Bearer token. Raises 401 if missing or invalid."""
+    return context.user
 
 
 @router.get("/google")
@@ -164,9 +192,11 @@ async def oauth_callback(
     state: str,
     request: Request,
     response: Response,
-    db: Session = Depends(get_db),
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_db),
 ):
-    """Exchange code for tokens, create or get User, redirect to frontend with one-time ?code=."""
+    """Exchange code for tokens, create or get User, redirect to frontend with one-time ?code=.
+    Also warms the user's Google calendar list cache in the background so the calendar picker opens instantly."""
     if not settings.GOOGLE_CLIENT_ID or not settings.GOOGLE_CLIENT_SECRET:
         raise HTTPException(status_code=503, detail="Google OAuth not configured")
 
@@ -176,18 +206,7 @@ async def oauth_callback(
         raise HTTPException(status_code=400, detail="Invalid or missing OAuth state; try signing in again")
 
     async with httpx.AsyncClient() as client:
-        token_resp = await client.post(
-            "https://oauth2.googleapis.com/token",
-            data={
-                "code": code,
-                "client_id": settings.GOOGLE_CLIENT_ID,
-                "client_secret": settings.GOOGLE_CLIENT_SECRET,
-                "redirect_uri": settings.GOOGLE_REDIRECT_URI,
-                "grant_type": "authorization_code",
-                "code_verifier": verifier_cookie,
-            },
-            headers={"Content-Type": "application/x-www-form-urlencoded"},
-        )
+        token_resp = await google_tokens.exchange_code(client, code, verifier_cookie)
     if token_resp.status_code != 200:
         raise HTTPException(status_code=400, detail="Failed to exchange code for token")
 
@@ -213,7 +232,8 @@ async def oauth_callback(
     if not google_sub or not email:
         raise HTTPException(status_code=400, detail="Missing id or email from Google")
 
-    user = db.query(User).filter(User.google_sub == google_sub).first()
+    use_primary(db.sync_session)  # creates the user if missing: a lagging replica would miss a new one
+    user = await db.scalar(select(User).where(User.google_sub == google_sub))
     if not user:
         user = User(
             google_sub=google_sub,
@@ -234,8 +254,10 @@ async def oauth_callback(
         user.token_expiry = datetime.utcnow() + timedelta(
             seconds=token_data.get("expires_in", 3600)
         )
-    db.commit()
-    db.refresh(user)
+    await db.commit()
+    await db.refresh(user)
+    await copy_user(user)
+    background_tasks.add_task(calendar_list_cache.refresh_in_background, user.id, access_token)
 
     # One-time code for frontend to exchange for cookie
     exchange_code = secrets.token_urlsafe(32)
@@ -288,22 +310,8 @@ async def logout(response: Response):
 
 
 @router.get("/me")
-def get_current_user_info(
-    request: Request,
-    authorization: str | None = Header(None),
-    db: Session = Depends(get_db),
-):
+async def get_current_user_info(user: User = Depends(get_current_user)):
     """Return current user from cookie or Bearer token. Returns 401 if invalid."""
-    token = _token_from_request(request, authorization)
-    if not token:
-        raise HTTPException(status_code=401, detail="Missing or invalid Authorization header or cookie")
-    payload = decode_token(token)
-    if not payload or "sub" not in payload:
-        raise HTTPException(status_code=401, detail="Invalid or expired token")
-    user_id = int(payload["sub"])
-    user = db.get(User, user_id)
-    if not user:
-        raise HTTPException(status_code=401, detail="User not found")
     return {
         "id": user.id,
         "email": user.email,
@@ -314,32 +322,36 @@ def get_current_user_info(
 
 
 @router.get("/google-calendars")
-async def list_google_calendars(current_user: User = Depends(get_current_user)):
-    """List the current user's Google calendars. Uses decrypted access token."""
+async def list_google_calendars(
+    background_tasks: BackgroundTasks,
+    refresh: bool = Query(False, description="Revalidate with Google now instead of serving the cached list"),
+    current_user: User = Depends(get_current_user),
+):
+    """List the current user's Google calendars. Served from a per-user cache; stale entries are
+    returned immediately and revalidated with Google in the background."""
     access_token = get_decrypted_access_token(current_user)
     if not access_token:
         raise HTTPException(
             status_code=400,
             detail="No Google access token. Sign out and sign in again with Google to grant calendar access.",
         )
-    async with httpx.AsyncClient() as client:
-        resp = await client.get(
-            "https://www.googleapis.com/calendar/v3/users/me/calendarList",
-            headers={"Authorization": f"Bearer {access_token}"},
-        )
-    if resp.status_code == 401:
+    entry = None if refresh else calendar_list_cache.get_cached(current_user.id)
+    if entry is not None:
+        if not calendar_list_cache.is_fresh(entry):
+            background_tasks.add_task(
+                calendar_list_cache.refresh_in_background, current_user.id, access_token
+            )
+        return entry.items
+    try:
+        entry = await calendar_list_cache.refresh_calendar_list(current_user.id, access_token)
+    except calendar_list_cache.CalendarListAuthError:
         raise HTTPException(
             status_code=401,
             detail="Google token expired or invalid. Sign out and sign in again.",
         )
-    if resp.status_code != 200:
+    except calendar_list_cache.CalendarListFetchError as e:
         raise HTTPException(
             status_code=502,
-            detail=f"Google Calendar API error: {resp.status_code}",
+            detail=f"Google Calendar API error: {e.status_code}",
         )
-    data = resp.json()
-    items = data.get("items") or []
-    return [
-        {"id": item["id"], "summary": item.get("summary", item["id"])}
-        for item in items
-    ]
+    return entry.items
@@ -1,71 +1,79 @@
 """Calendar CRUD routes."""
 
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.api.routes.auth import get_current_user
-from src.db.session import get_db
+from src.api.conditional import household_etag, not_modified
+from src.api.routes.auth import AuthContext, get_auth_context
+from src.db.session import get_db, scalars_per_shard
 from src.models.database import Calendar, Member
-from src.models.database import User
 from src.models.schemas import CalendarCreate, CalendarResponse, CalendarUpdate
+from src.services import ics_subscriptions
 
 router = APIRouter(prefix="/api/calendars", tags=["calendars"])
 
 
-def _user_household_ids(db: Session, user_id: int) -> list[int]:
-    rows = db.query(Member.household_id).filter(Member.user_id == user_id).all()
-    return [r[0] for r in rows]
-
-
-def _user_member_ids(db: Session, user_id: int) -> list[int]:
-    rows = db.query(Member.id).filter(Member.user_id == user_id).all()
-    return [r[0] for r in rows]
-
-
 @router.get("", response_model=list[CalendarResponse])
-def list_calendars(
+async def list_calendars(
+    request: Request,
+    response: Response,
     member_id: int | None = Query(None, description="Filter by member"),
     household_id: int | None = Query(None, description="All calendars for household"),
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    auth: AuthContext = Depends(get_auth_context),
+    db: AsyncSession = Depends(get_db),
 ):
-    """List calendars for households the current user is in."""
-    hid_list = _user_household_ids(db, current_user.id)
+    """List calendars for households the current user is in. Honours If-None-Match with 304."""
+    hid_list = auth.household_ids
     if not hid_list:
         return []
-    q = db.query(Calendar).join(Member).filter(Member.household_id.in_(hid_list))
-    if member_id is not None:
-        my_mids = _user_member_ids(db, current_user.id)
-        if member_id not in my_mids:
-            return []
-        q = q.filter(Calendar.member_id == member_id)
-    if household_id is not None:
-        if household_id not in hid_list:
-            return []
-        q = q.filter(Member.household_id == household_id)
-    return q.all()
+    cached = not_modified(request, response, await household_etag(db, hid_list, ("calendars",)))
+    if cached is not None:
+        return cached
+    if member_id is not None and member_id not in auth.member_ids:
+        return []
+    if household_id is not None and household_id not in hid_list:
+        return []
+
+    def query(ids: list[int]):
+        q = select(Calendar).join(Member).where(Member.household_id.in_(ids))
+        if member_id is not None:
+            q = q.where(Calendar.member_id == member_id)
+        if household_id is not None:
+            q = q.where(Member.household_id == household_id)
+        return q
+
+    return await scalars_per_shard(db, hid_list, query)
 
 
 @router.post("", response_model=CalendarResponse, status_code=201)
-def create_calendar(
+async def create_calendar(
     body: CalendarCreate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    background_tasks: BackgroundTasks,
+    auth: AuthContext = Depends(get_auth_context),
+    db: AsyncSession = Depends(get_db),
 ):
-    """Add a calendar for the current user's member (only your own calendars)."""
-    member = db.get(Member, body.member_id)
-    if not member:
-        raise HTTPException(status_code=404, detail="Member not found")
-    if member.user_id != current_user.id:
+    """Add a calendar for the current user's member (only your own calendars).
+    source_type "ics" subscribes to an ICS URL; its first fetch runs in the background."""
+    if body.member_id not in auth.member_ids:
+        if not await db.get(Member, body.member_id):
+            raise HTTPException(status_code=404, detail="Member not found")
         raise HTTPException(status_code=403, detail="You can only add calendars for yourself")
-    existing = (
-        db.query(Calendar)
-        .filter(
-            Calendar.member_id == body.member_id,
-            Calendar.google_calendar_id == body.google_calendar_id,
-        )
-        .first()
-    )
+    google_calendar_id = None
+    ics_url = None
+    if body.source_type == ics_subscriptions.SOURCE_GOOGLE:
+        if not body.google_calendar_id:
+            raise HTTPException(status_code=400, detail="google_calendar_id is required")
+        google_calendar_id = body.google_calendar_id
+        duplicate = Calendar.google_calendar_id == google_calendar_id
+    elif body.source_type == ics_subscriptions.SOURCE_ICS:
+        ics_url = ics_subscriptions.normalize_ics_url(body.ics_url or "")
+        if not ics_url:
+            raise HTTPException(status_code=400, detail="ics_url must be an http(s) or webcal URL")
+        duplicate = Calendar.ics_url == ics_url
+    else:
+        raise HTTPException(status_code=400, detail="source_type must be 'google' or 'ics'")
+    existing = await db.scalar(select(Calendar).where(Calendar.member_id == body.member_id, duplicate).limit(1))
     if existing:
         raise HTTPException(
             status_code=400,
@@ -73,47 +81,49 @@ def create_calendar(
         )
     cal = Calendar(
         member_id=body.member_id,
-        google_calendar_id=body.google_calendar_id,
+        source_type=body.source_type,
+        google_calendar_id=google_calendar_id,
+        ics_url=ics_url,
         name=body.name,
         color=body.color,
         is_visible=body.is_visible,
     )
     db.add(cal)
-    db.commit()
-    db.refresh(cal)
+    await db.commit()
+    await db.refresh(cal)
+    if cal.source_type == ics_subscriptions.SOURCE_ICS:
+        background_tasks.add_task(ics_subscriptions.sync_calendar_in_background, cal.id)
     return cal
 
 
 @router.get("/{calendar_id}", response_model=CalendarResponse)
-def get_calendar(
+async def get_calendar(
     calendar_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    auth: AuthContext = Depends(get_auth_context),
+    db: AsyncSession = Depends(get_db),
 ):
     """Get a calendar by id. Only allowed for calendars in the user's households."""
-    cal = db.get(Calendar, calendar_id)
+    cal = await db.get(Calendar, calendar_id)
     if not cal:
         raise HTTPException(status_code=404, detail="Calendar not found")
-    hid_list = _user_household_ids(db, current_user.id)
-    member = db.get(Member, cal.member_id)
-    if not member or member.household_id not in hid_list:
+    member = await db.get(Member, cal.member_id)
+    if not member or auth.membership(member.household_id) is None:
         raise HTTPException(status_code=404, detail="Calendar not found")
     return cal
 
 
 @router.patch("/{calendar_id}", response_model=CalendarResponse)
-def update_calendar(
+async def update_calendar(
     calendar_id: int,
     body: CalendarUpdate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    auth: AuthContext = Depends(get_auth_context),
+    db: AsyncSession = Depends(get_db),
 ):
     """Update a calendar. Only the calendar owner (member's user) can update."""
-    cal = db.get(Calendar, calendar_id)
+    cal = await db.get(Calendar, calendar_id)
     if not cal:
         raise HTTPException(status_code=404, detail="Calendar not found")
-    member = db.get(Member, cal.member_id)
-    if not member or member.user_id != current_user.id:
+    if cal.member_id not in auth.member_ids:
         raise HTTPException(status_code=404, detail="Calendar not found")
     if body.name is not None:
         cal.name = body.name
@@ -121,24 +131,23 @@ def update_calendar(
         cal.color = body.color
     if body.is_visible is not None:
         cal.is_visible = body.is_visible
-    db.commit()
-    db.refresh(cal)
+    await db.commit()
+    await db.refresh(cal)
     return cal
 
 
 @router.delete("/{calendar_id}", status_code=204)
-def delete_calendar(
+async def delete_calendar(
     calendar_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    auth: AuthContext = Depends(get_auth_context),
+    db: AsyncSession = Depends(get_db),
 ):
     """Remove a calendar. Only the calendar owner can delete."""
-    cal = db.get(Calendar, calendar_id)
+    cal = await db.get(Calendar, calendar_id)
     if not cal:
         raise HTTPException(status_code=404, detail="Calendar not found")
-    member = db.get(Member, cal.member_id)
-    if not member or member.user_id != current_user.id:
+    if cal.member_id not in auth.member_ids:
         raise HTTPException(status_code=404, detail="Calendar not found")
-    db.delete(cal)
-    db.commit()
+    await db.delete(cal)
+    await db.commit()
     return None
@@ -3,51 +3,43 @@
 from datetime import datetime, timedelta, timezone
 
 import httpx
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session, joinedload
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
 
-from src.db.session import get_db
-from src.models.database import Calendar, Member
+from src.db.session import get_db, per_shard, scalars_per_shard
+from src.models.database import Calendar, HouseholdAgenda, Member
 from src.models.schemas import EventCreate
+from src.services import agenda as agenda_service
+from src.services import calendar_snapshots, google_events, ics_subscriptions
+from src.services.google_tokens import get_decrypted_access_token, refresh_google_token
 
-from src.api.routes.auth import get_current_user, get_decrypted_access_token, refresh_google_token_if_needed
+from src.api.routes.auth import AuthContext, get_auth_context, get_current_user
 from src.models.database import User
 
 router = APIRouter(prefix="/api/events", tags=["events"])
 
 
-def _parse_google_event_time(start_or_end: dict) -> str | None:
-    """Return ISO start/end string for FullCalendar. Prefer dateTime; fallback to date (all-day)."""
-    if not start_or_end:
-        return None
-    if "dateTime" in start_or_end:
-        return start_or_end["dateTime"]
-    if "date" in start_or_end:
-        return start_or_end["date"]
-    return None
-
-
 @router.get("")
 async def get_events(
     start_date: datetime | None = Query(None, description="Start of range (ISO)"),
     end_date: datetime | None = Query(None, description="End of range (ISO)"),
     q: str | None = Query(None, description="Search query (title, description, location)"),
     household_id: int | None = Query(None, description="Filter to this household's calendars"),
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    auth: AuthContext = Depends(get_auth_context),
+    db: AsyncSession = Depends(get_db),
 ):
-    """Get aggregated events from calendars visible to the current user. Optional household_id limits to one household. Optional q searches via Google Calendar API."""
+    """Get aggregated events from calendars visible to the current user. Optional household_id limits to one household. Optional q searches via Google Calendar API.
+    Google calendars are served from their snapshot until Google reports a change (see calendar_snapshots);
+    ICS subscription calendars are read from their stored events (synced in the background)."""
     now = datetime.now(timezone.utc)
     if not start_date:
         start_date = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
     if not end_date:
         end_date = start_date + timedelta(days=60)
 
-    # Households the current user belongs to
-    my_memberships = (
-        db.query(Member.household_id).filter(Member.user_id == current_user.id).all()
-    )
-    user_household_ids = [m[0] for m in my_memberships]
+    user_household_ids = auth.household_ids
 
     if not user_household_ids:
         return {"events": [], "skipped_calendars": []}
@@ -56,106 +48,149 @@ async def get_events(
         return {"events": [], "skipped_calendars": []}
 
     household_ids = [household_id] if household_id is not None else user_household_ids
+    search = q.strip() if q and q.strip() else None
+    results = await per_shard(
+        db, household_ids, lambda shard_db, ids: _calendar_events(shard_db, ids, auth, start_date, end_date, search)
+    )
+    return {
+        "events": [event for events, _ in results for event in events],
+        "skipped_calendars": [skipped for _, skipped_calendars in results for skipped in skipped_calendars],
+    }
+
 
+async def _calendar_events(
+    db: AsyncSession,
+    household_ids: list[int],
+    auth: AuthContext,
+    start_date: datetime,
+    end_date: datetime,
+    search: str | None,
+) -> tuple[list[dict], list[dict]]:
+    """Events of the visible calendars of household_ids (all on db's shard), and the calendars skipped."""
     # Visible calendars in the selected household(s) (with member and user for access_token)
-    calendars = (
-        db.query(Calendar)
+    calendars = (await db.scalars(
+        select(Calendar)
         .join(Member, Calendar.member_id == Member.id)
-        .filter(
+        .where(
             Member.household_id.in_(household_ids),
             Calendar.is_visible.is_(True),
         )
-        .options(joinedload(Calendar.member).joinedload(Member.user))
-        .all()
-    )
+        .options(
+            joinedload(Calendar.member).joinedload(Member.user),
+            joinedload(Calendar.snapshot),
+        )
+    )).all()
 
-    all_events = []
+    all_events = await db.run_sync(ics_subscriptions.stored_events, calendars, start_date, end_date, q=search)
     skipped_calendars = []  # { "calendar_name", "owner" } when we can't load a calendar
-    time_min = start_date.isoformat().replace("+00:00", "Z")
-    time_max = end_date.isoformat().replace("+00:00", "Z")
-
-    # Refresh expired/missing Google tokens for calendar owners so we can fetch all households' events
+    time_min = google_events.google_time(start_date)
+    time_max = google_events.google_time(end_date)
+    google_calendars = []
     for cal in calendars:
-        if cal.member and cal.member.user:
-            refresh_google_token_if_needed(cal.member.user, db)
-
-    def _owner_label(cal) -> str:
-        if cal.member and cal.member.user:
-            u = cal.member.user
-            return u.display_name or u.email or "Unknown"
-        return "Unknown"
+        if cal.source_type == ics_subscriptions.SOURCE_ICS:
+            continue
+        cached = None if search else calendar_snapshots.cached_events(cal, start_date, end_date)
+        if cached is not None:
+            all_events.extend(cached)
+        else:
+            google_calendars.append(cal)
+    # Ranges inside the snapshot window are fetched as a whole snapshot so later reads are served from it
+    use_snapshot = not search and calendar_snapshots.can_snapshot(start_date, end_date)
 
     async with httpx.AsyncClient() as client:
-        for cal in calendars:
+        # Refresh expired/missing Google tokens for calendar owners so we can fetch all households' events
+        for cal in google_calendars:
+            if cal.member and cal.member.user:
+                await refresh_google_token(cal.member.user, db, client)
+
+        for cal in google_calendars:
             user = cal.member.user
-            owner_is_current = user and user.id == current_user.id
+            owner_is_current = user and user.id == auth.user.id
             access_token = get_decrypted_access_token(user) if user else None
-            if not user or not access_token:
-                skipped_calendars.append({
-                    "calendar_name": cal.name,
-                    "owner": _owner_label(cal),
-                    "owner_is_current_user": owner_is_current,
-                })
-                continue
-            url = (
-                f"https://www.googleapis.com/calendar/v3/calendars/{cal.google_calendar_id}/events"
-            )
-            params = {
-                "timeMin": time_min,
-                "timeMax": time_max,
-                "singleEvents": "true",
-                "orderBy": "startTime",
-            }
-            if q and q.strip():
-                params["q"] = q.strip()
-            resp = await client.get(
-                url,
-                headers={"Authorization": f"Bearer {access_token}"},
-                params=params,
-            )
-            if resp.status_code != 200:
+            items = None
+            if user and access_token and use_snapshot:
+                fetched_at, window = datetime.utcnow(), calendar_snapshots.snapshot_window()
+                events = await calendar_snapshots.fetch_window_events(cal, client, access_token, window)
+                if events is not None:
+                    snapshot = await db.run_sync(calendar_snapshots.store_snapshot, cal, events, window, fetched_at)
+                    all_events.extend(calendar_snapshots.events_in_range(cal, snapshot, start_date, end_date))
+                    continue
+            elif user and access_token:
+                items = await google_events.fetch_calendar_items(
+                    client,
+                    cal.google_calendar_id,
+                    access_token,
+                    time_min,
+                    time_max,
+                    q=search,
+                )
+            if items is None:
                 skipped_calendars.append({
                     "calendar_name": cal.name,
-                    "owner": _owner_label(cal),
+                    "owner": google_events.owner_label(cal),
                     "owner_is_current_user": owner_is_current,
                 })
                 continue
-            data = resp.json()
-            for item in data.get("items") or []:
-                start_str = _parse_google_event_time(item.get("start"))
-                end_str = _parse_google_event_time(item.get("end"))
-                if not start_str:
-                    continue
-                all_events.append({
-                    "id": f"{cal.id}-{item.get('id', '')}",
-                    "title": item.get("summary") or "(No title)",
-                    "start": start_str,
-                    "end": end_str or start_str,
-                    "description": item.get("description"),
-                    "location": item.get("location"),
-                    "calendar_name": cal.name,
-                    "color": (cal.member.event_color if cal.member else None) or cal.color,
-                    "html_link": item.get("htmlLink"),
-                })
+            for item in items:
+                event = google_events.google_item_to_event(cal, item)
+                if event:
+                    all_events.append(event)
 
-    return {"events": all_events, "skipped_calendars": skipped_calendars}
+    return all_events, skipped_calendars
+
+
+@router.get("/agenda")
+async def get_agenda(
+    background_tasks: BackgroundTasks,
+    household_id: int = Query(..., description="Household whose agenda to return"),
+    auth: AuthContext = Depends(get_auth_context),
+    db: AsyncSession = Depends(get_db),
+):
+    """Precomputed agenda (merged, colored events for the next few days) for a household.
+    Served from one stored row without calling Google. If the household has no agenda yet, returns an
+    empty one and builds it in the background."""
+    auth.require_member(household_id, detail="You are not a member of this household")
+    agenda = await db.get(HouseholdAgenda, household_id)
+    if agenda is None:
+        background_tasks.add_task(agenda_service.build_agenda_in_background, household_id)
+        return {
+            "household_id": household_id,
+            "window_start": None,
+            "window_end": None,
+            "built_at": None,
+            "events": [],
+        }
+    return {
+        "household_id": household_id,
+        "window_start": agenda.window_start.isoformat(),
+        "window_end": agenda.window_end.isoformat(),
+        "built_at": agenda.built_at,
+        "events": agenda.events,
+    }
 
 
 @router.get("/writable-calendars")
-def get_writable_calendars(
+async def get_writable_calendars(
     household_id: int | None = Query(None, description="Filter to calendars in this household"),
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    auth: AuthContext = Depends(get_auth_context),
+    db: AsyncSession = Depends(get_db),
 ):
-    """List calendars the current user can add events to (calendars they own). Optional household_id limits to one household."""
-    q = (
-        db.query(Calendar)
-        .join(Member, Calendar.member_id == Member.id)
-        .filter(Member.user_id == current_user.id)
+    """List calendars the current user can add events to (Google calendars they own). Optional household_id limits to one household."""
+    if household_id is None:
+        household_ids = auth.household_ids
+    else:
+        household_ids = [household_id] if auth.membership(household_id) else []
+    if not household_ids:
+        return []
+    calendars = await scalars_per_shard(
+        db,
+        household_ids,
+        lambda ids: select(Calendar).where(
+            Calendar.member_id.in_([auth.memberships[hid].member_id for hid in ids]),
+            Calendar.source_type != ics_subscriptions.SOURCE_ICS,
+        ),
     )
-    if household_id is not None:
-        q = q.filter(Member.household_id == household_id)
-    calendars = q.order_by(Calendar.name).all()
+    calendars.sort(key=lambda cal: cal.name)
     return [
         {"id": cal.id, "name": cal.name}
         for cal in calendars
@@ -166,15 +201,10 @@ def get_writable_calendars(
 async def create_event(
     body: EventCreate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     """Create an event on a Google calendar. Only the calendar owner (member's user) can create."""
-    cal = (
-        db.query(Calendar)
-        .options(joinedload(Calendar.member).joinedload(Member.user))
-        .filter(Calendar.id == body.calendar_id)
-        .first()
-    )
+    cal = await db.get(Calendar, body.calendar_id, options=[joinedload(Calendar.member).joinedload(Member.user)])
     if not cal:
         raise HTTPException(status_code=404, detail="Calendar not found")
     if cal.member.user_id != current_user.id:
@@ -182,6 +212,8 @@ async def create_event(
             status_code=403,
             detail="You can only add events to calendars you own. Select one of your calendars.",
         )
+    if cal.source_type == ics_subscriptions.SOURCE_ICS:
+        raise HTTPException(status_code=400, detail="ICS subscription calendars are read-only")
     user = cal.member.user
     access_token = get_decrypted_access_token(user) if user else None
     if not user or not access_token:
@@ -221,7 +253,7 @@ async def create_event(
     data = resp.json()
     start_str = data.get("start", {}).get("dateTime") or data.get("start", {}).get("date")
     end_str = data.get("end", {}).get("dateTime") or data.get("end", {}).get("date") or start_str
-    return {
+    event = {
         "id": f"{cal.id}-{data.get('id', '')}",
         "title": data.get("summary") or body.title,
         "start": start_str,
@@ -229,6 +261,10 @@ async def create_event(
         "description": data.get("description"),
         "location": data.get("location"),
         "calendar_name": cal.name,
-        "color": (cal.member.event_color if cal.member else None) or cal.color,
+        "color": google_events.event_color(cal),
         "html_link": data.get("htmlLink"),
     }
+    await db.run_sync(calendar_snapshots.mark_changed, cal.id)
+    if cal.is_visible and start_str:
+        await db.run_sync(agenda_service.add_event_to_agenda, cal.member.household_id, event)
+    return event
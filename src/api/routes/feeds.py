@@ -0,0 +1,119 @@
+"""Household .ics feed: members manage a secret feed URL; calendar clients subscribe to it without logging in."""
+
+from datetime import timezone
+from email.utils import format_datetime, parsedate_to_datetime
+
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Request
+from fastapi.responses import Response, StreamingResponse
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.api.routes.auth import AuthContext, get_auth_context
+from src.db.session import get_db, locate
+from src.models.database import HouseholdFeed, HouseholdFeedEvent
+from src.services import ics_feed
+
+router = APIRouter(prefix="/api", tags=["feeds"])
+
+FEED_CACHE_CONTROL = "private, max-age=300"
+
+
+def _feed_response(request: Request, feed: HouseholdFeed) -> dict:
+    return {
+        "household_id": feed.household_id,
+        "url": str(request.url_for("get_feed_ics", token=feed.token)),
+        "built_at": feed.built_at,
+        "content_updated_at": feed.content_updated_at,
+    }
+
+
+@router.get("/households/{household_id}/feed")
+async def get_household_feed(
+    household_id: int,
+    request: Request,
+    auth: AuthContext = Depends(get_auth_context),
+    db: AsyncSession = Depends(get_db),
+):
+    """Return the household's feed URL. 404 if no feed has been created."""
+    auth.require_member(household_id)
+    feed = await db.get(HouseholdFeed, household_id)
+    if not feed:
+        raise HTTPException(status_code=404, detail="Feed not found")
+    return _feed_response(request, feed)
+
+
+@router.post("/households/{household_id}/feed", status_code=201)
+async def create_household_feed(
+    household_id: int,
+    request: Request,
+    background_tasks: BackgroundTasks,
+    auth: AuthContext = Depends(get_auth_context),
+    db: AsyncSession = Depends(get_db),
+):
+    """Create the household's feed, or rotate its token (the old URL stops working). The first
+    snapshot is built in the background."""
+    auth.require_member(household_id)
+    feed = await db.get(HouseholdFeed, household_id)
+    if feed:
+        feed.token = ics_feed.generate_token()
+    else:
+        feed = HouseholdFeed(household_id=household_id, token=ics_feed.generate_token())
+        db.add(feed)
+        background_tasks.add_task(ics_feed.build_feed_in_background, household_id)
+    await db.commit()
+    await db.refresh(feed)
+    return _feed_response(request, feed)
+
+
+@router.delete("/households/{household_id}/feed", status_code=204)
+async def delete_household_feed(
+    household_id: int,
+    auth: AuthContext = Depends(get_auth_context),
+    db: AsyncSession = Depends(get_db),
+):
+    """Revoke the household's feed and drop its snapshot."""
+    auth.require_member(household_id)
+    feed = await db.get(HouseholdFeed, household_id)
+    if not feed:
+        raise HTTPException(status_code=404, detail="Feed not found")
+    await db.execute(delete(HouseholdFeedEvent).where(HouseholdFeedEvent.household_id == household_id))
+    await db.delete(feed)
+    await db.commit()
+    return None
+
+
+def _not_modified(request: Request, feed: HouseholdFeed, etag: str) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return etag in [t.strip() for t in if_none_match.split(",")] or if_none_match.strip() == "*"
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and feed.content_updated_at:
+        try:
+            since = parsedate_to_datetime(if_modified_since).replace(tzinfo=None)
+        except (TypeError, ValueError):
+            return False
+        return feed.content_updated_at.replace(microsecond=0) <= since
+    return False
+
+
+@router.get("/feeds/{token}.ics", name="get_feed_ics")
+async def get_feed_ics(token: str, request: Request, db: AsyncSession = Depends(get_db)):
+    """The household's merged calendar as iCalendar, streamed from the latest snapshot.
+    Supports If-None-Match / If-Modified-Since (304)."""
+    feed = await locate(db, select(HouseholdFeed).where(HouseholdFeed.token == token))
+    if not feed:
+        raise HTTPException(status_code=404, detail="Feed not found")
+    headers = {"Cache-Control": FEED_CACHE_CONTROL}
+    if feed.etag:
+        headers["ETag"] = f'"{feed.etag}"'
+    if feed.content_updated_at:
+        # Stored as naive UTC
+        last_modified = feed.content_updated_at.replace(microsecond=0, tzinfo=timezone.utc)
+        headers["Last-Modified"] = format_datetime(last_modified, usegmt=True)
+    if feed.etag and _not_modified(request, feed, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    return StreamingResponse(
+        ics_feed.iter_feed_ics(feed.household_id),
+        media_type="text/calendar; charset=utf-8",
+        headers=headers,
+    )
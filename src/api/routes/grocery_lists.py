@@ -1,54 +1,44 @@
 """Grocery lists and items. Household members can create lists (e.g. Costco) and add/remove/reorder items."""
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from src.api.routes.auth import get_current_user
-from src.db.session import get_db
-from src.models.database import GroceryList, GroceryListItem, Member, User
+from src.api.conditional import not_modified
+from src.api.routes.auth import AuthContext, get_auth_context
+from src.db.session import get_db, use_primary
+from src.models.database import GroceryList, GroceryListItem
 from src.models.schemas import (
     DEFAULT_MEMBER_EVENT_COLOR,
     GroceryListCreate,
     GroceryListResponse,
     GroceryListUpdate,
+    GroceryListItemBulkUpdate,
     GroceryListItemCreate,
+    GroceryListItemOrder,
     GroceryListItemResponse,
+    GroceryListItemsFromMeals,
+    GroceryListItemsFromMealsResponse,
     GroceryListItemUpdate,
 )
+from src.services import bulk_updates, change_log, meal_ingredients, meal_plans, ranking, revisions
+from src.services.member_directory import MemberLabel, load_member_labels
 
 router = APIRouter(prefix="/api", tags=["grocery_lists"])
 
 DEFAULT_LIST_NAME = "Groceries"
 
 
-def _ensure_member(db: Session, user_id: int, household_id: int) -> Member:
-    m = (
-        db.query(Member)
-        .filter(Member.user_id == user_id, Member.household_id == household_id)
-        .first()
-    )
-    if not m:
-        raise HTTPException(status_code=403, detail="Not a member of this household")
-    return m
-
-
 # ----- Lists -----
 
 
-@router.get("/grocery-lists", response_model=list[GroceryListResponse])
-def list_grocery_lists(
-    household_id: int = Query(...),
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
-):
-    """List grocery lists for a household. Creates a default 'Groceries' list if none exist."""
-    _ensure_member(db, current_user.id, household_id)
-    lists = (
-        db.query(GroceryList)
-        .filter(GroceryList.household_id == household_id)
-        .order_by(GroceryList.id.asc())
-        .all()
-    )
+def ensure_grocery_lists(db: Session, household_id: int) -> list[GroceryList]:
+    """The household's grocery lists, creating the default 'Groceries' list if there are none."""
+    query = db.query(GroceryList).filter(GroceryList.household_id == household_id).order_by(GroceryList.id.asc())
+    lists = query.all()
+    if not lists and use_primary(db):
+        lists = query.all()  # a lagging replica may not have them yet
     if not lists:
         new_list = GroceryList(household_id=household_id, name=DEFAULT_LIST_NAME)
         db.add(new_list)
@@ -58,80 +48,92 @@ def list_grocery_lists(
     return lists
 
 
+@router.get("/grocery-lists", response_model=list[GroceryListResponse])
+async def list_grocery_lists(
+    request: Request,
+    response: Response,
+    household_id: int = Query(...),
+    auth: AuthContext = Depends(get_auth_context),
+    db: AsyncSession = Depends(get_db),
+):
+    """List grocery lists for a household. Creates a default 'Groceries' list if none exist.
+    Honours If-None-Match with 304."""
+    auth.require_member(household_id)
+    cached = not_modified(request, response, await db.run_sync(revisions.etag, [household_id], ("grocery_lists",)))
+    if cached is not None:
+        return cached
+    return await db.run_sync(ensure_grocery_lists, household_id)
+
+
 @router.post("/grocery-lists", response_model=GroceryListResponse, status_code=201)
-def create_grocery_list(
+async def create_grocery_list(
     body: GroceryListCreate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    auth: AuthContext = Depends(get_auth_context),
+    db: AsyncSession = Depends(get_db),
 ):
     """Add a new grocery list (e.g. store name like Costco)."""
-    _ensure_member(db, current_user.id, body.household_id)
+    auth.require_member(body.household_id)
     name = (body.name or "").strip() or DEFAULT_LIST_NAME
     gl = GroceryList(household_id=body.household_id, name=name)
     db.add(gl)
-    db.commit()
-    db.refresh(gl)
+    await db.commit()
+    await db.refresh(gl)
     return gl
 
 
 @router.patch("/grocery-lists/{list_id}", response_model=GroceryListResponse)
-def update_grocery_list(
+async def update_grocery_list(
     list_id: int,
     body: GroceryListUpdate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    auth: AuthContext = Depends(get_auth_context),
+    db: AsyncSession = Depends(get_db),
 ):
-    gl = db.get(GroceryList, list_id)
+    gl = await db.get(GroceryList, list_id)
     if not gl:
         raise HTTPException(status_code=404, detail="Grocery list not found")
-    _ensure_member(db, current_user.id, gl.household_id)
+    auth.require_member(gl.household_id)
     if body.name is not None:
         gl.name = (body.name or "").strip() or gl.name
-    db.commit()
-    db.refresh(gl)
+    await db.commit()
+    await db.refresh(gl)
     return gl
 
 
 @router.delete("/grocery-lists/{list_id}", status_code=204)
-def delete_grocery_list(
+async def delete_grocery_list(
     list_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    auth: AuthContext = Depends(get_auth_context),
+    db: AsyncSession = Depends(get_db),
 ):
     """Delete a list. Forbidden if it is the household's last list."""
-    gl = db.get(GroceryList, list_id)
+    gl = await db.get(GroceryList, list_id)
     if not gl:
         raise HTTPException(status_code=404, detail="Grocery list not found")
-    _ensure_member(db, current_user.id, gl.household_id)
-    count = db.query(GroceryList).filter(GroceryList.household_id == gl.household_id).count()
+    auth.require_member(gl.household_id)
+    count = await db.scalar(select(func.count()).select_from(GroceryList).where(GroceryList.household_id == gl.household_id))
     if count <= 1:
         raise HTTPException(
             status_code=400,
             detail="Cannot delete the last grocery list. Add another list first.",
         )
-    db.delete(gl)
-    db.commit()
+    await db.delete(gl)
+    await db.commit()
     return None
 
 
 # ----- Items -----
 
 
-def _item_to_response(db: Session, item: GroceryListItem) -> GroceryListItemResponse:
-    member_name = None
-    member_color = DEFAULT_MEMBER_EVENT_COLOR
-    if item.member_id:
-        member = db.get(Member, item.member_id)
-        if member:
-            if member.user:
-                member_name = member.user.display_name or member.user.email
-            member_color = member.event_color or DEFAULT_MEMBER_EVENT_COLOR
+def item_to_response(item: GroceryListItem, labels: dict[int, MemberLabel]) -> GroceryListItemResponse:
+    label = labels.get(item.member_id) if item.member_id else None
+    member_name = label.display_name if label else None
+    member_color = (label.color if label else None) or DEFAULT_MEMBER_EVENT_COLOR
     return GroceryListItemResponse(
         id=item.id,
         grocery_list_id=item.grocery_list_id,
         content=item.content,
         is_section_header=item.is_section_header,
-        position=item.position,
+        rank=item.rank,
         member_id=item.member_id,
         member_display_name=member_name,
         member_color=member_color,
@@ -139,91 +141,217 @@ def _item_to_response(db: Session, item: GroceryListItem) -> GroceryListItemResp
     )
 
 
-@router.get("/grocery-list-items", response_model=list[GroceryListItemResponse])
-def list_grocery_list_items(
-    grocery_list_id: int = Query(...),
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
-):
-    gl = db.get(GroceryList, grocery_list_id)
+async def _require_list_member(db: AsyncSession, auth: AuthContext, grocery_list_id: int) -> GroceryList:
+    gl = await db.get(GroceryList, grocery_list_id)
     if not gl:
         raise HTTPException(status_code=404, detail="Grocery list not found")
-    _ensure_member(db, current_user.id, gl.household_id)
+    auth.require_member(gl.household_id)
+    return gl
+
+
+def _validate_bulk_ids(ids: list[int]) -> None:
+    try:
+        bulk_updates.validate_ids(ids)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def _bulk_response(db: Session, grocery_list_id: int, ids: list[int]) -> list[GroceryListItemResponse]:
+    """Serialize the rows a bulk request touched (current values, in list order); 404 if any is missing.
+
+    Call before committing: a missing id rolls the whole request back.
+    """
     items = (
         db.query(GroceryListItem)
-        .filter(GroceryListItem.grocery_list_id == grocery_list_id)
-        .order_by(GroceryListItem.position.asc(), GroceryListItem.id.asc())
+        .filter(GroceryListItem.grocery_list_id == grocery_list_id, GroceryListItem.id.in_(ids))
+        .order_by(GroceryListItem.rank.asc(), GroceryListItem.id.asc())
+        .populate_existing()
         .all()
     )
-    return [_item_to_response(db, it) for it in items]
+    if len(items) != len(ids):
+        db.rollback()
+        raise HTTPException(status_code=404, detail="Grocery list item not found")
+    labels = load_member_labels(db, (it.member_id for it in items))
+    return [item_to_response(it, labels) for it in items]
+
+
+@router.get("/grocery-list-items", response_model=list[GroceryListItemResponse])
+async def list_grocery_list_items(
+    request: Request,
+    response: Response,
+    grocery_list_id: int = Query(...),
+    auth: AuthContext = Depends(get_auth_context),
+    db: AsyncSession = Depends(get_db),
+):
+    """List a grocery list's items in order. Honours If-None-Match with 304."""
+    gl = await _require_list_member(db, auth, grocery_list_id)
+    tag = await db.run_sync(revisions.etag, [gl.household_id], ("grocery_items", "members"))
+    cached = not_modified(request, response, tag)
+    if cached is not None:
+        return cached
+    items = (await db.scalars(
+        select(GroceryListItem)
+        .where(GroceryListItem.grocery_list_id == grocery_list_id)
+        .order_by(GroceryListItem.rank.asc(), GroceryListItem.id.asc())
+    )).all()
+    labels = await db.run_sync(load_member_labels, [it.member_id for it in items])
+    return [item_to_response(it, labels) for it in items]
 
 
 @router.post("/grocery-list-items", response_model=GroceryListItemResponse, status_code=201)
-def create_grocery_list_item(
+async def create_grocery_list_item(
     body: GroceryListItemCreate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    auth: AuthContext = Depends(get_auth_context),
+    db: AsyncSession = Depends(get_db),
 ):
-    gl = db.get(GroceryList, body.grocery_list_id)
+    gl = await db.get(GroceryList, body.grocery_list_id)
     if not gl:
         raise HTTPException(status_code=404, detail="Grocery list not found")
-    my_member = _ensure_member(db, current_user.id, gl.household_id)
-    position = body.position
-    if position is None:
-        max_pos = (
-            db.query(GroceryListItem)
-            .filter(GroceryListItem.grocery_list_id == body.grocery_list_id)
-            .count()
-        )
-        position = max_pos
-    member_id = body.member_id if body.member_id is not None else my_member.id
+    my_member = auth.require_member(gl.household_id)
+    member_id = body.member_id if body.member_id is not None else my_member.member_id
     item = GroceryListItem(
         grocery_list_id=body.grocery_list_id,
         content=(body.content or "").strip() or "New item",
         is_section_header=body.is_section_header,
-        position=position,
+        rank=await db.run_sync(ranking.append_rank, GroceryListItem, body.grocery_list_id),
         member_id=member_id,
     )
     db.add(item)
-    db.commit()
-    db.refresh(item)
-    return _item_to_response(db, item)
+    await db.commit()
+    await db.refresh(item)
+    return item_to_response(item, await db.run_sync(load_member_labels, [item.member_id]))
+
+
+@router.patch("/grocery-list-items", response_model=list[GroceryListItemResponse])
+async def update_grocery_list_items(
+    body: GroceryListItemBulkUpdate,
+    auth: AuthContext = Depends(get_auth_context),
+    db: AsyncSession = Depends(get_db),
+):
+    """Apply many partial updates in one transaction and one UPDATE. Returns the affected items in list order."""
+    await _require_list_member(db, auth, body.grocery_list_id)
+    ids = [change.id for change in body.items]
+    _validate_bulk_ids(ids)
+    if not ids:
+        return []
+    changes = {}
+    for change in body.items:
+        values = {}
+        if change.content and change.content.strip():
+            values["content"] = change.content.strip()
+        if change.is_section_header is not None:
+            values["is_section_header"] = change.is_section_header
+        changes[change.id] = values
+
+    def apply(session: Session) -> list[GroceryListItemResponse]:
+        bulk_updates.apply_changes(
+            session, GroceryListItem, GroceryListItem.grocery_list_id == body.grocery_list_id, changes
+        )
+        response = _bulk_response(session, body.grocery_list_id, ids)
+        change_log.record(session, GroceryListItem, body.grocery_list_id, ids)
+        session.commit()
+        return response
+
+    return await db.run_sync(apply)
+
+
+@router.put("/grocery-list-items/order", response_model=list[GroceryListItemResponse])
+async def reorder_grocery_list_items(
+    body: GroceryListItemOrder,
+    auth: AuthContext = Depends(get_auth_context),
+    db: AsyncSession = Depends(get_db),
+):
+    """Put the given items in the given order (they take over each other's places) with one UPDATE.
+    Sending every id of the list sets the whole order. Returns the items in their new order."""
+    await _require_list_member(db, auth, body.grocery_list_id)
+    _validate_bulk_ids(body.ids)
+    if not body.ids:
+        return []
+
+    def apply(session: Session) -> list[GroceryListItemResponse]:
+        try:
+            ranking.reorder(session, GroceryListItem, body.grocery_list_id, body.ids)
+        except LookupError:
+            raise HTTPException(status_code=404, detail="Grocery list item not found")
+        response = _bulk_response(session, body.grocery_list_id, body.ids)
+        session.commit()
+        return response
+
+    return await db.run_sync(apply)
+
+
+@router.post("/grocery-list-items/from-meals", response_model=GroceryListItemsFromMealsResponse)
+async def add_items_from_meals(
+    body: GroceryListItemsFromMeals,
+    auth: AuthContext = Depends(get_auth_context),
+    db: AsyncSession = Depends(get_db),
+):
+    """Append the ingredients of the household's planned meals in a date range to a list (merged, and
+    skipping names already on it) with one INSERT. See src/services/meal_ingredients.py."""
+    gl = await _require_list_member(db, auth, body.grocery_list_id)
+    days = (body.end_date - body.start_date).days + 1
+    if not 1 <= days <= meal_plans.MAX_PLAN_DAYS:
+        raise HTTPException(status_code=400, detail=f"date range must be 1 to {meal_plans.MAX_PLAN_DAYS} days")
+    member_id = auth.memberships[gl.household_id].member_id
+
+    def apply(session: Session) -> GroceryListItemsFromMealsResponse:
+        plan = meal_ingredients.plan_items(session, gl.household_id, gl.id, body.start_date, body.end_date)
+        added = [item.content for item in plan.items]
+        items = []
+        if not body.dry_run and added:
+            ids = meal_ingredients.insert_items(session, gl.id, added, member_id)
+            items = _bulk_response(session, gl.id, ids)
+            session.commit()
+        return GroceryListItemsFromMealsResponse(
+            dry_run=body.dry_run,
+            added=added,
+            already_on_list=plan.already_on_list,
+            meals_without_ingredients=plan.meals_without_ingredients,
+            items=items,
+        )
+
+    return await db.run_sync(apply)
 
 
 @router.patch("/grocery-list-items/{item_id}", response_model=GroceryListItemResponse)
-def update_grocery_list_item(
+async def update_grocery_list_item(
     item_id: int,
     body: GroceryListItemUpdate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    auth: AuthContext = Depends(get_auth_context),
+    db: AsyncSession = Depends(get_db),
 ):
-    item = db.get(GroceryListItem, item_id)
+    item = await db.get(GroceryListItem, item_id)
     if not item:
         raise HTTPException(status_code=404, detail="Grocery list item not found")
-    gl = db.get(GroceryList, item.grocery_list_id)
-    _ensure_member(db, current_user.id, gl.household_id)
+    gl = await db.get(GroceryList, item.grocery_list_id)
+    auth.require_member(gl.household_id)
     if body.content is not None:
         item.content = (body.content or "").strip() or item.content
     if body.is_section_header is not None:
         item.is_section_header = body.is_section_header
-    if body.position is not None:
-        item.position = body.position
-    db.commit()
-    db.refresh(item)
-    return _item_to_response(db, item)
+    if body.after_id is not None or body.before_id is not None:
+        try:
+            item.rank = await db.run_sync(ranking.move_rank, item, body.after_id, body.before_id)
+        except LookupError:
+            raise HTTPException(status_code=400, detail="Neighbour item not found in this list")
+        except ranking.RankConflict:
+            raise HTTPException(status_code=400, detail="after_id must come before before_id")
+    await db.commit()
+    await db.refresh(item)
+    return item_to_response(item, await db.run_sync(load_member_labels, [item.member_id]))
 
 
 @router.delete("/grocery-list-items/{item_id}", status_code=204)
-def delete_grocery_list_item(
+async def delete_grocery_list_item(
     item_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    auth: AuthContext = Depends(get_auth_context),
+    db: AsyncSession = Depends(get_db),
 ):
-    item = db.get(GroceryListItem, item_id)
+    item = await db.get(GroceryListItem, item_id)
     if not item:
         raise HTTPException(status_code=404, detail="Grocery list item not found")
-    gl = db.get(GroceryList, item.grocery_list_id)
-    _ensure_member(db, current_user.id, gl.household_id)
-    db.delete(item)
-    db.commit()
+    gl = await db.get(GroceryList, item.grocery_list_id)
+    auth.require_member(gl.household_id)
+    await db.delete(item)
+    await db.commit()
     return None
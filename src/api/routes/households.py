@@ -1,110 +1,354 @@
-"""Household CRUD routes."""
+"""Household CRUD routes, plus the one-request household snapshot used when the app starts, the
+changes feed (delta sync) and the event stream that tells clients when to read it."""
 
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+import asyncio
+import json
+from datetime import date
 
-from src.api.routes.auth import get_current_user
-from src.db.session import get_db
-from src.models.database import Household, Member
-from src.models.database import User
-from src.models.schemas import HouseholdCreate, HouseholdResponse, HouseholdUpdate
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload
 
-router = APIRouter(prefix="/api/households", tags=["households"])
+from src.api.routes.auth import AuthContext, get_auth_context, get_current_user
+from src.api.routes.grocery_lists import ensure_grocery_lists, item_to_response
+from src.api.routes.meal_planner import default_meal_range, ensure_meal_slots, planned_meal_to_response
+from src.api.routes.todos import todo_to_response
+from src.db.session import get_db, place_household, request_session, scalars_per_shard, shard_index, use_shard
+from src.models.database import Calendar, GroceryList, GroceryListItem, Household, HouseholdChange, Member
+from src.models.database import PlannedMeal, TodoItem, User
+from src.models.schemas import (
+    HouseholdChangesResponse,
+    HouseholdCreate,
+    HouseholdResponse,
+    HouseholdSnapshotResponse,
+    HouseholdUpdate,
+)
+from src.config import settings
+from src.services import change_log, pubsub, todo_retention
+from src.services.member_directory import labels_from_members, load_member_labels
 
+router = APIRouter(prefix="/api/households", tags=["households"])
 
-def _user_household_ids(db: Session, user_id: int) -> list[int]:
-    """Household IDs the user is a member of."""
-    rows = db.query(Member.household_id).filter(Member.user_id == user_id).all()
-    return [r[0] for r in rows]
+SNAPSHOT_FIELDS = (
+    "household",
+    "members",
+    "calendars",
+    "todos",
+    "grocery_lists",
+    "grocery_items",
+    "meal_slots",
+    "planned_meals",
+)
+# Fields whose rows show member names / colors (resolved from the members query)
+_LABELED_FIELDS = {"members", "todos", "grocery_items", "planned_meals"}
+# Change log entity name -> model (entities are named after their snapshot field)
+_CHANGE_MODELS = {entity: model for model, entity in change_log.ENTITIES.items()}
 
 
 @router.get("", response_model=list[HouseholdResponse])
-def list_households(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+async def list_households(
+    auth: AuthContext = Depends(get_auth_context),
+    db: AsyncSession = Depends(get_db),
 ):
     """List households the current user is a member of."""
-    hid_list = _user_household_ids(db, current_user.id)
+    hid_list = auth.household_ids
     if not hid_list:
         return []
-    return db.query(Household).filter(Household.id.in_(hid_list)).all()
+    return await scalars_per_shard(db, hid_list, lambda ids: select(Household).where(Household.id.in_(ids)))
 
 
 @router.post("", response_model=HouseholdResponse, status_code=201)
-def create_household(
+async def create_household(
     body: HouseholdCreate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     """Create a household (caller is not auto-added; frontend typically creates then creates member)."""
     household = Household(name=body.name)
+    use_shard(db, await place_household())
     db.add(household)
-    db.commit()
-    db.refresh(household)
+    await db.commit()
+    await db.refresh(household)
     return household
 
 
 @router.get("/{household_id}", response_model=HouseholdResponse)
-def get_household(
+async def get_household(
     household_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    auth: AuthContext = Depends(get_auth_context),
+    db: AsyncSession = Depends(get_db),
 ):
     """Get a household by id. Only allowed if the user is a member."""
-    hid_list = _user_household_ids(db, current_user.id)
-    if household_id not in hid_list:
+    auth.require_member(household_id, detail="Household not found", status_code=404)
+    household = await db.get(Household, household_id)
+    if not household:
         raise HTTPException(status_code=404, detail="Household not found")
+    return household
+
+
+def _parse_fields(fields: str | None) -> set[str]:
+    if not fields:
+        return set(SNAPSHOT_FIELDS)
+    selected = {f.strip() for f in fields.split(",") if f.strip()}
+    unknown = selected - set(SNAPSHOT_FIELDS)
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown snapshot field(s): {', '.join(sorted(unknown))}. Allowed: {', '.join(SNAPSHOT_FIELDS)}",
+        )
+    return selected
+
+
+@router.get("/{household_id}/snapshot", response_model=HouseholdSnapshotResponse)
+async def get_household_snapshot(
+    household_id: int,
+    fields: str | None = Query(None, description=f"Comma-separated subset of: {', '.join(SNAPSHOT_FIELDS)} (default: all)"),
+    start_date: date | None = Query(None, description="First day of planned_meals (default: Monday of this week)"),
+    end_date: date | None = Query(None, description="Last day of planned_meals (default: meal_planner_weeks later)"),
+    auth: AuthContext = Depends(get_auth_context),
+    db: AsyncSession = Depends(get_db),
+):
+    """Household, members, calendars, to-dos, grocery lists and items, meal slots and planned meals in one
+    response (instead of one request per list, each re-checking membership). One query per selected
+    field; member names and colors come from the members query. Omitted fields are absent from the JSON."""
+    auth.require_member(household_id, detail="Household not found", status_code=404)
+    selected = _parse_fields(fields)
+    return await db.run_sync(_build_snapshot, household_id, selected, start_date, end_date)
+
+
+def _build_snapshot(
+    db: Session, household_id: int, selected: set[str], start_date: date | None, end_date: date | None
+) -> JSONResponse:
     household = db.get(Household, household_id)
     if not household:
         raise HTTPException(status_code=404, detail="Household not found")
-    return household
+    # Read before the lists: a write landing in between is returned again by the next changes poll
+    data: dict = {"household": household, "seq": household.change_seq}
+
+    members: list[Member] = []
+    labels = {}
+    if selected & _LABELED_FIELDS:
+        members = (
+            db.query(Member)
+            .options(joinedload(Member.user))
+            .filter(Member.household_id == household_id)
+            .order_by(Member.id.asc())
+            .all()
+        )
+        labels = labels_from_members(members)
+        data["members"] = members
+
+    def resolve(member_ids) -> dict:
+        # Rows may reference members outside the household (e.g. a grocery item's member_id); rare
+        missing = {mid for mid in member_ids if mid is not None and mid not in labels}
+        return {**labels, **load_member_labels(db, missing)} if missing else labels
+
+    if "calendars" in selected:
+        data["calendars"] = (
+            db.query(Calendar).join(Member).filter(Member.household_id == household_id).order_by(Calendar.id).all()
+        )
+    if "todos" in selected:
+        todos = (
+            db.query(TodoItem)
+            .filter(TodoItem.household_id == household_id, todo_retention.not_expired())
+            .order_by(TodoItem.rank.asc(), TodoItem.id.asc())
+            .all()
+        )
+        todo_labels = resolve(t.member_id for t in todos)
+        data["todos"] = [todo_to_response(t, todo_labels) for t in todos]
+    if selected & {"grocery_lists", "grocery_items"}:
+        data["grocery_lists"] = ensure_grocery_lists(db, household_id)
+    if "grocery_items" in selected:
+        items = (
+            db.query(GroceryListItem)
+            .join(GroceryList)
+            .filter(GroceryList.household_id == household_id)
+            .order_by(GroceryListItem.grocery_list_id.asc(), GroceryListItem.rank.asc(), GroceryListItem.id.asc())
+            .all()
+        )
+        item_labels = resolve(it.member_id for it in items)
+        data["grocery_items"] = [item_to_response(it, item_labels) for it in items]
+    if selected & {"meal_slots", "planned_meals"}:
+        data["meal_slots"] = ensure_meal_slots(db, household_id)
+    if "planned_meals" in selected:
+        default_start, default_end = default_meal_range(household)
+        start, end = start_date or default_start, end_date or default_end
+        meals = (
+            db.query(PlannedMeal)
+            .filter(
+                PlannedMeal.household_id == household_id,
+                PlannedMeal.meal_date >= start,
+                PlannedMeal.meal_date <= end,
+            )
+            .order_by(PlannedMeal.meal_date.asc(), PlannedMeal.meal_slot_id.asc())
+            .all()
+        )
+        meal_labels = resolve(m.member_id for m in meals)
+        data["planned_meals"] = [planned_meal_to_response(m, meal_labels) for m in meals]
+        data["planned_meals_start"] = start.isoformat()
+        data["planned_meals_end"] = end.isoformat()
+
+    snapshot = HouseholdSnapshotResponse.model_validate(data, from_attributes=True)
+    keep = selected | {"seq"} | ({"planned_meals_start", "planned_meals_end"} if "planned_meals" in selected else set())
+    # Serialized here (not via response_model) so unselected fields are left out rather than null
+    return JSONResponse(snapshot.model_dump(mode="json", include=keep))
+
+
+def _changed_rows(db: Session, household_id: int, entity: str, ids: list[int]) -> list:
+    """Current rows of one entity among ids (rows deleted since are simply missing)."""
+    if entity == "members":
+        return (
+            db.query(Member)
+            .options(joinedload(Member.user))
+            .filter(Member.household_id == household_id, Member.id.in_(ids))
+            .all()
+        )
+    if entity == "grocery_items":
+        return (
+            db.query(GroceryListItem)
+            .join(GroceryList)
+            .filter(GroceryList.household_id == household_id, GroceryListItem.id.in_(ids))
+            .all()
+        )
+    model = _CHANGE_MODELS[entity]
+    query = db.query(model).filter(model.household_id == household_id, model.id.in_(ids))
+    if model is TodoItem:
+        query = query.filter(todo_retention.not_expired())
+    return query.all()
+
+
+@router.get("/{household_id}/changes", response_model=HouseholdChangesResponse)
+async def get_household_changes(
+    household_id: int,
+    since: int = Query(0, ge=0, description="seq of the last snapshot or changes response"),
+    limit: int = Query(500, ge=1, le=2000, description="Maximum number of changed rows"),
+    auth: AuthContext = Depends(get_auth_context),
+    db: AsyncSession = Depends(get_db),
+):
+    """Rows written since `since`: current versions of changed rows and ids of deleted ones, plus the
+    seq to pass next time. Reads the household's change log (index on household_id, seq) and one query
+    per changed entity, so the cost follows the number of changes, not the size of the lists."""
+    auth.require_member(household_id, detail="Household not found", status_code=404)
+    return await db.run_sync(_build_changes, household_id, since, limit)
+
+
+def _build_changes(db: Session, household_id: int, since: int, limit: int) -> HouseholdChangesResponse:
+    household = db.get(Household, household_id)
+    if not household:
+        raise HTTPException(status_code=404, detail="Household not found")
+    seq = household.change_seq
+    if since < household.change_floor_seq:
+        return HouseholdChangesResponse(seq=seq, reset=True)
+
+    log = select(HouseholdChange.entity, HouseholdChange.entity_id, HouseholdChange.seq, HouseholdChange.deleted)
+    in_range = (HouseholdChange.household_id == household_id, HouseholdChange.seq > since, HouseholdChange.seq <= seq)
+    rows = db.execute(log.where(*in_range).order_by(HouseholdChange.seq.asc()).limit(limit + 1)).all()
+    has_more = len(rows) > limit
+    if has_more:
+        # Stop at a seq boundary so the next poll (from the returned seq) misses nothing
+        last = rows[limit - 1].seq
+        rows = [r for r in rows[:limit] if r.seq < last] if rows[limit].seq == last else rows[:limit]
+        if not rows:  # a single write larger than limit: return it whole
+            rows = db.execute(log.where(*in_range, HouseholdChange.seq == last)).all()
+        seq = rows[-1].seq
+
+    data: dict = {"seq": seq, "has_more": has_more, "deleted": []}
+    changed: dict[str, list[int]] = {}
+    for row in rows:
+        if row.deleted:
+            data["deleted"].append({"entity": row.entity, "id": row.entity_id})
+        else:
+            changed.setdefault(row.entity, []).append(row.entity_id)
+    loaded = {entity: _changed_rows(db, household_id, entity, ids) for entity, ids in changed.items()}
+    for entity, ids in changed.items():
+        found = {obj.id for obj in loaded[entity]}
+        # Deleted without going through the ORM (e.g. database cascade when a member is removed)
+        data["deleted"].extend({"entity": entity, "id": i} for i in ids if i not in found)
+
+    labeled = [obj for entity in ("todos", "grocery_items", "planned_meals") for obj in loaded.get(entity, [])]
+    labels = load_member_labels(db, (obj.member_id for obj in labeled))
+    data["members"] = loaded.get("members", [])
+    data["grocery_lists"] = loaded.get("grocery_lists", [])
+    data["meal_slots"] = loaded.get("meal_slots", [])
+    data["todos"] = [todo_to_response(t, labels) for t in loaded.get("todos", [])]
+    data["grocery_items"] = [item_to_response(it, labels) for it in loaded.get("grocery_items", [])]
+    data["planned_meals"] = [planned_meal_to_response(m, labels) for m in loaded.get("planned_meals", [])]
+    return HouseholdChangesResponse.model_validate(data, from_attributes=True)
+
+
+async def _event_stream(household_id: int):
+    subscription = pubsub.bus.subscribe(household_id)
+    try:
+        # Subscribed before "ready": a client that fetches changes on ready cannot miss a write
+        yield "retry: 5000\nevent: ready\ndata: {}\n\n"
+        while True:
+            try:
+                message = await asyncio.wait_for(subscription.get(), settings.PUSH_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            yield f"id: {message['seq']}\nevent: change\ndata: {json.dumps(message)}\n\n"
+    finally:
+        pubsub.bus.unsubscribe(subscription)
+
+
+async def _authorize_stream(request: Request, household_id: int) -> None:
+    # Own short session, closed before streaming starts: with Depends(get_db) the pooled connection
+    # would be held for as long as the stream stays open.
+    async with request_session(shard_index(household_id)) as db:
+        auth = await get_auth_context(request, request.headers.get("authorization"), db)
+        auth.require_member(household_id, detail="Household not found", status_code=404)
+
+
+@router.get("/{household_id}/events")
+async def stream_household_events(household_id: int, request: Request):
+    """Server-sent events: `ready` once connected, then `change` ({"seq": N}) after every commit that
+    changed the household's to-dos, grocery lists, meal plan or members. Clients fetch
+    GET /changes?since= on ready and on change instead of polling; bursts are coalesced for slow readers."""
+    await _authorize_stream(request, household_id)
+    return StreamingResponse(
+        _event_stream(household_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @router.patch("/{household_id}", response_model=HouseholdResponse)
-def update_household(
+async def update_household(
     household_id: int,
     body: HouseholdUpdate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    auth: AuthContext = Depends(get_auth_context),
+    db: AsyncSession = Depends(get_db),
 ):
     """Update a household. Only allowed if the user is a member."""
-    hid_list = _user_household_ids(db, current_user.id)
-    if household_id not in hid_list:
-        raise HTTPException(status_code=404, detail="Household not found")
-    household = db.get(Household, household_id)
+    auth.require_member(household_id, detail="Household not found", status_code=404)
+    household = await db.get(Household, household_id)
     if not household:
         raise HTTPException(status_code=404, detail="Household not found")
     if body.name is not None:
         household.name = body.name
     if body.meal_planner_weeks is not None:
         household.meal_planner_weeks = max(1, min(4, body.meal_planner_weeks))
-    db.commit()
-    db.refresh(household)
+    await db.commit()
+    await db.refresh(household)
     return household
 
 
 @router.delete("/{household_id}", status_code=204)
-def delete_household(
+async def delete_household(
     household_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    auth: AuthContext = Depends(get_auth_context),
+    db: AsyncSession = Depends(get_db),
 ):
     """Delete a household and all related records. Only the household owner may delete."""
-    household = db.get(Household, household_id)
+    household = await db.get(Household, household_id)
     if not household:
         raise HTTPException(status_code=404, detail="Household not found")
-    member = (
-        db.query(Member)
-        .filter(
-            Member.household_id == household_id,
-            Member.user_id == current_user.id,
-        )
-        .first()
-    )
-    if not member:
-        raise HTTPException(status_code=403, detail="You are not a member of this household")
+    member = auth.require_member(household_id, detail="You are not a member of this household")
     if member.role != "owner":
         raise HTTPException(status_code=403, detail="Only the household owner can delete the household")
-    db.delete(household)
-    db.commit()
+    await db.delete(household)
+    await db.commit()
     return None
@@ -4,14 +4,17 @@ import logging
 import secrets
 from datetime import datetime
 
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-
-from src.api.routes.auth import get_current_user
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
+
+from src.api.conditional import household_etag, not_modified
+from src.api.routes.auth import AuthContext, get_auth_context
 from src.config import settings
-from src.db.session import get_db
+from src.db.session import get_db, locate, scalars_per_shard
 from src.models.database import Household, Invitation, Member
-from src.models.database import User
 from src.models.schemas import (
     DEFAULT_MEMBER_EVENT_COLOR,
     InvitationAccept,
@@ -30,41 +33,49 @@ def _generate_token() -> str:
     return secrets.token_urlsafe(32)
 
 
-def _user_household_ids(db: Session, user_id: int) -> list[int]:
-    rows = db.query(Member.household_id).filter(Member.user_id == user_id).all()
-    return [r[0] for r in rows]
-
-
 @router.get("", response_model=list[InvitationResponse])
-def list_invitations(
+async def list_invitations(
+    request: Request,
+    response: Response,
     household_id: int | None = Query(None, description="Filter by household"),
     status: str | None = Query(None, description="pending | accepted | expired"),
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    auth: AuthContext = Depends(get_auth_context),
+    db: AsyncSession = Depends(get_db),
 ):
-    """List invitations for households the current user is in."""
-    hid_list = _user_household_ids(db, current_user.id)
+    """List invitations for households the current user is in. Honours If-None-Match with 304."""
+    hid_list = auth.household_ids
     if not hid_list:
         return []
-    q = db.query(Invitation).filter(Invitation.household_id.in_(hid_list))
-    if household_id is not None:
-        if household_id not in hid_list:
-            return []
-        q = q.filter(Invitation.household_id == household_id)
-    if status is not None:
-        q = q.filter(Invitation.status == status)
-    return q.all()
+    cached = not_modified(request, response, await household_etag(db, hid_list, ("invitations",)))
+    if cached is not None:
+        return cached
+    if household_id is not None and household_id not in hid_list:
+        return []
 
+    def query(ids: list[int]):
+        q = select(Invitation).where(Invitation.household_id.in_(ids))
+        if household_id is not None:
+            q = q.where(Invitation.household_id == household_id)
+        if status is not None:
+            q = q.where(Invitation.status == status)
+        return q
 
-def _send_invite_email_for(inv: Invitation) -> bool | None:
+    return await scalars_per_shard(db, hid_list, query)
+
+
+async def _send_invite_email_for(db: AsyncSession, inv: Invitation) -> bool | None:
     """Send invitation email if Mailjet is configured. Returns True if sent, False on error, None if not configured."""
     base = settings.frontend_base_url.rstrip("/")
     accept_url = f"{base}/invite/accept?token={inv.token}"
-    household_name = inv.household.name if inv.household else "a household"
+    household = await db.get(Household, inv.household_id)
+    household_name = household.name if household else "a household"
+    inviter = await db.get(Member, inv.invited_by_member_id, options=[joinedload(Member.user)])
     inviter_name = None
-    if inv.invited_by and inv.invited_by.user:
-        inviter_name = inv.invited_by.user.display_name or inv.invited_by.user.email
-    ok = send_invitation_email(
+    if inviter and inviter.user:
+        inviter_name = inviter.user.display_name or inviter.user.email
+    # Mailjet is called with a blocking HTTP client: keep it off the event loop
+    ok = await run_in_threadpool(
+        send_invitation_email,
         to_email=inv.email,
         household_name=household_name,
         inviter_name=inviter_name,
@@ -76,41 +87,42 @@ def _send_invite_email_for(inv: Invitation) -> bool | None:
 
 
 @router.post("", response_model=InvitationSendResponse, status_code=201)
-def create_invitation(
+async def create_invitation(
     body: InvitationCreate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    auth: AuthContext = Depends(get_auth_context),
+    db: AsyncSession = Depends(get_db),
 ):
     """Send an invitation to join a household. Caller must be the inviter (member of that household)."""
-    household = db.get(Household, body.household_id)
+    household = await db.get(Household, body.household_id)
     if not household:
         raise HTTPException(status_code=404, detail="Household not found")
-    inviter = db.get(Member, body.invited_by_member_id)
-    if not inviter or inviter.household_id != body.household_id:
-        raise HTTPException(
-            status_code=400, detail="invited_by_member_id must be a member of the household"
-        )
-    if inviter.user_id != current_user.id:
+    my_membership = auth.membership(body.household_id)
+    if not my_membership or my_membership.member_id != body.invited_by_member_id:
+        inviter = await db.get(Member, body.invited_by_member_id)
+        if not inviter or inviter.household_id != body.household_id:
+            raise HTTPException(
+                status_code=400, detail="invited_by_member_id must be a member of the household"
+            )
         raise HTTPException(status_code=403, detail="You can only send invites as yourself (your member in this household)")
     # Reuse pending invitation for same email + household
-    existing = (
-        db.query(Invitation)
-        .filter(
+    existing = await db.scalar(
+        select(Invitation)
+        .where(
             Invitation.household_id == body.household_id,
             Invitation.email == body.email.strip().lower(),
             Invitation.status == "pending",
         )
-        .first()
+        .limit(1)
     )
     now = datetime.utcnow()
     if existing:
         existing.last_sent_at = now
-        db.commit()
-        db.refresh(existing)
-        email_sent = _send_invite_email_for(existing)
+        await db.commit()
+        await db.refresh(existing)
+        email_sent = await _send_invite_email_for(db, existing)
         return InvitationSendResponse(invitation=InvitationResponse.model_validate(existing), email_sent=email_sent)
     token = _generate_token()
-    while db.query(Invitation).filter(Invitation.token == token).first():
+    while await db.scalar(select(Invitation.id).where(Invitation.token == token)):
         token = _generate_token()
     inv = Invitation(
         household_id=body.household_id,
@@ -122,94 +134,82 @@ def create_invitation(
         last_sent_at=now,
     )
     db.add(inv)
-    db.commit()
-    db.refresh(inv)
-    email_sent = _send_invite_email_for(inv)
+    await db.commit()
+    await db.refresh(inv)
+    email_sent = await _send_invite_email_for(db, inv)
     return InvitationSendResponse(invitation=InvitationResponse.model_validate(inv), email_sent=email_sent)
 
 
 @router.post("/resend/{invitation_id}", response_model=InvitationSendResponse)
-def resend_invitation(
+async def resend_invitation(
     invitation_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    auth: AuthContext = Depends(get_auth_context),
+    db: AsyncSession = Depends(get_db),
 ):
     """Resend an invitation. Only allowed for invitations in a household the current user is in."""
-    inv = db.get(Invitation, invitation_id)
+    inv = await db.get(Invitation, invitation_id)
     if not inv:
         raise HTTPException(status_code=404, detail="Invitation not found")
-    hid_list = _user_household_ids(db, current_user.id)
-    if inv.household_id not in hid_list:
-        raise HTTPException(status_code=404, detail="Invitation not found")
+    auth.require_member(inv.household_id, detail="Invitation not found", status_code=404)
     if inv.status != "pending":
         raise HTTPException(
             status_code=400, detail="Can only resend a pending invitation"
         )
     inv.last_sent_at = datetime.utcnow()
-    db.commit()
-    db.refresh(inv)
-    email_sent = _send_invite_email_for(inv)
+    await db.commit()
+    await db.refresh(inv)
+    email_sent = await _send_invite_email_for(db, inv)
     return InvitationSendResponse(invitation=InvitationResponse.model_validate(inv), email_sent=email_sent)
 
 
 @router.delete("/{invitation_id}", status_code=204)
-def delete_invitation(
+async def delete_invitation(
     invitation_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    auth: AuthContext = Depends(get_auth_context),
+    db: AsyncSession = Depends(get_db),
 ):
     """Delete an invitation. Only allowed for invitations in a household the current user is in."""
-    inv = db.get(Invitation, invitation_id)
+    inv = await db.get(Invitation, invitation_id)
     if not inv:
         raise HTTPException(status_code=404, detail="Invitation not found")
-    hid_list = _user_household_ids(db, current_user.id)
-    if inv.household_id not in hid_list:
-        raise HTTPException(status_code=404, detail="Invitation not found")
-    db.delete(inv)
-    db.commit()
+    auth.require_member(inv.household_id, detail="Invitation not found", status_code=404)
+    await db.delete(inv)
+    await db.commit()
     return None
 
 
 @router.get("/by-token/{token}", response_model=InvitationResponse)
-def get_invitation_by_token(token: str, db: Session = Depends(get_db)):
+async def get_invitation_by_token(token: str, db: AsyncSession = Depends(get_db)):
     """Get invitation by token (e.g. for accept page)."""
-    inv = db.query(Invitation).filter(Invitation.token == token).first()
+    inv = await locate(db, select(Invitation).where(Invitation.token == token))
     if not inv:
         raise HTTPException(status_code=404, detail="Invitation not found")
     return inv
 
 
 @router.post("/accept", response_model=InvitationResponse)
-def accept_invitation(
+async def accept_invitation(
     body: InvitationAccept,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    auth: AuthContext = Depends(get_auth_context),
+    db: AsyncSession = Depends(get_db),
 ):
     """
     Accept an invitation for the current user. user_id in body must match current user.
     """
-    if body.user_id != current_user.id:
+    if body.user_id != auth.user.id:
         raise HTTPException(status_code=403, detail="You can only accept an invitation for yourself")
-    inv = db.query(Invitation).filter(Invitation.token == body.token).first()
+    inv = await locate(db, select(Invitation).where(Invitation.token == body.token))
     if not inv:
         raise HTTPException(status_code=404, detail="Invitation not found")
     if inv.status != "pending":
         raise HTTPException(
             status_code=400, detail="Invitation is not pending (already accepted or expired)"
         )
-    existing = (
-        db.query(Member)
-        .filter(
-            Member.user_id == body.user_id,
-            Member.household_id == inv.household_id,
-        )
-        .first()
-    )
-    if existing:
+    if auth.membership(inv.household_id):
         inv.status = "accepted"
         inv.accepted_at = datetime.utcnow()
-        db.commit()
-        db.refresh(inv)
+        await db.commit()
+        await db.refresh(inv)
         return inv
     member = Member(
         user_id=body.user_id,
@@ -219,6 +219,6 @@ def accept_invitation(
     db.add(member)
     inv.status = "accepted"
     inv.accepted_at = datetime.utcnow()
-    db.commit()
-    db.refresh(inv)
+    await db.commit()
+    await db.refresh(inv)
     return inv
@@ -1,325 +1,419 @@
 """Meal planner: meal slots (config) and planned meals. Household members only."""
 
-from datetime import date, datetime
+from datetime import date, datetime, timedelta
 
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy import select
-from sqlalchemy.orm import Session, joinedload
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import func, literal, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
 
-from src.api.routes.auth import get_current_user
-from src.db.session import get_db
+from src.api.conditional import not_modified
+from src.api.routes.auth import AuthContext, get_auth_context
+from src.db.session import get_db, use_primary
 from src.models.database import Household, MealSlot, Member, PlannedMeal, User
 from src.models.schemas import (
     DEFAULT_MEMBER_EVENT_COLOR,
     MealSlotCreate,
     MealSlotResponse,
     MealSlotUpdate,
+    MealGridCell,
+    MealGridMember,
+    MealGridResponse,
+    MealSuggestion,
+    PlannedMealBulkResponse,
+    PlannedMealCopy,
     PlannedMealCreate,
+    PlannedMealPreview,
     PlannedMealResponse,
+    PlannedMealRotation,
     PlannedMealSwap,
     PlannedMealUpdate,
 )
+from src.services import meal_plans, meal_suggestions, revisions
+from src.services.member_directory import MemberLabel, load_member_labels
 
 router = APIRouter(prefix="/api", tags=["meal_planner"])
 
 DEFAULT_MEAL_SLOTS = [("Breakfast", 0), ("Lunch", 1), ("Dinner", 2)]
 
 
-def _ensure_member(db: Session, user_id: int, household_id: int) -> Member:
-    m = (
-        db.query(Member)
-        .filter(Member.user_id == user_id, Member.household_id == household_id)
-        .first()
-    )
-    if not m:
-        raise HTTPException(status_code=403, detail="Not a member of this household")
-    return m
-
-
-@router.get("/meal-slots", response_model=list[MealSlotResponse])
-def list_meal_slots(
-    household_id: int = Query(...),
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
-):
-    """List meal slots for a household (e.g. Breakfast, Lunch, Dinner). Creates defaults if none exist."""
-    _ensure_member(db, current_user.id, household_id)
-    slots = (
+def ensure_meal_slots(db: Session, household_id: int) -> list[MealSlot]:
+    """The household's meal slots in order, creating the default slots if there are none."""
+    query = (
         db.query(MealSlot)
         .filter(MealSlot.household_id == household_id)
         .order_by(MealSlot.position.asc(), MealSlot.id.asc())
-        .all()
     )
+    slots = query.all()
+    if not slots and use_primary(db):
+        slots = query.all()  # a lagging replica may not have them yet
     if not slots:
         for name, pos in DEFAULT_MEAL_SLOTS:
             s = MealSlot(household_id=household_id, name=name, position=pos)
             db.add(s)
         db.commit()
-        slots = (
-            db.query(MealSlot)
-            .filter(MealSlot.household_id == household_id)
-            .order_by(MealSlot.position.asc(), MealSlot.id.asc())
-            .all()
-        )
+        slots = query.all()
     return slots
 
 
+def default_meal_range(household: Household) -> tuple[date, date]:
+    """The meal planner's default view: Monday of this week, for the household's number of weeks."""
+    today = date.today()
+    start = today - timedelta(days=today.weekday())
+    return start, start + timedelta(days=7 * (household.meal_planner_weeks or 2) - 1)
+
+
+def _build_grid(db: Session, household: Household, start_date: date | None) -> MealGridResponse:
+    start, end = default_meal_range(household)
+    if start_date is not None:
+        start, end = start_date, start_date + (end - start)
+    slots = ensure_meal_slots(db, household.id)
+    columns = {slot.id: i for i, slot in enumerate(slots)}
+    cells: list[list[MealGridCell | None]] = [[None] * len(slots) for _ in range((end - start).days + 1)]
+    members: dict[int, MealGridMember] = {}
+    # Meals with their assignee's name and color: one query
+    rows = db.execute(
+        select(
+            PlannedMeal.id,
+            PlannedMeal.meal_date,
+            PlannedMeal.meal_slot_id,
+            PlannedMeal.member_id,
+            PlannedMeal.description,
+            Member.event_color,
+            User.display_name,
+            User.email,
+        )
+        .outerjoin(Member, PlannedMeal.member_id == Member.id)
+        .outerjoin(User, Member.user_id == User.id)
+        .where(PlannedMeal.household_id == household.id, PlannedMeal.meal_date >= start, PlannedMeal.meal_date <= end)
+    ).all()
+    for meal_id, meal_date, slot_id, member_id, description, color, display_name, email in rows:
+        column = columns.get(slot_id)
+        if column is None:
+            continue
+        cells[(meal_date - start).days][column] = MealGridCell(id=meal_id, member_id=member_id, description=description)
+        if member_id not in members:
+            members[member_id] = MealGridMember(display_name=display_name or email, color=color or DEFAULT_MEMBER_EVENT_COLOR)
+    return MealGridResponse(
+        household_id=household.id,
+        start_date=start.isoformat(),
+        end_date=end.isoformat(),
+        slots=[MealSlotResponse.model_validate(slot) for slot in slots],
+        members=members,
+        cells=cells,
+    )
+
+
+def planned_meal_to_response(meal: PlannedMeal, labels: dict[int, MemberLabel]) -> PlannedMealResponse:
+    label = labels.get(meal.member_id) if meal.member_id else None
+    return PlannedMealResponse(
+        id=meal.id,
+        household_id=meal.household_id,
+        meal_date=meal.meal_date.isoformat(),
+        meal_slot_id=meal.meal_slot_id,
+        member_id=meal.member_id,
+        member_display_name=label.display_name if label else None,
+        member_color=(label.color if label else None) or DEFAULT_MEMBER_EVENT_COLOR,
+        description=meal.description,
+        created_at=meal.created_at,
+    )
+
+
+async def _apply_meal_plan(db: AsyncSession, household_id: int, rows: list[dict], dry_run: bool) -> PlannedMealBulkResponse:
+    """Write rows (from meal_plans.repeat_meals) in one upsert and commit, or with dry_run only report them."""
+    replacing: dict = {}
+    if rows:
+        replacing = await db.run_sync(
+            meal_plans.slot_meals, household_id, rows[0]["meal_date"], rows[-1]["meal_date"]
+        )
+    labels = await db.run_sync(load_member_labels, [row["member_id"] for row in rows])
+    if not dry_run and rows:
+        await db.run_sync(meal_plans.upsert_planned_meals, rows)
+        await db.commit()
+        meal_suggestions.record(household_id, [(row["description"], row["meal_date"]) for row in rows])
+    meals = []
+    for row in rows:
+        label = labels.get(row["member_id"])
+        meals.append(PlannedMealPreview(
+            meal_date=row["meal_date"].isoformat(),
+            meal_slot_id=row["meal_slot_id"],
+            member_id=row["member_id"],
+            member_display_name=label.display_name if label else None,
+            member_color=(label.color if label else None) or DEFAULT_MEMBER_EVENT_COLOR,
+            description=row["description"],
+            replaces_id=replacing.get((row["meal_date"], row["meal_slot_id"])),
+        ))
+    replaced = sum(1 for m in meals if m.replaces_id is not None)
+    return PlannedMealBulkResponse(dry_run=dry_run, created=len(meals) - replaced, replaced=replaced, meals=meals)
+
+
+@router.get("/meal-slots", response_model=list[MealSlotResponse])
+async def list_meal_slots(
+    request: Request,
+    response: Response,
+    household_id: int = Query(...),
+    auth: AuthContext = Depends(get_auth_context),
+    db: AsyncSession = Depends(get_db),
+):
+    """List meal slots for a household (e.g. Breakfast, Lunch, Dinner). Creates defaults if none exist.
+    Honours If-None-Match with 304."""
+    auth.require_member(household_id)
+    cached = not_modified(request, response, await db.run_sync(revisions.etag, [household_id], ("meal_slots",)))
+    if cached is not None:
+        return cached
+    return await db.run_sync(ensure_meal_slots, household_id)
+
+
 @router.post("/meal-slots", response_model=MealSlotResponse, status_code=201)
-def create_meal_slot(
+async def create_meal_slot(
     body: MealSlotCreate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    auth: AuthContext = Depends(get_auth_context),
+    db: AsyncSession = Depends(get_db),
 ):
     """Add a meal type (e.g. Snack). Only household members."""
-    _ensure_member(db, current_user.id, body.household_id)
+    auth.require_member(body.household_id)
     position = body.position
     if position is None:
-        max_pos = db.query(MealSlot).filter(MealSlot.household_id == body.household_id).count()
-        position = max_pos
+        position = await db.scalar(
+            select(func.count()).select_from(MealSlot).where(MealSlot.household_id == body.household_id)
+        )
     slot = MealSlot(household_id=body.household_id, name=body.name.strip() or "Meal", position=position)
     db.add(slot)
-    db.commit()
-    db.refresh(slot)
+    await db.commit()
+    await db.refresh(slot)
     return slot
 
 
 @router.patch("/meal-slots/{slot_id}", response_model=MealSlotResponse)
-def update_meal_slot(
+async def update_meal_slot(
     slot_id: int,
     body: MealSlotUpdate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    auth: AuthContext = Depends(get_auth_context),
+    db: AsyncSession = Depends(get_db),
 ):
     """Update meal slot name or position."""
-    slot = db.get(MealSlot, slot_id)
+    slot = await db.get(MealSlot, slot_id)
     if not slot:
         raise HTTPException(status_code=404, detail="Meal slot not found")
-    _ensure_member(db, current_user.id, slot.household_id)
+    auth.require_member(slot.household_id)
     if body.name is not None:
         slot.name = body.name.strip() or slot.name
     if body.position is not None:
         slot.position = body.position
-    db.commit()
-    db.refresh(slot)
+    await db.commit()
+    await db.refresh(slot)
     return slot
 
 
 @router.delete("/meal-slots/{slot_id}", status_code=204)
-def delete_meal_slot(
+async def delete_meal_slot(
     slot_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    auth: AuthContext = Depends(get_auth_context),
+    db: AsyncSession = Depends(get_db),
 ):
     """Remove a meal slot (and its planned meals)."""
-    slot = db.get(MealSlot, slot_id)
+    slot = await db.get(MealSlot, slot_id)
     if not slot:
         raise HTTPException(status_code=404, detail="Meal slot not found")
-    _ensure_member(db, current_user.id, slot.household_id)
-    db.delete(slot)
-    db.commit()
+    auth.require_member(slot.household_id)
+    await db.delete(slot)
+    await db.commit()
     return None
 
 
 @router.get("/planned-meals", response_model=list[PlannedMealResponse])
-def list_planned_meals(
+async def list_planned_meals(
+    request: Request,
+    response: Response,
     household_id: int = Query(...),
     start_date: date = Query(...),
     end_date: date = Query(...),
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    auth: AuthContext = Depends(get_auth_context),
+    db: AsyncSession = Depends(get_db),
 ):
-    """List planned meals in a date range. Returns member display name and color for UI."""
-    _ensure_member(db, current_user.id, household_id)
-    meals = (
-        db.query(PlannedMeal)
-        .filter(
+    """List planned meals in a date range. Returns member display name and color for UI.
+    Honours If-None-Match with 304."""
+    auth.require_member(household_id)
+    tag = await db.run_sync(revisions.etag, [household_id], ("planned_meals", "members"))
+    cached = not_modified(request, response, tag)
+    if cached is not None:
+        return cached
+    meals = (await db.scalars(
+        select(PlannedMeal).where(
             PlannedMeal.household_id == household_id,
             PlannedMeal.meal_date >= start_date,
             PlannedMeal.meal_date <= end_date,
         )
-        .options(
-            joinedload(PlannedMeal.member).joinedload(Member.user),
-        )
-        .all()
-    )
-    # Load current event_color for all members (so viewer always sees up-to-date colors)
-    member_ids = {m.member_id for m in meals if m.member_id}
-    member_colors = {}
-    if member_ids:
-        rows = db.execute(
-            select(Member.id, Member.event_color).where(Member.id.in_(member_ids))
-        ).all()
-        member_colors = {r[0]: r[1] for r in rows}
+    )).all()
+    # Current name and event_color of the assigned members (so viewers always see up-to-date colors)
+    labels = await db.run_sync(load_member_labels, [m.member_id for m in meals])
+    return [planned_meal_to_response(m, labels) for m in meals]
+
+
+@router.get("/planned-meals/grid", response_model=MealGridResponse)
+async def get_meal_grid(
+    request: Request,
+    response: Response,
+    household_id: int = Query(...),
+    start_date: date | None = Query(None, description="First day (default: Monday of this week)"),
+    auth: AuthContext = Depends(get_auth_context),
+    db: AsyncSession = Depends(get_db),
+):
+    """The meal planner's view in one response: the household's meal_planner_weeks from start_date as a
+    day-by-slot matrix of meals, with the slots and the assignees' names and colors listed once.
+    Creates default slots if none exist. Honours If-None-Match with 304."""
+    auth.require_member(household_id)
+    household = await db.get(Household, household_id)
+    if not household:
+        raise HTTPException(status_code=404, detail="Household not found")
+    # The default start moves every Monday; the number of weeks is covered by the members revision
+    start = literal(start_date or default_meal_range(household)[0])
+    tag = await db.run_sync(revisions.etag, [household_id], ("meal_slots", "planned_meals", "members"), start)
+    cached = not_modified(request, response, tag)
+    if cached is not None:
+        return cached
+    return await db.run_sync(_build_grid, household, start_date)
+
+
+@router.get("/planned-meals/suggestions", response_model=list[MealSuggestion])
+async def suggest_meals(
+    household_id: int = Query(...),
+    q: str = Query("", description="What the user has typed so far (matches the start of any word)"),
+    limit: int = Query(10, ge=1, le=50),
+    auth: AuthContext = Depends(get_auth_context),
+    db: AsyncSession = Depends(get_db),
+):
+    """Type-ahead for a meal's description: the household's past meals matching q, most often planned
+    first. Served from an in-memory index (see meal_suggestions); no query once it is built."""
+    auth.require_member(household_id)
+    index = meal_suggestions.cached_index(household_id)
+    if index is None:
+        index = await db.run_sync(meal_suggestions.get_index, household_id)
     return [
-        PlannedMealResponse(
-            id=m.id,
-            household_id=m.household_id,
-            meal_date=m.meal_date.isoformat(),
-            meal_slot_id=m.meal_slot_id,
-            member_id=m.member_id,
-            member_display_name=m.member.user.display_name or m.member.user.email,
-            member_color=(member_colors.get(m.member_id) if m.member_id else None) or DEFAULT_MEMBER_EVENT_COLOR,
-            description=m.description,
-            created_at=m.created_at,
-        )
-        for m in meals
+        MealSuggestion(description=s.description, count=s.count, last_planned=s.last_planned.isoformat())
+        for s in index.search(q, limit)
     ]
 
 
 @router.post("/planned-meals", response_model=PlannedMealResponse, status_code=201)
-def create_or_update_planned_meal(
+async def create_or_update_planned_meal(
     body: PlannedMealCreate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    auth: AuthContext = Depends(get_auth_context),
+    db: AsyncSession = Depends(get_db),
 ):
-    """Add or update a planned meal for a day/slot. Member must be current user's membership for that household."""
-    my_member = _ensure_member(db, current_user.id, body.household_id)
-    if body.member_id != my_member.id:
+    """Add or update a planned meal for a day/slot (one upsert, so concurrent edits of a slot cannot
+    collide). Member must be current user's membership for that household."""
+    my_member = auth.require_member(body.household_id)
+    if body.member_id != my_member.member_id:
         raise HTTPException(status_code=403, detail="Can only set yourself as the meal assignee")
-    meal_date = date.fromisoformat(body.meal_date)
-    existing = (
-        db.query(PlannedMeal)
-        .filter(
-            PlannedMeal.household_id == body.household_id,
-            PlannedMeal.meal_date == meal_date,
-            PlannedMeal.meal_slot_id == body.meal_slot_id,
-        )
-        .first()
-    )
-    if existing:
-        existing.member_id = body.member_id
-        existing.description = body.description
-        db.commit()
-        db.refresh(existing)
-        existing.member = db.get(Member, existing.member_id)
-        existing.member.user = db.get(User, existing.member.user_id)
-        return PlannedMealResponse(
-            id=existing.id,
-            household_id=existing.household_id,
-            meal_date=existing.meal_date.isoformat(),
-            meal_slot_id=existing.meal_slot_id,
-            member_id=existing.member_id,
-            member_display_name=existing.member.user.display_name or existing.member.user.email,
-            member_color=existing.member.event_color or DEFAULT_MEMBER_EVENT_COLOR,
-            description=existing.description,
-            created_at=existing.created_at,
-        )
-    meal = PlannedMeal(
-        household_id=body.household_id,
-        meal_date=meal_date,
-        meal_slot_id=body.meal_slot_id,
-        member_id=body.member_id,
-        description=body.description,
-    )
-    db.add(meal)
-    db.commit()
-    db.refresh(meal)
-    meal.member = db.get(Member, meal.member_id)
-    meal.member.user = db.get(User, meal.member.user_id)
-    return PlannedMealResponse(
-        id=meal.id,
-        household_id=meal.household_id,
-        meal_date=meal.meal_date.isoformat(),
-        meal_slot_id=meal.meal_slot_id,
-        member_id=meal.member_id,
-        member_display_name=meal.member.user.display_name or meal.member.user.email,
-        member_color=meal.member.event_color or DEFAULT_MEMBER_EVENT_COLOR,
-        description=meal.description,
-        created_at=meal.created_at,
+    meal = await db.run_sync(
+        meal_plans.upsert_planned_meal,
+        body.household_id,
+        date.fromisoformat(body.meal_date),
+        body.meal_slot_id,
+        body.member_id,
+        body.description,
     )
+    await db.commit()
+    meal_suggestions.record(body.household_id, [(meal.description, meal.meal_date)])
+    return planned_meal_to_response(meal, await db.run_sync(load_member_labels, [meal.member_id]))
 
 
 @router.patch("/planned-meals/{meal_id}", response_model=PlannedMealResponse)
-def update_planned_meal(
+async def update_planned_meal(
     meal_id: int,
     body: PlannedMealUpdate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    auth: AuthContext = Depends(get_auth_context),
+    db: AsyncSession = Depends(get_db),
 ):
     """Update a planned meal's date or slot. Any household member can move any meal."""
-    meal = db.get(PlannedMeal, meal_id)
+    meal = await db.get(PlannedMeal, meal_id)
     if not meal:
         raise HTTPException(status_code=404, detail="Planned meal not found")
-    _ensure_member(db, current_user.id, meal.household_id)
+    auth.require_member(meal.household_id)
     if body.meal_date is not None:
         meal.meal_date = date.fromisoformat(body.meal_date)
     if body.meal_slot_id is not None:
         meal.meal_slot_id = body.meal_slot_id
-    db.commit()
-    db.refresh(meal)
-    meal.member = db.get(Member, meal.member_id)
-    meal.member.user = db.get(User, meal.member.user_id)
-    return PlannedMealResponse(
-        id=meal.id,
-        household_id=meal.household_id,
-        meal_date=meal.meal_date.isoformat(),
-        meal_slot_id=meal.meal_slot_id,
-        member_id=meal.member_id,
-        member_display_name=meal.member.user.display_name or meal.member.user.email,
-        member_color=meal.member.event_color or DEFAULT_MEMBER_EVENT_COLOR,
-        description=meal.description,
-        created_at=meal.created_at,
-    )
+    await db.commit()
+    await db.refresh(meal)
+    return planned_meal_to_response(meal, await db.run_sync(load_member_labels, [meal.member_id]))
 
 
 @router.delete("/planned-meals/{meal_id}", status_code=204)
-def delete_planned_meal(
+async def delete_planned_meal(
     meal_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    auth: AuthContext = Depends(get_auth_context),
+    db: AsyncSession = Depends(get_db),
 ):
     """Remove a planned meal."""
-    meal = db.get(PlannedMeal, meal_id)
+    meal = await db.get(PlannedMeal, meal_id)
     if not meal:
         raise HTTPException(status_code=404, detail="Planned meal not found")
-    _ensure_member(db, current_user.id, meal.household_id)
-    db.delete(meal)
-    db.commit()
+    auth.require_member(meal.household_id)
+    await db.delete(meal)
+    await db.commit()
     return None
 
 
+@router.post("/planned-meals/copy", response_model=PlannedMealBulkResponse)
+async def copy_planned_meals(
+    body: PlannedMealCopy,
+    auth: AuthContext = Depends(get_auth_context),
+    db: AsyncSession = Depends(get_db),
+):
+    """Copy a date range's meals (assignee and description per day/slot) to the range starting on
+    target_start, overwriting meals already there; one upsert in one transaction. With dry_run, returns
+    the same result without writing."""
+    auth.require_member(body.household_id)
+    days = (body.source_end - body.source_start).days + 1
+    if not 1 <= days <= meal_plans.MAX_PLAN_DAYS:
+        raise HTTPException(status_code=400, detail=f"source range must be 1 to {meal_plans.MAX_PLAN_DAYS} days")
+    rows = await db.run_sync(
+        meal_plans.repeat_meals, body.household_id, body.source_start, days, body.target_start, days
+    )
+    return await _apply_meal_plan(db, body.household_id, rows, body.dry_run)
+
+
+@router.post("/planned-meals/rotation", response_model=PlannedMealBulkResponse)
+async def apply_meal_rotation(
+    body: PlannedMealRotation,
+    auth: AuthContext = Depends(get_auth_context),
+    db: AsyncSession = Depends(get_db),
+):
+    """Repeat a template of template_weeks weeks (from template_start) over `weeks` weeks from start_date,
+    overwriting meals already there; one upsert in one transaction. With dry_run, returns the same
+    result without writing."""
+    auth.require_member(body.household_id)
+    if not 1 <= body.template_weeks <= 4:
+        raise HTTPException(status_code=400, detail="template_weeks must be 1 to 4")
+    if not 1 <= body.weeks * 7 <= meal_plans.MAX_PLAN_DAYS:
+        raise HTTPException(status_code=400, detail=f"weeks must be 1 to {meal_plans.MAX_PLAN_DAYS // 7}")
+    rows = await db.run_sync(
+        meal_plans.repeat_meals, body.household_id, body.template_start, body.template_weeks * 7, body.start_date, body.weeks * 7
+    )
+    return await _apply_meal_plan(db, body.household_id, rows, body.dry_run)
+
+
 @router.post("/planned-meals/swap", status_code=204)
-def swap_planned_meals(
+async def swap_planned_meals(
     body: PlannedMealSwap,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    auth: AuthContext = Depends(get_auth_context),
+    db: AsyncSession = Depends(get_db),
 ):
-    """Swap two planned meals' dates and slots. Both must belong to the same household."""
-    meal_a = db.get(PlannedMeal, body.meal_id_a)
-    meal_b = db.get(PlannedMeal, body.meal_id_b)
+    """Swap two planned meals between their dates and slots, in one transaction (neither day/slot is
+    ever empty). Both must belong to the same household."""
+    # One SELECT (one snapshot) of both rows, locked where the database supports it, so a concurrent
+    # swap cannot interleave and duplicate one of the meals
+    meals = {m.id: m for m in (await db.scalars(
+        select(PlannedMeal).where(PlannedMeal.id.in_([body.meal_id_a, body.meal_id_b])).with_for_update()
+    )).all()}
+    meal_a, meal_b = meals.get(body.meal_id_a), meals.get(body.meal_id_b)
     if not meal_a or not meal_b:
         raise HTTPException(status_code=404, detail="One or both meals not found")
     if meal_a.household_id != meal_b.household_id:
         raise HTTPException(status_code=400, detail="Meals must be in the same household")
-    _ensure_member(db, current_user.id, meal_a.household_id)
-    household_id = meal_a.household_id
-    # Delete both then recreate in swapped positions to satisfy unique constraint
-    a_date, a_slot, a_member, a_desc = (
-        meal_a.meal_date,
-        meal_a.meal_slot_id,
-        meal_a.member_id,
-        meal_a.description,
-    )
-    b_date, b_slot, b_member, b_desc = (
-        meal_b.meal_date,
-        meal_b.meal_slot_id,
-        meal_b.member_id,
-        meal_b.description,
-    )
-    db.delete(meal_a)
-    db.delete(meal_b)
-    db.commit()
-    for meal_date, slot_id, member_id, description in [
-        (a_date, a_slot, b_member, b_desc),
-        (b_date, b_slot, a_member, a_desc),
-    ]:
-        m = PlannedMeal(
-            household_id=household_id,
-            meal_date=meal_date,
-            meal_slot_id=slot_id,
-            member_id=member_id,
-            description=description,
-        )
-        db.add(m)
-    db.commit()
+    auth.require_member(meal_a.household_id)
+    await db.run_sync(meal_plans.swap_planned_meals, meal_a, meal_b)
+    await db.commit()
     return None
@@ -1,12 +1,14 @@
 """Member CRUD routes."""
 
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy import func
-from sqlalchemy.orm import Session, joinedload
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
 
-from src.api.routes.auth import get_current_user
-from src.db.session import get_db
-from src.models.database import Member, User
+from src.api.conditional import household_etag, not_modified
+from src.api.routes.auth import AuthContext, get_auth_context
+from src.db.session import get_db, scalars_per_shard
+from src.models.database import Member
 from src.models.schemas import (
     DEFAULT_MEMBER_EVENT_COLOR,
     MemberCreate,
@@ -16,62 +18,57 @@ from src.models.schemas import (
 
 router = APIRouter(prefix="/api/members", tags=["members"])
 
+# MemberResponse nests the member's user and household
+_WITH_USER_AND_HOUSEHOLD = (joinedload(Member.user), joinedload(Member.household))
 
-def _user_household_ids(db: Session, user_id: int) -> list[int]:
-    rows = db.query(Member.household_id).filter(Member.user_id == user_id).all()
-    return [r[0] for r in rows]
+
+async def _get_member(db: AsyncSession, member_id: int) -> Member | None:
+    # populate_existing: a member this session just created is in its identity map without its relationships
+    return await db.get(Member, member_id, options=_WITH_USER_AND_HOUSEHOLD, populate_existing=True)
 
 
 @router.get("", response_model=list[MemberResponse])
-def list_members(
+async def list_members(
+    request: Request,
+    response: Response,
     household_id: int | None = Query(None, description="Filter by household; omit to list members of all your households"),
-    _: str | None = Query(None, include_in_schema=False),  # cache-busting; ignored
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    auth: AuthContext = Depends(get_auth_context),
+    db: AsyncSession = Depends(get_db),
 ):
-    """List members of households the current user is in. If household_id is omitted, returns members of all households the user belongs to."""
-    hid_list = _user_household_ids(db, current_user.id)
+    """List members of households the current user is in. If household_id is omitted, returns members of all households the user belongs to.
+    Honours If-None-Match with 304."""
+    hid_list = auth.household_ids
+    if household_id is not None and household_id not in hid_list:
+        raise HTTPException(status_code=403, detail="You are not a member of this household")
+    tag = await household_etag(db, [household_id] if household_id is not None else hid_list, ("members",))
+    cached = not_modified(request, response, tag)
+    if cached is not None:
+        return cached
     if household_id is not None:
-        if household_id not in hid_list:
-            raise HTTPException(status_code=403, detail="You are not a member of this household")
-        return (
-            db.query(Member)
-            .options(joinedload(Member.user))
-            .filter(Member.household_id == household_id)
-            .all()
-        )
+        return (await db.scalars(
+            select(Member).options(*_WITH_USER_AND_HOUSEHOLD).where(Member.household_id == household_id)
+        )).all()
     if not hid_list:
         return []
-    return (
-        db.query(Member)
-        .options(joinedload(Member.user))
-        .filter(Member.household_id.in_(hid_list))
-        .all()
+    return await scalars_per_shard(
+        db, hid_list, lambda ids: select(Member).options(*_WITH_USER_AND_HOUSEHOLD).where(Member.household_id.in_(ids))
     )
 
 
 @router.post("", response_model=MemberResponse, status_code=201)
-def create_member(
+async def create_member(
     body: MemberCreate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    auth: AuthContext = Depends(get_auth_context),
+    db: AsyncSession = Depends(get_db),
 ):
     """Add the current user as a member of a household (e.g. after creating the household). Only self-add allowed."""
-    if body.user_id != current_user.id:
+    if body.user_id != auth.user.id:
         raise HTTPException(status_code=403, detail="You can only add yourself as a member")
-    existing = (
-        db.query(Member)
-        .filter(
-            Member.user_id == body.user_id,
-            Member.household_id == body.household_id,
-        )
-        .first()
-    )
-    if existing:
+    if auth.membership(body.household_id):
         raise HTTPException(
             status_code=400, detail="User is already a member of this household"
         )
-    count = db.query(func.count(Member.id)).filter(Member.household_id == body.household_id).scalar()
+    count = await db.scalar(select(func.count(Member.id)).where(Member.household_id == body.household_id))
     role = body.role
     if count == 0:
         role = "owner"
@@ -82,80 +79,57 @@ def create_member(
         event_color=body.event_color or DEFAULT_MEMBER_EVENT_COLOR,
     )
     db.add(member)
-    db.commit()
-    db.refresh(member)
-    return member
+    await db.commit()
+    return await _get_member(db, member.id)
 
 
 @router.get("/{member_id}", response_model=MemberResponse)
-def get_member(
+async def get_member(
     member_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    auth: AuthContext = Depends(get_auth_context),
+    db: AsyncSession = Depends(get_db),
 ):
     """Get a member by id. Only allowed if the member is in a household the current user is in."""
-    member = db.get(Member, member_id)
+    member = await _get_member(db, member_id)
     if not member:
         raise HTTPException(status_code=404, detail="Member not found")
-    hid_list = _user_household_ids(db, current_user.id)
-    if member.household_id not in hid_list:
-        raise HTTPException(status_code=404, detail="Member not found")
+    auth.require_member(member.household_id, detail="Member not found", status_code=404)
     return member
 
 
 @router.patch("/{member_id}", response_model=MemberResponse)
-def update_member(
+async def update_member(
     member_id: int,
     body: MemberUpdate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    auth: AuthContext = Depends(get_auth_context),
+    db: AsyncSession = Depends(get_db),
 ):
     """Update a member. Allowed if same household; only owners can change role."""
-    member = db.get(Member, member_id)
+    member = await _get_member(db, member_id)
     if not member:
         raise HTTPException(status_code=404, detail="Member not found")
-    hid_list = _user_household_ids(db, current_user.id)
-    if member.household_id not in hid_list:
-        raise HTTPException(status_code=404, detail="Member not found")
-    my_membership = (
-        db.query(Member)
-        .filter(
-            Member.household_id == member.household_id,
-            Member.user_id == current_user.id,
-        )
-        .first()
-    )
-    if body.role is not None and my_membership and my_membership.role != "owner":
+    my_membership = auth.require_member(member.household_id, detail="Member not found", status_code=404)
+    if body.role is not None and my_membership.role != "owner":
         raise HTTPException(status_code=403, detail="Only the household owner can change roles")
     if body.role is not None:
         member.role = body.role
     if body.event_color is not None:
         member.event_color = body.event_color
-    db.commit()
-    db.refresh(member)
+    await db.commit()
     return member
 
 
 @router.delete("/{member_id}", status_code=204)
-def delete_member(
+async def delete_member(
     member_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    auth: AuthContext = Depends(get_auth_context),
+    db: AsyncSession = Depends(get_db),
 ):
     """Remove a member from the household. Only an owner/manager of that household can remove members."""
-    member = db.get(Member, member_id)
+    member = await db.get(Member, member_id)
     if not member:
         raise HTTPException(status_code=404, detail="Member not found")
-    my_membership = (
-        db.query(Member)
-        .filter(
-            Member.household_id == member.household_id,
-            Member.user_id == current_user.id,
-        )
-        .first()
-    )
-    if not my_membership:
-        raise HTTPException(status_code=403, detail="You are not in this household")
+    my_membership = auth.require_member(member.household_id, detail="You are not in this household")
     if my_membership.role != "owner":
         raise HTTPException(
             status_code=403,
@@ -166,6 +140,6 @@ def delete_member(
             status_code=400,
             detail="Cannot remove an owner. They must leave or be demoted first.",
         )
-    db.delete(member)
-    db.commit()
+    await db.delete(member)
+    await db.commit()
     return None
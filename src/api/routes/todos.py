@@ -1,53 +1,52 @@
 """Household to-do list routes. Only members of the household can access."""
 
-from datetime import datetime, timedelta
+from datetime import datetime
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from src.api.routes.auth import get_current_user
+from src.api.conditional import not_modified
+from src.api.routes.auth import AuthContext, Membership, get_auth_context
+from src.db import write_queue
 from src.db.session import get_db
-from src.models.database import Member, TodoItem, User
+from src.models.database import TodoItem
 from src.models.schemas import (
     DEFAULT_MEMBER_EVENT_COLOR,
+    TodoItemBulkUpdate,
     TodoItemCreate,
+    TodoItemOrder,
     TodoItemResponse,
     TodoItemUpdate,
 )
+from src.services import bulk_updates, change_log, ranking, revisions, todo_retention
+from src.services.member_directory import MemberLabel, load_member_labels
 
 router = APIRouter(prefix="/api/todos", tags=["todos"])
 
-DAYS_TO_KEEP_CHECKED = 7
 
+def _ensure_member_of_household(auth: AuthContext, household_id: int) -> Membership:
+    return auth.require_member(household_id, detail="You must be a member of this household")
 
-def _ensure_member_of_household(db: Session, user_id: int, household_id: int) -> Member | None:
-    member = (
-        db.query(Member)
-        .filter(Member.user_id == user_id, Member.household_id == household_id)
-        .first()
-    )
-    if not member:
-        raise HTTPException(
-            status_code=403, detail="You must be a member of this household"
-        )
-    return member
-
-
-def _ensure_can_access_todo(db: Session, user_id: int, todo: TodoItem) -> None:
-    _ensure_member_of_household(db, user_id, todo.household_id)
-
-
-def _todo_to_response(db: Session, item: TodoItem) -> TodoItemResponse:
-    member_name = None
-    member_color = None
-    if item.member_id:
-        member = db.get(Member, item.member_id)
-        if member:
-            if member.user_id:
-                user = db.get(User, member.user_id)
-                if user:
-                    member_name = user.display_name or user.email
-            member_color = (member.event_color if member else None) or DEFAULT_MEMBER_EVENT_COLOR
+
+def _ensure_can_access_todo(auth: AuthContext, todo: TodoItem) -> None:
+    _ensure_member_of_household(auth, todo.household_id)
+
+
+def _move_rank(db: Session, item: TodoItem, after_id: int | None, before_id: int | None) -> str:
+    try:
+        return ranking.move_rank(db, item, after_id, before_id)
+    except LookupError:
+        raise HTTPException(status_code=400, detail="Neighbour to-do item not found in this list")
+    except ranking.RankConflict:
+        raise HTTPException(status_code=400, detail="after_id must come before before_id")
+
+
+def todo_to_response(item: TodoItem, labels: dict[int, MemberLabel]) -> TodoItemResponse:
+    label = labels.get(item.member_id) if item.member_id else None
+    member_name = label.display_name if label else None
+    member_color = (label.color or DEFAULT_MEMBER_EVENT_COLOR) if label else None
     return TodoItemResponse(
         id=item.id,
         household_id=item.household_id,
@@ -55,7 +54,7 @@ def _todo_to_response(db: Session, item: TodoItem) -> TodoItemResponse:
         is_section_header=item.is_section_header,
         is_checked=item.is_checked,
         checked_at=item.checked_at,
-        position=item.position,
+        rank=item.rank,
         created_at=item.created_at,
         member_id=item.member_id,
         member_display_name=member_name,
@@ -63,102 +62,184 @@ def _todo_to_response(db: Session, item: TodoItem) -> TodoItemResponse:
     )
 
 
-@router.get("", response_model=list[TodoItemResponse])
-def list_todos(
-    household_id: int = Query(..., description="Household whose list to return"),
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
-):
-    """List to-do items for a household. Items checked off 7+ days ago are removed."""
-    _ensure_member_of_household(db, current_user.id, household_id)
+def _validate_bulk_ids(ids: list[int]) -> None:
+    try:
+        bulk_updates.validate_ids(ids)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 
-    cutoff = datetime.utcnow() - timedelta(days=DAYS_TO_KEEP_CHECKED)
-    db.query(TodoItem).filter(
-        TodoItem.household_id == household_id,
-        TodoItem.is_checked.is_(True),
-        TodoItem.checked_at < cutoff,
-    ).delete(synchronize_session=False)
-    db.commit()
+def _bulk_response(db: Session, household_id: int, ids: list[int]) -> list[TodoItemResponse]:
+    """Serialize the rows a bulk request touched (current values, in list order); 404 if any is missing.
 
+    Call before committing: a missing id rolls the whole request back.
+    """
     items = (
         db.query(TodoItem)
-        .filter(TodoItem.household_id == household_id)
-        .order_by(TodoItem.position.asc(), TodoItem.id.asc())
+        .filter(TodoItem.household_id == household_id, TodoItem.id.in_(ids))
+        .order_by(TodoItem.rank.asc(), TodoItem.id.asc())
+        .populate_existing()
         .all()
     )
-    return [_todo_to_response(db, item) for item in items]
+    if len(items) != len(ids):
+        db.rollback()
+        raise HTTPException(status_code=404, detail="Todo item not found")
+    labels = load_member_labels(db, (item.member_id for item in items))
+    return [todo_to_response(item, labels) for item in items]
+
+
+@router.get("", response_model=list[TodoItemResponse])
+async def list_todos(
+    request: Request,
+    response: Response,
+    household_id: int = Query(..., description="Household whose list to return"),
+    auth: AuthContext = Depends(get_auth_context),
+    db: AsyncSession = Depends(get_db),
+):
+    """List to-do items for a household. Items checked off 7+ days ago are hidden (and later purged by
+    the todo sweeper, see src/services/todo_retention.py). Honours If-None-Match with 304."""
+    _ensure_member_of_household(auth, household_id)
+    tag = await db.run_sync(revisions.etag, [household_id], ("todos", "members"), todo_retention.next_expiry(household_id))
+    cached = not_modified(request, response, tag)
+    if cached is not None:
+        return cached
+
+    items = (await db.scalars(
+        select(TodoItem)
+        .where(TodoItem.household_id == household_id, todo_retention.not_expired())
+        .order_by(TodoItem.rank.asc(), TodoItem.id.asc())
+    )).all()
+    labels = await db.run_sync(load_member_labels, [item.member_id for item in items])
+    return [todo_to_response(item, labels) for item in items]
 
 
 @router.post("", response_model=TodoItemResponse, status_code=201)
-def create_todo(
+async def create_todo(
     body: TodoItemCreate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    auth: AuthContext = Depends(get_auth_context),
+    db: AsyncSession = Depends(get_db),
 ):
     """Add a to-do item or section header to a household list."""
-    member = _ensure_member_of_household(db, current_user.id, body.household_id)
-
-    position = body.position
-    if position is None:
-        max_pos = (
-            db.query(TodoItem)
-            .filter(TodoItem.household_id == body.household_id)
-            .count()
-        )
-        position = max_pos
+    member = _ensure_member_of_household(auth, body.household_id)
 
     item = TodoItem(
         household_id=body.household_id,
-        member_id=member.id,
+        member_id=member.member_id,
         content=body.content.strip() or "New item",
         is_section_header=body.is_section_header,
-        position=position,
+        rank=await db.run_sync(ranking.append_rank, TodoItem, body.household_id),
     )
     db.add(item)
-    db.commit()
-    db.refresh(item)
-    return _todo_to_response(db, item)
+    await db.commit()
+    await db.refresh(item)
+    return todo_to_response(item, await db.run_sync(load_member_labels, [item.member_id]))
+
+
+@router.patch("", response_model=list[TodoItemResponse])
+async def update_todos(
+    body: TodoItemBulkUpdate,
+    auth: AuthContext = Depends(get_auth_context),
+    db: AsyncSession = Depends(get_db),
+):
+    """Apply many partial updates (e.g. check off a batch) in one transaction and one UPDATE.
+    Returns the affected items in list order."""
+    _ensure_member_of_household(auth, body.household_id)
+    ids = [change.id for change in body.items]
+    _validate_bulk_ids(ids)
+    if not ids:
+        return []
+    now = datetime.utcnow()
+    changes = {}
+    for change in body.items:
+        values = {}
+        if change.content and change.content.strip():
+            values["content"] = change.content.strip()
+        if change.is_section_header is not None:
+            values["is_section_header"] = change.is_section_header
+        if change.is_checked is not None:
+            values["is_checked"] = change.is_checked
+            values["checked_at"] = now if change.is_checked else None
+        changes[change.id] = values
+
+    def apply(session: Session) -> list[TodoItemResponse]:
+        bulk_updates.apply_changes(session, TodoItem, TodoItem.household_id == body.household_id, changes)
+        response = _bulk_response(session, body.household_id, ids)
+        change_log.record(session, TodoItem, body.household_id, ids)
+        session.commit()
+        return response
+
+    return await db.run_sync(apply)
+
+
+@router.put("/order", response_model=list[TodoItemResponse])
+async def reorder_todos(
+    body: TodoItemOrder,
+    auth: AuthContext = Depends(get_auth_context),
+    db: AsyncSession = Depends(get_db),
+):
+    """Put the given items in the given order (they take over each other's places) with one UPDATE.
+    Sending every id of the list sets the whole order. Returns the items in their new order."""
+    _ensure_member_of_household(auth, body.household_id)
+    _validate_bulk_ids(body.ids)
+    if not body.ids:
+        return []
+
+    def apply(session: Session) -> list[TodoItemResponse]:
+        try:
+            ranking.reorder(session, TodoItem, body.household_id, body.ids)
+        except LookupError:
+            raise HTTPException(status_code=404, detail="Todo item not found")
+        response = _bulk_response(session, body.household_id, body.ids)
+        session.commit()
+        return response
+
+    return await db.run_sync(apply)
 
 
 @router.patch("/{todo_id}", response_model=TodoItemResponse)
-def update_todo(
+async def update_todo(
     todo_id: int,
     body: TodoItemUpdate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    auth: AuthContext = Depends(get_auth_context),
+    db: AsyncSession = Depends(get_db),
 ):
-    """Update a to-do item (content, section header, or checked state)."""
-    item = db.get(TodoItem, todo_id)
+    """Update a to-do item (content, section header, checked state) or move it between two neighbours.
+    A hot small write: it goes through the SQLite writer queue when that is on (src/db/write_queue.py)."""
+    item = await db.get(TodoItem, todo_id)
     if not item:
         raise HTTPException(status_code=404, detail="Todo item not found")
-    _ensure_can_access_todo(db, current_user.id, item)
-
-    if body.content is not None:
-        item.content = body.content.strip() if body.content else item.content
-    if body.is_section_header is not None:
-        item.is_section_header = body.is_section_header
-    if body.position is not None:
-        item.position = body.position
-    if body.is_checked is not None:
-        item.is_checked = body.is_checked
-        item.checked_at = datetime.utcnow() if body.is_checked else None
-
-    db.commit()
-    db.refresh(item)
-    return _todo_to_response(db, item)
+    _ensure_can_access_todo(auth, item)
+
+    def apply(session: Session) -> None:
+        target = session.get(TodoItem, todo_id)
+        if target is None:
+            raise HTTPException(status_code=404, detail="Todo item not found")
+        if body.content is not None:
+            target.content = body.content.strip() if body.content else target.content
+        if body.is_section_header is not None:
+            target.is_section_header = body.is_section_header
+        if body.after_id is not None or body.before_id is not None:
+            target.rank = _move_rank(session, target, body.after_id, body.before_id)
+        if body.is_checked is not None:
+            target.is_checked = body.is_checked
+            target.checked_at = datetime.utcnow() if body.is_checked else None
+
+    await write_queue.run_write(db, apply)
+    await db.refresh(item)
+    return todo_to_response(item, await db.run_sync(load_member_labels, [item.member_id]))
 
 
 @router.delete("/{todo_id}", status_code=204)
-def delete_todo(
+async def delete_todo(
     todo_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    auth: AuthContext = Depends(get_auth_context),
+    db: AsyncSession = Depends(get_db),
 ):
     """Remove a to-do item from the list."""
-    item = db.get(TodoItem, todo_id)
+    item = await db.get(TodoItem, todo_id)
     if not item:
         raise HTTPException(status_code=404, detail="Todo item not found")
-    _ensure_can_access_todo(db, current_user.id, item)
-    db.delete(item)
-    db.commit()
+    _ensure_can_access_todo(auth, item)
+    await db.delete(item)
+    await db.commit()
     return None
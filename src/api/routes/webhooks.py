@@ -0,0 +1,31 @@
+"""Inbound webhooks from external services (no user session; each request is authenticated by its own secret)."""
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.db.session import get_db, locate
+from src.models.database import CalendarSnapshot
+from src.services import calendar_snapshots
+
+router = APIRouter(prefix="/api/webhooks", tags=["webhooks"])
+
+
+@router.post("/google-calendar", status_code=204)
+async def google_calendar_notification(
+    x_goog_channel_id: str | None = Header(None),
+    x_goog_channel_token: str | None = Header(None),
+    x_goog_resource_id: str | None = Header(None),
+    x_goog_resource_state: str | None = Header(None),
+    db: AsyncSession = Depends(get_db),
+):
+    """Google Calendar push notification for a watch channel. Marks that calendar's event snapshot as
+    changed so only it is refetched. Unknown channels or a wrong channel token get 404."""
+    if x_goog_channel_id:
+        # Moves db to the channel's shard when sharding is on
+        await locate(db, select(CalendarSnapshot.calendar_id).where(CalendarSnapshot.channel_id == x_goog_channel_id))
+    if not await db.run_sync(
+        calendar_snapshots.handle_notification, x_goog_channel_id, x_goog_channel_token, x_goog_resource_id, x_goog_resource_state
+    ):
+        raise HTTPException(status_code=404, detail="Unknown channel")
+    return Response(status_code=204)
@@ -63,6 +63,107 @@ class Settings:
         self.ENCRYPTION_KEY: Optional[str] = os.getenv("ENCRYPTION_KEY")
         self.ENCRYPTION_KEY_PREVIOUS: Optional[str] = os.getenv("ENCRYPTION_KEY_PREVIOUS")
 
+        # How long a user's cached Google calendar list (calendar picker) counts as fresh.
+        # Stale lists are still served while a background refresh revalidates them with Google (ETag).
+        self.GOOGLE_CALENDAR_LIST_TTL_SECONDS: int = int(
+            os.getenv("GOOGLE_CALENDAR_LIST_TTL_SECONDS", "900")
+        )
+
+        # Household agenda (wall-tablet view): days ahead to precompute and how often to rebuild (0 disables)
+        self.AGENDA_DAYS: int = int(os.getenv("AGENDA_DAYS", "2"))
+        self.AGENDA_REFRESH_SECONDS: int = int(os.getenv("AGENDA_REFRESH_SECONDS", "300"))
+
+        # Household .ics feed snapshot: days of history / future copied and how often to rebuild (0 disables)
+        self.FEED_PAST_DAYS: int = int(os.getenv("FEED_PAST_DAYS", "90"))
+        self.FEED_FUTURE_DAYS: int = int(os.getenv("FEED_FUTURE_DAYS", "730"))
+        self.FEED_REFRESH_SECONDS: int = int(os.getenv("FEED_REFRESH_SECONDS", "900"))
+
+        # ICS subscription calendars: how often URLs are polled (0 disables) and the instance window stored
+        self.ICS_REFRESH_SECONDS: int = int(os.getenv("ICS_REFRESH_SECONDS", "1800"))
+        self.ICS_PAST_DAYS: int = int(os.getenv("ICS_PAST_DAYS", "90"))
+        self.ICS_FUTURE_DAYS: int = int(os.getenv("ICS_FUTURE_DAYS", "400"))
+        # Allow ICS URLs on loopback / private / link-local addresses (calendars on the local network).
+        # Off by default: subscriptions are fetched server-side, so they could otherwise reach internal hosts.
+        self.ICS_ALLOW_PRIVATE_URLS: bool = os.getenv("ICS_ALLOW_PRIVATE_URLS", "").lower() in ("1", "true", "yes")
+
+        # Google event snapshots per calendar (served by GET /api/events until the calendar changes).
+        # GOOGLE_WATCH_WEBHOOK_URL is the public HTTPS URL of /api/webhooks/google-calendar; without it no
+        # watch channels are opened and snapshots are simply refetched after GOOGLE_SNAPSHOT_MAX_AGE_SECONDS.
+        self.GOOGLE_SNAPSHOT_PAST_DAYS: int = int(os.getenv("GOOGLE_SNAPSHOT_PAST_DAYS", "60"))
+        self.GOOGLE_SNAPSHOT_FUTURE_DAYS: int = int(os.getenv("GOOGLE_SNAPSHOT_FUTURE_DAYS", "180"))
+        self.GOOGLE_SNAPSHOT_MAX_AGE_SECONDS: int = int(os.getenv("GOOGLE_SNAPSHOT_MAX_AGE_SECONDS", "300"))
+        self.GOOGLE_SYNC_SECONDS: int = int(os.getenv("GOOGLE_SYNC_SECONDS", "300"))
+        self.GOOGLE_WATCH_WEBHOOK_URL: Optional[str] = os.getenv("GOOGLE_WATCH_WEBHOOK_URL")
+        self.GOOGLE_WATCH_TTL_SECONDS: int = int(os.getenv("GOOGLE_WATCH_TTL_SECONDS", "604800"))
+        self.GOOGLE_WATCH_RENEW_BEFORE_SECONDS: int = int(os.getenv("GOOGLE_WATCH_RENEW_BEFORE_SECONDS", "86400"))
+
+        # Checked to-do items expire after 7 days; the sweeper deletes them every TODO_SWEEP_SECONDS (0
+        # disables) in transactions of at most TODO_SWEEP_BATCH_SIZE rows. Reads hide expired items either way.
+        self.TODO_SWEEP_SECONDS: int = int(os.getenv("TODO_SWEEP_SECONDS", "3600"))
+        self.TODO_SWEEP_BATCH_SIZE: int = int(os.getenv("TODO_SWEEP_BATCH_SIZE", "500"))
+
+        # To-do and grocery items are ordered by lexicographic rank keys; the rebalance job (every
+        # RANK_REBALANCE_SECONDS, 0 disables) rewrites a list's keys once one is longer than RANK_MAX_LENGTH.
+        self.RANK_REBALANCE_SECONDS: int = int(os.getenv("RANK_REBALANCE_SECONDS", "3600"))
+        self.RANK_MAX_LENGTH: int = int(os.getenv("RANK_MAX_LENGTH", "24"))
+
+        # Delta sync: tombstones of deleted rows are kept CHANGE_TOMBSTONE_DAYS; the prune job runs every
+        # CHANGE_PRUNE_SECONDS (0 disables). Clients that last synced before a pruned delete must reload.
+        self.CHANGE_PRUNE_SECONDS: int = int(os.getenv("CHANGE_PRUNE_SECONDS", "86400"))
+        self.CHANGE_TOMBSTONE_DAYS: int = int(os.getenv("CHANGE_TOMBSTONE_DAYS", "30"))
+
+        # Push updates (GET /api/households/{id}/events): pub/sub backend shared by the workers ("local" =
+        # this process only; "postgres" = LISTEN/NOTIFY on DATABASE_URL), messages buffered per slow
+        # subscriber before the oldest are dropped, and seconds between keep-alive comments.
+        self.PUBSUB_BACKEND: str = os.getenv("PUBSUB_BACKEND", "local")
+        self.PUSH_QUEUE_SIZE: int = int(os.getenv("PUSH_QUEUE_SIZE", "16"))
+        self.PUSH_HEARTBEAT_SECONDS: int = int(os.getenv("PUSH_HEARTBEAT_SECONDS", "15"))
+
+        # SQLite profile (ignored on other databases), applied to every connection: journal mode (WAL lets
+        # readers run during a write), how long a writer waits for the lock before "database is locked",
+        # fsync level (NORMAL is safe with WAL: a power loss can drop the last commits, never corrupt),
+        # page cache and memory-mapped I/O sizes. Foreign keys are always enforced.
+        self.SQLITE_JOURNAL_MODE: str = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+        self.SQLITE_BUSY_TIMEOUT_MS: int = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+        self.SQLITE_SYNCHRONOUS: str = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+        self.SQLITE_CACHE_SIZE_KB: int = int(os.getenv("SQLITE_CACHE_SIZE_KB", "65536"))
+        self.SQLITE_MMAP_SIZE_MB: int = int(os.getenv("SQLITE_MMAP_SIZE_MB", "256"))
+        # Single-writer queue (src/db/write_queue.py, SQLite only; 0 = off): hot small writes run on one
+        # writer thread, up to SQLITE_WRITE_BATCH queued ones per transaction (one commit, one fsync).
+        self.SQLITE_WRITE_QUEUE: int = int(os.getenv("SQLITE_WRITE_QUEUE", "0"))
+        self.SQLITE_WRITE_BATCH: int = int(os.getenv("SQLITE_WRITE_BATCH", "64"))
+
+        # Connection pool (SQLite files and PostgreSQL): connections kept open, extra ones allowed in a
+        # burst, seconds a request waits for a connection before failing, seconds after which a
+        # connection is replaced (managed Postgres and proxies drop idle ones; -1 = never) and whether
+        # to test each connection on checkout (1) so a dropped one is replaced instead of failing.
+        self.DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "10"))
+        self.DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+        self.DB_POOL_TIMEOUT: int = int(os.getenv("DB_POOL_TIMEOUT", "10"))
+        self.DB_POOL_RECYCLE: int = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+        self.DB_POOL_PRE_PING: int = int(os.getenv("DB_POOL_PRE_PING", "1"))
+        # PostgreSQL only: statement_timeout (ms; 0 = none), idle_in_transaction_session_timeout (ms;
+        # 0 = none) and the application_name shown in pg_stat_activity.
+        self.DB_STATEMENT_TIMEOUT_MS: int = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "30000"))
+        self.DB_IDLE_IN_TRANSACTION_TIMEOUT_MS: int = int(os.getenv("DB_IDLE_IN_TRANSACTION_TIMEOUT_MS", "60000"))
+        self.DB_APPLICATION_NAME: str = os.getenv("DB_APPLICATION_NAME", "lionfish")
+        # GET /metrics (pool usage and checkout waits, Prometheus text format): bearer token required to
+        # read it; empty = open (keep it unreachable from outside then).
+        self.METRICS_TOKEN: str = os.getenv("METRICS_TOKEN", "")
+        # Read replica (same URL format as DATABASE_URL; empty = off): GET requests read from it, except for
+        # READ_YOUR_WRITES_SECONDS after the same client wrote, so its reads see its own writes.
+        self.DATABASE_REPLICA_URL: str = os.getenv("DATABASE_REPLICA_URL", "")
+        self.READ_YOUR_WRITES_SECONDS: int = int(os.getenv("READ_YOUR_WRITES_SECONDS", "10"))
+        # Household shards: comma-separated database URLs added after DATABASE_URL (shard 0); each household's
+        # rows live on one shard (see src/db/shards.py). Empty = one database.
+        self.DATABASE_SHARD_URLS: str = os.getenv("DATABASE_SHARD_URLS", "")
+
+        # Meal suggestions (type-ahead when adding a meal): per-household in-memory index of past meals.
+        # Rebuilt from the database once older than the TTL (catches other workers' writes); at most
+        # MEAL_SUGGESTIONS_HOUSEHOLDS households are kept, least recently used evicted first.
+        self.MEAL_SUGGESTIONS_TTL_SECONDS: int = int(os.getenv("MEAL_SUGGESTIONS_TTL_SECONDS", "300"))
+        self.MEAL_SUGGESTIONS_HOUSEHOLDS: int = int(os.getenv("MEAL_SUGGESTIONS_HOUSEHOLDS", "1000"))
+
         # Frontend URL (where to send user after OAuth; default localhost for dev)
         self.FRONTEND_URL: str = os.getenv("FRONTEND_URL", "http://localhost:3000")
 
@@ -0,0 +1,113 @@
+"""Connection pool instrumentation: checkout wait times and pool usage, exported on GET /metrics.
+
+InstrumentedQueuePool is the sync engine's QueuePool (see create_db_engine in session.py), and
+InstrumentedAsyncQueuePool the async engine's one, timing every checkout: the time a request waits for a
+connection is the first thing to grow when the pool is too small for a burst, long before checkouts
+start failing with DB_POOL_TIMEOUT.
+"""
+
+import bisect
+import threading
+import time
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+# Upper bounds (seconds) of the checkout wait histogram buckets
+WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0)
+
+
+class PoolMetrics:
+    """Checkout counters and wait-time histogram of one pool (thread-safe)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.bucket_counts = [0] * len(WAIT_BUCKETS)
+        self.checkouts = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.timeouts = 0
+
+    def observe(self, waited: float, timed_out: bool = False) -> None:
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+                return
+            self.checkouts += 1
+            self.wait_seconds += waited
+            self.max_wait_seconds = max(self.max_wait_seconds, waited)
+            index = bisect.bisect_left(WAIT_BUCKETS, waited)
+            if index < len(self.bucket_counts):
+                self.bucket_counts[index] += 1
+
+
+class _CheckoutTimer:
+    """Pool mixin recording how long each checkout waited for a connection."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.metrics = self.metrics  # keep counting across engine.dispose()
+        return pool
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            self.metrics.observe(time.perf_counter() - started, timed_out=True)
+            raise
+        self.metrics.observe(time.perf_counter() - started)
+        return connection
+
+
+class InstrumentedQueuePool(_CheckoutTimer, QueuePool):
+    """QueuePool that records how long each checkout waited for a connection."""
+
+
+class InstrumentedAsyncQueuePool(_CheckoutTimer, AsyncAdaptedQueuePool):
+    """The same for async engines (checkouts wait on the event loop, not a thread)."""
+
+
+def render_metrics(pools: dict) -> str:
+    """Prometheus text exposition of the pools' usage and checkout waits, labelled by engine name."""
+    lines = []
+
+    def metric(name: str, kind: str, help_text: str, samples: list[tuple[str, str, float]]) -> None:
+        # samples: (name suffix, labels, value)
+        if samples:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            lines.extend(f"{name}{suffix}{{{labels}}} {value:g}" for suffix, labels, value in samples)
+
+    queue_pools = {f'engine="{name}"': p for name, p in pools.items() if isinstance(p, QueuePool)}
+    for name, help_text, read in (
+        ("db_pool_size", "Configured pool size (DB_POOL_SIZE).", QueuePool.size),
+        ("db_pool_checked_out", "Connections currently checked out.", QueuePool.checkedout),
+        ("db_pool_checked_in", "Idle connections in the pool.", QueuePool.checkedin),
+        ("db_pool_overflow", "Connections open beyond the pool size (negative: pool not full yet).", QueuePool.overflow),
+    ):
+        metric(name, "gauge", help_text, [("", labels, read(p)) for labels, p in queue_pools.items()])
+
+    histogram, max_waits, timeouts = [], [], []
+    for name, p in pools.items():
+        stats = getattr(p, "metrics", None)
+        if stats is None:
+            continue
+        labels = f'engine="{name}"'
+        with stats._lock:
+            buckets, count, total = list(stats.bucket_counts), stats.checkouts, stats.wait_seconds
+            max_waits.append(("", labels, stats.max_wait_seconds))
+            timeouts.append(("", labels, stats.timeouts))
+        cumulative = 0
+        for bound, bucket in zip(WAIT_BUCKETS, buckets):
+            cumulative += bucket
+            histogram.append(("_bucket", f'{labels},le="{bound:g}"', cumulative))
+        histogram += [("_bucket", f'{labels},le="+Inf"', count), ("_sum", labels, total), ("_count", labels, count)]
+    metric("db_pool_checkout_wait_seconds", "histogram", "Time spent waiting for a pooled connection.", histogram)
+    metric("db_pool_checkout_wait_max_seconds", "gauge", "Longest checkout wait since start.", max_waits)
+    metric("db_pool_checkout_timeouts_total", "counter", "Checkouts that gave up after DB_POOL_TIMEOUT.", timeouts)
+    return "\n".join(lines) + "\n"
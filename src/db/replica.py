@@ -0,0 +1,57 @@
+"""Read-replica routing (DATABASE_REPLICA_URL): which requests may read from the replica.
+
+With a replica configured, GET and HEAD requests read from it (see get_db and RequestSession.get_bind in
+session.py); writes, and every read after a request's first write, go to the primary. A replica lags the
+primary, so a client that just wrote would not find its write there: for READ_YOUR_WRITES_SECONDS after a
+write, the same user's requests (keyed by the user id in their JWT, from the session cookie or the bearer
+token) read from the primary too.
+
+The window is kept per worker process. With several workers, a client's next read may land on a worker
+that did not see its write; keep the load balancer's sessions sticky, or the replica's lag well below the
+time between a write and the client's next read.
+"""
+
+import threading
+import time
+
+from src.config import settings
+
+# Expired entries are dropped once this many clients are tracked
+_PRUNE_AT = 1024
+
+
+class RecentWriters:
+    """Clients that wrote within the last READ_YOUR_WRITES_SECONDS (thread-safe)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._until: dict[str, float] = {}
+
+    def wrote(self, key: str) -> None:
+        now = time.monotonic()
+        with self._lock:
+            if len(self._until) >= _PRUNE_AT:
+                self._until = {k: until for k, until in self._until.items() if until > now}
+            self._until[key] = now + settings.READ_YOUR_WRITES_SECONDS
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            until = self._until.get(key)
+        return until is not None and until > time.monotonic()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._until.clear()
+
+
+recent_writers = RecentWriters()
+
+
+def client_key(request) -> str | None:
+    """Read-your-writes key of a request: the signed-in user's id (the JWT's "sub", read as the auth
+    dependency reads it: session cookie first, then bearer token). None for anonymous requests."""
+    from src.api.routes import auth  # auth imports src.db.session, which imports this module
+
+    token = auth.token_from_request(request, request.headers.get("authorization"))
+    payload = auth.decode_token(token) if token else None
+    return payload.get("sub") if payload else None
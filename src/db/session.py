@@ -1,27 +1,180 @@
-"""Database session management."""
+"""Database session management.
 
+Two engines on DATABASE_URL: the async engine (aiosqlite / asyncpg) serves API requests through
+get_db, so handlers wait for the database on the event loop and request concurrency is bounded by the
+pool rather than by worker threads. The sync engine (SessionLocal) is for background jobs, streaming
+feeds, migrations and scripts. Sync service code (ranking, change log, revisions, ...) runs on a
+request's session with `await db.run_sync(fn, ...)`: SQLAlchemy's AsyncSession wraps a sync Session,
+whose flush hooks (change_log) fire the same on both.
+
+With DATABASE_REPLICA_URL set, GET requests read from a third engine on the replica (see replica.py).
+With DATABASE_SHARD_URLS set, each shard gets its own pair of engines (see shards.py).
+"""
+
+import asyncio
 import logging
 import os
+from contextvars import ContextVar
 from pathlib import Path
 
-from sqlalchemy import create_engine
+from typing import AsyncIterator, Awaitable, Callable, Iterable, TypeVar
+
+from fastapi import Request
+from sqlalchemy import Select, create_engine, event, func, inspect, select
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, Session
 
-from src.models.database import Base
+from src.config import settings
+from src.db import replica, shards
+from src.db.pool import InstrumentedAsyncQueuePool, InstrumentedQueuePool
+from src.models.database import Base, Household, User
+from src.services import change_log
 
 logger = logging.getLogger(__name__)
 
 # Database URL - defaults to SQLite
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./household_manager.db")
 
-# Create engine
-engine = create_engine(
-    DATABASE_URL,
-    connect_args={"check_same_thread": False} if "sqlite" in DATABASE_URL else {}
-)
 
-# Create session factory
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Async driver for each sync URL scheme of DATABASE_URL
+ASYNC_DRIVERS = {"sqlite": "aiosqlite", "postgresql": "asyncpg"}
+
+
+def async_database_url(url: str) -> str:
+    """url with its dialect's async driver (sqlite -> sqlite+aiosqlite, postgresql -> postgresql+asyncpg)."""
+    parsed = make_url(url)
+    driver = ASYNC_DRIVERS.get(parsed.get_backend_name())
+    if driver is None:
+        raise ValueError(f"No async driver for {parsed.get_backend_name()} databases")
+    return parsed.set(drivername=f"{parsed.get_backend_name()}+{driver}").render_as_string(hide_password=False)
+
+
+def _postgres_settings() -> dict[str, str]:
+    # Server-side guards, set once per connection: runaway queries are cancelled, and the
+    # connections show up under their own name in pg_stat_activity
+    server_settings = {"statement_timeout": f"{settings.DB_STATEMENT_TIMEOUT_MS:d}"}
+    if settings.DB_IDLE_IN_TRANSACTION_TIMEOUT_MS:
+        server_settings["idle_in_transaction_session_timeout"] = f"{settings.DB_IDLE_IN_TRANSACTION_TIMEOUT_MS:d}"
+    return server_settings
+
+
+def _connect_args(url: str) -> dict:
+    if url.startswith("sqlite+aiosqlite"):
+        return {}
+    if url.startswith("sqlite"):
+        return {"check_same_thread": False}
+    if url.startswith("postgresql+asyncpg"):
+        return {"server_settings": {"application_name": settings.DB_APPLICATION_NAME, **_postgres_settings()}}
+    if url.startswith("postgresql"):
+        options = " ".join(f"-c {name}={value}" for name, value in _postgres_settings().items())
+        return {"application_name": settings.DB_APPLICATION_NAME, "options": options}
+    return {}
+
+
+def _pool_kwargs(url: str, poolclass) -> dict:
+    """DB_POOL_* settings for url's engine (in-memory SQLite keeps SQLAlchemy's default pool)."""
+    if ":memory:" in url or make_url(url).database in (None, ""):
+        return {}
+    return {
+        "poolclass": poolclass,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": bool(settings.DB_POOL_PRE_PING),
+    }
+
+
+def create_db_engine(url: str):
+    """Sync engine for url with the DB_POOL_* settings."""
+    return create_engine(url, connect_args=_connect_args(url), **_pool_kwargs(url, InstrumentedQueuePool))
+
+
+def create_async_db_engine(url: str):
+    """Async engine for url (given with its sync driver) with the DB_POOL_* settings."""
+    url = async_database_url(url)
+    return create_async_engine(url, connect_args=_connect_args(url), **_pool_kwargs(url, InstrumentedAsyncQueuePool))
+
+
+# Create engines
+engine = create_db_engine(DATABASE_URL)
+async_engine = create_async_db_engine(DATABASE_URL)
+replica_engine = create_async_db_engine(settings.DATABASE_REPLICA_URL) if settings.DATABASE_REPLICA_URL else None
+# Shard 0 is DATABASE_URL; DATABASE_SHARD_URLS adds the others
+SHARD_URLS = [DATABASE_URL] + shards.parse_urls(settings.DATABASE_SHARD_URLS)
+shard_engines = [engine] + [create_db_engine(url) for url in SHARD_URLS[1:]]
+async_shard_engines = [async_engine] + [create_async_db_engine(url) for url in SHARD_URLS[1:]]
+
+
+def apply_sqlite_pragmas(dbapi_connection, connection_record=None) -> None:
+    """Apply the SQLite profile (see SQLITE_* settings) to a new connection."""
+    cursor = dbapi_connection.cursor()
+    cursor.execute(f"PRAGMA journal_mode={settings.SQLITE_JOURNAL_MODE}")
+    cursor.execute(f"PRAGMA busy_timeout={settings.SQLITE_BUSY_TIMEOUT_MS:d}")
+    cursor.execute(f"PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS}")
+    cursor.execute(f"PRAGMA cache_size=-{settings.SQLITE_CACHE_SIZE_KB:d}")
+    cursor.execute(f"PRAGMA mmap_size={settings.SQLITE_MMAP_SIZE_MB * 1024 * 1024:d}")
+    # Off by default in SQLite; without it ON DELETE CASCADE / SET NULL never fire
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.close()
+
+
+for _shard_engine, _async_shard_engine in zip(shard_engines, async_shard_engines):
+    if _shard_engine.dialect.name == "sqlite":
+        event.listen(_shard_engine, "connect", apply_sqlite_pragmas)
+        event.listen(_async_shard_engine.sync_engine, "connect", apply_sqlite_pragmas)
+if replica_engine is not None and replica_engine.dialect.name == "sqlite":
+    event.listen(replica_engine.sync_engine, "connect", apply_sqlite_pragmas)
+
+# Shard that SessionLocal sessions open on: 0, or the one each_shard is running a job on
+current_shard: ContextVar[int] = ContextVar("current_shard", default=0)
+
+
+class JobSession(Session):
+    """SessionLocal's sessions: bound to current_shard's database unless given a bind."""
+
+    def __init__(self, bind=None, **kw):
+        super().__init__(bind=bind if bind is not None else shard_engines[current_shard.get()], **kw)
+
+
+# Create session factories
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, class_=JobSession)
+change_log.install(SessionLocal)
+
+
+class RequestSession(Session):
+    """The sync Session inside each AsyncSessionLocal session (change log hooks are installed on it).
+
+    While `replica` is set (by get_db), SELECTs go to the replica; the first write sends the rest of the
+    session to the primary and opens the client's read-your-writes window.
+    """
+
+    replica = None  # async engine for this session's reads, or None (everything on the primary)
+    client_key = None  # read-your-writes key of the request (see replica.client_key)
+    shard = None  # shard the request is scoped to; None: user-level (lists fan out, see per_shard)
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if self._flushing or getattr(clause, "is_dml", False):
+            self.wrote()
+        elif self.replica is not None and getattr(clause, "is_select", False):
+            return self.replica.sync_engine
+        return super().get_bind(mapper=mapper, clause=clause, **kw)
+
+    def wrote(self) -> None:
+        """Record a write: reads from now on go to the primary, for this client's next requests too."""
+        self.replica = None
+        if self.client_key is not None:
+            replica.recent_writers.wrote(self.client_key)
+            self.client_key = None  # once per request is enough
+
+
+# expire_on_commit=False: attributes read after a commit would otherwise need a lazy load, which an
+# AsyncSession cannot do implicitly
+AsyncSessionLocal = async_sessionmaker(
+    async_engine, autoflush=False, expire_on_commit=False, sync_session_class=RequestSession
+)
+change_log.install(RequestSession)
 
 
 def run_migrations() -> None:
@@ -47,14 +200,171 @@ def run_migrations() -> None:
 
 
 def init_db() -> None:
-    """Create any missing tables (SQLAlchemy create_all)."""
+    """Create any missing tables (SQLAlchemy create_all), on every shard."""
     Base.metadata.create_all(bind=engine)
+    for index, shard_engine in enumerate(shard_engines[1:], start=1):
+        shards.init_shard(shard_engine, index, users_from=engine)
 
 
-def get_db() -> Session:
-    """Get database session."""
-    db = SessionLocal()
-    try:
+def use_primary(session: Session) -> bool:
+    """Send the session's further reads to the primary. True if it was reading from the replica (for
+    code about to write based on what it read, e.g. creating default rows it found missing)."""
+    if getattr(session, "replica", None) is None:
+        return False
+    session.replica = None
+    return True
+
+
+def shard_count() -> int:
+    return len(async_shard_engines)
+
+
+def shard_index(entity_id: int) -> int:
+    """The shard holding the household, or household row, with this id (0 for ids beyond the last shard)."""
+    index = shards.shard_for_id(entity_id)
+    return index if index < len(shard_engines) else 0
+
+
+def shard_session(entity_id: int) -> Session:
+    """A SessionLocal session on the shard of entity_id (background work for one household)."""
+    return SessionLocal(bind=shard_engines[shard_index(entity_id)])
+
+
+def request_session(shard: int | None = None) -> AsyncSession:
+    """An AsyncSessionLocal session on `shard`; None: not scoped to one (opens on shard 0)."""
+    db = AsyncSessionLocal(bind=async_shard_engines[shard or 0])
+    db.sync_session.shard = shard
+    return db
+
+
+def use_shard(db: AsyncSession, shard: int) -> None:
+    """Move a request's session to `shard`: its statements from now on run there."""
+    session = db.sync_session
+    session.bind = async_shard_engines[shard].sync_engine
+    session.shard = shard
+    if shard:
+        session.replica = None  # the replica is shard 0's
+
+
+def spans_shards(db: AsyncSession) -> bool:
+    """True for a user-level request with sharding on: its data may be on any shard."""
+    return len(async_shard_engines) > 1 and db.sync_session.shard is None
+
+
+T = TypeVar("T")
+
+
+async def fan_out(fn: Callable[[AsyncSession], Awaitable[T]], indexes: Iterable[int] | None = None) -> list[T]:
+    """fn(session) on each shard (all by default), concurrently, each in its own session."""
+
+    async def one(index: int) -> T:
+        async with request_session(index) as db:
+            return await fn(db)
+
+    indexes = range(len(async_shard_engines)) if indexes is None else indexes
+    return list(await asyncio.gather(*(one(index) for index in indexes)))
+
+
+async def per_shard(
+    db: AsyncSession, household_ids: Iterable[int], fn: Callable[[AsyncSession, list[int]], Awaitable[T]]
+) -> list[T]:
+    """fn(session, ids) for household_ids grouped by shard. Once, on db itself, when sharding is off or
+    the request is scoped to a shard; otherwise once per shard holding some of them (their own sessions)."""
+    household_ids = list(household_ids)
+    if not spans_shards(db):
+        return [await fn(db, household_ids)]
+    groups: dict[int, list[int]] = {}
+    for household_id in household_ids:
+        groups.setdefault(shard_index(household_id), []).append(household_id)
+    indexes = sorted(groups)
+    return await fan_out(lambda shard_db: fn(shard_db, groups[shard_db.sync_session.shard]), indexes)
+
+
+async def scalars_per_shard(db: AsyncSession, household_ids: Iterable[int], statement: Callable[[list[int]], Select]) -> list:
+    """All rows of statement(ids) for household_ids, from each shard holding some of them (see per_shard)."""
+
+    async def rows(shard_db: AsyncSession, ids: list[int]) -> list:
+        return list((await shard_db.scalars(statement(ids))).all())
+
+    return [row for shard_rows in await per_shard(db, household_ids, rows) for row in shard_rows]
+
+
+async def locate(db: AsyncSession, statement):
+    """The first result of a scalar `statement`. For a user-level request with sharding on, tries each
+    shard in turn and leaves db on the one that has it (lookups by token or channel id)."""
+    if not spans_shards(db):
+        return await db.scalar(statement)
+    for index in range(len(async_shard_engines)):
+        use_shard(db, index)
+        found = await db.scalar(statement)
+        if found is not None:
+            return found
+    return None
+
+
+async def place_household() -> int:
+    """Shard for a new household: the one holding the fewest (0 without sharding)."""
+    if len(async_shard_engines) == 1:
+        return 0
+    counts = await fan_out(lambda db: db.scalar(select(func.count()).select_from(Household)))
+    return counts.index(min(counts))
+
+
+def _user_row(user: User) -> dict:
+    return {attr.key: getattr(user, attr.key) for attr in inspect(User).column_attrs}
+
+
+async def copy_user(user: User) -> None:
+    """Write user's row to every shard (users are on all of them). Call after each committed change."""
+    if len(async_shard_engines) == 1:
+        return
+    row = _user_row(user)
+
+    async def merge(db: AsyncSession) -> None:
+        await db.merge(User(**row))
+        await db.commit()
+
+    await fan_out(merge)
+
+
+def copy_user_sync(user: User) -> None:
+    """copy_user for sync code (background jobs)."""
+    if len(shard_engines) == 1:
+        return
+    row = _user_row(user)
+    for shard_engine in shard_engines:
+        with SessionLocal(bind=shard_engine) as db:
+            db.merge(User(**row))
+            db.commit()
+
+
+def each_shard(job: Callable[[], Awaitable[None]]) -> Callable[[], Awaitable[None]]:
+    """A scheduler job running `job` once per shard, with SessionLocal opening on each in turn."""
+
+    async def run() -> None:
+        for index in range(len(shard_engines)):
+            token = current_shard.set(index)
+            try:
+                await job()
+            finally:
+                current_shard.reset(token)
+
+    run.__name__ = job.__name__
+    return run
+
+
+async def get_db(request: Request) -> AsyncIterator[AsyncSession]:
+    """Get the request's database session (async engine), on the shard of the household the request names
+    (see shards.request_entity_id). GET and HEAD requests read from the replica when one is configured,
+    unless the same client wrote within READ_YOUR_WRITES_SECONDS."""
+    shard = None
+    if len(async_shard_engines) > 1:
+        entity_id = await shards.request_entity_id(request)
+        shard = shard_index(entity_id) if entity_id is not None else None
+    async with request_session(shard) as db:
+        if replica_engine is not None and not shard:
+            session = db.sync_session
+            session.client_key = replica.client_key(request)
+            if request.method in ("GET", "HEAD") and session.client_key not in replica.recent_writers:
+                session.replica = replica_engine
         yield db
-    finally:
-        db.close()
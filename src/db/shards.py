@@ -0,0 +1,103 @@
+"""Household sharding (DATABASE_SHARD_URLS): each household's rows live in one of several databases.
+
+Shard 0 is DATABASE_URL; each URL in DATABASE_SHARD_URLS adds a shard. Every shard has the full schema,
+and shard k allocates row ids from its own block, upward from k * SHARD_ID_BLOCK, so any id (a
+household's, a to-do's, a member's) names its shard without a lookup: shard_for_id. New households go
+to the shard holding the fewest. Users are reference data: every shard keeps a copy of every user row
+(copied after each change), so members, calendars and tokens join them locally.
+
+Request sessions are bound to the shard named by the request (see get_db in session.py); requests that
+name no household (the user's households, invitation and feed tokens, webhooks) fan out across shards.
+Background jobs run once per shard.
+"""
+
+from sqlalchemy import Engine, MetaData, func, insert, select, text
+
+from src.models.database import Base
+
+# Ids of shard k start above k * SHARD_ID_BLOCK (at most 21 shards fit in a 32-bit PostgreSQL integer)
+SHARD_ID_BLOCK = 100_000_000
+
+# Body and query keys that are not household rows (users are on every shard)
+GLOBAL_ID_KEYS = frozenset({"user_id"})
+
+
+def parse_urls(value: str) -> list[str]:
+    """DATABASE_SHARD_URLS: comma-separated database URLs."""
+    return [url.strip() for url in value.split(",") if url.strip()]
+
+
+def shard_for_id(entity_id: int) -> int:
+    """The shard holding the household, or household row, with this id."""
+    return entity_id // SHARD_ID_BLOCK
+
+
+def _as_id(value) -> int | None:
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, int):
+        return value
+    if isinstance(value, str) and value.isdigit():
+        return int(value)
+    return None
+
+
+async def request_entity_id(request) -> int | None:
+    """The id naming the request's shard: its household_id (path, query string or JSON body, in that
+    order), else the first other *_id there. None for user-level requests."""
+    sources = [request.path_params, request.query_params]
+    if request.method in ("POST", "PUT", "PATCH", "DELETE"):
+        try:
+            body = await request.json()  # cached by Starlette; FastAPI parses the same bytes
+        except ValueError:
+            body = None
+        if isinstance(body, dict):
+            sources.append(body)
+    for source in sources:
+        household_id = _as_id(source.get("household_id"))
+        if household_id is not None:
+            return household_id
+    for source in sources:
+        for key, value in source.items():
+            entity_id = _as_id(value) if key.endswith("_id") and key not in GLOBAL_ID_KEYS else None
+            if entity_id is not None:
+                return entity_id
+    return None
+
+
+def init_shard(bind: Engine, index: int, users_from: Engine | None = None) -> None:
+    """Create shard `index`'s missing tables, start its ids at its block, and copy users_from's users into
+    it while it has none. Idempotent (run at every startup by init_db)."""
+    metadata = MetaData()
+    for table in Base.metadata.sorted_tables:
+        # AUTOINCREMENT: SQLite then honours the sqlite_sequence start below and never reuses ids
+        table.to_metadata(metadata).dialect_kwargs["sqlite_autoincrement"] = True
+    metadata.create_all(bind)
+    floor = index * SHARD_ID_BLOCK
+    with bind.begin() as conn:
+        for table in metadata.sorted_tables:
+            column = table.autoincrement_column
+            if column is None:
+                continue
+            if bind.dialect.name == "sqlite":
+                conn.execute(
+                    text(
+                        "INSERT INTO sqlite_sequence (name, seq) SELECT :name, :floor "
+                        "WHERE NOT EXISTS (SELECT 1 FROM sqlite_sequence WHERE name = :name)"
+                    ),
+                    {"name": table.name, "floor": floor},
+                )
+            elif bind.dialect.name == "postgresql":
+                conn.execute(
+                    text(
+                        f"SELECT setval(pg_get_serial_sequence(:name, :column), "
+                        f"GREATEST((SELECT COALESCE(MAX({column.name}), 0) FROM {table.name}), :floor))"
+                    ),
+                    {"name": table.name, "column": column.name, "floor": floor},
+                )
+        users = metadata.tables["users"]
+        if users_from is not None and not conn.scalar(select(func.count()).select_from(users)):
+            with users_from.connect() as source:
+                rows = source.execute(select(users)).mappings().all()
+            if rows:
+                conn.execute(insert(users), [dict(row) for row in rows])
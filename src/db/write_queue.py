@@ -0,0 +1,186 @@
+"""Single-writer queue for SQLite (SQLITE_WRITE_QUEUE).
+
+SQLite has one writer at a time. With many request threads writing, each waits on the file lock
+(busy_timeout) and pays its own commit and fsync. With the queue on, hot small writes are handed to one
+writer thread instead: it takes every job waiting (up to SQLITE_WRITE_BATCH), runs each inside its own
+SAVEPOINT on a single transaction and commits once. A failing job rolls back only its savepoint and
+gets its exception back; the others still commit. The writer has its own connection, which opens each
+batch with BEGIN IMMEDIATE (the write lock is taken up front, and pysqlite's implicit transaction
+handling, which would commit on the first RELEASE SAVEPOINT, is off).
+
+Jobs are callables taking the writer's Session. They must not commit, and must return plain values
+(ids, primitives), not ORM objects, which belong to the writer's session.
+
+    result = await write_queue.run_write(db, lambda s: ...)
+
+runs the job on the writer when the queue is on, and otherwise on the request's session `db`, committing
+it; callers are written once for both. Each shard has its own writer (on its own database), and a job goes
+to the writer of the shard `db` is on.
+"""
+
+import asyncio
+import logging
+import queue
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, sessionmaker
+
+from src.config import settings
+from src.db.session import DATABASE_URL, SHARD_URLS, RequestSession, apply_sqlite_pragmas
+from src.services import change_log
+
+logger = logging.getLogger(__name__)
+
+Job = Callable[[Session], Any]
+
+
+class WriteQueue:
+    """One writer thread applying queued jobs in batched transactions."""
+
+    def __init__(self, session_factory: sessionmaker, batch_size: int | None = None):
+        self.session_factory = session_factory
+        self.batch_size = batch_size or settings.SQLITE_WRITE_BATCH
+        self.batches = 0  # transactions committed (or rolled back) so far
+        self._jobs: queue.SimpleQueue = queue.SimpleQueue()
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+
+    def submit(self, job: Job) -> Future:
+        """Queue a job; the future resolves to its return value (or exception) once its batch commits."""
+        future: Future = Future()
+        self._ensure_started()
+        self._jobs.put((job, future))
+        return future
+
+    def run(self, job: Job) -> Any:
+        """Queue a job and wait for its result."""
+        return self.submit(job).result()
+
+    def stop(self) -> None:
+        """Finish the queued jobs, then stop the writer thread."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._jobs.put(None)
+            thread.join()
+
+    def _ensure_started(self) -> None:
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._work, name="sqlite-writer", daemon=True)
+                self._thread.start()
+
+    def _work(self) -> None:
+        while True:
+            item = self._jobs.get()
+            if item is None:
+                return
+            batch = [item]
+            stopping = False
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._jobs.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            self._apply(batch)
+            if stopping:
+                return
+
+    def _apply(self, batch: list[tuple[Job, Future]]) -> None:
+        session = self.session_factory()
+        results: list[tuple[Future, Any, BaseException | None]] = []
+        try:
+            for job, future in batch:
+                if not future.set_running_or_notify_cancel():
+                    continue
+                savepoint = session.begin_nested()
+                try:
+                    value = job(session)
+                    session.flush()
+                    savepoint.commit()
+                    results.append((future, value, None))
+                except Exception as e:
+                    savepoint.rollback()
+                    results.append((future, None, e))
+            session.commit()
+        except Exception as e:
+            # The commit itself failed: nothing in the batch was written
+            logger.exception("Write queue batch of %s jobs failed", len(batch))
+            session.rollback()
+            results = [(future, None, error or e) for future, _, error in results]
+        finally:
+            session.close()
+            self.batches += 1
+        for future, value, error in results:
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(value)
+
+
+def _writer_connection(dbapi_connection, connection_record) -> None:
+    apply_sqlite_pragmas(dbapi_connection)
+    dbapi_connection.isolation_level = None  # SQLAlchemy emits BEGIN itself (see _begin_immediate)
+
+
+def _begin_immediate(conn) -> None:
+    conn.exec_driver_sql("BEGIN IMMEDIATE")
+
+
+def writer_sessionmaker(url: str) -> sessionmaker:
+    """Sessions on a dedicated writer connection to the SQLite database at url (with change logging)."""
+    writer_engine = create_engine(url, connect_args={"check_same_thread": False}, pool_size=1, max_overflow=0)
+    event.listen(writer_engine, "connect", _writer_connection)
+    event.listen(writer_engine, "begin", _begin_immediate)
+    factory = sessionmaker(autocommit=False, autoflush=False, bind=writer_engine)
+    change_log.install(factory)
+    return factory
+
+
+def create_queue(url: str = DATABASE_URL, force: bool = False) -> WriteQueue | None:
+    """A writer queue for the database at url: on only for SQLite with SQLITE_WRITE_QUEUE set (or force)."""
+    if make_url(url).get_backend_name() != "sqlite" or not (force or settings.SQLITE_WRITE_QUEUE):
+        return None
+    return WriteQueue(writer_sessionmaker(url))
+
+
+# The app's writer queues, one per shard (indexed like session.shard_engines); None where the queue is off
+writers: list[WriteQueue | None] = [create_queue(url) for url in SHARD_URLS]
+
+
+def writer_for(db: AsyncSession) -> WriteQueue | None:
+    """The writer of the shard db is on (shard 0 for sessions not scoped to a shard)."""
+    shard = getattr(db.sync_session, "shard", None) or 0
+    return writers[shard] if shard < len(writers) else None
+
+
+async def run_write(db: AsyncSession, job: Job) -> Any:
+    """Run a write job on the writer queue if it is on, else on `db` and commit. Returns the job's result.
+
+    With the queue on, `db`'s own transaction is ended first and its objects are expired afterwards, so
+    reads through `db` see the write. The event loop is not blocked while the job waits for its batch.
+    """
+    writer = writer_for(db)
+    if writer is None:
+
+        def apply(session: Session) -> Any:
+            result = job(session)
+            session.commit()
+            return result
+
+        return await db.run_sync(apply)
+    await db.rollback()
+    if isinstance(db.sync_session, RequestSession):
+        db.sync_session.wrote()  # the write is not on db's own connection: record it for replica routing
+    result = await asyncio.wrap_future(writer.submit(job))
+    db.expire_all()
+    return result
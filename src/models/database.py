@@ -11,10 +11,13 @@ from sqlalchemy import (
     Date,
     DateTime,
     ForeignKey,
+    Index,
     Integer,
+    JSON,
     String,
     Text,
     UniqueConstraint,
+    text,
 )
 from sqlalchemy.orm import relationship
 from sqlalchemy.ext.declarative import declarative_base
@@ -49,6 +52,10 @@ class Household(Base):
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(255), nullable=False)
     meal_planner_weeks = Column(Integer, default=2)  # how many weeks to show (1 or 2)
+    # Delta sync (src/services/change_log.py): last change sequence number handed out, and the highest
+    # sequence number whose tombstones were pruned (clients behind it must reload from the snapshot)
+    change_seq = Column(Integer, nullable=False, default=0, server_default="0")
+    change_floor_seq = Column(Integer, nullable=False, default=0, server_default="0")
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
@@ -68,6 +75,14 @@ class Household(Base):
     grocery_lists = relationship(
         "GroceryList", back_populates="household", cascade="all, delete-orphan"
     )
+    agenda = relationship(
+        "HouseholdAgenda", back_populates="household", cascade="all, delete-orphan", uselist=False
+    )
+    feed = relationship(
+        "HouseholdFeed", back_populates="household", cascade="all, delete-orphan", uselist=False
+    )
+    changes = relationship("HouseholdChange", cascade="all, delete-orphan")
+    revisions = relationship("HouseholdRevision", cascade="all, delete-orphan")
 
 
 class Member(Base):
@@ -86,7 +101,11 @@ class Member(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
-    __table_args__ = (UniqueConstraint("user_id", "household_id", name="uq_member_user_household"),)
+    __table_args__ = (
+        # Also serves lookups by user_id (auth context); household_id needs its own index
+        UniqueConstraint("user_id", "household_id", name="uq_member_user_household"),
+        Index("ix_members_household", "household_id"),
+    )
 
     user = relationship("User", back_populates="memberships")
     household = relationship("Household", back_populates="members")
@@ -102,13 +121,22 @@ class Member(Base):
 
 
 class Calendar(Base):
-    """A Google calendar added by a member. Visible to all members of that household."""
+    """A calendar added by a member. Visible to all members of that household.
+
+    source_type "google" reads the member's Google calendar; "ics" subscribes to a public ICS URL
+    (school, sports, holidays) that is polled in the background into ics_events.
+    """
 
     __tablename__ = "calendars"
 
     id = Column(Integer, primary_key=True, index=True)
     member_id = Column(Integer, ForeignKey("members.id", ondelete="CASCADE"), nullable=False)
-    google_calendar_id = Column(String(255), nullable=False)
+    source_type = Column(String(16), nullable=False, default="google", server_default="google")
+    google_calendar_id = Column(String(255), nullable=True)  # set for source_type "google"
+    ics_url = Column(String(2048), nullable=True)  # set for source_type "ics"
+    ics_etag = Column(String(255), nullable=True)  # validators of the last successful fetch
+    ics_last_modified = Column(String(64), nullable=True)
+    ics_fetched_at = Column(DateTime, nullable=True)
     name = Column(String(255), nullable=False)
     color = Column(String(32), nullable=True)
     is_visible = Column(Boolean, default=True)
@@ -120,6 +148,61 @@ class Calendar(Base):
     )
 
     member = relationship("Member", back_populates="calendars")
+    ics_events = relationship("IcsEvent", back_populates="calendar", cascade="all, delete-orphan")
+    snapshot = relationship(
+        "CalendarSnapshot", back_populates="calendar", uselist=False, cascade="all, delete-orphan"
+    )
+
+
+class CalendarSnapshot(Base):
+    """Cached Google events of one calendar, served by GET /api/events until the calendar changes.
+
+    Google push notifications (watch channel) set changed_at; the snapshot is stale once changed_at is
+    later than fetched_at (the start of the fetch that produced it), so a ping during a fetch is not lost.
+    """
+
+    __tablename__ = "calendar_snapshots"
+
+    calendar_id = Column(Integer, ForeignKey("calendars.id", ondelete="CASCADE"), primary_key=True)
+    window_start = Column(DateTime, nullable=False)  # naive UTC; events overlapping [start, end)
+    window_end = Column(DateTime, nullable=False)
+    events = Column(JSON, nullable=False, default=list)  # API-shaped event dicts
+    fetched_at = Column(DateTime, nullable=False)
+    changed_at = Column(DateTime, nullable=True)
+    channel_id = Column(String(64), nullable=True, unique=True, index=True)  # active watch channel
+    channel_token = Column(String(64), nullable=True)  # echoed by Google in X-Goog-Channel-Token
+    channel_resource_id = Column(String(255), nullable=True)
+    channel_expires_at = Column(DateTime, nullable=True)
+
+    calendar = relationship("Calendar", back_populates="snapshot")
+
+
+class IcsEvent(Base):
+    """An event instance parsed from an ICS subscription calendar (recurrences expanded).
+
+    start/end use the same strings as Google events ("YYYY-MM-DD" or RFC3339); start_at/end_at are
+    naive UTC for range queries.
+    """
+
+    __tablename__ = "ics_events"
+
+    id = Column(Integer, primary_key=True, index=True)
+    calendar_id = Column(Integer, ForeignKey("calendars.id", ondelete="CASCADE"), nullable=False)
+    instance_key = Column(String(512), nullable=False)  # uid/recurrence start; overrides replace instances
+    start = Column(String(40), nullable=False)
+    end = Column(String(40), nullable=False)
+    start_at = Column(DateTime, nullable=False)
+    end_at = Column(DateTime, nullable=False)
+    summary = Column(Text, nullable=False)
+    description = Column(Text, nullable=True)
+    location = Column(Text, nullable=True)
+
+    __table_args__ = (
+        Index("ix_ics_events_calendar_start", "calendar_id", "start_at"),
+        Index("ix_ics_events_calendar_instance", "calendar_id", "instance_key"),
+    )
+
+    calendar = relationship("Calendar", back_populates="ics_events")
 
 
 class Invitation(Base):
@@ -143,6 +226,12 @@ class Invitation(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    __table_args__ = (
+        # Listing a household's invitations (optionally by status) and the pending-duplicate check
+        Index("ix_invitations_household_status_email", "household_id", "status", "email"),
+        Index("ix_invitations_invited_by", "invited_by_member_id"),
+    )
+
     household = relationship("Household", back_populates="invitations")
     invited_by = relationship("Member", back_populates="invitations_sent")
 
@@ -163,10 +252,30 @@ class TodoItem(Base):
     is_section_header = Column(Boolean, default=False)
     is_checked = Column(Boolean, default=False)
     checked_at = Column(DateTime, nullable=True)  # when checked; items checked 7+ days ago are auto-removed
-    position = Column(Integer, default=0)  # display order
+    rank = Column(String(255), nullable=False, default="i")  # lexicographic display order (src/services/ranking.py)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    __table_args__ = (
+        Index("ix_todo_items_household_rank", "household_id", "rank"),
+        # Partial index over checked items only: the retention sweeper finds expired rows per household
+        # without scanning open items (src/services/todo_retention.py)
+        Index(
+            "ix_todo_items_checked",
+            "household_id",
+            "checked_at",
+            postgresql_where=text("is_checked"),
+            sqlite_where=text("is_checked = 1"),
+        ),
+        # Deleting a member unassigns its items (ON DELETE SET NULL); most items are unassigned
+        Index(
+            "ix_todo_items_member",
+            "member_id",
+            postgresql_where=text("member_id IS NOT NULL"),
+            sqlite_where=text("member_id IS NOT NULL"),
+        ),
+    )
+
     household = relationship("Household", back_populates="todo_items")
     member = relationship("Member")
 
@@ -184,6 +293,8 @@ class MealSlot(Base):
     position = Column(Integer, default=0)
     created_at = Column(DateTime, default=datetime.utcnow)
 
+    __table_args__ = (Index("ix_meal_slots_household_position", "household_id", "position"),)
+
     household = relationship("Household", back_populates="meal_slots")
     planned_meals = relationship(
         "PlannedMeal", back_populates="meal_slot", cascade="all, delete-orphan"
@@ -213,7 +324,10 @@ class PlannedMeal(Base):
         UniqueConstraint(
             "household_id", "meal_date", "meal_slot_id",
             name="uq_planned_meal_household_date_slot",
-        ),
+        ),  # also serves listing a household's meals in a date range
+        # Foreign keys cascaded from member and meal slot deletes
+        Index("ix_planned_meals_member", "member_id"),
+        Index("ix_planned_meals_slot", "meal_slot_id"),
     )
 
     household = relationship("Household", back_populates="planned_meals")
@@ -234,6 +348,8 @@ class GroceryList(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    __table_args__ = (Index("ix_grocery_lists_household", "household_id"),)
+
     household = relationship("Household", back_populates="grocery_lists")
     items = relationship(
         "GroceryListItem", back_populates="grocery_list", cascade="all, delete-orphan"
@@ -251,12 +367,124 @@ class GroceryListItem(Base):
     )
     content = Column(String(500), nullable=False)
     is_section_header = Column(Boolean, default=False)
-    position = Column(Integer, default=0)
+    rank = Column(String(255), nullable=False, default="i")  # lexicographic display order (src/services/ranking.py)
     member_id = Column(
         Integer, ForeignKey("members.id", ondelete="CASCADE"), nullable=True
     )  # who added it; optional for section headers / legacy
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    __table_args__ = (
+        Index("ix_grocery_list_items_list_rank", "grocery_list_id", "rank"),
+        Index(
+            "ix_grocery_list_items_member",
+            "member_id",
+            postgresql_where=text("member_id IS NOT NULL"),
+            sqlite_where=text("member_id IS NOT NULL"),
+        ),
+    )
+
     grocery_list = relationship("GroceryList", back_populates="items")
     member = relationship("Member")
+
+
+class HouseholdAgenda(Base):
+    """Precomputed agenda for a household: merged, colored events for the next few days.
+
+    Rebuilt by a background job and patched when events are created through the API, so the
+    wall-tablet view reads one row instead of calling Google on every poll.
+    """
+
+    __tablename__ = "household_agendas"
+
+    household_id = Column(
+        Integer, ForeignKey("households.id", ondelete="CASCADE"), primary_key=True
+    )
+    window_start = Column(Date, nullable=False)  # first day covered (inclusive)
+    window_end = Column(Date, nullable=False)  # last day covered (exclusive)
+    events = Column(JSON, nullable=False, default=list)  # compact event dicts sorted by start
+    built_at = Column(DateTime, nullable=False, default=datetime.utcnow)  # last full rebuild
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    household = relationship("Household", back_populates="agenda")
+
+
+class HouseholdFeed(Base):
+    """Subscribable .ics feed of a household's merged calendars. The token in the URL is the only credential."""
+
+    __tablename__ = "household_feeds"
+
+    household_id = Column(
+        Integer, ForeignKey("households.id", ondelete="CASCADE"), primary_key=True
+    )
+    token = Column(String(64), unique=True, nullable=False, index=True)
+    generation = Column(Integer, nullable=False, default=0)  # bumped on every snapshot build
+    etag = Column(String(64), nullable=True)  # hash of the snapshot content; null until first build
+    content_updated_at = Column(DateTime, nullable=True)  # last build that changed the content (Last-Modified)
+    built_at = Column(DateTime, nullable=True)  # last snapshot build
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    household = relationship("Household", back_populates="feed")
+
+
+class HouseholdFeedEvent(Base):
+    """One event in a household's feed snapshot, copied from Google by the feed refresh job."""
+
+    __tablename__ = "household_feed_events"
+
+    id = Column(Integer, primary_key=True)
+    household_id = Column(
+        Integer, ForeignKey("household_feeds.household_id", ondelete="CASCADE"), nullable=False, index=True
+    )
+    calendar_id = Column(Integer, ForeignKey("calendars.id", ondelete="CASCADE"), nullable=False)
+    generation = Column(Integer, nullable=False)  # snapshot build that wrote the row
+    uid = Column(String(512), nullable=False)
+    start = Column(String(40), nullable=False)  # "YYYY-MM-DD" (all-day) or RFC3339
+    end = Column(String(40), nullable=False)
+    summary = Column(String(1024), nullable=False)
+    description = Column(Text, nullable=True)
+    location = Column(String(1024), nullable=True)
+
+
+class HouseholdChange(Base):
+    """Latest change of one synced row of a household (delta sync, see src/services/change_log.py).
+
+    One row per (entity, entity_id), overwritten on every write, so the log grows with the number of rows
+    rather than the number of writes. deleted marks a tombstone; tombstones are pruned after
+    CHANGE_TOMBSTONE_DAYS.
+    """
+
+    __tablename__ = "household_changes"
+
+    household_id = Column(Integer, ForeignKey("households.id", ondelete="CASCADE"), primary_key=True)
+    entity = Column(String(32), primary_key=True)  # snapshot field name, e.g. "todos", "grocery_items"
+    entity_id = Column(Integer, primary_key=True)
+    seq = Column(Integer, nullable=False)
+    deleted = Column(Boolean, nullable=False, default=False)
+    changed_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index("ix_household_changes_household_seq", "household_id", "seq"),
+        # Tombstone pruning (change_log.prune_tombstones) reads only deleted entries, per household
+        Index(
+            "ix_household_changes_tombstones",
+            "household_id",
+            "changed_at",
+            postgresql_where=text("deleted"),
+            sqlite_where=text("deleted = 1"),
+        ),
+    )
+
+
+class HouseholdRevision(Base):
+    """Revision of one of a household's lists, used as its ETag (see src/services/revisions.py).
+
+    Set to the household's new change_seq by every write to the list, in the writing transaction. A list
+    that was never written has no row (revision 0).
+    """
+
+    __tablename__ = "household_revisions"
+
+    household_id = Column(Integer, ForeignKey("households.id", ondelete="CASCADE"), primary_key=True)
+    resource = Column(String(32), primary_key=True)  # e.g. "todos", "members", "calendars", "invitations"
+    revision = Column(Integer, nullable=False)
@@ -3,7 +3,7 @@
 Aligns with docs/DATA_MODEL.md: User, Household, Member, Calendar.
 """
 
-from datetime import datetime
+from datetime import date, datetime
 from typing import Optional
 
 from pydantic import BaseModel, ConfigDict, field_serializer
@@ -103,7 +103,9 @@ class MemberResponse(MemberBase):
 
 class CalendarBase(BaseModel):
     name: str
-    google_calendar_id: str
+    source_type: str = "google"  # google | ics
+    google_calendar_id: Optional[str] = None  # required for source_type "google"
+    ics_url: Optional[str] = None  # required for source_type "ics" (http(s) or webcal URL)
     color: Optional[str] = None
     is_visible: bool = True
 
@@ -122,6 +124,7 @@ class CalendarResponse(CalendarBase):
     id: int
     member_id: int
     created_at: datetime
+    ics_fetched_at: Optional[datetime] = None
     model_config = ConfigDict(from_attributes=True)
 
 
@@ -216,6 +219,71 @@ class PlannedMealResponse(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
+class MealGridMember(BaseModel):
+    display_name: Optional[str] = None
+    color: str
+
+
+class MealGridCell(BaseModel):
+    id: int
+    member_id: int
+    description: Optional[str] = None
+
+
+class MealGridResponse(BaseModel):
+    """The planner's weeks as a matrix: cells[day][slot] is the meal on start_date + day in slots[slot]
+    (null if none). Slots and assignees are listed once."""
+    household_id: int
+    start_date: str
+    end_date: str
+    slots: list[MealSlotResponse]
+    members: dict[int, MealGridMember]  # member_id -> name and color of the cells' assignees
+    cells: list[list[Optional[MealGridCell]]]
+
+
+class MealSuggestion(BaseModel):
+    description: str
+    count: int  # times planned
+    last_planned: str  # ISO date
+
+
+class PlannedMealCopy(BaseModel):
+    """Copy the meals of source_start..source_end (inclusive) to the same slots, shifted to start on target_start."""
+    household_id: int
+    source_start: date
+    source_end: date
+    target_start: date
+    dry_run: bool = False  # only preview what would be written
+
+
+class PlannedMealRotation(BaseModel):
+    """Repeat the template_weeks weeks starting on template_start over `weeks` weeks starting on start_date."""
+    household_id: int
+    template_start: date
+    template_weeks: int = 1
+    start_date: date
+    weeks: int
+    dry_run: bool = False  # only preview what would be written
+
+
+class PlannedMealPreview(BaseModel):
+    """A meal written (or, in a dry run, to be written) by a copy or rotation."""
+    meal_date: str
+    meal_slot_id: int
+    member_id: int
+    member_display_name: Optional[str] = None
+    member_color: Optional[str] = None
+    description: Optional[str] = None
+    replaces_id: Optional[int] = None  # id of the meal already in that day/slot, which is overwritten
+
+
+class PlannedMealBulkResponse(BaseModel):
+    dry_run: bool
+    created: int  # meals in day/slots that were empty
+    replaced: int  # meals overwritten
+    meals: list[PlannedMealPreview]
+
+
 # ----- TodoItem -----
 
 
@@ -223,14 +291,36 @@ class TodoItemCreate(BaseModel):
     household_id: int
     content: str
     is_section_header: bool = False
-    position: Optional[int] = None
 
 
 class TodoItemUpdate(BaseModel):
     content: Optional[str] = None
     is_section_header: Optional[bool] = None
     is_checked: Optional[bool] = None
-    position: Optional[int] = None
+    # Move between two neighbours (either may be omitted at the ends of the list); only this row is written
+    after_id: Optional[int] = None
+    before_id: Optional[int] = None
+
+
+class TodoItemChange(BaseModel):
+    """One row of a bulk update; unset fields are left unchanged."""
+
+    id: int
+    content: Optional[str] = None
+    is_section_header: Optional[bool] = None
+    is_checked: Optional[bool] = None
+
+
+class TodoItemBulkUpdate(BaseModel):
+    household_id: int
+    items: list[TodoItemChange]
+
+
+class TodoItemOrder(BaseModel):
+    """Ids in their new order; the items take over each other's places (see ranking.reorder)."""
+
+    household_id: int
+    ids: list[int]
 
 
 class TodoItemResponse(BaseModel):
@@ -240,7 +330,7 @@ class TodoItemResponse(BaseModel):
     is_section_header: bool
     is_checked: bool
     checked_at: Optional[datetime] = None
-    position: int
+    rank: str
     created_at: datetime
     member_id: Optional[int] = None
     member_display_name: Optional[str] = None
@@ -275,14 +365,35 @@ class GroceryListItemCreate(BaseModel):
     grocery_list_id: int
     content: str
     is_section_header: bool = False
-    position: Optional[int] = None
     member_id: Optional[int] = None  # set by API from current user if not provided
 
 
 class GroceryListItemUpdate(BaseModel):
     content: Optional[str] = None
     is_section_header: Optional[bool] = None
-    position: Optional[int] = None
+    # Move between two neighbours (either may be omitted at the ends of the list); only this row is written
+    after_id: Optional[int] = None
+    before_id: Optional[int] = None
+
+
+class GroceryListItemChange(BaseModel):
+    """One row of a bulk update; unset fields are left unchanged."""
+
+    id: int
+    content: Optional[str] = None
+    is_section_header: Optional[bool] = None
+
+
+class GroceryListItemBulkUpdate(BaseModel):
+    grocery_list_id: int
+    items: list[GroceryListItemChange]
+
+
+class GroceryListItemOrder(BaseModel):
+    """Ids in their new order; the items take over each other's places (see ranking.reorder)."""
+
+    grocery_list_id: int
+    ids: list[int]
 
 
 class GroceryListItemResponse(BaseModel):
@@ -290,13 +401,30 @@ class GroceryListItemResponse(BaseModel):
     grocery_list_id: int
     content: str
     is_section_header: bool
-    position: int
+    rank: str
     member_id: Optional[int] = None
     member_display_name: Optional[str] = None
     member_color: Optional[str] = None
     created_at: datetime
 
 
+class GroceryListItemsFromMeals(BaseModel):
+    """Add the ingredients of the list's household's meals from start_date to end_date (inclusive)."""
+
+    grocery_list_id: int
+    start_date: date
+    end_date: date
+    dry_run: bool = False  # report what would be added without writing
+
+
+class GroceryListItemsFromMealsResponse(BaseModel):
+    dry_run: bool
+    added: list[str]  # item contents, in list order
+    already_on_list: list[str]  # ingredient names skipped
+    meals_without_ingredients: int
+    items: list[GroceryListItemResponse]  # the new items (empty for a dry run)
+
+
 # ----- Event (API/aggregation only, not stored) -----
 
 
@@ -324,3 +452,48 @@ class EventResponse(EventBase):
     calendar_name: str
     color: Optional[str] = None
     model_config = ConfigDict(from_attributes=True)
+
+
+# ----- Household snapshot -----
+
+
+class HouseholdSnapshotResponse(BaseModel):
+    """Everything a household screen needs in one response. Only requested fields are present."""
+
+    household: Optional[HouseholdResponse] = None
+    members: Optional[list[MemberResponse]] = None
+    calendars: Optional[list[CalendarResponse]] = None
+    todos: Optional[list[TodoItemResponse]] = None
+    grocery_lists: Optional[list[GroceryListResponse]] = None
+    grocery_items: Optional[list[GroceryListItemResponse]] = None  # items of all lists, by list then rank
+    meal_slots: Optional[list[MealSlotResponse]] = None
+    planned_meals: Optional[list[PlannedMealResponse]] = None
+    planned_meals_start: Optional[str] = None  # range of planned_meals (YYYY-MM-DD, inclusive)
+    planned_meals_end: Optional[str] = None
+    seq: Optional[int] = None  # household change seq this snapshot is current to (always present)
+
+
+# ----- Household changes (delta sync) -----
+
+
+class DeletedRow(BaseModel):
+    entity: str  # snapshot field name, e.g. "todos"
+    id: int
+
+
+class HouseholdChangesResponse(BaseModel):
+    """Rows of a household written since a change seq: current versions plus ids of deleted rows.
+
+    planned_meals are not limited to a date range; clients drop meals outside the range they show.
+    """
+
+    seq: int  # pass as since on the next poll
+    reset: bool = False  # since predates pruned tombstones: reload the snapshot, then poll from its seq
+    has_more: bool = False  # limit reached: poll again right away from seq
+    members: list[MemberResponse] = []
+    todos: list[TodoItemResponse] = []
+    grocery_lists: list[GroceryListResponse] = []
+    grocery_items: list[GroceryListItemResponse] = []
+    meal_slots: list[MealSlotResponse] = []
+    planned_meals: list[PlannedMealResponse] = []
+    deleted: list[DeletedRow] = []
@@ -0,0 +1,169 @@
+"""Precomputed per-household agenda for the wall-tablet view ("today and tomorrow").
+
+A background job rebuilds each household's agenda from Google (merged, sorted and colored) and stores
+it in one HouseholdAgenda row; events created through the API are patched in right away. The agenda
+endpoint then serves a single primary-key read with no Google calls or merging per request.
+"""
+
+import asyncio
+import bisect
+import logging
+from datetime import date, datetime, time, timedelta, timezone
+
+import httpx
+from sqlalchemy.orm import Session, joinedload
+
+from src.config import settings
+from src.db.session import SessionLocal, shard_session
+from src.models.database import Calendar, HouseholdAgenda, Member
+from src.services import google_events, ics_subscriptions
+from src.services.google_tokens import calendar_access_tokens
+
+logger = logging.getLogger(__name__)
+
+COMPACT_FIELDS = ("id", "title", "start", "end", "location", "calendar_name", "color")
+
+
+def agenda_window(today: date | None = None) -> tuple[date, date]:
+    """[start, end) dates covered by an agenda built today. Starts a day early so clients west of UTC
+    still find their local "today"."""
+    today = today or datetime.utcnow().date()
+    return today - timedelta(days=1), today + timedelta(days=settings.AGENDA_DAYS)
+
+
+def compact_event(event: dict) -> dict:
+    return {k: event.get(k) for k in COMPACT_FIELDS}
+
+
+def _start_key(event: dict) -> datetime:
+    """Sortable UTC start; all-day events ("YYYY-MM-DD") sort at midnight UTC."""
+    return google_events.event_time_utc(event["start"])
+
+
+def _visible_calendars(db: Session, household_id: int) -> list[Calendar]:
+    return (
+        db.query(Calendar)
+        .join(Member, Calendar.member_id == Member.id)
+        .filter(Member.household_id == household_id, Calendar.is_visible.is_(True))
+        .options(joinedload(Calendar.member).joinedload(Member.user))
+        .all()
+    )
+
+
+def _agenda_sources(
+    db: Session, household_id: int, range_start: datetime, range_end: datetime
+) -> tuple[list[dict], list[Calendar], list[tuple[int, str, str]]]:
+    """Database half of a build, before the Google fetches: the stored ICS events of the window, the
+    visible Google calendars, and (calendar id, Google calendar id, access token) of those that can be
+    fetched (tokens refreshed first)."""
+    all_calendars = _visible_calendars(db, household_id)
+    events = [compact_event(e) for e in ics_subscriptions.stored_events(db, all_calendars, range_start, range_end)]
+    calendars = [cal for cal in all_calendars if cal.source_type != ics_subscriptions.SOURCE_ICS]
+    tokens = calendar_access_tokens(db, calendars)
+    return events, calendars, [(cal.id, cal.google_calendar_id, tokens[cal.id]) for cal in calendars if cal.id in tokens]
+
+
+def _store_agenda(
+    db: Session,
+    household_id: int,
+    window: tuple[date, date],
+    events: list[dict],
+    calendars: list[Calendar],
+    fetched: dict[int, list[dict] | None],
+) -> HouseholdAgenda:
+    """Database half after the fetches: merge the Google items into events and store the agenda (commits).
+    A calendar without items keeps its events from the previous build."""
+    agenda = db.get(HouseholdAgenda, household_id)
+    previous = agenda.events if agenda else []
+    for cal in calendars:
+        items = fetched.get(cal.id)
+        if items is None:
+            prefix = f"{cal.id}-"
+            events.extend(e for e in previous if e["id"].startswith(prefix))
+            continue
+        for item in items:
+            event = google_events.google_item_to_event(cal, item)
+            if event:
+                events.append(compact_event(event))
+    events.sort(key=_start_key)
+
+    if agenda is None:
+        agenda = HouseholdAgenda(household_id=household_id)
+        db.add(agenda)
+    agenda.window_start, agenda.window_end = window
+    agenda.events = events
+    agenda.built_at = datetime.utcnow()
+    db.commit()
+    return agenda
+
+
+async def build_agenda(db: Session, household_id: int, today: date | None = None) -> HouseholdAgenda:
+    """Fetch the household's visible calendars from Google and store the merged agenda.
+    ICS subscription calendars come from their stored events.
+
+    If a calendar cannot be fetched, its events from the previous build are kept. The database is only
+    used, from a worker thread, before and after the fetches.
+    """
+    window_start, window_end = agenda_window(today)
+    range_start = datetime.combine(window_start, time.min, tzinfo=timezone.utc)
+    range_end = datetime.combine(window_end, time.min, tzinfo=timezone.utc)
+    time_min = google_events.google_time(range_start)
+    time_max = google_events.google_time(range_end)
+    events, calendars, sources = await asyncio.to_thread(_agenda_sources, db, household_id, range_start, range_end)
+
+    fetched: dict[int, list[dict] | None] = {}
+    async with httpx.AsyncClient() as client:
+        for calendar_id, google_calendar_id, access_token in sources:
+            fetched[calendar_id] = await google_events.fetch_calendar_items(
+                client, google_calendar_id, access_token, time_min, time_max
+            )
+    return await asyncio.to_thread(
+        _store_agenda, db, household_id, (window_start, window_end), events, calendars, fetched
+    )
+
+
+def add_event_to_agenda(db: Session, household_id: int, event: dict) -> bool:
+    """Insert a newly created event into the household's agenda, keeping start order.
+    Returns False if there is no agenda yet or the event falls outside its window."""
+    agenda = db.get(HouseholdAgenda, household_id)
+    if agenda is None:
+        return False
+    key = _start_key(event)
+    if not (agenda.window_start <= key.date() < agenda.window_end):
+        return False
+    events = [e for e in agenda.events if e["id"] != event["id"]]
+    idx = bisect.bisect_right([_start_key(e) for e in events], key)
+    events.insert(idx, compact_event(event))
+    agenda.events = events
+    db.commit()
+    return True
+
+
+async def build_agenda_in_background(household_id: int) -> None:
+    """Background task for the first request of a household that has no agenda yet."""
+    db = shard_session(household_id)
+    try:
+        await build_agenda(db, household_id)
+    except Exception:
+        logger.exception("Building agenda for household %s failed", household_id)
+    finally:
+        await asyncio.to_thread(db.close)
+
+
+def _agenda_household_ids(db: Session) -> list[int]:
+    return [r[0] for r in db.query(HouseholdAgenda.household_id).all()]
+
+
+async def refresh_all_agendas() -> None:
+    """Scheduled job: rebuild every materialized agenda (households whose agenda has been requested)."""
+    db = SessionLocal()
+    try:
+        household_ids = await asyncio.to_thread(_agenda_household_ids, db)
+        for household_id in household_ids:
+            try:
+                await build_agenda(db, household_id)
+            except Exception:
+                await asyncio.to_thread(db.rollback)
+                logger.exception("Agenda refresh for household %s failed", household_id)
+    finally:
+        await asyncio.to_thread(db.close)
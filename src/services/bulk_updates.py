@@ -0,0 +1,41 @@
+"""Set-based updates of many rows of one list (bulk PATCH of to-do and grocery items).
+
+Every changed column becomes one CASE expression keyed by id, so any number of per-row changes is a
+single UPDATE statement instead of one load, UPDATE and refresh per row.
+"""
+
+from sqlalchemy import case, update
+from sqlalchemy.orm import Session
+
+MAX_BULK_ITEMS = 500
+
+
+def validate_ids(ids: list[int]) -> None:
+    """Raise ValueError (message fit for a 400) for oversized requests or repeated ids."""
+    if len(ids) > MAX_BULK_ITEMS:
+        raise ValueError(f"At most {MAX_BULK_ITEMS} items per request")
+    if len(set(ids)) != len(ids):
+        raise ValueError("Duplicate item id")
+
+
+def apply_changes(db: Session, model, scope_clause, changes: dict[int, dict]) -> None:
+    """UPDATE rows of `model` matching scope_clause; changes maps id -> {column name: new value}.
+
+    Rows only get the columns listed for them (others keep their value via ELSE). Not committed.
+    """
+    columns: dict[str, dict[int, object]] = {}
+    for row_id, values in changes.items():
+        for name, value in values.items():
+            columns.setdefault(name, {})[row_id] = value
+    if not columns:
+        return
+    id_column = model.__table__.c.id
+    values = {
+        name: case(by_id, value=id_column, else_=model.__table__.c[name]) for name, by_id in columns.items()
+    }
+    db.execute(
+        update(model)
+        .where(scope_clause, id_column.in_(list(changes)))
+        .values(**values)
+        .execution_options(synchronize_session=False)
+    )
@@ -0,0 +1,126 @@
+"""Per-user cache of the Google calendar list (users/me/calendarList) used by the calendar picker.
+
+Entries are fresh for GOOGLE_CALENDAR_LIST_TTL_SECONDS. A stale entry is still served immediately while a
+background refresh revalidates it with If-None-Match, so an unchanged list costs Google a single 304. Google's
+ETag only covers the first page, so lists longer than one page are refetched in full instead.
+The list is refreshed in the background right after login, so the picker usually opens from cache.
+"""
+
+import logging
+import time
+from dataclasses import dataclass
+
+import httpx
+
+from src.config import settings
+
+logger = logging.getLogger(__name__)
+
+CALENDAR_LIST_URL = "https://www.googleapis.com/calendar/v3/users/me/calendarList"
+PAGE_SIZE = 250  # Google's maximum for calendarList
+
+
+class CalendarListAuthError(Exception):
+    """Google rejected the access token (401)."""
+
+
+class CalendarListFetchError(Exception):
+    """Google returned an unexpected status for calendarList."""
+
+    def __init__(self, status_code: int):
+        super().__init__(f"Google Calendar API error: {status_code}")
+        self.status_code = status_code
+
+
+@dataclass
+class CachedCalendarList:
+    items: list[dict]  # [{"id", "summary"}] as returned by GET /api/auth/google-calendars
+    etag: str | None  # None for lists longer than one page (the ETag would not cover the later pages)
+    fetched_at: float  # time.monotonic() of the last successful fetch or 304 revalidation
+
+
+# user_id -> cached calendar list
+_cache: dict[int, CachedCalendarList] = {}
+# user_ids with a background refresh in flight (avoid piling up refreshes on repeated picker opens)
+_refreshing: set[int] = set()
+
+
+def get_cached(user_id: int) -> CachedCalendarList | None:
+    """Cached calendar list for the user, fresh or stale. None if never fetched."""
+    return _cache.get(user_id)
+
+
+def is_fresh(entry: CachedCalendarList) -> bool:
+    return time.monotonic() - entry.fetched_at < settings.GOOGLE_CALENDAR_LIST_TTL_SECONDS
+
+
+def invalidate(user_id: int) -> None:
+    _cache.pop(user_id, None)
+
+
+async def _fetch_all_pages(
+    client: httpx.AsyncClient, access_token: str, etag: str | None
+) -> tuple[list[dict] | None, str | None]:
+    """Fetch every page of the calendar list. Returns (None, etag) if Google says the list is unchanged (304),
+    else (items, ETag of the list if it fits in one page)."""
+    items: list[dict] = []
+    list_etag = None
+    page_token = None
+    while True:
+        headers = {"Authorization": f"Bearer {access_token}"}
+        params = {"maxResults": PAGE_SIZE}
+        if page_token:
+            params["pageToken"] = page_token
+        elif etag:
+            # Only kept for single-page lists, so a 304 means the whole list is unchanged
+            headers["If-None-Match"] = etag
+        resp = await client.get(CALENDAR_LIST_URL, headers=headers, params=params)
+        if resp.status_code == 304:
+            return None, etag
+        if resp.status_code == 401:
+            raise CalendarListAuthError()
+        if resp.status_code != 200:
+            raise CalendarListFetchError(resp.status_code)
+        data = resp.json()
+        if page_token is None:
+            list_etag = resp.headers.get("ETag") or data.get("etag")
+        for item in data.get("items") or []:
+            items.append({"id": item["id"], "summary": item.get("summary", item["id"])})
+        page_token = data.get("nextPageToken")
+        if page_token:
+            list_etag = None  # a 304 on the first page would say nothing about this one
+        else:
+            return items, list_etag
+
+
+async def refresh_calendar_list(user_id: int, access_token: str) -> CachedCalendarList:
+    """Fetch (or revalidate) the user's calendar list from Google and store it in the cache.
+
+    Raises CalendarListAuthError on 401 and CalendarListFetchError on other non-200 responses.
+    """
+    entry = _cache.get(user_id)
+    async with httpx.AsyncClient() as client:
+        items, etag = await _fetch_all_pages(client, access_token, entry.etag if entry else None)
+    now = time.monotonic()
+    if items is None and entry is not None:
+        entry.fetched_at = now
+        return entry
+    entry = CachedCalendarList(items=items or [], etag=etag, fetched_at=now)
+    _cache[user_id] = entry
+    return entry
+
+
+async def refresh_in_background(user_id: int, access_token: str) -> None:
+    """Background task: refresh the user's calendar list, logging instead of raising on failure."""
+    if user_id in _refreshing:
+        return
+    _refreshing.add(user_id)
+    try:
+        await refresh_calendar_list(user_id, access_token)
+    except CalendarListAuthError:
+        logger.info("Calendar list refresh for user %s skipped: Google token rejected", user_id)
+        invalidate(user_id)
+    except (CalendarListFetchError, httpx.HTTPError) as e:
+        logger.warning("Calendar list refresh for user %s failed: %s", user_id, e)
+    finally:
+        _refreshing.discard(user_id)
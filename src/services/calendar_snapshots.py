@@ -0,0 +1,324 @@
+"""Per-calendar snapshots of Google events, kept fresh by Google push notifications (watch channels).
+
+GET /api/events serves a calendar from its CalendarSnapshot while the snapshot covers the requested
+range and nothing has changed. Google pings the webhook (src/api/routes/webhooks.py) when a watched
+calendar changes, which marks only that snapshot stale; the next read or the sync job refetches it.
+Calendars without an active channel (no GOOGLE_WATCH_WEBHOOK_URL, or a channel that could not be
+created) fall back to polling: their snapshot is trusted for GOOGLE_SNAPSHOT_MAX_AGE_SECONDS. The sync
+job also renews channels shortly before they expire.
+
+Snapshots hold only Google's event data. Calendar name and color are local settings that Google does not
+notify about, so they are added from the Calendar row (and its member) each time events are served.
+"""
+
+import asyncio
+import hmac
+import logging
+import secrets
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+
+import httpx
+from sqlalchemy.orm import Session, joinedload
+
+from src.config import settings
+from src.db.session import SessionLocal
+from src.models.database import Calendar, CalendarSnapshot, Member
+from src.services import google_events
+from src.services.google_tokens import calendar_access_tokens
+
+logger = logging.getLogger(__name__)
+
+WATCH_URL = "https://www.googleapis.com/calendar/v3/calendars/{calendar_id}/events/watch"
+STOP_URL = "https://www.googleapis.com/calendar/v3/channels/stop"
+
+
+def snapshot_window(now: datetime | None = None) -> tuple[datetime, datetime]:
+    """Naive UTC [start, end) stored in a snapshot, anchored at today's midnight."""
+    now = now or datetime.utcnow()
+    today = now.replace(hour=0, minute=0, second=0, microsecond=0, tzinfo=None)
+    return (
+        today - timedelta(days=settings.GOOGLE_SNAPSHOT_PAST_DAYS),
+        today + timedelta(days=settings.GOOGLE_SNAPSHOT_FUTURE_DAYS),
+    )
+
+
+def _naive_utc(dt: datetime) -> datetime:
+    return dt.astimezone(timezone.utc).replace(tzinfo=None) if dt.tzinfo else dt
+
+
+def _aware_utc(dt: datetime) -> datetime:
+    return dt.astimezone(timezone.utc) if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
+
+
+def has_active_channel(snapshot: CalendarSnapshot, now: datetime) -> bool:
+    return bool(snapshot.channel_id and snapshot.channel_expires_at and snapshot.channel_expires_at > now)
+
+
+def is_dirty(snapshot: CalendarSnapshot) -> bool:
+    return snapshot.changed_at is not None and snapshot.changed_at >= snapshot.fetched_at
+
+
+def is_fresh(snapshot: CalendarSnapshot, now: datetime) -> bool:
+    """Not changed since it was fetched, and either watched or younger than the polling max age."""
+    if is_dirty(snapshot):
+        return False
+    if has_active_channel(snapshot, now):
+        return True
+    return (now - snapshot.fetched_at).total_seconds() < settings.GOOGLE_SNAPSHOT_MAX_AGE_SECONDS
+
+
+def covers(snapshot: CalendarSnapshot, start: datetime, end: datetime) -> bool:
+    return snapshot.window_start <= _naive_utc(start) and _naive_utc(end) <= snapshot.window_end
+
+
+# Event keys that come from the Calendar row, not from Google (set when serving, never stored)
+_CALENDAR_KEYS = ("calendar_name", "color")
+
+
+def events_in_range(cal: Calendar, snapshot: CalendarSnapshot, start: datetime, end: datetime) -> list[dict]:
+    """Snapshot events overlapping [start, end), with cal's current name and color."""
+    start, end = _aware_utc(start), _aware_utc(end)
+    calendar_fields = {"calendar_name": cal.name, "color": google_events.event_color(cal)}
+    return [{**e, **calendar_fields} for e in snapshot.events if google_events.event_overlaps(e, start, end)]
+
+
+def cached_events(cal: Calendar, start: datetime, end: datetime, now: datetime | None = None) -> list[dict] | None:
+    """Events of cal in [start, end) from its snapshot, or None if it must be fetched from Google."""
+    snapshot = cal.snapshot
+    now = now or datetime.utcnow()
+    if snapshot is None or not covers(snapshot, start, end) or not is_fresh(snapshot, now):
+        return None
+    return events_in_range(cal, snapshot, start, end)
+
+
+def can_snapshot(start: datetime, end: datetime, now: datetime | None = None) -> bool:
+    """True if [start, end) lies inside the window a fresh snapshot would hold."""
+    window_start, window_end = snapshot_window(now)
+    return window_start <= _naive_utc(start) and _naive_utc(end) <= window_end
+
+
+async def fetch_window_events(
+    cal: Calendar, client: httpx.AsyncClient, access_token: str, window: tuple[datetime, datetime]
+) -> list[dict] | None:
+    """cal's events in the snapshot window from Google (no database access). None if Google fails."""
+    items = await fetch_window_items(cal.google_calendar_id, client, access_token, window)
+    if items is None:
+        return None
+    return items_to_events(cal, items)
+
+
+async def fetch_window_items(
+    google_calendar_id: str, client: httpx.AsyncClient, access_token: str, window: tuple[datetime, datetime]
+) -> list[dict] | None:
+    """The calendar's Google items in the snapshot window. None if Google fails."""
+    window_start, window_end = window
+    return await google_events.fetch_calendar_items(
+        client,
+        google_calendar_id,
+        access_token,
+        google_events.google_time(window_start.replace(tzinfo=timezone.utc)),
+        google_events.google_time(window_end.replace(tzinfo=timezone.utc)),
+    )
+
+
+def items_to_events(cal: Calendar, items: list[dict]) -> list[dict]:
+    return [e for e in (google_events.google_item_to_event(cal, item) for item in items) if e]
+
+
+def store_snapshot(
+    db: Session, cal: Calendar, events: list[dict], window: tuple[datetime, datetime], fetched_at: datetime
+) -> CalendarSnapshot:
+    """Replace cal's snapshot with events fetched for window (commits)."""
+    window_start, window_end = window
+    snapshot = cal.snapshot
+    if snapshot is None:
+        snapshot = CalendarSnapshot(calendar_id=cal.id)
+        cal.snapshot = snapshot
+    snapshot.window_start = window_start
+    snapshot.window_end = window_end
+    snapshot.events = [{k: v for k, v in e.items() if k not in _CALENDAR_KEYS} for e in events]
+    snapshot.fetched_at = fetched_at
+    db.commit()
+    return snapshot
+
+
+def mark_changed(db: Session, calendar_id: int) -> None:
+    """Make the next read refetch this calendar (e.g. after creating an event through the API)."""
+    snapshot = db.get(CalendarSnapshot, calendar_id)
+    if snapshot is not None:
+        snapshot.changed_at = datetime.utcnow()
+        db.commit()
+
+
+def handle_notification(
+    db: Session, channel_id: str | None, token: str | None, resource_id: str | None, resource_state: str | None
+) -> bool:
+    """Apply one Google push notification. Returns False if it does not match an active channel."""
+    if not channel_id:
+        return False
+    snapshot = db.query(CalendarSnapshot).filter(CalendarSnapshot.channel_id == channel_id).first()
+    if snapshot is None or not hmac.compare_digest(snapshot.channel_token or "", token or ""):
+        return False
+    if snapshot.channel_resource_id and resource_id and resource_id != snapshot.channel_resource_id:
+        return False
+    if resource_state != "sync":  # "sync" only confirms a new channel; "exists"/"not_exists" are changes
+        snapshot.changed_at = datetime.utcnow()
+        db.commit()
+    return True
+
+
+def needs_channel(snapshot: CalendarSnapshot, now: datetime) -> bool:
+    if not settings.GOOGLE_WATCH_WEBHOOK_URL:
+        return False
+    if not snapshot.channel_expires_at:
+        return True
+    return (snapshot.channel_expires_at - now).total_seconds() < settings.GOOGLE_WATCH_RENEW_BEFORE_SECONDS
+
+
+async def stop_channel(
+    client: httpx.AsyncClient, channel_id: str | None, resource_id: str | None, access_token: str
+) -> None:
+    """Best effort: an unstopped channel simply expires, and its pings no longer match."""
+    if not channel_id or not resource_id:
+        return
+    try:
+        await client.post(
+            STOP_URL,
+            headers={"Authorization": f"Bearer {access_token}"},
+            json={"id": channel_id, "resourceId": resource_id},
+        )
+    except httpx.HTTPError as e:
+        logger.info("Stopping watch channel %s failed: %s", channel_id, e)
+
+
+async def start_channel(
+    client: httpx.AsyncClient, calendar_id: int, google_calendar_id: str, access_token: str
+) -> dict | None:
+    """Open a new watch channel for a calendar (no database access). Returns the snapshot's channel fields,
+    or None if Google refuses; the calendar then stays on the polling fallback."""
+    channel_id = uuid.uuid4().hex
+    channel_token = secrets.token_urlsafe(32)
+    resp = await client.post(
+        WATCH_URL.format(calendar_id=google_calendar_id),
+        headers={"Authorization": f"Bearer {access_token}"},
+        json={
+            "id": channel_id,
+            "type": "web_hook",
+            "address": settings.GOOGLE_WATCH_WEBHOOK_URL,
+            "token": channel_token,
+            "params": {"ttl": str(settings.GOOGLE_WATCH_TTL_SECONDS)},
+        },
+    )
+    if resp.status_code != 200:
+        logger.warning("Watching calendar %s failed: %s", calendar_id, resp.status_code)
+        return None
+    data = resp.json()
+    expiration_ms = data.get("expiration")
+    return {
+        "channel_id": channel_id,
+        "channel_token": channel_token,
+        "channel_resource_id": data.get("resourceId"),
+        "channel_expires_at": (
+            datetime.utcfromtimestamp(int(expiration_ms) / 1000)
+            if expiration_ms
+            else datetime.utcnow() + timedelta(seconds=settings.GOOGLE_WATCH_TTL_SECONDS)
+        ),
+    }
+
+
+@dataclass
+class _SyncPlan:
+    """What sync_snapshot reads from the database before going to Google."""
+
+    calendar_id: int
+    google_calendar_id: str
+    access_token: str
+    renew_channel: bool
+    stale: bool  # refetch even if no new channel is opened
+    old_channel: tuple[str | None, str | None]  # (id, resource id), stopped once a new one is open
+
+
+def _plan_sync(db: Session, snapshot: CalendarSnapshot, now: datetime) -> _SyncPlan | None:
+    cal = snapshot.calendar
+    access_token = calendar_access_tokens(db, [cal]).get(cal.id)
+    if not access_token:
+        return None
+    window_start, window_end = snapshot_window(now)
+    return _SyncPlan(
+        calendar_id=cal.id,
+        google_calendar_id=cal.google_calendar_id,
+        access_token=access_token,
+        renew_channel=needs_channel(snapshot, now),
+        stale=not covers(snapshot, window_start, window_end) or not is_fresh(snapshot, now),
+        old_channel=(snapshot.channel_id, snapshot.channel_resource_id),
+    )
+
+
+def _store_channel(db: Session, snapshot: CalendarSnapshot, channel: dict) -> None:
+    for key, value in channel.items():
+        setattr(snapshot, key, value)
+    db.commit()
+
+
+def _store_items(
+    db: Session, snapshot: CalendarSnapshot, items: list[dict], window: tuple[datetime, datetime], fetched_at: datetime
+) -> None:
+    cal = snapshot.calendar
+    store_snapshot(db, cal, items_to_events(cal, items), window, fetched_at)
+
+
+async def sync_snapshot(
+    db: Session, snapshot: CalendarSnapshot, client: httpx.AsyncClient, now: datetime | None = None
+) -> None:
+    """Renew the snapshot's watch channel if it is missing or about to expire, then refetch the events if
+    Google reported a change, the window has moved on, or (unwatched) the polling max age has passed.
+    The database is only used, from a worker thread, around the Google calls."""
+    now = now or datetime.utcnow()
+    plan = await asyncio.to_thread(_plan_sync, db, snapshot, now)
+    if plan is None:
+        return
+    renewed = False
+    if plan.renew_channel:
+        channel = await start_channel(client, plan.calendar_id, plan.google_calendar_id, plan.access_token)
+        if channel is not None:
+            await stop_channel(client, *plan.old_channel, plan.access_token)
+            await asyncio.to_thread(_store_channel, db, snapshot, channel)
+            renewed = True
+    # Changes made before a new channel existed are never notified, so a new channel means a refetch
+    if renewed or plan.stale:
+        fetched_at, window = datetime.utcnow(), snapshot_window(now)
+        items = await fetch_window_items(plan.google_calendar_id, client, plan.access_token, window)
+        if items is not None:
+            await asyncio.to_thread(_store_items, db, snapshot, items, window, fetched_at)
+
+
+def _load_snapshots(db: Session) -> list[tuple[int, CalendarSnapshot]]:
+    snapshots = (
+        db.query(CalendarSnapshot)
+        .options(joinedload(CalendarSnapshot.calendar).joinedload(Calendar.member).joinedload(Member.user))
+        .order_by(CalendarSnapshot.calendar_id)
+        .all()
+    )
+    return [(snapshot.calendar_id, snapshot) for snapshot in snapshots]
+
+
+async def sync_all_snapshots() -> None:
+    """Scheduled job: channel renewal plus refetching of changed (or, unwatched, expired) snapshots.
+    A failing calendar is logged and skipped."""
+    db = SessionLocal()
+    try:
+        snapshots = await asyncio.to_thread(_load_snapshots, db)
+        async with httpx.AsyncClient() as client:
+            for calendar_id, snapshot in snapshots:
+                try:
+                    await sync_snapshot(db, snapshot, client)
+                except httpx.HTTPError as e:
+                    await asyncio.to_thread(db.rollback)
+                    logger.warning("Snapshot sync of calendar %s failed: %s", calendar_id, e)
+                except Exception:
+                    await asyncio.to_thread(db.rollback)
+                    logger.exception("Snapshot sync of calendar %s failed", calendar_id)
+    finally:
+        await asyncio.to_thread(db.close)
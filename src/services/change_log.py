@@ -0,0 +1,315 @@
+"""Per-household change log for delta sync (GET /api/households/{id}/changes?since=).
+
+Every write to a synced row (to-do items, grocery lists and items, meal slots, planned meals, members)
+bumps the household's change_seq and stamps the row's household_changes entry with the new value;
+deletes leave the entry behind as a tombstone. A client keeps the seq of its last snapshot or poll
+and asks only for entries above it, so a poll costs as much as the number of changed rows, not the
+size of the lists.
+
+ORM writes are picked up by session flush hooks (installed on SessionLocal by src/db/session.py).
+Set-based Core UPDATE/DELETE statements bypass the ORM, so their callers call record(). After a commit
+that wrote changes, each household's new seq is published on the pub/sub bus (src/services/pubsub.py),
+which pushes it to the household's open event streams.
+
+The same writes (plus calendars, invitations and the user fields shown in member lists) also set the
+household's per-list revisions in household_revisions to the new seq; list endpoints use them as ETags
+(src/services/revisions.py).
+
+The seq is taken with UPDATE households ... RETURNING inside the writing transaction. On PostgreSQL
+that row lock is held until commit (SQLite serializes writers anyway), so seqs of one household are
+committed in increasing order and a reader that saw seq N has seen every change up to N.
+"""
+
+import asyncio
+import logging
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Iterable
+
+from sqlalchemy import delete, event, func, inspect, select, update
+from sqlalchemy.orm import Session
+
+from src.config import settings
+from src.models.database import (
+    Calendar,
+    GroceryList,
+    GroceryListItem,
+    Household,
+    HouseholdChange,
+    HouseholdRevision,
+    Invitation,
+    MealSlot,
+    Member,
+    PlannedMeal,
+    TodoItem,
+    User,
+)
+from src.services import pubsub
+
+logger = logging.getLogger(__name__)
+
+# Synced models -> entity name (the matching snapshot field)
+ENTITIES = {
+    TodoItem: "todos",
+    GroceryListItem: "grocery_items",
+    GroceryList: "grocery_lists",
+    PlannedMeal: "planned_meals",
+    MealSlot: "meal_slots",
+    Member: "members",
+}
+
+# Rows pointing at a member: deleting the member deletes (or, for to-dos, unassigns) them in the
+# database, so they are logged as changed too; the changes endpoint reports vanished rows as deleted.
+_MEMBER_DEPENDENTS = (TodoItem, GroceryListItem, PlannedMeal)
+
+# Calendars and invitations are not in the changes feed, but their writes bump the list revisions too
+# (see _touch). User and household fields nested in member list responses (token refreshes do not invalidate them)
+_MEMBER_LIST_FIELDS = {
+    User: ("email", "display_name", "avatar_url", "google_sub"),
+    Household: ("name", "meal_planner_weeks"),
+}
+
+_PENDING = "change_log.pending"
+_COMMITTED = "change_log.seqs"  # household_id -> latest seq written in the current transaction
+
+# (household_id, entity, entity_id) -> deleted
+Entries = dict[tuple[int, str, int], bool]
+# household_id -> list revisions to bump besides the entities of Entries
+Touched = dict[int, set[str]]
+
+
+def _list_households(session: Session, list_ids: set[int]) -> dict[int, int]:
+    """grocery_list_id -> household_id, from lists in the session or else one query."""
+    found = {}
+    for obj in session.identity_map.values():
+        if isinstance(obj, GroceryList) and obj.id in list_ids:
+            found[obj.id] = obj.household_id
+    for obj in session.deleted:
+        if isinstance(obj, GroceryList) and obj.id in list_ids:
+            found[obj.id] = obj.household_id
+    missing = list_ids - set(found)
+    if missing:
+        rows = session.connection().execute(
+            select(GroceryList.id, GroceryList.household_id).where(GroceryList.id.in_(missing))
+        )
+        found.update(dict(rows.all()))
+    return found
+
+
+def _member_households(session: Session, member_ids: set[int]) -> dict[int, int]:
+    """member_id -> household_id, from members in the session or else one query."""
+    found = {}
+    for obj in [*session.identity_map.values(), *session.deleted]:
+        if isinstance(obj, Member) and obj.id in member_ids:
+            found[obj.id] = obj.household_id
+    missing = member_ids - set(found)
+    if missing:
+        rows = session.connection().execute(select(Member.id, Member.household_id).where(Member.id.in_(missing)))
+        found.update(dict(rows.all()))
+    return found
+
+
+def _collect(session: Session, objects: Iterable, deleted: bool, entries: Entries) -> None:
+    tracked = [obj for obj in objects if type(obj) in ENTITIES]
+    list_ids = {obj.grocery_list_id for obj in tracked if isinstance(obj, GroceryListItem)}
+    lists = _list_households(session, list_ids) if list_ids else {}
+    for obj in tracked:
+        household_id = lists.get(obj.grocery_list_id) if isinstance(obj, GroceryListItem) else obj.household_id
+        if household_id is not None and obj.id is not None:
+            entries[(household_id, ENTITIES[type(obj)], obj.id)] = deleted
+
+
+def _fields_changed(obj, names: tuple[str, ...]) -> bool:
+    state = inspect(obj)
+    for name in names:
+        history = state.attrs[name].history
+        if history.added and list(history.added) != list(history.deleted):
+            return True
+    return False
+
+
+def _touch(session: Session, objects: Iterable, touched: Touched, deleted: bool = False) -> None:
+    objects = list(objects)
+    calendars = [obj for obj in objects if isinstance(obj, Calendar)]
+    members = _member_households(session, {c.member_id for c in calendars}) if calendars else {}
+
+    def add(household_id, *resources):
+        if household_id is not None:
+            touched.setdefault(household_id, set()).update(resources)
+
+    for obj in objects:
+        if isinstance(obj, Invitation):
+            add(obj.household_id, "invitations")
+        elif isinstance(obj, Calendar):
+            add(members.get(obj.member_id), "calendars")
+        elif isinstance(obj, Member) and deleted:
+            # The database drops the member's calendars and invitations with it
+            add(obj.household_id, "calendars", "invitations")
+        elif obj in session.new or deleted:
+            continue  # a new or deleted user or household is in no other household's member list
+        elif isinstance(obj, Household) and _fields_changed(obj, _MEMBER_LIST_FIELDS[Household]):
+            add(obj.id, "members")
+        elif isinstance(obj, User) and _fields_changed(obj, _MEMBER_LIST_FIELDS[User]):
+            rows = session.connection().execute(select(Member.household_id).where(Member.user_id == obj.id))
+            for household_id in rows.scalars():
+                add(household_id, "members")
+
+
+def _before_flush(session: Session, flush_context, instances) -> None:
+    # Deleted rows are read now, while their attributes can still be loaded
+    entries: Entries = {}
+    touched: Touched = {}
+    _collect(session, session.deleted, True, entries)
+    _touch(session, session.deleted, touched, deleted=True)
+    members = {m.id: m.household_id for m in session.deleted if isinstance(m, Member)}
+    if members:
+        conn = session.connection()
+        for model in _MEMBER_DEPENDENTS:
+            query = select(model.id).where(model.member_id.in_(members))
+            if model is GroceryListItem:
+                query = query.add_columns(GroceryList.household_id).join(GroceryList)
+            else:
+                query = query.add_columns(model.household_id)
+            for row_id, household_id in conn.execute(query):
+                entries.setdefault((household_id, ENTITIES[model], row_id), False)
+    session.info[_PENDING] = entries, touched
+
+
+def _after_flush(session: Session, flush_context) -> None:
+    # New rows have their ids now; new, dirty and deleted still show the pre-flush state
+    entries, touched = session.info.pop(_PENDING, ({}, {}))
+    dirty = [obj for obj in session.dirty if session.is_modified(obj, include_collections=False)]
+    _collect(session, [*session.new, *dirty], False, entries)
+    _touch(session, [*session.new, *dirty], touched)
+    gone = {h.id for h in session.deleted if isinstance(h, Household)}
+    entries = {key: value for key, value in entries.items() if key[0] not in gone}
+    touched = {key: value for key, value in touched.items() if key not in gone}
+    if entries or touched:
+        _write(session, entries, touched)
+
+
+def _write(session: Session, entries: Entries, touched: Touched | None = None) -> None:
+    conn = session.connection()
+    households = Household.__table__
+    by_household: dict[int, list[tuple[str, int, bool]]] = defaultdict(list)
+    for (household_id, entity, entity_id), deleted in entries.items():
+        by_household[household_id].append((entity, entity_id, deleted))
+    touched = touched or {}
+    now = datetime.utcnow()
+    # Fixed lock order, so two transactions touching the same households cannot deadlock
+    for household_id in sorted(set(by_household) | set(touched)):
+        seq = conn.execute(
+            update(households)
+            .where(households.c.id == household_id)
+            .values(change_seq=households.c.change_seq + 1, updated_at=households.c.updated_at)
+            .returning(households.c.change_seq)
+        ).scalar()
+        if seq is None:
+            continue  # household deleted
+        session.info.setdefault(_COMMITTED, {})[household_id] = seq
+        changes = by_household.get(household_id, [])
+        if changes:
+            _upsert(conn, HouseholdChange.__table__, ("household_id", "entity", "entity_id"), [
+                {"household_id": household_id, "entity": entity, "entity_id": entity_id, "seq": seq,
+                 "deleted": deleted, "changed_at": now}
+                for entity, entity_id, deleted in changes
+            ])
+        resources = {entity for entity, _, _ in changes} | touched.get(household_id, set())
+        _upsert(conn, HouseholdRevision.__table__, ("household_id", "resource"), [
+            {"household_id": household_id, "resource": resource, "revision": seq} for resource in sorted(resources)
+        ])
+
+
+def _upsert(conn, table, keys: tuple[str, ...], rows: list[dict]) -> None:
+    """INSERT rows, overwriting the other columns of rows whose primary key (keys) already exists."""
+    if conn.dialect.name in ("postgresql", "sqlite"):
+        if conn.dialect.name == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+        stmt = insert(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c[k] for k in keys],
+            set_={c.name: stmt.excluded[c.name] for c in table.c if c.name not in keys},
+        )
+        conn.execute(stmt, rows)
+        return
+    for row in rows:
+        conn.execute(delete(table).where(*(table.c[k] == row[k] for k in keys)))
+    conn.execute(table.insert(), rows)
+
+
+def _after_commit(session: Session) -> None:
+    for household_id, seq in session.info.pop(_COMMITTED, {}).items():
+        pubsub.bus.publish(household_id, {"seq": seq})
+
+
+def _after_rollback(session: Session) -> None:
+    session.info.pop(_COMMITTED, None)
+
+
+def install(session_factory) -> None:
+    """Log ORM writes of sessions made by session_factory (a sessionmaker, or a Session subclass such as
+    the sync half of the async request sessions) and publish them on commit."""
+    event.listen(session_factory, "before_flush", _before_flush)
+    event.listen(session_factory, "after_flush", _after_flush)
+    event.listen(session_factory, "after_commit", _after_commit)
+    event.listen(session_factory, "after_rollback", _after_rollback)
+
+
+def record(db: Session, model, scope_id: int, ids: Iterable[int], deleted: bool = False) -> None:
+    """Log a Core UPDATE/DELETE of rows `ids` of `model` (not committed).
+
+    scope_id is the household id, or for grocery items their list's id (as in ranking).
+    """
+    ids = list(ids)
+    if not ids:
+        return
+    household_id = scope_id
+    if model is GroceryListItem:
+        household_id = db.scalar(select(GroceryList.household_id).where(GroceryList.id == scope_id))
+        if household_id is None:
+            return
+    entity = ENTITIES[model]
+    _write(db, {(household_id, entity, i): deleted for i in ids})
+
+
+def prune_tombstones(db: Session, older_than_days: int | None = None, now: datetime | None = None) -> int:
+    """Delete tombstones older than the retention period; returns the number deleted.
+
+    Each affected household's change_floor_seq is raised to the newest pruned seq: a client whose
+    since is below it may have missed a delete and is told to reload.
+    """
+    days = older_than_days or settings.CHANGE_TOMBSTONE_DAYS
+    cutoff = (now or datetime.utcnow()) - timedelta(days=days)
+    table = HouseholdChange.__table__
+    expired = (table.c.deleted, table.c.changed_at < cutoff)  # matches ix_household_changes_tombstones
+    floors = db.execute(select(table.c.household_id, func.max(table.c.seq)).where(*expired).group_by(table.c.household_id)).all()
+    pruned = 0
+    households = Household.__table__
+    for household_id, floor in floors:
+        pruned += db.execute(delete(table).where(table.c.household_id == household_id, *expired)).rowcount
+        db.execute(
+            update(households)
+            .where(households.c.id == household_id, households.c.change_floor_seq < floor)
+            .values(change_floor_seq=floor, updated_at=households.c.updated_at)
+        )
+        db.commit()
+    return pruned
+
+
+def _prune() -> int:
+    from src.db.session import SessionLocal  # session.py installs this module's hooks
+
+    db = SessionLocal()
+    try:
+        return prune_tombstones(db)
+    finally:
+        db.close()
+
+
+async def prune_all_tombstones() -> None:
+    """Scheduled job: drop old tombstones (blocking DB work runs in a worker thread)."""
+    pruned = await asyncio.to_thread(_prune)
+    if pruned:
+        logger.info("Change log prune removed %s tombstones", pruned)
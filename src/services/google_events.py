@@ -0,0 +1,138 @@
+"""Fetch events from Google Calendar and convert them to the API's event shape.
+
+Shared by GET /api/events and the background jobs that precompute household views.
+"""
+
+from datetime import date, datetime, time, timezone
+from typing import AsyncIterator
+
+import httpx
+
+from src.models.database import Calendar
+
+EVENTS_URL = "https://www.googleapis.com/calendar/v3/calendars/{calendar_id}/events"
+PAGE_SIZE = 250
+
+
+def parse_google_event_time(start_or_end: dict) -> str | None:
+    """Return ISO start/end string for FullCalendar. Prefer dateTime; fallback to date (all-day)."""
+    if not start_or_end:
+        return None
+    if "dateTime" in start_or_end:
+        return start_or_end["dateTime"]
+    if "date" in start_or_end:
+        return start_or_end["date"]
+    return None
+
+
+def event_time_utc(value: str) -> datetime:
+    """Aware UTC datetime of an event start/end string; all-day dates ("YYYY-MM-DD") are midnight UTC."""
+    if len(value) == 10:
+        return datetime.combine(date.fromisoformat(value), time.min, tzinfo=timezone.utc)
+    dt = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    return dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
+
+
+def event_overlaps(event: dict, start: datetime, end: datetime) -> bool:
+    """Same overlap rule as Google's timeMin/timeMax: the event ends after start and starts before end."""
+    return event_time_utc(event["start"]) < end and event_time_utc(event["end"] or event["start"]) > start
+
+
+def owner_label(cal: Calendar) -> str:
+    if cal.member and cal.member.user:
+        u = cal.member.user
+        return u.display_name or u.email or "Unknown"
+    return "Unknown"
+
+
+def event_color(cal: Calendar) -> str | None:
+    """Events use the owning member's display color, falling back to the calendar's own color."""
+    return (cal.member.event_color if cal.member else None) or cal.color
+
+
+def google_item_to_event(cal: Calendar, item: dict) -> dict | None:
+    """Convert a Google event resource to the API's event dict. None if it has no start."""
+    start_str = parse_google_event_time(item.get("start"))
+    end_str = parse_google_event_time(item.get("end"))
+    if not start_str:
+        return None
+    return {
+        "id": f"{cal.id}-{item.get('id', '')}",
+        "title": item.get("summary") or "(No title)",
+        "start": start_str,
+        "end": end_str or start_str,
+        "description": item.get("description"),
+        "location": item.get("location"),
+        "calendar_name": cal.name,
+        "color": event_color(cal),
+        "html_link": item.get("htmlLink"),
+    }
+
+
+def google_time(dt) -> str:
+    """RFC3339 timestamp for timeMin/timeMax."""
+    return dt.isoformat().replace("+00:00", "Z")
+
+
+class GoogleEventsError(Exception):
+    """Google returned a non-200 status while listing a calendar's events."""
+
+    def __init__(self, status_code: int):
+        super().__init__(f"Google Calendar API error: {status_code}")
+        self.status_code = status_code
+
+
+async def iter_calendar_pages(
+    client: httpx.AsyncClient,
+    google_calendar_id: str,
+    access_token: str,
+    time_min: str,
+    time_max: str,
+    q: str | None = None,
+) -> AsyncIterator[list[dict]]:
+    """Yield Google event items of one calendar in [time_min, time_max) one page at a time, following
+    nextPageToken. Raises GoogleEventsError on a non-200 response."""
+    params = {
+        "timeMin": time_min,
+        "timeMax": time_max,
+        "singleEvents": "true",
+        "orderBy": "startTime",
+        "maxResults": PAGE_SIZE,
+    }
+    if q:
+        params["q"] = q
+    while True:
+        resp = await client.get(
+            EVENTS_URL.format(calendar_id=google_calendar_id),
+            headers={"Authorization": f"Bearer {access_token}"},
+            params=params,
+        )
+        if resp.status_code != 200:
+            raise GoogleEventsError(resp.status_code)
+        data = resp.json()
+        yield data.get("items") or []
+        page_token = data.get("nextPageToken")
+        if not page_token:
+            return
+        params = {**params, "pageToken": page_token}
+
+
+async def fetch_calendar_items(
+    client: httpx.AsyncClient,
+    google_calendar_id: str,
+    access_token: str,
+    time_min: str,
+    time_max: str,
+    q: str | None = None,
+) -> list[dict] | None:
+    """All Google event items of one calendar in [time_min, time_max).
+    Returns None if Google answers with a non-200 status."""
+    items: list[dict] = []
+    try:
+        async for page in iter_calendar_pages(
+            client, google_calendar_id, access_token, time_min, time_max, q=q
+        ):
+            items.extend(page)
+    except GoogleEventsError:
+        return None
+    return items
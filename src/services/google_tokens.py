@@ -0,0 +1,123 @@
+"""Google OAuth access tokens of users: decryption and refresh (shared by request handlers and background jobs)."""
+
+from datetime import datetime, timedelta
+
+import httpx
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from src.config import settings
+from src.db.session import copy_user, copy_user_sync
+from src.models.database import Calendar, User
+from src.services import token_encryption
+
+
+def get_decrypted_access_token(user: User) -> str | None:
+    """Return the decrypted access_token for use with Google APIs (e.g. events, calendar list)."""
+    return token_encryption.decrypt_token(user.access_token)
+
+
+GOOGLE_TOKEN_URL = "https://oauth2.googleapis.com/token"
+_FORM_HEADERS = {"Content-Type": "application/x-www-form-urlencoded"}
+
+
+def _refresh_form(user: User | None) -> dict | None:
+    """Token refresh request for the user's Google access token, or None if it cannot be refreshed."""
+    if not user or not user.refresh_token:
+        return None
+    ref_plain = token_encryption.decrypt_token(user.refresh_token)
+    if not ref_plain:
+        return None
+    return {
+        "client_id": settings.GOOGLE_CLIENT_ID,
+        "client_secret": settings.GOOGLE_CLIENT_SECRET,
+        "refresh_token": ref_plain,
+        "grant_type": "refresh_token",
+    }
+
+
+def _access_token_fresh(user: User, now: datetime) -> bool:
+    return bool(user.access_token and user.token_expiry and (user.token_expiry - now).total_seconds() > 300)
+
+
+def _store_refreshed_token(user: User, resp: httpx.Response, now: datetime) -> bool:
+    """Set the new access token from Google's refresh response on user (not committed)."""
+    if resp.status_code != 200:
+        return False
+    data = resp.json()
+    new_access = data.get("access_token")
+    if not new_access:
+        return False
+    user.access_token = token_encryption.encrypt_token(new_access)
+    user.token_expiry = now + timedelta(seconds=data.get("expires_in", 3600))
+    return True
+
+
+def refresh_google_token_if_needed(user: User, db: Session) -> bool:
+    """
+    Refresh the user's Google access token if missing or expired (using refresh_token).
+    Updates user.access_token and user.token_expiry in DB on success.
+    Returns True if we have a valid token to use, False otherwise.
+    """
+    form = _refresh_form(user)
+    if form is None:
+        return False
+    now = datetime.utcnow()
+    if _access_token_fresh(user, now):
+        return True
+    with httpx.Client() as client:
+        resp = client.post(GOOGLE_TOKEN_URL, data=form, headers=_FORM_HEADERS)
+    if not _store_refreshed_token(user, resp, now):
+        return False
+    db.commit()
+    db.refresh(user)
+    copy_user_sync(user)
+    return True
+
+
+async def exchange_code(client: httpx.AsyncClient, code: str, code_verifier: str) -> httpx.Response:
+    """Trade the authorization code of an OAuth sign-in (with its PKCE verifier) for the user's tokens."""
+    return await client.post(
+        GOOGLE_TOKEN_URL,
+        data={
+            "code": code,
+            "client_id": settings.GOOGLE_CLIENT_ID,
+            "client_secret": settings.GOOGLE_CLIENT_SECRET,
+            "redirect_uri": settings.GOOGLE_REDIRECT_URI,
+            "grant_type": "authorization_code",
+            "code_verifier": code_verifier,
+        },
+        headers=_FORM_HEADERS,
+    )
+
+
+async def refresh_google_token(user: User, db: AsyncSession, client: httpx.AsyncClient) -> bool:
+    """refresh_google_token_if_needed for request handlers (async session and HTTP client)."""
+    form = _refresh_form(user)
+    if form is None:
+        return False
+    now = datetime.utcnow()
+    if _access_token_fresh(user, now):
+        return True
+    resp = await client.post(GOOGLE_TOKEN_URL, data=form, headers=_FORM_HEADERS)
+    if not _store_refreshed_token(user, resp, now):
+        return False
+    await db.commit()
+    await db.refresh(user)
+    await copy_user(user)
+    return True
+
+
+def calendar_access_tokens(db: Session, calendars: list[Calendar]) -> dict[int, str]:
+    """{calendar id: access token} of the calendars whose member's user has one, refreshed first if expired.
+    For background jobs, which read tokens in a worker thread and then fetch on the event loop."""
+    users = [cal.member.user for cal in calendars if cal.member and cal.member.user]
+    for user in users:
+        refresh_google_token_if_needed(user, db)
+    tokens = {}
+    for cal in calendars:
+        user = cal.member.user if cal.member else None
+        access_token = get_decrypted_access_token(user) if user else None
+        if access_token:
+            tokens[cal.id] = access_token
+    return tokens
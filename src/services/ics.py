@@ -0,0 +1,448 @@
+"""iCalendar (RFC 5545) helpers: writing the household .ics feed and parsing subscribed ICS calendars."""
+
+import logging
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Iterator
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+logger = logging.getLogger(__name__)
+
+CRLF = "\r\n"
+PRODID = "-//Lionfish//Household Calendar//EN"
+
+
+def escape_text(value: str) -> str:
+    """Escape a TEXT property value (RFC 5545 3.3.11)."""
+    return (
+        value.replace("\\", "\\\\")
+        .replace(";", "\\;")
+        .replace(",", "\\,")
+        .replace("\r\n", "\\n")
+        .replace("\n", "\\n")
+    )
+
+
+def fold_line(line: str) -> str:
+    """Return the content line folded at 75 octets and terminated with CRLF (RFC 5545 3.1)."""
+    if len(line.encode("utf-8")) <= 75:
+        return line + CRLF
+    parts = []
+    current = ""
+    size = 0
+    limit = 75
+    for ch in line:
+        n = len(ch.encode("utf-8"))
+        if size + n > limit:
+            parts.append(current)
+            current = ""
+            size = 0
+            limit = 74  # continuation lines start with a space
+        current += ch
+        size += n
+    parts.append(current)
+    return (CRLF + " ").join(parts) + CRLF
+
+
+def format_time(value: str) -> tuple[str, str]:
+    """Google-style start/end ("YYYY-MM-DD" or RFC3339) -> (property params, value) for DTSTART/DTEND."""
+    if len(value) == 10:
+        return ";VALUE=DATE", value.replace("-", "")
+    dt = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return "", dt.astimezone(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+
+def calendar_header(name: str) -> str:
+    return "".join(
+        fold_line(line)
+        for line in (
+            "BEGIN:VCALENDAR",
+            "VERSION:2.0",
+            f"PRODID:{PRODID}",
+            "CALSCALE:GREGORIAN",
+            "METHOD:PUBLISH",
+            f"X-WR-CALNAME:{escape_text(name)}",
+        )
+    )
+
+
+def calendar_footer() -> str:
+    return "END:VCALENDAR" + CRLF
+
+
+def vevent(
+    *,
+    uid: str,
+    start: str,
+    end: str,
+    summary: str,
+    dtstamp: datetime,
+    description: str | None = None,
+    location: str | None = None,
+) -> str:
+    """One VEVENT block. start/end are Google-style strings (all-day dates or RFC3339 timestamps)."""
+    start_params, start_value = format_time(start)
+    end_params, end_value = format_time(end or start)
+    lines = [
+        "BEGIN:VEVENT",
+        f"UID:{escape_text(uid)}",
+        f"DTSTAMP:{dtstamp.strftime('%Y%m%dT%H%M%SZ')}",
+        f"DTSTART{start_params}:{start_value}",
+        f"DTEND{end_params}:{end_value}",
+        f"SUMMARY:{escape_text(summary)}",
+    ]
+    if description:
+        lines.append(f"DESCRIPTION:{escape_text(description)}")
+    if location:
+        lines.append(f"LOCATION:{escape_text(location)}")
+    lines.append("END:VEVENT")
+    return "".join(fold_line(line) for line in lines)
+
+
+# ----- Parsing (ICS subscription calendars) -----
+
+MAX_INSTANCES_PER_EVENT = 1000  # most instances of one event stored from the sync window
+_WEEKDAYS = ["MO", "TU", "WE", "TH", "FR", "SA", "SU"]
+
+
+def unescape_text(value: str) -> str:
+    out = []
+    i = 0
+    while i < len(value):
+        ch = value[i]
+        if ch == "\\" and i + 1 < len(value):
+            nxt = value[i + 1]
+            out.append("\n" if nxt in "nN" else nxt)
+            i += 2
+            continue
+        out.append(ch)
+        i += 1
+    return "".join(out)
+
+
+def _split_outside_quotes(text: str, sep: str) -> list[str]:
+    parts, current, quoted = [], [], False
+    for ch in text:
+        if ch == '"':
+            quoted = not quoted
+        if ch == sep and not quoted:
+            parts.append("".join(current))
+            current = []
+        else:
+            current.append(ch)
+    parts.append("".join(current))
+    return parts
+
+
+def parse_content_line(line: str) -> tuple[str, dict[str, str], str]:
+    """Split an unfolded content line into (NAME, {PARAM: value}, value)."""
+    quoted = False
+    colon = -1
+    for i, ch in enumerate(line):
+        if ch == '"':
+            quoted = not quoted
+        elif ch == ":" and not quoted:
+            colon = i
+            break
+    if colon < 0:
+        return line.upper(), {}, ""
+    head, value = line[:colon], line[colon + 1:]
+    name, *raw_params = _split_outside_quotes(head, ";")
+    params = {}
+    for raw in raw_params:
+        key, _, val = raw.partition("=")
+        params[key.upper()] = val.strip('"')
+    return name.upper(), params, value
+
+
+def parse_time(params: dict[str, str], value: str) -> date | datetime:
+    """DATE values become date; DATE-TIME values become aware datetimes (floating times are taken as UTC)."""
+    value = value.strip()
+    if params.get("VALUE") == "DATE" or len(value) == 8:
+        return datetime.strptime(value[:8], "%Y%m%d").date()
+    dt = datetime.strptime(value[:15], "%Y%m%dT%H%M%S")
+    if value.endswith("Z"):
+        return dt.replace(tzinfo=timezone.utc)
+    tzid = params.get("TZID")
+    if tzid:
+        try:
+            return dt.replace(tzinfo=ZoneInfo(tzid))
+        except (ZoneInfoNotFoundError, ValueError):
+            logger.debug("Unknown TZID %s; treating as UTC", tzid)
+    return dt.replace(tzinfo=timezone.utc)
+
+
+def parse_duration(value: str) -> timedelta:
+    """Parse an RFC 5545 DURATION such as P1D, PT1H30M or -P1W."""
+    sign = -1 if value.startswith("-") else 1
+    value = value.lstrip("+-").lstrip("P")
+    total = timedelta()
+    number = ""
+    in_time = False
+    units = {"W": timedelta(weeks=1), "D": timedelta(days=1)}
+    time_units = {"H": timedelta(hours=1), "M": timedelta(minutes=1), "S": timedelta(seconds=1)}
+    for ch in value:
+        if ch == "T":
+            in_time = True
+        elif ch.isdigit():
+            number += ch
+        elif number:
+            unit = (time_units if in_time else units).get(ch)
+            if unit is not None:
+                total += int(number) * unit
+            number = ""
+    return sign * total
+
+
+def as_utc(value: date | datetime) -> datetime:
+    """Aware UTC datetime; dates are taken as midnight UTC, naive datetimes as UTC."""
+    if isinstance(value, datetime):
+        return value.astimezone(timezone.utc) if value.tzinfo else value.replace(tzinfo=timezone.utc)
+    return datetime.combine(value, time.min, tzinfo=timezone.utc)
+
+
+def format_google_style(value: date | datetime) -> str:
+    """"YYYY-MM-DD" for dates, RFC3339 UTC for date-times (the same shapes Google returns)."""
+    if isinstance(value, datetime):
+        return value.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+    return value.isoformat()
+
+
+def _build_event(props: dict, exdates: list) -> dict | None:
+    if "UID" not in props or "DTSTART" not in props:
+        return None
+    start = parse_time(*props["DTSTART"])
+    all_day = not isinstance(start, datetime)
+    if "DTEND" in props:
+        end = parse_time(*props["DTEND"])
+    elif "DURATION" in props:
+        end = start + parse_duration(props["DURATION"][1])
+    else:
+        end = start + timedelta(days=1) if all_day else start
+    rrule = None
+    if "RRULE" in props:
+        rrule = {}
+        for part in props["RRULE"][1].split(";"):
+            key, _, val = part.partition("=")
+            rrule[key.upper()] = val
+    recurrence_id = None
+    if "RECURRENCE-ID" in props:
+        recurrence_id = format_google_style(parse_time(*props["RECURRENCE-ID"]))
+    return {
+        "uid": props["UID"][1],
+        "start": start,
+        "end": end,
+        "all_day": all_day,
+        "summary": unescape_text(props.get("SUMMARY", ({}, ""))[1]) or "(No title)",
+        "description": unescape_text(props["DESCRIPTION"][1]) if "DESCRIPTION" in props else None,
+        "location": unescape_text(props["LOCATION"][1]) if "LOCATION" in props else None,
+        "rrule": rrule,
+        "exdates": {as_utc(d) for d in exdates},
+        "recurrence_id": recurrence_id,
+    }
+
+
+class IcsParser:
+    """Incremental VEVENT parser: feed raw lines as they arrive and collect completed events.
+
+    Only the current event is held in memory, so arbitrarily large calendars can be streamed.
+    """
+
+    def __init__(self):
+        self._pending: str | None = None  # unfolded line still collecting continuation lines
+        self._props: dict | None = None  # properties of the VEVENT being parsed
+        self._exdates: list = []
+        self._nested = 0  # depth of components inside the VEVENT (VALARM)
+
+    def feed(self, line: str) -> list[dict]:
+        line = line.rstrip("\r\n")
+        if line[:1] in (" ", "\t") and self._pending is not None:
+            self._pending += line[1:]
+            return []
+        events = []
+        if self._pending is not None:
+            event = self._handle(self._pending)
+            if event:
+                events.append(event)
+        self._pending = line
+        return events
+
+    def close(self) -> list[dict]:
+        events = []
+        if self._pending is not None:
+            event = self._handle(self._pending)
+            if event:
+                events.append(event)
+            self._pending = None
+        return events
+
+    def _handle(self, line: str) -> dict | None:
+        if not line:
+            return None
+        name, params, value = parse_content_line(line)
+        if name == "BEGIN":
+            if value.upper() == "VEVENT" and self._props is None:
+                self._props, self._exdates, self._nested = {}, [], 0
+            elif self._props is not None:
+                self._nested += 1
+            return None
+        if self._props is None:
+            return None
+        if name == "END":
+            if self._nested:
+                self._nested -= 1
+                return None
+            props, exdates = self._props, self._exdates
+            self._props = None
+            try:
+                return _build_event(props, exdates)
+            except ValueError as e:
+                logger.debug("Skipping unparseable VEVENT %s: %s", props.get("UID"), e)
+                return None
+        if self._nested:
+            return None
+        if name == "EXDATE":
+            for part in value.split(","):
+                try:
+                    self._exdates.append(parse_time(params, part))
+                except ValueError:
+                    pass
+        else:
+            self._props[name] = (params, value)
+        return None
+
+
+def _add_months(value: date | datetime, months: int) -> date | datetime | None:
+    years, month0 = divmod(value.month - 1 + months, 12)
+    try:
+        return value.replace(year=value.year + years, month=month0 + 1)
+    except ValueError:  # e.g. the 31st in a 30-day month: no instance that month
+        return None
+
+
+def _byday(rrule: dict) -> list[str]:
+    return [d[-2:].upper() for d in rrule.get("BYDAY", "").split(",") if d[-2:].upper() in _WEEKDAYS]
+
+
+def _unsupported_parts(start: date | datetime, rrule: dict) -> list[str]:
+    """RRULE parts expand_instances would ignore (and so get dates wrong). BYMONTH / BYMONTHDAY that only
+    restate DTSTART's month / day are fine."""
+    freq = rrule.get("FREQ", "").upper()
+    parts = []
+    for part, value in rrule.items():
+        if not part.startswith("BY"):
+            continue
+        if part == "BYDAY" and freq == "WEEKLY" and len(_byday(rrule)) == len(value.split(",")):
+            continue
+        if part == "BYMONTHDAY" and freq in ("MONTHLY", "YEARLY") and value == str(start.day):
+            continue
+        if part == "BYMONTH" and freq == "YEARLY" and value == str(start.month):
+            continue
+        parts.append(part)
+    return parts
+
+
+def _periods_before(start: date | datetime, freq: str, interval: int, before: datetime) -> int:
+    """Whole periods of the rule (days, weeks, months or years times INTERVAL) from DTSTART to before, less
+    one for safety: the periods expansion can skip without missing an instance that ends after before."""
+    if isinstance(start, datetime):
+        days = (before - as_utc(start)).days
+        start_day = start.date()
+    else:
+        days = (before.date() - start).days
+        start_day = start
+    if freq == "DAILY":
+        periods = days // interval
+    elif freq == "WEEKLY":
+        periods = days // 7 // interval
+    else:
+        months = (before.year - start_day.year) * 12 + before.month - start_day.month
+        periods = months // (interval * (12 if freq == "YEARLY" else 1))
+    return max(periods - 1, 0)
+
+
+def _instances_in_periods(start: date | datetime, rrule: dict, freq: str, interval: int, periods: int) -> int:
+    """Instances the rule generates in its first `periods` periods (what they count towards COUNT)."""
+    if periods == 0:
+        return 0
+    byday = _byday(rrule)
+    if freq == "WEEKLY" and byday:
+        first_week = sum(1 for d in set(byday) if _WEEKDAYS.index(d) >= start.weekday())
+        return first_week + (periods - 1) * len(set(byday))
+    if freq in ("MONTHLY", "YEARLY"):  # the 31st (or 29 February) is skipped where it does not exist
+        step = interval * (12 if freq == "YEARLY" else 1)
+        if start.day <= 28:
+            return periods
+        return sum(1 for k in range(periods) if _add_months(start, k * step) is not None)
+    return periods
+
+
+def _candidates(start: date | datetime, rrule: dict, first_period: int = 0) -> Iterator[date | datetime]:
+    freq = rrule.get("FREQ", "").upper()
+    interval = max(1, int(rrule.get("INTERVAL", "1") or 1))
+    byday = _byday(rrule)
+    k = first_period
+    while True:
+        if freq == "DAILY":
+            yield start + timedelta(days=k * interval)
+        elif freq == "WEEKLY" and byday:
+            week_start = start - timedelta(days=start.weekday()) + timedelta(weeks=k * interval)
+            for day in sorted({_WEEKDAYS.index(d) for d in byday}):
+                candidate = week_start + timedelta(days=day)
+                if candidate >= start:
+                    yield candidate
+        elif freq == "WEEKLY":
+            yield start + timedelta(weeks=k * interval)
+        elif freq in ("MONTHLY", "YEARLY"):
+            candidate = _add_months(start, k * interval * (12 if freq == "YEARLY" else 1))
+            if candidate is not None:
+                yield candidate
+        else:
+            yield start  # unsupported rule: keep the first instance only
+            return
+        k += 1
+
+
+def expand_instances(event: dict, window_start: datetime, window_end: datetime) -> Iterator[tuple]:
+    """Yield (start, end) of the event's instances overlapping [window_start, window_end), at most
+    MAX_INSTANCES_PER_EVENT of them.
+
+    Supports FREQ=DAILY/WEEKLY/MONTHLY/YEARLY with INTERVAL, COUNT, UNTIL, weekly BYDAY and EXDATE.
+    Events whose rule has other BY* parts are skipped (logged) rather than given wrong dates. Expansion
+    starts at the period before the window, so a series that began decades ago costs no more than a new one.
+    """
+    start, end = event["start"], event["end"]
+    duration = end - start
+    rrule = event["rrule"]
+    if not rrule:
+        if as_utc(start) < window_end and as_utc(end) > window_start:
+            yield start, end
+        return
+    unsupported = _unsupported_parts(start, rrule)
+    if unsupported:
+        logger.info("Skipping recurring event %s: unsupported RRULE parts %s", event["uid"], ",".join(unsupported))
+        return
+    freq = rrule.get("FREQ", "").upper()
+    interval = max(1, int(rrule.get("INTERVAL", "1") or 1))
+    count = int(rrule["COUNT"]) if rrule.get("COUNT", "").isdigit() else None
+    until = as_utc(parse_time({}, rrule["UNTIL"])) if rrule.get("UNTIL") else None
+    first_period = 0
+    if freq in ("DAILY", "WEEKLY", "MONTHLY", "YEARLY"):
+        first_period = _periods_before(start, freq, interval, window_start - duration)
+    generated = _instances_in_periods(start, rrule, freq, interval, first_period)  # towards COUNT
+    stored = 0
+    for candidate in _candidates(start, rrule, first_period):
+        candidate_utc = as_utc(candidate)
+        if until is not None and candidate_utc > until:
+            return
+        if candidate_utc >= window_end or stored >= MAX_INSTANCES_PER_EVENT:
+            return
+        generated += 1
+        if count is not None and generated > count:
+            return
+        if candidate_utc in event["exdates"]:
+            continue
+        if as_utc(candidate + duration) > window_start:
+            stored += 1
+            yield candidate, candidate + duration
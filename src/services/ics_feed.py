@@ -0,0 +1,265 @@
+"""Server-side snapshot of a household's merged calendars, exported as a subscribable .ics feed.
+
+Calendar clients poll feeds often, so the feed is never built from Google at request time. A background
+job copies each feed household's visible calendars into household_feed_events page by page (bounded
+memory even for multi-year windows) and hashes the result into an ETag. The feed endpoint streams the
+snapshot straight from the table and answers conditional requests with 304 when nothing changed.
+"""
+
+import asyncio
+import hashlib
+import logging
+import secrets
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Iterator
+
+import httpx
+from sqlalchemy import delete, insert
+from sqlalchemy.orm import Session, joinedload
+
+from src.config import settings
+from src.db.session import SessionLocal, shard_session
+from src.models.database import Calendar, Household, HouseholdFeed, HouseholdFeedEvent, Member
+from src.services import google_events, ics, ics_subscriptions
+from src.services.google_tokens import calendar_access_tokens
+
+logger = logging.getLogger(__name__)
+
+STREAM_BATCH_SIZE = 500
+
+_events_table = HouseholdFeedEvent.__table__
+
+
+def generate_token() -> str:
+    return secrets.token_urlsafe(32)
+
+
+def feed_window(now: datetime | None = None) -> tuple[datetime, datetime]:
+    """[start, end) of the events copied into a feed snapshot."""
+    now = now or datetime.now(timezone.utc)
+    today = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    return today - timedelta(days=settings.FEED_PAST_DAYS), today + timedelta(days=settings.FEED_FUTURE_DAYS)
+
+
+def _snapshot_rows(db: Session, household_id: int, generation: int):
+    """Snapshot rows in a stable order, fetched in batches. Rows of a build still running (newer than
+    generation, the feed's last finished build) are left out."""
+    return (
+        db.query(HouseholdFeedEvent)
+        .filter(HouseholdFeedEvent.household_id == household_id, HouseholdFeedEvent.generation <= generation)
+        .order_by(HouseholdFeedEvent.calendar_id, HouseholdFeedEvent.start, HouseholdFeedEvent.uid)
+        .yield_per(STREAM_BATCH_SIZE)
+    )
+
+
+def _content_hash(db: Session, household_id: int, generation: int) -> str:
+    digest = hashlib.sha256()
+    for row in _snapshot_rows(db, household_id, generation):
+        for value in (row.uid, row.start, row.end, row.summary, row.description, row.location):
+            digest.update((value or "").encode())
+            digest.update(b"\x1f")
+        digest.update(b"\x1e")
+    return digest.hexdigest()[:32]
+
+
+@dataclass
+class _Build:
+    """A snapshot build in progress."""
+
+    generation: int
+    calendar_ids: list[int]  # visible calendars; rows of any other calendar are dropped
+    sources: list[tuple[int, str, str]]  # (calendar id, Google calendar id, access token) to fetch
+    complete: list[int]  # calendars whose rows of this generation are all written
+
+
+def _start_build(db: Session, household_id: int, window: tuple[datetime, datetime]) -> _Build | None:
+    """Database half of a build before the Google fetches: copies the stored ICS events in as the new
+    generation (commits). None if the household has no feed."""
+    feed = db.get(HouseholdFeed, household_id)
+    if feed is None:
+        return None
+    generation = (feed.generation or 0) + 1
+    window_start, window_end = window
+    # Left behind by a build that did not finish
+    _delete_rows(db, _events_table.c.household_id == household_id, _events_table.c.generation >= generation)
+
+    calendars = (
+        db.query(Calendar)
+        .join(Member, Calendar.member_id == Member.id)
+        .filter(Member.household_id == household_id, Calendar.is_visible.is_(True))
+        .options(joinedload(Calendar.member).joinedload(Member.user))
+        .all()
+    )
+    google_calendars = [cal for cal in calendars if cal.source_type != ics_subscriptions.SOURCE_ICS]
+    tokens = calendar_access_tokens(db, google_calendars)
+
+    rows = []
+    for cal, row in ics_subscriptions.iter_stored_rows(db, calendars, window_start, window_end):
+        rows.append({
+            "household_id": household_id,
+            "calendar_id": cal.id,
+            "generation": generation,
+            "uid": f"{cal.id}-{row.instance_key}@lionfish",
+            "start": row.start,
+            "end": row.end,
+            "summary": row.summary,
+            "description": row.description,
+            "location": row.location,
+        })
+        if len(rows) >= STREAM_BATCH_SIZE:
+            db.execute(insert(_events_table), rows)
+            rows = []
+    if rows:
+        db.execute(insert(_events_table), rows)
+    build = _Build(
+        generation=generation,
+        calendar_ids=[cal.id for cal in calendars],
+        sources=[(cal.id, cal.google_calendar_id, tokens[cal.id]) for cal in google_calendars if cal.id in tokens],
+        complete=[cal.id for cal in calendars if cal.source_type == ics_subscriptions.SOURCE_ICS],
+    )
+    db.commit()
+    return build
+
+
+def _insert_page(db: Session, household_id: int, generation: int, calendar_id: int, page: list[dict]) -> None:
+    """One page of Google items of a calendar, as rows of the new generation (commits)."""
+    cal = db.get(Calendar, calendar_id)
+    rows = []
+    for item in page:
+        event = google_events.google_item_to_event(cal, item)
+        if event is None:
+            continue
+        rows.append({
+            "household_id": household_id,
+            "calendar_id": calendar_id,
+            "generation": generation,
+            "uid": f"{event['id']}@lionfish",
+            "start": event["start"],
+            "end": event["end"],
+            "summary": event["title"],
+            "description": event["description"],
+            "location": event["location"],
+        })
+    if rows:
+        db.execute(insert(_events_table), rows)
+    db.commit()
+
+
+def _delete_rows(db: Session, *where) -> None:
+    db.execute(delete(_events_table).where(*where))
+
+
+def _drop_calendar(db: Session, calendar_id: int, generation: int) -> None:
+    """Drop a calendar's partly written rows of this generation (commits); it keeps its previous ones."""
+    _delete_rows(db, _events_table.c.calendar_id == calendar_id, _events_table.c.generation == generation)
+    db.commit()
+
+
+def _finish_build(db: Session, household_id: int, build: _Build) -> HouseholdFeed | None:
+    """Database half after the fetches, in one short transaction: drop the older rows of the complete
+    calendars and the rows of hidden or removed ones, rehash, and publish the generation."""
+    if build.complete:
+        _delete_rows(
+            db, _events_table.c.calendar_id.in_(build.complete), _events_table.c.generation != build.generation
+        )
+    _delete_rows(
+        db, _events_table.c.household_id == household_id, _events_table.c.calendar_id.not_in(build.calendar_ids)
+    )
+    feed = db.get(HouseholdFeed, household_id)
+    if feed is None:  # deleted while building
+        db.commit()
+        return None
+    now_naive = datetime.utcnow()
+    etag = _content_hash(db, household_id, build.generation)
+    if etag != feed.etag:
+        feed.etag = etag
+        feed.content_updated_at = now_naive
+    feed.generation = build.generation
+    feed.built_at = now_naive
+    db.commit()
+    return feed
+
+
+async def build_feed_snapshot(db: Session, household_id: int, now: datetime | None = None) -> HouseholdFeed | None:
+    """Copy the household's visible calendars (Google, plus stored ICS subscription events) into its
+    feed snapshot.
+
+    Each build writes its rows as a new generation, which readers skip until the build's last step
+    raises HouseholdFeed.generation. A calendar's older rows are dropped only then, and only if its new
+    ones are complete; a calendar Google fails to return keeps its previous rows. Every step commits, and
+    runs in a worker thread: no transaction stays open while a Google page is awaited on the event loop.
+    """
+    window = feed_window(now)
+    time_min, time_max = (google_events.google_time(t) for t in window)
+    build = await asyncio.to_thread(_start_build, db, household_id, window)
+    if build is None:
+        return None
+
+    async with httpx.AsyncClient() as client:
+        for calendar_id, google_calendar_id, access_token in build.sources:
+            try:
+                async for page in google_events.iter_calendar_pages(
+                    client, google_calendar_id, access_token, time_min, time_max
+                ):
+                    await asyncio.to_thread(_insert_page, db, household_id, build.generation, calendar_id, page)
+            except (google_events.GoogleEventsError, httpx.HTTPError) as e:
+                logger.warning("Feed snapshot: keeping previous events of calendar %s (%s)", calendar_id, e)
+                await asyncio.to_thread(_drop_calendar, db, calendar_id, build.generation)
+                continue
+            build.complete.append(calendar_id)
+    return await asyncio.to_thread(_finish_build, db, household_id, build)
+
+
+def iter_feed_ics(household_id: int) -> Iterator[str]:
+    """Stream the household's feed snapshot as iCalendar text. Uses its own session so the response
+    can keep streaming after the request's session is closed."""
+    db = shard_session(household_id)
+    try:
+        household = db.get(Household, household_id)
+        feed = db.get(HouseholdFeed, household_id)
+        dtstamp = (feed.content_updated_at if feed else None) or datetime.utcnow()
+        yield ics.calendar_header(household.name if household else "Household")
+        for row in _snapshot_rows(db, household_id, feed.generation if feed else 0):
+            yield ics.vevent(
+                uid=row.uid,
+                start=row.start,
+                end=row.end,
+                summary=row.summary,
+                description=row.description,
+                location=row.location,
+                dtstamp=dtstamp,
+            )
+        yield ics.calendar_footer()
+    finally:
+        db.close()
+
+
+async def build_feed_in_background(household_id: int) -> None:
+    """Background task: first snapshot right after a feed is created."""
+    db = shard_session(household_id)
+    try:
+        await build_feed_snapshot(db, household_id)
+    except Exception:
+        logger.exception("Building feed snapshot for household %s failed", household_id)
+    finally:
+        await asyncio.to_thread(db.close)
+
+
+def _feed_household_ids(db: Session) -> list[int]:
+    return [r[0] for r in db.query(HouseholdFeed.household_id).all()]
+
+
+async def refresh_all_feeds() -> None:
+    """Scheduled job: rebuild the snapshot of every household that has a feed."""
+    db = SessionLocal()
+    try:
+        household_ids = await asyncio.to_thread(_feed_household_ids, db)
+        for household_id in household_ids:
+            try:
+                await build_feed_snapshot(db, household_id)
+            except Exception:
+                await asyncio.to_thread(db.rollback)
+                logger.exception("Feed refresh for household %s failed", household_id)
+    finally:
+        await asyncio.to_thread(db.close)
@@ -0,0 +1,366 @@
+"""ICS subscription calendars (school, sports, holiday calendars published as public .ics URLs).
+
+A background job polls each subscribed URL with If-None-Match / If-Modified-Since. A 304 costs one
+round trip and no parsing; a changed calendar is streamed line by line through ics.IcsParser and its
+recurrences are expanded inside a fixed window. Only when the download is complete are the instances
+written, replacing the calendar's rows in ics_events in one short transaction (in a worker thread, so the
+event loop never waits on the database). Event reads (GET /api/events, the agenda and the .ics feed) merge
+these rows from the database and never fetch the URL at request time.
+
+URLs are supplied by household members, so fetches only go to the public internet: every host (the
+subscribed one and each redirect, followed by hand) is resolved and refused if any of its addresses is
+loopback, private, link-local or otherwise not global, and the connection goes to the address that was
+checked. A fetch may take at most FETCH_DEADLINE_SECONDS and MAX_FEED_BYTES in total.
+ICS_ALLOW_PRIVATE_URLS lifts the address check (for calendars served on the local network).
+"""
+
+import asyncio
+import ipaddress
+import logging
+import socket
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, Iterator
+
+import httpx
+from sqlalchemy import delete, insert, or_, select
+from sqlalchemy.orm import Session
+
+from src.config import settings
+from src.db.session import SessionLocal, shard_session
+from src.models.database import Calendar, IcsEvent
+from src.services import google_events, ics
+
+logger = logging.getLogger(__name__)
+
+SOURCE_GOOGLE = "google"
+SOURCE_ICS = "ics"
+INSERT_BATCH_SIZE = 500
+FETCH_TIMEOUT_SECONDS = 30.0  # per connect / read
+FETCH_DEADLINE_SECONDS = 120.0  # whole fetch, redirects included
+MAX_FEED_BYTES = 20 * 1024 * 1024
+MAX_REDIRECTS = 5
+
+
+class IcsFetchError(Exception):
+    """The subscribed URL answered with an unexpected status."""
+
+    def __init__(self, status_code: int):
+        super().__init__(f"ICS fetch failed: {status_code}")
+        self.status_code = status_code
+
+
+class IcsUrlError(Exception):
+    """The URL, or a redirect, points at a host that is not on the public internet (or redirects too often)."""
+
+
+class IcsLimitError(Exception):
+    """The feed is larger than MAX_FEED_BYTES or took longer than FETCH_DEADLINE_SECONDS."""
+
+
+@dataclass
+class FetchedCalendar:
+    rows: list[dict]  # ics_events rows of the instances in the sync window
+    etag: str | None
+    last_modified: str | None
+
+
+def _public_address(address: str) -> bool:
+    ip = ipaddress.ip_address(address.split("%")[0])
+    if ip.version == 6 and ip.ipv4_mapped:
+        ip = ip.ipv4_mapped
+    return ip.is_global and not ip.is_multicast
+
+
+def _public_host(host: str) -> bool:
+    """False for hosts that are known not to be public without a DNS lookup (localhost, private IPs)."""
+    host = host.lower().rstrip(".")
+    if host == "localhost" or host.endswith(".localhost"):
+        return False
+    try:
+        return _public_address(host)
+    except ValueError:
+        return True  # a name: checked when it is resolved
+
+
+def normalize_ics_url(url: str) -> str | None:
+    """webcal:// is http(s) by convention. Returns None for anything that is not an http(s) URL of a
+    (possibly) public host."""
+    url = url.strip()
+    if url.lower().startswith("webcal://"):
+        url = "https://" + url[len("webcal://"):]
+    if not url.lower().startswith(("http://", "https://")):
+        return None
+    try:
+        host = httpx.URL(url).host
+    except httpx.InvalidURL:
+        return None
+    if not host or not (settings.ICS_ALLOW_PRIVATE_URLS or _public_host(host)):
+        return None
+    return url
+
+
+async def _resolve(host: str, port: int) -> list[str]:
+    infos = await asyncio.get_running_loop().getaddrinfo(host, port, type=socket.SOCK_STREAM)
+    return [info[4][0] for info in infos]
+
+
+async def _checked_address(url: httpx.URL) -> str:
+    """An address of url's host to connect to. Raises IcsUrlError if any of its addresses is not public."""
+    if url.scheme not in ("http", "https") or not url.host:
+        raise IcsUrlError(f"not an http(s) URL: {url}")
+    try:
+        addresses = await _resolve(url.host, url.port or (443 if url.scheme == "https" else 80))
+    except socket.gaierror as e:
+        raise IcsUrlError(f"cannot resolve {url.host}: {e}") from e
+    if not addresses:
+        raise IcsUrlError(f"cannot resolve {url.host}")
+    if not settings.ICS_ALLOW_PRIVATE_URLS and not all(_public_address(a) for a in addresses):
+        raise IcsUrlError(f"{url.host} is not a public host")
+    return addresses[0]
+
+
+def sync_window(now: datetime | None = None) -> tuple[datetime, datetime]:
+    """[start, end) of the instances stored for each subscription."""
+    now = now or datetime.now(timezone.utc)
+    today = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    return today - timedelta(days=settings.ICS_PAST_DAYS), today + timedelta(days=settings.ICS_FUTURE_DAYS)
+
+
+def _naive_utc(value) -> datetime:
+    return ics.as_utc(value).replace(tzinfo=None)
+
+
+def _instance_rows(calendar_id: int, event: dict, window_start: datetime, window_end: datetime) -> Iterator[dict]:
+    for start, end in ics.expand_instances(event, window_start, window_end):
+        start_str = ics.format_google_style(start)
+        yield {
+            "calendar_id": calendar_id,
+            "instance_key": f"{event['uid']}/{event['recurrence_id'] or start_str}",
+            "start": start_str,
+            "end": ics.format_google_style(end),
+            "start_at": _naive_utc(start),
+            "end_at": _naive_utc(end),
+            "summary": event["summary"],
+            "description": event["description"],
+            "location": event["location"],
+        }
+
+
+async def _parse(calendar_id: int, resp: httpx.Response, window: tuple[datetime, datetime]) -> list[dict]:
+    """Instances of the streamed feed, with RECURRENCE-ID overrides applied."""
+    length = resp.headers.get("content-length")
+    if length and length.isdigit() and int(length) > MAX_FEED_BYTES:
+        raise IcsLimitError(f"feed is {length} bytes")
+    parser = ics.IcsParser()
+    rows: dict[str, dict] = {}  # instance_key -> row
+    # Instances replaced by a RECURRENCE-ID override; the override may come before or after its series
+    overridden: set[str] = set()
+
+    def add(events: Iterable[dict]) -> None:
+        for event in events:
+            instances = list(_instance_rows(calendar_id, event, *window))
+            if event["recurrence_id"]:
+                key = f"{event['uid']}/{event['recurrence_id']}"
+                overridden.add(key)
+                # An override moved outside the window still cancels the original instance
+                rows.pop(key, None)
+            else:
+                instances = [r for r in instances if r["instance_key"] not in overridden]
+            rows.update((r["instance_key"], r) for r in instances)
+
+    async for line in resp.aiter_lines():
+        if resp.num_bytes_downloaded > MAX_FEED_BYTES:
+            raise IcsLimitError(f"feed is over {MAX_FEED_BYTES} bytes")
+        add(parser.feed(line))
+    add(parser.close())
+    return list(rows.values())
+
+
+async def _fetch(
+    client: httpx.AsyncClient, calendar_id: int, url: str, headers: dict, window: tuple[datetime, datetime]
+) -> FetchedCalendar | None:
+    target = httpx.URL(url)
+    for _ in range(MAX_REDIRECTS + 1):
+        address = await _checked_address(target)
+        request = client.build_request(
+            "GET",
+            target.copy_with(host=address),  # connect to the address that was checked
+            headers={**headers, "Host": target.netloc.decode("ascii")},
+            extensions={"sni_hostname": target.host},
+        )
+        resp = await client.send(request, stream=True, follow_redirects=False)
+        try:
+            if resp.has_redirect_location:
+                target = target.join(resp.headers["location"])
+                continue
+            if resp.status_code == 304:
+                return None
+            if resp.status_code != 200:
+                raise IcsFetchError(resp.status_code)
+            rows = await _parse(calendar_id, resp, window)
+            return FetchedCalendar(rows, resp.headers.get("etag"), resp.headers.get("last-modified"))
+        finally:
+            await resp.aclose()
+    raise IcsUrlError(f"more than {MAX_REDIRECTS} redirects")
+
+
+async def fetch_calendar(
+    client: httpx.AsyncClient,
+    calendar_id: int,
+    url: str,
+    etag: str | None,
+    last_modified: str | None,
+    now: datetime | None = None,
+) -> FetchedCalendar | None:
+    """Conditional GET of a subscription and its instances in the sync window; None if unchanged (304).
+
+    Touches no database. Raises IcsFetchError, IcsUrlError, IcsLimitError or httpx.HTTPError on failure.
+    """
+    headers = {}
+    if etag:
+        headers["If-None-Match"] = etag
+    if last_modified:
+        headers["If-Modified-Since"] = last_modified
+    try:
+        return await asyncio.wait_for(_fetch(client, calendar_id, url, headers, sync_window(now)), FETCH_DEADLINE_SECONDS)
+    except asyncio.TimeoutError as e:
+        raise IcsLimitError(f"fetch took over {FETCH_DEADLINE_SECONDS:g}s") from e
+
+
+def store_calendar(db: Session, calendar_id: int, fetched: FetchedCalendar | None) -> None:
+    """Replace the calendar's stored instances with fetched ones (None: unchanged, only the poll time is
+    recorded), in one transaction. Blocking: run it in a worker thread."""
+    cal = db.get(Calendar, calendar_id)
+    if cal is None:
+        return
+    if fetched is not None:
+        table = IcsEvent.__table__
+        db.execute(delete(table).where(table.c.calendar_id == calendar_id))
+        for start in range(0, len(fetched.rows), INSERT_BATCH_SIZE):
+            db.execute(insert(table), fetched.rows[start:start + INSERT_BATCH_SIZE])
+        cal.ics_etag, cal.ics_last_modified = fetched.etag, fetched.last_modified
+    cal.ics_fetched_at = datetime.utcnow()
+    db.commit()
+
+
+def _subscription(db: Session, calendar_id: int) -> tuple[str, str | None, str | None] | None:
+    """(url, etag, last_modified) of an ICS calendar; None if it is gone or not an ICS subscription."""
+    row = db.execute(
+        select(Calendar.ics_url, Calendar.ics_etag, Calendar.ics_last_modified).where(
+            Calendar.id == calendar_id, Calendar.source_type == SOURCE_ICS
+        )
+    ).first()
+    db.commit()  # end the read transaction before the download
+    return tuple(row) if row else None
+
+
+async def sync_calendar(db: Session, calendar_id: int, client: httpx.AsyncClient, now: datetime | None = None) -> bool:
+    """Poll one subscription. Returns True if its events were replaced, False on 304 Not Modified (or if
+    it is no longer a subscription).
+
+    The database is only used, from a worker thread, before and after the download. Raises the errors of
+    fetch_calendar; the calendar's stored events are then left as they were.
+    """
+    subscription = await asyncio.to_thread(_subscription, db, calendar_id)
+    if subscription is None:
+        return False
+    fetched = await fetch_calendar(client, calendar_id, *subscription, now=now)
+    await asyncio.to_thread(store_calendar, db, calendar_id, fetched)
+    return fetched is not None
+
+
+def _client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(timeout=FETCH_TIMEOUT_SECONDS)  # redirects are followed (and checked) by _fetch
+
+
+def _close(db: Session, failed: bool = False) -> None:
+    if failed:
+        db.rollback()
+    db.close()
+
+
+async def sync_calendar_in_background(calendar_id: int) -> None:
+    """Background task: first fetch right after a subscription is added."""
+    db = shard_session(calendar_id)
+    failed = False
+    try:
+        async with _client() as client:
+            await sync_calendar(db, calendar_id, client)
+    except Exception:
+        failed = True
+        logger.exception("Syncing ICS calendar %s failed", calendar_id)
+    finally:
+        await asyncio.to_thread(_close, db, failed)
+
+
+def _ics_calendar_ids(db: Session) -> list[int]:
+    ids = list(db.scalars(select(Calendar.id).where(Calendar.source_type == SOURCE_ICS).order_by(Calendar.id)))
+    db.commit()
+    return ids
+
+
+async def sync_all_ics_calendars() -> None:
+    """Scheduled job: poll every ICS subscription (conditional GET, so unchanged calendars are cheap).
+    A failing calendar is logged and skipped."""
+    db = SessionLocal()
+    try:
+        calendar_ids = await asyncio.to_thread(_ics_calendar_ids, db)
+        async with _client() as client:
+            for calendar_id in calendar_ids:
+                try:
+                    await sync_calendar(db, calendar_id, client)
+                except (IcsFetchError, IcsUrlError, IcsLimitError, httpx.HTTPError) as e:
+                    await asyncio.to_thread(db.rollback)
+                    logger.warning("ICS refresh of calendar %s failed: %s", calendar_id, e)
+                except Exception:
+                    await asyncio.to_thread(db.rollback)
+                    logger.exception("ICS refresh of calendar %s failed", calendar_id)
+    finally:
+        await asyncio.to_thread(db.close)
+
+
+def row_to_event(cal: Calendar, row: IcsEvent) -> dict:
+    """Stored instance in the API's event shape (same keys as google_events.google_item_to_event)."""
+    return {
+        "id": f"{cal.id}-{row.instance_key}",
+        "title": row.summary,
+        "start": row.start,
+        "end": row.end,
+        "description": row.description,
+        "location": row.location,
+        "calendar_name": cal.name,
+        "color": google_events.event_color(cal),
+        "html_link": None,
+    }
+
+
+def iter_stored_rows(
+    db: Session, calendars: list[Calendar], start: datetime, end: datetime, q: str | None = None
+) -> Iterator[tuple[Calendar, IcsEvent]]:
+    """Stored instances of the given ICS calendars overlapping [start, end), in one query."""
+    by_id = {cal.id: cal for cal in calendars if cal.source_type == SOURCE_ICS}
+    if not by_id:
+        return
+    query = db.query(IcsEvent).filter(
+        IcsEvent.calendar_id.in_(list(by_id)),
+        IcsEvent.start_at < _naive_utc(end),
+        IcsEvent.end_at > _naive_utc(start),
+    )
+    if q:
+        pattern = f"%{q}%"
+        query = query.filter(
+            or_(
+                IcsEvent.summary.ilike(pattern),
+                IcsEvent.description.ilike(pattern),
+                IcsEvent.location.ilike(pattern),
+            )
+        )
+    for row in query.order_by(IcsEvent.start_at).yield_per(INSERT_BATCH_SIZE):
+        yield by_id[row.calendar_id], row
+
+
+def stored_events(
+    db: Session, calendars: list[Calendar], start: datetime, end: datetime, q: str | None = None
+) -> list[dict]:
+    return [row_to_event(cal, row) for cal, row in iter_stored_rows(db, calendars, start, end, q)]
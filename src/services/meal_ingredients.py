@@ -0,0 +1,186 @@
+"""Grocery items from planned meals: ingredient lines parsed out of meal descriptions, merged, and
+appended to a grocery list in one bulk insert.
+
+Meals have no ingredient table; a description lists them after a colon and a space, or on the lines after
+the first ("Chili: 500g beef mince, 2 onions, 1 tin tomatoes"). Each ingredient is an optional quantity and unit
+and a name. Lines with the same name (case and plural ignored) and unit are merged and their quantities
+added; names already on the list are skipped. Reading costs two queries (the meals of the range, the
+list's items) and writing one INSERT per _INSERT_CHUNK items, however long the range. Not committed.
+"""
+
+import re
+from dataclasses import dataclass, field
+from datetime import date
+
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+
+from src.models.database import GroceryListItem, PlannedMeal
+from src.services import change_log, ranking
+
+# Rows per INSERT statement (5 parameters each; SQLite allows 32766 per statement)
+_INSERT_CHUNK = 1000
+
+# Written unit -> (unit it is counted in, factor)
+_UNITS = {
+    "g": ("g", 1), "gram": ("g", 1), "grams": ("g", 1),
+    "kg": ("g", 1000), "kilo": ("g", 1000), "kilos": ("g", 1000),
+    "ml": ("ml", 1), "l": ("ml", 1000), "litre": ("ml", 1000), "litres": ("ml", 1000), "liter": ("ml", 1000),
+    "tsp": ("tsp", 1), "tbsp": ("tbsp", 1),
+    "cup": ("cup", 1), "cups": ("cup", 1),
+    "tin": ("tin", 1), "tins": ("tin", 1), "can": ("can", 1), "cans": ("can", 1),
+    "pack": ("pack", 1), "packs": ("pack", 1),
+    "bunch": ("bunch", 1), "bunches": ("bunch", 1),
+    "clove": ("clove", 1), "cloves": ("clove", 1),
+}
+
+_BULLET = re.compile(r"^\s*(?:[-*•]|\d+[.)])\s+")
+_QUANTITY = re.compile(r"^(?P<quantity>\d+/\d+|\d+(?:[.,]\d+)?)\s*(?P<rest>.*)$")
+_UNIT = re.compile(r"^(?P<unit>[a-z]+)\.?(?:\s+of)?\s+(?P<name>.+)$", re.IGNORECASE)
+# A comma between two digits is a decimal comma ("1,5 kg flour"), not a separator
+_SEPARATORS = re.compile(r"[\n;]|(?<!\d),|,(?!\d)")
+# The colon before the ingredients is followed by a space or line end; "7:30" is a time
+_LIST_COLON = re.compile(r":(?=\s|$)")
+
+
+@dataclass
+class Ingredient:
+    name: str  # as first written
+    quantity: float | None = None  # in unit (or a count when unit is None); None: not given
+    unit: str | None = None
+
+    @property
+    def key(self) -> tuple[str, str | None]:
+        return _name_key(self.name), self.unit
+
+    @property
+    def content(self) -> str:
+        """The grocery item text, e.g. "beef mince (1.5 kg)", "onions (3)", "parsley"."""
+        if self.quantity is None:
+            return self.name
+        quantity, unit = self.quantity, self.unit
+        if unit in ("g", "ml") and quantity >= 1000:
+            quantity, unit = quantity / 1000, "kg" if unit == "g" else "l"
+        amount = f"{quantity:g} {unit}" if unit else f"{quantity:g}"
+        return f"{self.name} ({amount})"
+
+
+@dataclass
+class GroceryPlan:
+    """What adding a range's meals to a list would do."""
+
+    items: list[Ingredient] = field(default_factory=list)  # new, in order of first use
+    already_on_list: list[str] = field(default_factory=list)  # names skipped
+    meals_without_ingredients: int = 0
+
+
+def _name_key(name: str) -> str:
+    """Casefolded name with the last word's simple plural trimmed ("Tomatoes" and "tomato" match)."""
+    words = name.casefold().split()
+    if not words:
+        return ""
+    last = words[-1]
+    if len(last) > 4 and last.endswith("ies"):
+        last = last[:-3] + "y"
+    elif len(last) > 3 and last.endswith("oes"):
+        last = last[:-2]
+    elif len(last) > 3 and last.endswith("s") and not last.endswith("ss"):
+        last = last[:-1]
+    return " ".join(words[:-1] + [last])
+
+
+def _parse_quantity(text: str) -> float:
+    if "/" in text:
+        numerator, denominator = text.split("/")
+        return int(numerator) / int(denominator) if int(denominator) else 0.0
+    return float(text.replace(",", "."))
+
+
+def parse_ingredient(line: str) -> Ingredient | None:
+    """One ingredient line ("500g beef mince", "2 onions", "salt"); None if it is blank."""
+    line = " ".join(_BULLET.sub("", line).split())
+    if not line:
+        return None
+    match = _QUANTITY.match(line)
+    if match is None or not match["rest"]:
+        return Ingredient(line)
+    quantity, rest = _parse_quantity(match["quantity"]), match["rest"]
+    unit_match = _UNIT.match(rest)
+    if unit_match and unit_match["unit"].lower() in _UNITS:
+        unit, factor = _UNITS[unit_match["unit"].lower()]
+        return Ingredient(unit_match["name"], quantity * factor, unit)
+    return Ingredient(rest, quantity)
+
+
+def parse_description(description: str | None) -> list[Ingredient]:
+    """The ingredients listed in a meal description (after a colon, or on the lines after the first)."""
+    if not description:
+        return []
+    parts = _LIST_COLON.split(description, maxsplit=1)
+    if len(parts) == 2:
+        text = parts[1]
+    else:
+        lines = description.strip().splitlines()
+        text = "\n".join(lines[1:])
+    return [ingredient for part in _SEPARATORS.split(text) if (ingredient := parse_ingredient(part))]
+
+
+def merge(ingredients: list[Ingredient]) -> list[Ingredient]:
+    """One ingredient per name and unit, quantities added, in order of first appearance."""
+    merged: dict[tuple[str, str | None], Ingredient] = {}
+    for ingredient in ingredients:
+        existing = merged.get(ingredient.key)
+        if existing is None:
+            merged[ingredient.key] = Ingredient(ingredient.name, ingredient.quantity, ingredient.unit)
+        elif ingredient.quantity is not None:
+            existing.quantity = (existing.quantity or 0) + ingredient.quantity
+    return list(merged.values())
+
+
+def plan_items(db: Session, household_id: int, grocery_list_id: int, start: date, end: date) -> GroceryPlan:
+    """The items the household's meals from start to end (inclusive) need that the list does not have.
+    Two queries."""
+    descriptions = db.scalars(
+        select(PlannedMeal.description)
+        .where(PlannedMeal.household_id == household_id, PlannedMeal.meal_date >= start, PlannedMeal.meal_date <= end)
+        .order_by(PlannedMeal.meal_date.asc(), PlannedMeal.meal_slot_id.asc())
+    ).all()
+    plan = GroceryPlan()
+    ingredients = []
+    for description in descriptions:
+        parsed = parse_description(description)
+        if not parsed:
+            plan.meals_without_ingredients += 1
+        ingredients += parsed
+    on_list = {
+        _name_key(ingredient.name)
+        for content in db.scalars(
+            select(GroceryListItem.content).where(
+                GroceryListItem.grocery_list_id == grocery_list_id, GroceryListItem.is_section_header.is_not(True)
+            )
+        )
+        if (ingredient := parse_ingredient(re.sub(r"\s*\([^)]*\)$", "", content)))
+    }
+    for ingredient in merge(ingredients):
+        if _name_key(ingredient.name) in on_list:
+            if ingredient.name not in plan.already_on_list:
+                plan.already_on_list.append(ingredient.name)
+        else:
+            plan.items.append(ingredient)
+    return plan
+
+
+def insert_items(db: Session, grocery_list_id: int, contents: list[str], member_id: int | None) -> list[int]:
+    """Append contents to the end of the list, in order (keys for all of them in one pass). Returns ids."""
+    if not contents:
+        return []
+    ranks = ranking.ranks_after(ranking.last_rank(db, GroceryListItem, grocery_list_id), len(contents))
+    rows = [
+        {"grocery_list_id": grocery_list_id, "content": content[:500], "is_section_header": False, "rank": rank, "member_id": member_id}
+        for content, rank in zip(contents, ranks)
+    ]
+    ids = []
+    for start in range(0, len(rows), _INSERT_CHUNK):
+        ids += db.scalars(insert(GroceryListItem).values(rows[start:start + _INSERT_CHUNK]).returning(GroceryListItem.id)).all()
+    change_log.record(db, GroceryListItem, grocery_list_id, ids)
+    return ids
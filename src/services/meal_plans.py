@@ -0,0 +1,133 @@
+"""Planned meal writes that must be atomic: set a day/slot's meal, swap two meals, copy or repeat a range.
+
+All are set-based, so concurrent edits of the same slot cannot interleave between a read and a write:
+upserts are INSERT ... ON CONFLICT (household_id, meal_date, meal_slot_id) DO UPDATE (any number of rows
+in one statement), and the swap exchanges the two rows' assignee and description in one UPDATE (the rows
+keep their day/slot, so the unique constraint is never violated mid-swap). They bypass the ORM, so they
+log their changes with change_log.record. Not committed.
+"""
+
+from collections import defaultdict
+from datetime import date, timedelta
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from src.models.database import PlannedMeal
+from src.services import bulk_updates, change_log
+
+# Longest range a copy may read, and a rotation may write
+MAX_PLAN_DAYS = 366
+
+_SLOT_KEY = ("household_id", "meal_date", "meal_slot_id")
+
+# Rows per upsert statement (6 parameters each; SQLite allows 32766 per statement)
+_UPSERT_CHUNK = 1000
+
+# (meal_date, meal_slot_id) -> id of the meal planned there
+SlotMeals = dict[tuple[date, int], int]
+
+
+def upsert_planned_meals(db: Session, rows: list[dict]) -> list[PlannedMeal]:
+    """Write rows (PlannedMeal column values, at most one per household/day/slot), each inserted or
+    overwriting the meal already in its day/slot. Returns the meals (in no particular order)."""
+    if not rows:
+        return []
+    dialect = db.get_bind().dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+        meals = []
+        for start in range(0, len(rows), _UPSERT_CHUNK):
+            stmt = insert(PlannedMeal).values(rows[start:start + _UPSERT_CHUNK])  # one multi-row VALUES statement
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[PlannedMeal.__table__.c[k] for k in _SLOT_KEY],
+                set_={"member_id": stmt.excluded.member_id, "description": stmt.excluded.description},
+            )
+            meals += db.scalars(stmt.returning(PlannedMeal), execution_options={"populate_existing": True}).all()
+        ids_by_household: dict[int, list[int]] = defaultdict(list)
+        for meal in meals:
+            ids_by_household[meal.household_id].append(meal.id)
+        for household_id, ids in ids_by_household.items():
+            change_log.record(db, PlannedMeal, household_id, ids)
+        return meals
+    meals = []
+    for row in rows:
+        meal = db.scalar(select(PlannedMeal).filter_by(**{k: row[k] for k in _SLOT_KEY}).with_for_update())
+        if meal is None:
+            meal = PlannedMeal(**row)
+            db.add(meal)
+        else:
+            meal.member_id, meal.description = row["member_id"], row.get("description")
+        meals.append(meal)
+    db.flush()  # logged by the flush hooks
+    return meals
+
+
+def upsert_planned_meal(
+    db: Session, household_id: int, meal_date: date, meal_slot_id: int, member_id: int, description: str | None
+) -> PlannedMeal:
+    """The household's meal for meal_date/meal_slot_id, inserted or, if the slot has one, overwritten."""
+    return upsert_planned_meals(db, [{
+        "household_id": household_id,
+        "meal_date": meal_date,
+        "meal_slot_id": meal_slot_id,
+        "member_id": member_id,
+        "description": description,
+    }])[0]
+
+
+def swap_planned_meals(db: Session, meal_a: PlannedMeal, meal_b: PlannedMeal) -> None:
+    """Exchange two meals of one household between their day/slots (assignee and description)."""
+    bulk_updates.apply_changes(
+        db,
+        PlannedMeal,
+        PlannedMeal.household_id == meal_a.household_id,
+        {
+            meal_a.id: {"member_id": meal_b.member_id, "description": meal_b.description},
+            meal_b.id: {"member_id": meal_a.member_id, "description": meal_a.description},
+        },
+    )
+    change_log.record(db, PlannedMeal, meal_a.household_id, [meal_a.id, meal_b.id])
+
+
+def repeat_meals(
+    db: Session, household_id: int, source_start: date, period_days: int, target_start: date, target_days: int
+) -> list[dict]:
+    """Rows repeating the household's meals of the period_days from source_start over the target_days
+    from target_start: target day n gets the meals of source day n % period_days. One query."""
+    source = db.execute(
+        select(PlannedMeal.meal_date, PlannedMeal.meal_slot_id, PlannedMeal.member_id, PlannedMeal.description).where(
+            PlannedMeal.household_id == household_id,
+            PlannedMeal.meal_date >= source_start,
+            PlannedMeal.meal_date < source_start + timedelta(days=period_days),
+        )
+    ).all()
+    by_day = defaultdict(list)
+    for meal_date, meal_slot_id, member_id, description in source:
+        by_day[(meal_date - source_start).days].append((meal_slot_id, member_id, description))
+    return [
+        {
+            "household_id": household_id,
+            "meal_date": target_start + timedelta(days=day),
+            "meal_slot_id": meal_slot_id,
+            "member_id": member_id,
+            "description": description,
+        }
+        for day in range(target_days)
+        for meal_slot_id, member_id, description in sorted(by_day.get(day % period_days, []), key=lambda m: m[0])
+    ]
+
+
+def slot_meals(db: Session, household_id: int, start: date, end: date) -> SlotMeals:
+    """The household's planned day/slots from start to end (inclusive). One query."""
+    rows = db.execute(
+        select(PlannedMeal.meal_date, PlannedMeal.meal_slot_id, PlannedMeal.id).where(
+            PlannedMeal.household_id == household_id,
+            PlannedMeal.meal_date >= start,
+            PlannedMeal.meal_date <= end,
+        )
+    ).all()
+    return {(meal_date, meal_slot_id): meal_id for meal_date, meal_slot_id, meal_id in rows}
@@ -0,0 +1,157 @@
+"""Type-ahead suggestions for planned meal descriptions, from the household's meal history.
+
+Each household's distinct descriptions (case-insensitive) are kept in memory with how often and how
+recently they were planned. Prefix lookups search a sorted array of lowercased word suffixes ("pesto
+pasta" is found by "pe" and by "pa") with bisect, so a suggestion costs no database query.
+
+An index is built from one aggregate query over the household's planned meals the first time it is
+needed, then updated in place as meals are saved in this process (record). It is rebuilt once older than
+MEAL_SUGGESTIONS_TTL_SECONDS, which picks up writes made by other workers, and at most
+MEAL_SUGGESTIONS_HOUSEHOLDS indexes are kept (least recently used evicted first). Deleting or
+overwriting a meal does not lower its count until the next rebuild.
+"""
+
+import bisect
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import date
+from typing import Iterable
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from src.config import settings
+from src.models.database import PlannedMeal
+
+# Distinct descriptions kept per household (the most planned ones)
+MAX_ENTRIES = 500
+
+
+@dataclass
+class Suggestion:
+    description: str  # as most recently written
+    count: int  # times planned
+    last_planned: date
+
+
+def _key(description: str) -> str:
+    return " ".join(description.casefold().split())
+
+
+class MealIndex:
+    """One household's past meal descriptions, searchable by the prefix of any of their words."""
+
+    def __init__(self, entries: Iterable[Suggestion] = ()):
+        self.built_at = time.monotonic()
+        self._entries: dict[str, Suggestion] = {}
+        self._suffixes: list[tuple[str, str]] = []  # sorted (word suffix of key, key)
+        for entry in entries:
+            self._merge(entry.description, entry.count, entry.last_planned)
+        self._trim()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def add(self, description: str | None, meal_date: date) -> None:
+        """Count one more planning of description (on meal_date)."""
+        if description and description.strip():
+            self._merge(description.strip(), 1, meal_date)
+            if len(self._entries) > MAX_ENTRIES:
+                self._trim()
+
+    def search(self, prefix: str, limit: int = 10) -> list[Suggestion]:
+        """Descriptions with a word starting with prefix, most planned (then most recent) first."""
+        prefix = _key(prefix)
+        if not prefix:
+            matches = set(self._entries)
+        else:
+            matches = set()
+            i = bisect.bisect_left(self._suffixes, (prefix, ""))
+            while i < len(self._suffixes) and self._suffixes[i][0].startswith(prefix):
+                matches.add(self._suffixes[i][1])
+                i += 1
+        ranked = sorted((self._entries[k] for k in matches), key=lambda s: (-s.count, -s.last_planned.toordinal(), s.description))
+        return ranked[:limit]
+
+    def _merge(self, description: str, count: int, last_planned: date) -> None:
+        key = _key(description)
+        entry = self._entries.get(key)
+        if entry is None:
+            self._entries[key] = Suggestion(description, count, last_planned)
+            for suffix in self._word_suffixes(key):
+                bisect.insort(self._suffixes, (suffix, key))
+            return
+        entry.count += count
+        if last_planned >= entry.last_planned:
+            entry.description, entry.last_planned = description, last_planned
+
+    def _trim(self) -> None:
+        if len(self._entries) <= MAX_ENTRIES:
+            return
+        keep = sorted(self._entries.items(), key=lambda kv: (-kv[1].count, -kv[1].last_planned.toordinal()))[:MAX_ENTRIES]
+        self._entries = dict(keep)
+        self._suffixes = sorted((suffix, key) for key in self._entries for suffix in self._word_suffixes(key))
+
+    @staticmethod
+    def _word_suffixes(key: str) -> list[str]:
+        words = key.split(" ")
+        return [" ".join(words[i:]) for i in range(len(words))]
+
+
+# household_id -> index, least recently used first
+_indexes: "OrderedDict[int, MealIndex]" = OrderedDict()
+
+
+def build_index(db: Session, household_id: int) -> MealIndex:
+    """Index of the household's planned meals (one aggregate query)."""
+    rows = db.execute(
+        select(PlannedMeal.description, func.count(), func.max(PlannedMeal.meal_date))
+        .where(PlannedMeal.household_id == household_id, PlannedMeal.description.is_not(None))
+        .group_by(PlannedMeal.description)
+    ).all()
+    return MealIndex(
+        Suggestion(description.strip(), count, last_planned)
+        for description, count, last_planned in rows
+        if description.strip()
+    )
+
+
+def cached_index(household_id: int) -> MealIndex | None:
+    """The household's index if it is in memory and fresh (marks it recently used)."""
+    index = _indexes.get(household_id)
+    if index is None:
+        return None
+    if time.monotonic() - index.built_at >= settings.MEAL_SUGGESTIONS_TTL_SECONDS:
+        del _indexes[household_id]
+        return None
+    _indexes.move_to_end(household_id)
+    return index
+
+
+def store(household_id: int, index: MealIndex) -> None:
+    _indexes[household_id] = index
+    _indexes.move_to_end(household_id)
+    while len(_indexes) > max(settings.MEAL_SUGGESTIONS_HOUSEHOLDS, 1):
+        _indexes.popitem(last=False)
+
+
+def get_index(db: Session, household_id: int) -> MealIndex:
+    """The household's index, built (one query) if it is not in memory or is stale."""
+    index = cached_index(household_id)
+    if index is None:
+        index = build_index(db, household_id)
+        store(household_id, index)
+    return index
+
+
+def record(household_id: int, meals: Iterable[tuple[str | None, date]]) -> None:
+    """Count committed meal saves (description, meal_date) in the household's index, if it is in memory."""
+    index = _indexes.get(household_id)
+    if index is not None:
+        for description, meal_date in meals:
+            index.add(description, meal_date)
+
+
+def clear() -> None:
+    _indexes.clear()
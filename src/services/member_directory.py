@@ -0,0 +1,43 @@
+"""Batch lookup of member display names and colors for serializing household lists.
+
+List endpoints collect the member_ids their rows reference and resolve them here with one joined query,
+instead of loading each Member (and its User) per row.
+"""
+
+from dataclasses import dataclass
+from typing import Iterable
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from src.models.database import Member, User
+
+
+@dataclass(frozen=True)
+class MemberLabel:
+    display_name: str | None  # user's display name, falling back to email
+    color: str | None  # member's event_color (None if unset)
+
+
+def load_member_labels(db: Session, member_ids: Iterable[int | None]) -> dict[int, MemberLabel]:
+    """member_id -> MemberLabel for the given ids (None and unknown ids are skipped). One query."""
+    ids = {mid for mid in member_ids if mid is not None}
+    if not ids:
+        return {}
+    rows = db.execute(
+        select(Member.id, Member.event_color, User.display_name, User.email)
+        .outerjoin(User, Member.user_id == User.id)
+        .where(Member.id.in_(ids))
+    ).all()
+    return {
+        member_id: MemberLabel(display_name=display_name or email, color=color)
+        for member_id, color, display_name, email in rows
+    }
+
+
+def labels_from_members(members: Iterable[Member]) -> dict[int, MemberLabel]:
+    """Same as load_member_labels for Members already loaded with their User (no query)."""
+    return {
+        m.id: MemberLabel(display_name=(m.user.display_name or m.user.email) if m.user else None, color=m.event_color)
+        for m in members
+    }
@@ -0,0 +1,231 @@
+"""Per-household publish/subscribe bus behind the server-sent events stream (GET /api/households/{id}/events).
+
+Messages are small notifications ({"seq": N}: the household's change log moved to N); subscribers fetch
+the rows themselves from GET /api/households/{id}/changes. change_log publishes one after every commit
+that wrote synced rows, so routes do not publish by hand.
+
+Backends (PUBSUB_BACKEND):
+- "local": in-process only. Enough for one worker process, and the stand-in for tests and development.
+- "postgres": PostgreSQL LISTEN/NOTIFY, so every worker (and every instance) sharing the database sees
+  every message. Needs DATABASE_URL to point at PostgreSQL.
+
+Backpressure: each subscriber has a bounded queue (PUSH_QUEUE_SIZE). Publishing never blocks; when a
+slow consumer's queue is full its oldest message is dropped. Nothing is lost by that, since a newer
+seq supersedes older ones: the client still catches up through the changes endpoint.
+"""
+
+import asyncio
+import json
+import logging
+import queue
+import select
+import threading
+from typing import Any
+
+from src.config import settings
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "household_events"
+
+
+class Subscription:
+    """One consumer's queue of messages for one household. Read with `await get()`."""
+
+    def __init__(self, household_id: int, maxsize: int):
+        self.household_id = household_id
+        self.dropped = 0  # messages discarded because the consumer fell behind
+        self._loop = asyncio.get_running_loop()
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+
+    def offer(self, message: Any) -> None:
+        """Queue a message from any thread, dropping the oldest one if the queue is full."""
+        self._loop.call_soon_threadsafe(self._put, message)
+
+    def _put(self, message: Any) -> None:
+        if self._queue.full():
+            self._queue.get_nowait()
+            self.dropped += 1
+        self._queue.put_nowait(message)
+
+    async def get(self) -> Any:
+        return await self._queue.get()
+
+
+class LocalBackend:
+    """In-process bus: messages reach the subscribers of this process only."""
+
+    def __init__(self, queue_size: int | None = None):
+        self.queue_size = queue_size or settings.PUSH_QUEUE_SIZE
+        self._subscribers: dict[int, set[Subscription]] = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, household_id: int) -> Subscription:
+        """Start receiving a household's messages (call from the event loop). Pair with unsubscribe."""
+        subscription = Subscription(household_id, self.queue_size)
+        with self._lock:
+            self._subscribers.setdefault(household_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.household_id)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.household_id]
+
+    def subscriber_count(self, household_id: int | None = None) -> int:
+        with self._lock:
+            if household_id is not None:
+                return len(self._subscribers.get(household_id, ()))
+            return sum(len(s) for s in self._subscribers.values())
+
+    def publish(self, household_id: int, message: Any) -> None:
+        """Send a message to every subscriber of the household. Safe from any thread; never blocks."""
+        self._deliver(household_id, message)
+
+    def _deliver(self, household_id: int, message: Any) -> None:
+        with self._lock:
+            subscribers = list(self._subscribers.get(household_id, ()))
+        for subscription in subscribers:
+            try:
+                subscription.offer(message)
+            except RuntimeError:
+                # Its event loop is closed (app shut down); nothing left to deliver to
+                self.unsubscribe(subscription)
+
+    def start(self) -> None:
+        pass
+
+    def stop(self) -> None:
+        pass
+
+
+class PostgresBackend(LocalBackend):
+    """Bus shared by every process on the same PostgreSQL database, via LISTEN/NOTIFY.
+
+    publish() queues the message for a sender thread, which sends NOTIFY on CHANNEL: publish runs in
+    change_log's after-commit hook, on the event loop for request sessions, and must not wait for a round
+    trip to the database. A listener thread per process receives every notification (its own included)
+    and hands it to the local subscribers. If the sender falls SEND_QUEUE_SIZE messages behind, new
+    messages are dropped (subscribers catch up on their next changes fetch).
+    """
+
+    SEND_QUEUE_SIZE = 10000
+
+    def __init__(self, dsn: str, queue_size: int | None = None):
+        super().__init__(queue_size)
+        self.dsn = dsn
+        self.unsent = 0  # messages dropped because the sender queue was full
+        self._outbox: queue.Queue = queue.Queue(maxsize=self.SEND_QUEUE_SIZE)
+        self._sender: threading.Thread | None = None
+        self._sender_lock = threading.Lock()
+        self._listener: threading.Thread | None = None
+        self._stopping = threading.Event()
+
+    def _connect(self):
+        import psycopg2
+
+        conn = psycopg2.connect(self.dsn)
+        conn.autocommit = True
+        return conn
+
+    def publish(self, household_id: int, message: Any) -> None:
+        """Queue a NOTIFY for the sender thread. Never blocks."""
+        self._ensure_sender()
+        try:
+            self._outbox.put_nowait(json.dumps({"household_id": household_id, "message": message}))
+        except queue.Full:
+            self.unsent += 1
+
+    def _ensure_sender(self) -> None:
+        with self._sender_lock:
+            if self._sender is None:
+                self._sender = threading.Thread(target=self._send, name="pubsub-sender", daemon=True)
+                self._sender.start()
+
+    def _send(self) -> None:
+        conn = None
+        while True:
+            payloads = [self._outbox.get()]
+            while True:
+                try:
+                    payloads.append(self._outbox.get_nowait())
+                except queue.Empty:
+                    break
+            stopping = None in payloads
+            payloads = [payload for payload in payloads if payload is not None]
+            try:
+                if payloads:
+                    if conn is None or conn.closed:
+                        conn = self._connect()
+                    with conn.cursor() as cur:
+                        for payload in payloads:
+                            cur.execute("SELECT pg_notify(%s, %s)", (CHANNEL, payload))
+            except Exception:
+                # Subscribers catch up on their next changes fetch; a lost notification is not fatal
+                logger.exception("Publishing %s household events failed", len(payloads))
+                conn = None
+            if stopping:
+                if conn is not None:
+                    conn.close()
+                return
+
+    def start(self) -> None:
+        self._stopping.clear()
+        self._ensure_sender()
+        self._listener = threading.Thread(target=self._listen, name="pubsub-listener", daemon=True)
+        self._listener.start()
+
+    def stop(self) -> None:
+        """Send what is queued, then stop the sender and listener threads."""
+        self._stopping.set()
+        with self._sender_lock:
+            sender, self._sender = self._sender, None
+        if sender is not None:
+            self._outbox.put(None)
+            sender.join(timeout=5)
+        if self._listener is not None:
+            self._listener.join(timeout=5)
+            self._listener = None
+
+    def _listen(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                conn = self._connect()
+                with conn.cursor() as cur:
+                    cur.execute(f"LISTEN {CHANNEL}")
+                while not self._stopping.is_set():
+                    if select.select([conn], [], [], 1.0) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        notify = conn.notifies.pop(0)
+                        data = json.loads(notify.payload)
+                        self._deliver(data["household_id"], data["message"])
+                conn.close()
+            except Exception:
+                logger.exception("Pub/sub listener failed; reconnecting")
+                self._stopping.wait(5)
+
+
+def _database_dsn() -> str:
+    from sqlalchemy.engine import make_url
+
+    from src.db.session import DATABASE_URL
+
+    return make_url(DATABASE_URL).set(drivername="postgresql").render_as_string(hide_password=False)
+
+
+def create_backend(name: str | None = None) -> LocalBackend:
+    """Backend named by PUBSUB_BACKEND ("local" or "postgres")."""
+    name = (name or settings.PUBSUB_BACKEND).lower()
+    if name == "local":
+        return LocalBackend()
+    if name == "postgres":
+        return PostgresBackend(_database_dsn())
+    raise ValueError(f"Unknown PUBSUB_BACKEND: {name!r} (expected 'local' or 'postgres')")
+
+
+bus: LocalBackend = create_backend()
@@ -0,0 +1,232 @@
+"""Lexicographic rank keys for user-ordered lists (to-do items, grocery list items).
+
+A rank is a base-36 fraction written without its leading "0.": "i" is 0.5, "0i" is 0.0138... Keys of
+one list sort by plain string comparison, and there is always a key strictly between two others, so
+moving or inserting an item writes only that item's row. Keys never end in "0" (so there is always
+room before them) and use only digits and lowercase letters, whose order is the same under byte-wise
+and locale collations.
+
+Appends (the most common write) step just past the last key in its APPEND_WIDTH-th digit, so about
+20,000 items can be appended after a key in the middle before keys grow. Repeated inserts at one spot
+in the middle of a list make keys longer (about one character per five inserts); the rank-rebalance job
+rewrites a list with evenly spaced short keys once any key exceeds RANK_MAX_LENGTH.
+"""
+
+import asyncio
+import logging
+
+from sqlalchemy import case, func, select, update
+from sqlalchemy.orm import Session
+
+from src.config import settings
+from src.db.session import SessionLocal
+from src.models.database import GroceryListItem, TodoItem
+from src.services import change_log
+
+logger = logging.getLogger(__name__)
+
+DIGITS = "0123456789abcdefghijklmnopqrstuvwxyz"
+BASE = len(DIGITS)
+APPEND_WIDTH = 3  # digits of appended keys (longer only if the last key is)
+
+
+class RankConflict(ValueError):
+    """The two neighbours given for a move are not in order (before must sort before after)."""
+
+
+def _midpoint(a: str, b: str | None) -> str:
+    """Key strictly between a ("" = 0) and b (None = 1). Neither may end in "0"."""
+    if b is not None:
+        n = 0
+        while n < len(b) and (a[n] if n < len(a) else "0") == b[n]:
+            n += 1
+        if n > 0:
+            return b[:n] + _midpoint(a[n:], b[n:])
+    digit_a = DIGITS.index(a[0]) if a else 0
+    digit_b = DIGITS.index(b[0]) if b is not None else BASE
+    if digit_b - digit_a > 1:
+        return DIGITS[(digit_a + digit_b + 1) // 2]
+    if b is not None and len(b) > 1:
+        return b[0]
+    return DIGITS[digit_a] + _midpoint(a[1:], None)
+
+
+def rank_between(before: str | None, after: str | None) -> str:
+    """Key sorting after `before` and before `after`; None means the start / end of the list."""
+    if before is not None and after is not None and before >= after:
+        raise RankConflict(f"{before!r} does not sort before {after!r}")
+    return _midpoint(before or "", after)
+
+
+def evenly_spaced(count: int) -> list[str]:
+    """`count` ascending keys spread evenly over (0, 1), as short as possible."""
+    return spaced_between(None, None, count)
+
+
+def _value(key: str, width: int) -> int:
+    return int(key.ljust(width, "0"), BASE) if key else 0
+
+
+def _key(value: int, width: int) -> str:
+    digits = []
+    for _ in range(width):
+        value, digit = divmod(value, BASE)
+        digits.append(DIGITS[digit])
+    return "".join(reversed(digits)).rstrip("0")
+
+
+def ranks_after(last: str | None, count: int) -> list[str]:
+    """`count` ascending keys after `last` (None: an empty list), each one step past the previous in
+    the APPEND_WIDTH-th digit (or last's final digit, if longer). Only at the very end of the key space
+    ("zzz") are the keys spread over what is left, growing longer."""
+    if last is None:
+        if not count:
+            return []
+        first = rank_between(None, None)
+        return [first] + ranks_after(first, count - 1)
+    width = max(len(last), APPEND_WIDTH)
+    value = _value(last, width)
+    if value + count < BASE**width:
+        return [_key(value + i, width) for i in range(1, count + 1)]
+    return spaced_between(last, None, count)
+
+
+def spaced_between(before: str | None, after: str | None, count: int) -> list[str]:
+    """`count` ascending keys spread evenly between `before` and `after` (None: the start / end of the
+    list), as short as possible."""
+    if before is not None and after is not None and before >= after:
+        raise RankConflict(f"{before!r} does not sort before {after!r}")
+    width = max(len(before or ""), len(after or ""), 1)
+    while True:
+        low = _value(before or "", width)
+        high = _value(after, width) if after is not None else BASE**width
+        if high - low > count:
+            break
+        width += 1
+    step = (high - low) // (count + 1)
+    return [_key(low + i * step, width) for i in range(1, count + 1)]
+
+
+def _scope(model):
+    """Column holding the list an item belongs to."""
+    return TodoItem.household_id if model is TodoItem else GroceryListItem.grocery_list_id
+
+
+def last_rank(db: Session, model, scope_id: int) -> str | None:
+    """Highest key in a list (served by the (list, rank) index)."""
+    return db.scalar(select(func.max(model.rank)).where(_scope(model) == scope_id))
+
+
+def append_rank(db: Session, model, scope_id: int) -> str:
+    """Key for a new item at the end of a list."""
+    return ranks_after(last_rank(db, model, scope_id), 1)[0]
+
+
+def move_rank(db: Session, item, after_id: int | None, before_id: int | None) -> str:
+    """New key placing `item` after the item `after_id` and before the item `before_id`.
+
+    Either neighbour may be omitted: without after_id the item goes to the top of the list (or right
+    before `before_id`), without before_id right after `after_id` (or to the end). Neighbours must be
+    in the item's list; raises LookupError otherwise and RankConflict if they are out of order. Tied
+    neighbours (two items appended at the same moment) are told apart by respacing the list first.
+    """
+    model = type(item)
+    scope = _scope(model)
+    scope_id = getattr(item, scope.key)
+    before, after = _neighbour_ranks(db, item, after_id, before_id)
+    if before is not None and before == after:
+        _respace(db, model, scope_id)
+        before, after = _neighbour_ranks(db, item, after_id, before_id)
+    return rank_between(before, after)
+
+
+def _neighbour_ranks(db: Session, item, after_id: int | None, before_id: int | None) -> tuple[str | None, str | None]:
+    model = type(item)
+    scope = _scope(model)
+    others = (scope == getattr(item, scope.key), model.id != item.id)
+    wanted = [i for i in (after_id, before_id) if i is not None]
+    ranks = dict(db.execute(select(model.id, model.rank).where(*others, model.id.in_(wanted))).all()) if wanted else {}
+    if any(i not in ranks for i in wanted):
+        raise LookupError("Neighbour item not found in this list")
+    before = ranks.get(after_id)
+    after = ranks.get(before_id)
+    if after_id is None and before_id is not None:
+        # Directly after the item currently preceding `before_id` (None: top of the list)
+        before = db.scalar(select(func.max(model.rank)).where(*others, model.rank < after))
+    elif before_id is None and after_id is not None:
+        after = db.scalar(select(func.min(model.rank)).where(*others, model.rank > before))
+    elif after_id is None and before_id is None:
+        after = db.scalar(select(func.min(model.rank)).where(*others))
+    return before, after
+
+
+def reorder(db: Session, model, scope_id: int, ids: list[int]) -> None:
+    """Put the items `ids` of one list in the given order, in one UPDATE (not committed).
+
+    The items' current keys are dealt out again in the new order, so items not listed keep their place
+    and a complete list of ids simply sets the list's order. Raises LookupError if an id is not in the
+    list, ValueError if an id is repeated.
+    """
+    if len(set(ids)) != len(ids):
+        raise ValueError("Duplicate item id")
+    scope = _scope(model)
+    ranks = dict(db.execute(select(model.id, model.rank).where(scope == scope_id, model.id.in_(ids))).all())
+    if len(ranks) != len(ids):
+        raise LookupError("Item not found in this list")
+    slots = sorted(ranks.values())
+    if len(set(slots)) != len(slots):
+        # Tied keys (two items appended at the same moment): respace the list so every slot is distinct
+        _respace(db, model, scope_id)
+        ranks = dict(db.execute(select(model.id, model.rank).where(scope == scope_id, model.id.in_(ids))).all())
+        slots = sorted(ranks.values())
+    db.execute(
+        update(model)
+        .where(scope == scope_id, model.id.in_(ids))
+        .values(rank=case(dict(zip(ids, slots)), value=model.id))
+        .execution_options(synchronize_session=False)
+    )
+    change_log.record(db, model, scope_id, ids)
+
+
+def _respace(db: Session, model, scope_id: int) -> int:
+    ids = db.scalars(
+        select(model.id).where(_scope(model) == scope_id).order_by(model.rank.asc(), model.id.asc())
+    ).all()
+    if ids:
+        db.execute(update(model), [{"id": i, "rank": r} for i, r in zip(ids, evenly_spaced(len(ids)))])
+        change_log.record(db, model, scope_id, ids)
+    return len(ids)
+
+
+def rebalance(db: Session, model, scope_id: int) -> int:
+    """Rewrite every key of one list with evenly spaced short keys, keeping the order. Returns rows."""
+    rows = _respace(db, model, scope_id)
+    db.commit()
+    return rows
+
+
+def rebalance_long_ranks(db: Session, max_length: int | None = None) -> int:
+    """Rebalance every list holding a key longer than max_length. Returns the number of lists."""
+    max_length = max_length or settings.RANK_MAX_LENGTH
+    lists = 0
+    for model in (TodoItem, GroceryListItem):
+        scope_ids = db.scalars(select(_scope(model)).where(func.length(model.rank) > max_length).distinct()).all()
+        for scope_id in scope_ids:
+            rebalance(db, model, scope_id)
+            lists += 1
+    return lists
+
+
+def _rebalance() -> int:
+    db = SessionLocal()
+    try:
+        return rebalance_long_ranks(db)
+    finally:
+        db.close()
+
+
+async def rebalance_all_lists() -> None:
+    """Scheduled job: shorten rank keys that repeated inserts at one spot have made too long."""
+    lists = await asyncio.to_thread(_rebalance)
+    if lists:
+        logger.info("Rank rebalance rewrote %s lists", lists)
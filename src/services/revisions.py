@@ -0,0 +1,63 @@
+"""Weak ETags for list endpoints, built from per-household list revisions.
+
+change_log sets household_revisions (household_id, resource) to the household's new change_seq on every
+write to that list, in the writing transaction. A list's ETag is the revision of each household it
+covers; when a client's If-None-Match still matches, the endpoint answers 304 after this one indexed
+lookup, without loading or serializing the rows.
+
+Resources are the change log's entity names ("todos", "grocery_lists", "grocery_items", "meal_slots",
+"planned_meals", "members") plus "calendars" and "invitations". Lists that show member names and colors
+also depend on "members".
+"""
+
+from typing import Iterable
+
+from sqlalchemy import and_, func, select
+from sqlalchemy.orm import Session
+
+from src.models.database import Household, HouseholdRevision
+
+
+def etag(db: Session, household_ids: Iterable[int], resources: Iterable[str], *extra) -> str:
+    """Weak ETag of the given lists of the given households.
+
+    extra: scalar subqueries for response inputs that are not writes (e.g. the next to-do item to
+    expire); they are read in the same statement and folded into the tag.
+    """
+    household_ids = sorted(set(household_ids))
+    if not household_ids:
+        return 'W/"none"'
+    revision = func.coalesce(func.max(HouseholdRevision.revision), 0)
+    query = (
+        select(Household.id, revision, *extra)
+        .outerjoin(
+            HouseholdRevision,
+            and_(HouseholdRevision.household_id == Household.id, HouseholdRevision.resource.in_(list(resources))),
+        )
+        .where(Household.id.in_(household_ids))
+        .group_by(Household.id)
+        .order_by(Household.id)
+    )
+    rows = db.execute(query).all()
+    tag = ".".join(f"h{row[0]}r{row[1]}" for row in rows) or "none"
+    if extra and rows:
+        tag += "-x" + "_".join(_token(value) for value in rows[0][2:])
+    return f'W/"{tag}"'
+
+
+def _token(value) -> str:
+    if value is None:
+        return "0"
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return str(value)
+
+
+def matches(if_none_match: str | None, tag: str) -> bool:
+    """Weak comparison of an If-None-Match header with a tag (RFC 9110 section 13.1.2)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = tag.removeprefix("W/")
+    return any(candidate.strip().removeprefix("W/") == opaque for candidate in if_none_match.split(","))
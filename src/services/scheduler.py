@@ -0,0 +1,48 @@
+"""Periodic background jobs, started from the app lifespan (not when TESTING).
+
+Each job is an async callable run every `interval` seconds in its own asyncio task. A failing run is
+logged and retried on the next tick; it never stops the job or the app.
+"""
+
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Awaitable, Callable
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Job:
+    name: str
+    interval: float  # seconds between the end of one run and the start of the next
+    run: Callable[[], Awaitable[None]]
+
+
+async def _run_periodically(job: Job) -> None:
+    while True:
+        try:
+            await job.run()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Background job %s failed", job.name)
+        await asyncio.sleep(job.interval)
+
+
+def start(jobs: list[Job]) -> list[asyncio.Task]:
+    """Start each job in its own task. Cancel the returned tasks on shutdown (see stop)."""
+    tasks = []
+    for job in jobs:
+        if job.interval <= 0:
+            logger.info("Background job %s disabled (interval %s)", job.name, job.interval)
+            continue
+        tasks.append(asyncio.create_task(_run_periodically(job), name=job.name))
+        logger.info("Background job %s started (every %ss)", job.name, job.interval)
+    return tasks
+
+
+async def stop(tasks: list[asyncio.Task]) -> None:
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
@@ -0,0 +1,99 @@
+"""Retention of checked-off to-do items.
+
+Items checked off more than DAYS_TO_KEEP_CHECKED days ago are expired. Reads (GET /api/todos) only
+filter them out; a scheduled sweeper deletes them in small batches so no request ever pays for (or
+takes write locks for) the purge. Both the filter and the purge are served by the partial index
+ix_todo_items_checked (household_id, checked_at) WHERE is_checked.
+"""
+
+import asyncio
+import logging
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, func, or_, select
+from sqlalchemy.orm import Session
+
+from src.config import settings
+from src.db.session import SessionLocal
+from src.models.database import TodoItem
+from src.services import change_log
+
+logger = logging.getLogger(__name__)
+
+DAYS_TO_KEEP_CHECKED = 7
+
+
+def expiry_cutoff(now: datetime | None = None) -> datetime:
+    """Items checked off before this instant are expired."""
+    return (now or datetime.utcnow()) - timedelta(days=DAYS_TO_KEEP_CHECKED)
+
+
+def not_expired(now: datetime | None = None):
+    """Filter clause keeping open items and items checked off within the retention period."""
+    return or_(
+        TodoItem.is_checked.is_not(True),
+        TodoItem.checked_at.is_(None),
+        TodoItem.checked_at >= expiry_cutoff(now),
+    )
+
+
+def next_expiry(household_id: int, now: datetime | None = None):
+    """Scalar subquery: checked_at of the household's oldest still-visible checked item, i.e. when the
+    list next changes without a write (part of the list's ETag). Served by ix_todo_items_checked."""
+    return (
+        select(func.min(TodoItem.checked_at))
+        .where(
+            TodoItem.household_id == household_id,
+            TodoItem.is_checked,
+            TodoItem.checked_at >= expiry_cutoff(now),
+        )
+        .scalar_subquery()
+    )
+
+
+def _expired(cutoff: datetime):
+    # A bare boolean column renders as the partial index's own predicate ("is_checked" on PostgreSQL,
+    # "is_checked = 1" on SQLite); "IS true" would not match it and the index would go unused
+    return (TodoItem.is_checked, TodoItem.checked_at < cutoff)
+
+
+def purge_expired_todos(db: Session, batch_size: int | None = None, now: datetime | None = None) -> int:
+    """Delete expired items household by household, at most batch_size rows per transaction.
+
+    Returns the number of rows deleted. Committing per batch keeps each write lock short.
+    """
+    batch_size = batch_size or settings.TODO_SWEEP_BATCH_SIZE
+    cutoff = expiry_cutoff(now)
+    household_ids = db.scalars(select(TodoItem.household_id).where(*_expired(cutoff)).distinct()).all()
+    deleted = 0
+    for household_id in household_ids:
+        while True:
+            ids = db.scalars(
+                select(TodoItem.id)
+                .where(TodoItem.household_id == household_id, *_expired(cutoff))
+                .limit(batch_size)
+            ).all()
+            if not ids:
+                break
+            db.execute(delete(TodoItem).where(TodoItem.id.in_(ids)))
+            change_log.record(db, TodoItem, household_id, ids, deleted=True)
+            db.commit()
+            deleted += len(ids)
+            if len(ids) < batch_size:
+                break
+    return deleted
+
+
+def _sweep() -> int:
+    db = SessionLocal()
+    try:
+        return purge_expired_todos(db)
+    finally:
+        db.close()
+
+
+async def sweep_expired_todos() -> None:
+    """Scheduled job: purge expired checked items (blocking DB work runs in a worker thread)."""
+    deleted = await asyncio.to_thread(_sweep)
+    if deleted:
+        logger.info("Todo sweep removed %s expired checked items", deleted)
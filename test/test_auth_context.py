@@ -0,0 +1,91 @@
+"""Tests for the request-scoped AuthContext: user and memberships loaded in one query per request."""
+
+import uuid
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from src.api.main import app
+from src.api.routes.auth import create_access_token
+from src.db.session import async_engine
+from src.models.database import Household, Member, User
+
+
+@pytest.fixture
+def user(db):
+    uid = uuid.uuid4().hex[:12]
+    u = User(google_sub=f"ctx-{uid}", email=f"ctx-{uid}@example.com", display_name="Context User")
+    db.add(u)
+    db.commit()
+    db.refresh(u)
+    return u
+
+
+@pytest.fixture
+def households(db, user):
+    hs = [Household(name="Home"), Household(name="Cabin"), Household(name="Not mine")]
+    db.add_all(hs)
+    db.commit()
+    db.add_all([
+        Member(user_id=user.id, household_id=hs[0].id, role="owner"),
+        Member(user_id=user.id, household_id=hs[1].id, role="member"),
+    ])
+    db.commit()
+    return hs
+
+
+@pytest.fixture
+def auth_headers(user):
+    return {"Authorization": f"Bearer {create_access_token(user.id, user.email)}"}
+
+
+@pytest.fixture
+def client(db):
+    with TestClient(app) as c:
+        yield c
+
+
+@pytest.fixture
+def statements():
+    captured = []
+
+    def record(conn, cursor, statement, *args):
+        captured.append(statement)
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", record)
+    yield captured
+    event.remove(async_engine.sync_engine, "before_cursor_execute", record)
+
+
+def test_memberships_loaded_with_user_in_one_query(client, households, auth_headers, statements):
+    r = client.get("/api/households", headers=auth_headers)
+    assert r.status_code == 200
+    assert sorted(h["name"] for h in r.json()) == ["Cabin", "Home"]
+    # One query for the user plus memberships, one for the households
+    assert len(statements) == 2
+    assert "members" in statements[0] and "users" in statements[0]
+
+
+def test_membership_checks_use_context(client, households, auth_headers, statements):
+    cabin_id, other_id = households[1].id, households[2].id
+    statements.clear()
+    r = client.get(f"/api/households/{other_id}", headers=auth_headers)
+    assert r.status_code == 404
+    assert len(statements) == 1
+
+    r = client.get("/api/todos", params={"household_id": other_id}, headers=auth_headers)
+    assert r.status_code == 403
+
+    r = client.delete(f"/api/households/{cabin_id}", headers=auth_headers)
+    assert r.status_code == 403
+    assert r.json()["detail"] == "Only the household owner can delete the household"
+
+
+def test_user_without_memberships(client, db, auth_headers, statements):
+    r = client.get("/api/households", headers=auth_headers)
+    assert r.status_code == 200
+    assert r.json() == []
+    assert len(statements) == 1
+    r = client.get("/api/auth/me", headers={"Authorization": "Bearer not-a-token"})
+    assert r.status_code == 401
@@ -0,0 +1,173 @@
+"""Tests for bulk update and reorder endpoints of to-do and grocery items."""
+
+import uuid
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from src.api.main import app
+from src.api.routes.auth import create_access_token
+from src.db.session import async_engine
+from src.models.database import GroceryList, Household, Member, TodoItem, User
+from src.services import ranking
+
+
+@pytest.fixture
+def user(db):
+    uid = uuid.uuid4().hex[:12]
+    u = User(google_sub=f"bulk-{uid}", email=f"bulk-{uid}@example.com", display_name="Bulk User")
+    db.add(u)
+    db.commit()
+    db.refresh(u)
+    return u
+
+
+@pytest.fixture
+def household(db, user):
+    h = Household(name="Bulk Household")
+    db.add(h)
+    db.commit()
+    db.add(Member(user_id=user.id, household_id=h.id, event_color="#123456"))
+    db.commit()
+    db.refresh(h)
+    return h
+
+
+@pytest.fixture
+def auth_headers(user):
+    return {"Authorization": f"Bearer {create_access_token(user.id, user.email)}"}
+
+
+@pytest.fixture
+def client(db):
+    with TestClient(app) as c:
+        yield c
+
+
+def _todos(db, household, count) -> list[int]:
+    items = [
+        TodoItem(household_id=household.id, content=f"Task {i}", rank=rank)
+        for i, rank in enumerate(ranking.evenly_spaced(count))
+    ]
+    db.add_all(items)
+    db.commit()
+    return [item.id for item in items]
+
+
+def _run(client, method, url, body, headers) -> tuple[list[str], object]:
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", record)
+    try:
+        r = client.request(method, url, json=body, headers=headers)
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", record)
+    return statements, r
+
+
+def test_bulk_check_off_is_one_update_regardless_of_size(client, db, household, auth_headers):
+    counts = []
+    for size in (3, 150):
+        ids = _todos(db, household, size)
+        body = {"household_id": household.id, "items": [{"id": i, "is_checked": True} for i in ids]}
+        statements, r = _run(client, "PATCH", "/api/todos", body, auth_headers)
+        assert r.status_code == 200
+        assert [t["id"] for t in r.json()] == ids
+        assert all(t["is_checked"] and t["checked_at"] for t in r.json())
+        updates = [s for s in statements if s.lstrip().upper().startswith("UPDATE TODO_ITEMS")]
+        assert len(updates) == 1
+        counts.append(len(statements))
+    assert counts[0] == counts[1]
+
+
+def test_bulk_update_mixed_fields_and_rollback_on_foreign_id(client, db, household, auth_headers):
+    ids = _todos(db, household, 3)
+    other = Household(name="Other bulk household")
+    db.add(other)
+    db.commit()
+    foreign = TodoItem(household_id=other.id, content="Not yours")
+    db.add(foreign)
+    db.commit()
+
+    r = client.patch(
+        "/api/todos",
+        json={
+            "household_id": household.id,
+            "items": [
+                {"id": ids[0], "content": "  Renamed  "},
+                {"id": ids[1], "is_section_header": True},
+                {"id": foreign.id, "content": "Hijacked"},
+            ],
+        },
+        headers=auth_headers,
+    )
+    assert r.status_code == 404
+    db.expire_all()
+    assert db.get(TodoItem, ids[0]).content == "Task 0"
+    assert db.get(TodoItem, foreign.id).content == "Not yours"
+
+    r = client.patch(
+        "/api/todos",
+        json={
+            "household_id": household.id,
+            "items": [{"id": ids[0], "content": "  Renamed  "}, {"id": ids[1], "is_section_header": True}],
+        },
+        headers=auth_headers,
+    )
+    assert r.status_code == 200
+    assert [(t["content"], t["is_section_header"]) for t in r.json()] == [("Renamed", False), ("Task 1", True)]
+
+    r = client.patch(
+        "/api/todos",
+        json={"household_id": household.id, "items": [{"id": ids[0]}, {"id": ids[0]}]},
+        headers=auth_headers,
+    )
+    assert r.status_code == 400
+
+
+def test_reorder_todos_sets_order_in_one_update(client, db, household, auth_headers):
+    ids = _todos(db, household, 120)
+    new_order = list(reversed(ids))
+    statements, r = _run(
+        client, "PUT", "/api/todos/order", {"household_id": household.id, "ids": new_order}, auth_headers
+    )
+    assert r.status_code == 200
+    assert [t["id"] for t in r.json()] == new_order
+    assert len([s for s in statements if s.lstrip().upper().startswith("UPDATE TODO_ITEMS")]) == 1
+
+    listed = client.get("/api/todos", params={"household_id": household.id}, headers=auth_headers).json()
+    assert [t["id"] for t in listed] == new_order
+
+
+def test_reorder_subset_of_grocery_items_keeps_others_in_place(client, db, household, auth_headers):
+    gl = GroceryList(household_id=household.id, name="Bulk groceries")
+    db.add(gl)
+    db.commit()
+    ids = []
+    for name in ("A", "B", "C", "D"):
+        r = client.post("/api/grocery-list-items", json={"grocery_list_id": gl.id, "content": name}, headers=auth_headers)
+        ids.append(r.json()["id"])
+
+    r = client.put(
+        "/api/grocery-list-items/order",
+        json={"grocery_list_id": gl.id, "ids": [ids[3], ids[1]]},
+        headers=auth_headers,
+    )
+    assert r.status_code == 200
+    items = client.get("/api/grocery-list-items", params={"grocery_list_id": gl.id}, headers=auth_headers).json()
+    assert [i["content"] for i in items] == ["A", "D", "C", "B"]
+
+    r = client.patch(
+        "/api/grocery-list-items",
+        json={"grocery_list_id": gl.id, "items": [{"id": i, "content": f"Item {i}"} for i in ids]},
+        headers=auth_headers,
+    )
+    assert r.status_code == 200
+    assert [i["content"] for i in r.json()] == [f"Item {ids[0]}", f"Item {ids[3]}", f"Item {ids[2]}", f"Item {ids[1]}"]
+
+    r = client.put("/api/grocery-list-items/order", json={"grocery_list_id": gl.id, "ids": [ids[0], 10**9]}, headers=auth_headers)
+    assert r.status_code == 404
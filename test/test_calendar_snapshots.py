@@ -0,0 +1,259 @@
+"""Tests for per-calendar Google event snapshots: webhook-driven refetching, channel renewal and the
+polling fallback."""
+
+import asyncio
+import json
+import uuid
+from collections import Counter
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from src.api.main import app
+from src.api.routes.auth import create_access_token
+from src.config import settings
+from src.models.database import Calendar, CalendarSnapshot, Household, Member, User
+from src.services import calendar_snapshots
+
+_RealAsyncClient = httpx.AsyncClient
+
+
+@pytest.fixture
+def user(db):
+    uid = uuid.uuid4().hex[:12]
+    u = User(
+        google_sub=f"snap-{uid}",
+        email=f"snap-{uid}@example.com",
+        display_name="Snapshot User",
+        access_token="fake-token",
+    )
+    db.add(u)
+    db.commit()
+    db.refresh(u)
+    return u
+
+
+@pytest.fixture
+def member(db, user):
+    h = Household(name="Snapshot Household")
+    db.add(h)
+    db.commit()
+    m = Member(user_id=user.id, household_id=h.id)
+    db.add(m)
+    db.commit()
+    db.refresh(m)
+    return m
+
+
+@pytest.fixture
+def calendars(db, member):
+    cals = [
+        Calendar(member_id=member.id, google_calendar_id=f"{name}@group", name=name.title(), is_visible=True)
+        for name in ("school", "work")
+    ]
+    db.add_all(cals)
+    db.commit()
+    for cal in cals:
+        db.refresh(cal)
+    return cals
+
+
+@pytest.fixture
+def auth_headers(user):
+    return {"Authorization": f"Bearer {create_access_token(user.id, user.email)}"}
+
+
+@pytest.fixture
+def client(db):
+    with TestClient(app) as c:
+        yield c
+
+
+@pytest.fixture
+def google():
+    """Stand-in for Google: counts event list requests per calendar and records watch/stop calls."""
+    calls = Counter()
+    posts = []
+    tomorrow = (datetime.utcnow() + timedelta(days=1)).strftime("%Y-%m-%d")
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        path = request.url.path
+        if path.endswith("/events/watch"):
+            posts.append(("watch", json.loads(request.content)))
+            return httpx.Response(200, json={"resourceId": "res-new", "expiration": "4102444800000"})
+        if path.endswith("/channels/stop"):
+            posts.append(("stop", json.loads(request.content)))
+            return httpx.Response(204)
+        calendar_id = path.split("/calendars/")[1].split("/")[0]
+        calls[calendar_id] += 1
+        return httpx.Response(200, json={"items": [{
+            "id": f"ev{calls[calendar_id]}",
+            "summary": f"{calendar_id} v{calls[calendar_id]}",
+            "start": {"dateTime": f"{tomorrow}T10:00:00Z"},
+            "end": {"dateTime": f"{tomorrow}T11:00:00Z"},
+        }]})
+
+    transport = httpx.MockTransport(handler)
+    with patch(
+        "src.api.routes.events.httpx.AsyncClient",
+        side_effect=lambda *a, **kw: _RealAsyncClient(transport=transport),
+    ):
+        yield calls, posts
+
+
+def _watch(db, cal, channel_id, expires_in=timedelta(days=3)):
+    snapshot = db.get(CalendarSnapshot, cal.id)
+    snapshot.channel_id = channel_id
+    snapshot.channel_token = f"token-{channel_id}"
+    snapshot.channel_resource_id = f"res-{channel_id}"
+    snapshot.channel_expires_at = datetime.utcnow() + expires_in
+    db.commit()
+    return snapshot
+
+
+def _ping(client, channel_id, state="exists", token=None):
+    return client.post(
+        "/api/webhooks/google-calendar",
+        headers={
+            "X-Goog-Channel-ID": channel_id,
+            "X-Goog-Channel-Token": token or f"token-{channel_id}",
+            "X-Goog-Resource-ID": f"res-{channel_id}",
+            "X-Goog-Resource-State": state,
+        },
+    )
+
+
+def test_only_pinged_calendar_is_refetched(client, db, calendars, auth_headers, google):
+    calls, _ = google
+    school, work = calendars
+
+    r = client.get("/api/events", headers=auth_headers)
+    assert r.status_code == 200
+    assert calls == {"school@group": 1, "work@group": 1}
+    _watch(db, school, "ch-school")
+    _watch(db, work, "ch-work")
+
+    r = client.get("/api/events", headers=auth_headers)
+    assert sorted(e["title"] for e in r.json()["events"]) == ["school@group v1", "work@group v1"]
+    assert calls == {"school@group": 1, "work@group": 1}  # served from snapshots
+
+    assert _ping(client, "ch-school", state="sync").status_code == 204  # channel handshake, not a change
+    assert _ping(client, "ch-school", token="forged").status_code == 404
+    assert _ping(client, "ch-unknown").status_code == 404
+    client.get("/api/events", headers=auth_headers)
+    assert calls == {"school@group": 1, "work@group": 1}
+
+    assert _ping(client, "ch-school").status_code == 204
+    r = client.get("/api/events", headers=auth_headers)
+    assert sorted(e["title"] for e in r.json()["events"]) == ["school@group v2", "work@group v1"]
+    assert calls == {"school@group": 2, "work@group": 1}
+
+
+def test_renames_and_colors_show_without_a_refetch(client, db, member, calendars, auth_headers, google):
+    calls, _ = google
+    school, work = calendars
+    client.get("/api/events", headers=auth_headers)
+    _watch(db, school, "ch-school-rename")
+    _watch(db, work, "ch-work-rename")
+    assert "calendar_name" not in db.get(CalendarSnapshot, school.id).events[0]
+
+    school.name = "Kids' school"
+    member.event_color = "#00aa55"
+    db.commit()
+    r = client.get("/api/events", headers=auth_headers)
+    events = {e["title"]: e for e in r.json()["events"]}
+    assert events["school@group v1"]["calendar_name"] == "Kids' school"
+    assert {e["color"] for e in events.values()} == {"#00aa55"}
+    assert calls == {"school@group": 1, "work@group": 1}  # still served from the snapshots
+
+
+def test_search_and_out_of_window_ranges_bypass_snapshots(client, db, calendars, auth_headers, google):
+    calls, _ = google
+    client.get("/api/events", headers=auth_headers)
+    client.get("/api/events", params={"q": "school"}, headers=auth_headers)
+    client.get(
+        "/api/events",
+        params={"start_date": "2001-01-01T00:00:00Z", "end_date": "2001-02-01T00:00:00Z"},
+        headers=auth_headers,
+    )
+    assert calls == {"school@group": 3, "work@group": 3}
+
+
+def test_sync_renews_expiring_channel_and_refetches(db, calendars, google):
+    calls, posts = google
+    school = calendars[0]
+    db.add(CalendarSnapshot(
+        calendar_id=school.id,
+        window_start=datetime.utcnow() - timedelta(days=1),
+        window_end=datetime.utcnow() + timedelta(days=1),
+        events=[],
+        fetched_at=datetime.utcnow(),
+    ))
+    db.commit()
+    snapshot = _watch(db, school, "ch-old", expires_in=timedelta(hours=1))
+
+    async def run():
+        async with httpx.AsyncClient() as client:
+            await calendar_snapshots.sync_snapshot(db, snapshot, client)
+
+    with patch.object(settings, "GOOGLE_WATCH_WEBHOOK_URL", "https://example.com/api/webhooks/google-calendar"):
+        asyncio.run(run())
+
+    assert [kind for kind, _ in posts] == ["watch", "stop"]
+    assert posts[0][1]["address"] == "https://example.com/api/webhooks/google-calendar"
+    assert posts[1][1] == {"id": "ch-old", "resourceId": "res-ch-old"}
+    assert snapshot.channel_id == posts[0][1]["id"]
+    assert snapshot.channel_resource_id == "res-new"
+    assert snapshot.channel_expires_at == datetime(2100, 1, 1)
+    assert calls == {"school@group": 1}
+    assert [e["title"] for e in snapshot.events] == ["school@group v1"]
+
+
+def test_unwatched_snapshot_falls_back_to_polling(db, calendars, google):
+    calls, posts = google
+    school = calendars[0]
+    window_start, window_end = calendar_snapshots.snapshot_window()
+    snapshot = CalendarSnapshot(
+        calendar_id=school.id,
+        window_start=window_start,
+        window_end=window_end,
+        events=[],
+        fetched_at=datetime.utcnow(),
+    )
+    db.add(snapshot)
+    db.commit()
+
+    async def run():
+        async with httpx.AsyncClient() as client:
+            await calendar_snapshots.sync_snapshot(db, snapshot, client)
+
+    asyncio.run(run())
+    assert calls == {}  # still within GOOGLE_SNAPSHOT_MAX_AGE_SECONDS
+
+    snapshot.fetched_at = datetime.utcnow() - timedelta(seconds=settings.GOOGLE_SNAPSHOT_MAX_AGE_SECONDS + 1)
+    db.commit()
+    asyncio.run(run())
+    assert calls == {"school@group": 1}
+    assert posts == []  # no webhook URL configured, so no channel
+
+
+def test_sync_all_continues_after_a_failure(db, calendars):
+    window_start, window_end = calendar_snapshots.snapshot_window()
+    db.add_all([
+        CalendarSnapshot(calendar_id=cal.id, window_start=window_start, window_end=window_end, events=[], fetched_at=datetime.utcnow())
+        for cal in calendars
+    ])
+    db.commit()
+    synced = []
+
+    async def sync(session, snapshot, client, now=None):
+        synced.append(snapshot.calendar_id)
+        if snapshot.calendar_id == calendars[0].id:
+            raise RuntimeError("token decryption failed")
+
+    with patch("src.services.calendar_snapshots.sync_snapshot", side_effect=sync):
+        asyncio.run(calendar_snapshots.sync_all_snapshots())
+    assert calendars[0].id in synced and calendars[1].id in synced
@@ -0,0 +1,80 @@
+"""Tests for the engine's connection pool settings, Postgres connection guards and pool metrics."""
+
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import exc, text
+
+from src.api.main import app
+from src.config import settings
+from src.db import pool, session
+
+
+@pytest.fixture
+def small_pool(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "DB_POOL_SIZE", 1)
+    monkeypatch.setattr(settings, "DB_MAX_OVERFLOW", 0)
+    monkeypatch.setattr(settings, "DB_POOL_TIMEOUT", 0.2)
+    engine = session.create_db_engine(f"sqlite:///{tmp_path}/pool.db")
+    yield engine
+    engine.dispose()
+
+
+def test_engine_uses_configured_pool(small_pool):
+    assert isinstance(small_pool.pool, pool.InstrumentedQueuePool)
+    assert small_pool.pool.size() == 1 and small_pool.pool._max_overflow == 0
+    assert small_pool.pool._pre_ping and small_pool.pool._recycle == settings.DB_POOL_RECYCLE
+
+
+def test_checkout_waits_and_timeouts_are_recorded(small_pool):
+    held = small_pool.connect()
+    with pytest.raises(exc.TimeoutError):
+        small_pool.connect()
+
+    def release():
+        time.sleep(0.1)
+        held.close()
+
+    threading.Thread(target=release).start()
+    with small_pool.connect() as conn:  # waits for the release
+        conn.execute(text("SELECT 1"))
+
+    stats = small_pool.pool.metrics
+    assert stats.timeouts == 1 and stats.checkouts == 2
+    assert 0.05 < stats.max_wait_seconds < 0.2
+    rendered = pool.render_metrics({"api": small_pool.pool})
+    assert 'db_pool_size{engine="api"} 1' in rendered and 'db_pool_checked_out{engine="api"} 0' in rendered
+    assert 'db_pool_checkout_timeouts_total{engine="api"} 1' in rendered
+    assert 'db_pool_checkout_wait_seconds_bucket{engine="api",le="+Inf"} 2' in rendered
+    assert 'db_pool_checkout_wait_seconds_bucket{engine="api",le="0.05"} 1' in rendered
+
+
+def test_postgres_connections_get_timeouts_and_name(monkeypatch):
+    monkeypatch.setattr(settings, "DB_STATEMENT_TIMEOUT_MS", 15000)
+    monkeypatch.setattr(settings, "DB_IDLE_IN_TRANSACTION_TIMEOUT_MS", 0)
+    args = session._connect_args("postgresql://app@db/household")
+    assert args == {"application_name": settings.DB_APPLICATION_NAME, "options": "-c statement_timeout=15000"}
+    assert session._connect_args("sqlite:///./x.db") == {"check_same_thread": False}
+    async_args = session._connect_args("postgresql+asyncpg://app@db/household")
+    assert async_args == {"server_settings": {"application_name": settings.DB_APPLICATION_NAME, "statement_timeout": "15000"}}
+
+
+def test_async_engine_url_and_pool():
+    assert session.async_database_url("sqlite:///./x.db") == "sqlite+aiosqlite:///./x.db"
+    assert session.async_database_url("postgresql://app:pw@db/household") == "postgresql+asyncpg://app:pw@db/household"
+    with pytest.raises(ValueError):
+        session.async_database_url("mysql://app@db/household")
+    assert isinstance(session.async_engine.pool, pool.InstrumentedAsyncQueuePool)
+
+
+def test_metrics_endpoint(monkeypatch):
+    with TestClient(app) as client:
+        r = client.get("/metrics")
+        assert r.status_code == 200 and r.headers["content-type"].startswith("text/plain")
+        assert "# TYPE db_pool_checkout_wait_seconds histogram" in r.text
+        assert 'db_pool_size{engine="api"}' in r.text and 'db_pool_size{engine="jobs"}' in r.text
+        monkeypatch.setattr(settings, "METRICS_TOKEN", "s3cret")
+        assert client.get("/metrics").status_code == 401
+        assert client.get("/metrics", headers={"Authorization": "Bearer s3cret"}).status_code == 200
@@ -1,7 +1,8 @@
 """Tests for events API: get events, writable calendars, create event."""
 
+import asyncio
 import uuid
-from datetime import datetime, timezone
+from datetime import date, datetime, timezone
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
@@ -9,8 +10,8 @@ from fastapi.testclient import TestClient
 
 from src.api.main import app
 from src.api.routes.auth import create_access_token
-from src.db.session import get_db
-from src.models.database import Calendar, Household, Member, User
+from src.models.database import Calendar, Household, HouseholdAgenda, Member, User
+from src.services import agenda as agenda_service
 
 
 @pytest.fixture
@@ -114,13 +115,8 @@ def other_auth_headers(other_user):
 
 @pytest.fixture
 def client(db):
-    def override_get_db():
-        yield db
-
-    app.dependency_overrides[get_db] = override_get_db
     with TestClient(app) as c:
         yield c
-    app.dependency_overrides.clear()
 
 
 # ----- GET /api/events/writable-calendars -----
@@ -285,3 +281,104 @@ def test_get_events_empty_when_no_calendars(mock_async_client, client, user, aut
     r = client.get("/api/events", headers=auth_headers)
     assert r.status_code == 200
     assert r.json()["events"] == []
+
+
+# ----- GET /api/events/agenda -----
+
+
+def _mock_google_get(mock_async_client, items):
+    mock_response = MagicMock()
+    mock_response.status_code = 200
+    mock_response.json.return_value = {"items": items}
+    mock_client_instance = MagicMock()
+    mock_client_instance.get = AsyncMock(return_value=mock_response)
+    mock_client_instance.__aenter__ = AsyncMock(return_value=mock_client_instance)
+    mock_client_instance.__aexit__ = AsyncMock(return_value=None)
+    mock_async_client.return_value = mock_client_instance
+    return mock_client_instance.get
+
+
+def test_agenda_empty_before_first_build(client, user, household, member, auth_headers):
+    r = client.get("/api/events/agenda", params={"household_id": household.id}, headers=auth_headers)
+    assert r.status_code == 200
+    assert r.json()["events"] == []
+    assert r.json()["built_at"] is None
+
+
+def test_agenda_403_when_not_member(client, user, household, auth_headers):
+    r = client.get("/api/events/agenda", params={"household_id": household.id}, headers=auth_headers)
+    assert r.status_code == 403
+
+
+@patch("src.services.agenda.httpx.AsyncClient")
+def test_agenda_served_from_materialized_row(mock_async_client, client, db, household, member, calendar, auth_headers):
+    """Built agenda is merged, sorted and colored; reading it does not call Google."""
+    mock_get = _mock_google_get(mock_async_client, [
+        {"id": "late", "summary": "Dinner", "start": {"dateTime": "2024-06-01T18:00:00Z"}, "end": {"dateTime": "2024-06-01T19:00:00Z"}},
+        {"id": "early", "summary": "School run", "start": {"dateTime": "2024-06-01T08:00:00Z"}, "end": {"dateTime": "2024-06-01T08:30:00Z"}},
+    ])
+    asyncio.run(agenda_service.build_agenda(db, household.id, today=date(2024, 6, 1)))
+    assert mock_get.call_count == 1
+    mock_get.reset_mock()
+
+    r = client.get("/api/events/agenda", params={"household_id": household.id}, headers=auth_headers)
+    assert r.status_code == 200
+    data = r.json()
+    assert [e["title"] for e in data["events"]] == ["School run", "Dinner"]
+    assert all(e["color"] == "#3788d8" for e in data["events"])
+    assert data["window_start"] == "2024-05-31"
+    mock_get.assert_not_called()
+
+
+@patch("src.api.routes.events.httpx.AsyncClient")
+def test_create_event_patches_agenda(mock_async_client, client, db, household, member, calendar, auth_headers):
+    db.add(HouseholdAgenda(
+        household_id=household.id,
+        window_start=date(2024, 5, 31),
+        window_end=date(2024, 6, 3),
+        events=[{"id": "x-1", "title": "Later", "start": "2024-06-02T09:00:00Z", "end": "2024-06-02T10:00:00Z"}],
+    ))
+    db.commit()
+    mock_response = MagicMock()
+    mock_response.status_code = 201
+    mock_response.json.return_value = {
+        "id": "new1",
+        "summary": "Dentist",
+        "start": {"dateTime": "2024-06-01T10:00:00Z"},
+        "end": {"dateTime": "2024-06-01T11:00:00Z"},
+    }
+    mock_client_instance = MagicMock()
+    mock_client_instance.post = AsyncMock(return_value=mock_response)
+    mock_client_instance.__aenter__ = AsyncMock(return_value=mock_client_instance)
+    mock_client_instance.__aexit__ = AsyncMock(return_value=None)
+    mock_async_client.return_value = mock_client_instance
+
+    r = client.post(
+        "/api/events",
+        headers=auth_headers,
+        json={"calendar_id": calendar.id, "title": "Dentist", "start": "2024-06-01T10:00:00Z", "end": "2024-06-01T11:00:00Z"},
+    )
+    assert r.status_code == 200
+    events = db.get(HouseholdAgenda, household.id).events
+    assert [e["title"] for e in events] == ["Dentist", "Later"]
+
+
+def test_refresh_all_agendas_continues_after_a_failure(db, household):
+    second = Household(name="Second Household")
+    db.add(second)
+    db.commit()
+    db.add_all([
+        HouseholdAgenda(household_id=h.id, window_start=date(2024, 5, 31), window_end=date(2024, 6, 3), events=[])
+        for h in (household, second)
+    ])
+    db.commit()
+    built = []
+
+    async def build(session, household_id, today=None):
+        built.append(household_id)
+        if household_id == household.id:
+            raise RuntimeError("token decryption failed")
+
+    with patch("src.services.agenda.build_agenda", side_effect=build):
+        asyncio.run(agenda_service.refresh_all_agendas())
+    assert household.id in built and second.id in built
@@ -0,0 +1,185 @@
+"""Tests for the household .ics feed: token management, snapshot streaming and conditional GET."""
+
+import asyncio
+import uuid
+from unittest.mock import patch
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from src.api.main import app
+from src.api.routes.auth import create_access_token
+from src.db.session import SessionLocal
+from src.models.database import Calendar, Household, HouseholdFeed, HouseholdFeedEvent, Member, User
+from src.services import ics_feed
+
+_RealAsyncClient = httpx.AsyncClient
+
+
+@pytest.fixture
+def user(db):
+    uid = uuid.uuid4().hex[:12]
+    u = User(
+        google_sub=f"feed-{uid}",
+        email=f"feed-{uid}@example.com",
+        display_name="Feed User",
+        access_token="fake-token",
+    )
+    db.add(u)
+    db.commit()
+    db.refresh(u)
+    return u
+
+
+@pytest.fixture
+def household(db):
+    h = Household(name="Feed Household")
+    db.add(h)
+    db.commit()
+    db.refresh(h)
+    return h
+
+
+@pytest.fixture
+def member(db, user, household):
+    m = Member(user_id=user.id, household_id=household.id, event_color="#3788d8")
+    db.add(m)
+    db.commit()
+    db.refresh(m)
+    return m
+
+
+@pytest.fixture
+def calendar(db, member):
+    cal = Calendar(member_id=member.id, google_calendar_id="primary", name="Family", is_visible=True)
+    db.add(cal)
+    db.commit()
+    db.refresh(cal)
+    return cal
+
+
+@pytest.fixture
+def auth_headers(user):
+    token = create_access_token(user.id, user.email)
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+def client(db):
+    with TestClient(app) as c:
+        yield c
+
+
+@pytest.fixture
+def google():
+    """Stand-in for Google's events endpoint: two pages of events."""
+    pages = {
+        None: {
+            "items": [{"id": "a", "summary": "Soccer, practice", "start": {"dateTime": "2024-06-01T10:00:00Z"}, "end": {"dateTime": "2024-06-01T11:00:00Z"}}],
+            "nextPageToken": "p2",
+        },
+        "p2": {"items": [{"id": "b", "summary": "Holiday", "start": {"date": "2024-06-03"}, "end": {"date": "2024-06-04"}}]},
+    }
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, json=pages[request.url.params.get("pageToken")])
+
+    transport = httpx.MockTransport(handler)
+    with patch(
+        "src.services.ics_feed.httpx.AsyncClient",
+        side_effect=lambda *a, **kw: _RealAsyncClient(transport=transport),
+    ):
+        yield
+
+
+def test_create_feed_returns_url(client, household, member, auth_headers):
+    r = client.post(f"/api/households/{household.id}/feed", headers=auth_headers)
+    assert r.status_code == 201
+    assert r.json()["url"].endswith(".ics")
+
+
+def test_create_feed_403_when_not_member(client, user, household, auth_headers):
+    r = client.post(f"/api/households/{household.id}/feed", headers=auth_headers)
+    assert r.status_code == 403
+
+
+def test_feed_404_for_unknown_token(client):
+    r = client.get("/api/feeds/not-a-token.ics")
+    assert r.status_code == 404
+
+
+def test_feed_streams_snapshot_and_supports_304(client, db, household, member, calendar, google):
+    db.add(HouseholdFeed(household_id=household.id, token=f"tok-{uuid.uuid4().hex}"))
+    db.commit()
+    feed = asyncio.run(ics_feed.build_feed_snapshot(db, household.id))
+
+    r = client.get(f"/api/feeds/{feed.token}.ics")
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("text/calendar")
+    body = r.text
+    assert body.startswith("BEGIN:VCALENDAR\r\n")
+    assert "SUMMARY:Soccer\\, practice\r\n" in body
+    assert "DTSTART;VALUE=DATE:20240603\r\n" in body
+    assert "DTSTART:20240601T100000Z\r\n" in body
+
+    etag = r.headers["etag"]
+    assert client.get(f"/api/feeds/{feed.token}.ics", headers={"If-None-Match": etag}).status_code == 304
+    last_modified = r.headers["last-modified"]
+    assert client.get(f"/api/feeds/{feed.token}.ics", headers={"If-Modified-Since": last_modified}).status_code == 304
+
+
+def test_feed_etag_stable_when_content_unchanged(db, household, member, calendar, google):
+    db.add(HouseholdFeed(household_id=household.id, token=f"tok-{uuid.uuid4().hex}"))
+    db.commit()
+    first = asyncio.run(ics_feed.build_feed_snapshot(db, household.id))
+    etag, updated = first.etag, first.content_updated_at
+    second = asyncio.run(ics_feed.build_feed_snapshot(db, household.id))
+    assert second.generation == 2
+    assert second.etag == etag
+    assert second.content_updated_at == updated
+
+
+def test_build_commits_each_page_and_readers_skip_it_until_done(db, household, member, calendar):
+    feed = HouseholdFeed(household_id=household.id, token=f"tok-{uuid.uuid4().hex}")
+    db.add(feed)
+    db.commit()
+    seen = {}
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.params.get("pageToken") != "p2":
+            return httpx.Response(200, json={
+                "items": [{"id": "a", "summary": "Page one", "start": {"date": "2024-06-01"}, "end": {"date": "2024-06-02"}}],
+                "nextPageToken": "p2",
+            })
+        # Between pages: page one is committed (another connection sees it), but not served yet
+        with SessionLocal() as other:
+            seen["rows"] = other.query(HouseholdFeedEvent).filter(HouseholdFeedEvent.household_id == household.id).count()
+        seen["served"] = "".join(ics_feed.iter_feed_ics(household.id))
+        return httpx.Response(200, json={"items": []})
+
+    transport = httpx.MockTransport(handler)
+    with patch("src.services.ics_feed.httpx.AsyncClient", side_effect=lambda *a, **kw: _RealAsyncClient(transport=transport)):
+        asyncio.run(ics_feed.build_feed_snapshot(db, household.id))
+
+    assert seen["rows"] == 1
+    assert "Page one" not in seen["served"]
+    assert "SUMMARY:Page one" in "".join(ics_feed.iter_feed_ics(household.id))
+
+
+def test_refresh_all_feeds_continues_after_a_failure(db, household):
+    second = Household(name="Second Feed Household")
+    db.add(second)
+    db.commit()
+    db.add_all([HouseholdFeed(household_id=h.id, token=f"tok-{uuid.uuid4().hex}") for h in (household, second)])
+    db.commit()
+    built = []
+
+    async def build(session, household_id, now=None):
+        built.append(household_id)
+        if household_id == household.id:
+            raise RuntimeError("token decryption failed")
+
+    with patch("src.services.ics_feed.build_feed_snapshot", side_effect=build):
+        asyncio.run(ics_feed.refresh_all_feeds())
+    assert household.id in built and second.id in built
@@ -0,0 +1,130 @@
+"""Tests for GET /api/auth/google-calendars: pagination, per-user cache and ETag revalidation."""
+
+import time
+import uuid
+from unittest.mock import patch
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from src.api import main
+from src.api.main import app
+from src.api.routes.auth import create_access_token
+from src.models.database import User
+from src.services import calendar_list_cache
+
+_RealAsyncClient = httpx.AsyncClient
+
+
+@pytest.fixture
+def user(db):
+    uid = uuid.uuid4().hex[:12]
+    u = User(
+        google_sub=f"gcal-{uid}",
+        email=f"gcal-{uid}@example.com",
+        display_name="Picker User",
+        access_token="fake-token",
+    )
+    db.add(u)
+    db.commit()
+    db.refresh(u)
+    return u
+
+
+@pytest.fixture
+def auth_headers(user):
+    token = create_access_token(user.id, user.email)
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+def client(db):
+    main._auth_rate_store.clear()
+    with TestClient(app) as c:
+        yield c
+
+
+def _google(pages: int):
+    """Stand-in for Google's calendarList endpoint: one or two pages, ETag "v1" on the first page."""
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        if request.headers.get("If-None-Match") == '"v1"':
+            return httpx.Response(304)
+        if request.url.params.get("pageToken") == "p2":
+            return httpx.Response(200, json={"items": [{"id": "c3", "summary": "Work"}]})
+        first_page = {"items": [{"id": "primary", "summary": "Me"}, {"id": "c2"}]}
+        if pages > 1:
+            first_page["nextPageToken"] = "p2"
+        return httpx.Response(200, headers={"ETag": '"v1"'}, json=first_page)
+
+    transport = httpx.MockTransport(handler)
+    with patch(
+        "src.services.calendar_list_cache.httpx.AsyncClient",
+        side_effect=lambda *a, **kw: _RealAsyncClient(transport=transport),
+    ):
+        yield requests
+
+
+@pytest.fixture
+def google():
+    yield from _google(pages=2)
+
+
+@pytest.fixture
+def google_one_page():
+    yield from _google(pages=1)
+
+
+def _expire(user):
+    entry = calendar_list_cache.get_cached(user.id)
+    entry.fetched_at = time.monotonic() - calendar_list_cache.settings.GOOGLE_CALENDAR_LIST_TTL_SECONDS - 1
+
+
+def test_google_calendars_fetches_all_pages(client, user, auth_headers, google):
+    r = client.get("/api/auth/google-calendars", headers=auth_headers)
+    assert r.status_code == 200
+    assert r.json() == [
+        {"id": "primary", "summary": "Me"},
+        {"id": "c2", "summary": "c2"},
+        {"id": "c3", "summary": "Work"},
+    ]
+    assert len(google) == 2
+
+
+def test_google_calendars_served_from_cache(client, user, auth_headers, google):
+    client.get("/api/auth/google-calendars", headers=auth_headers)
+    google.clear()
+    r = client.get("/api/auth/google-calendars", headers=auth_headers)
+    assert r.status_code == 200
+    assert len(r.json()) == 3
+    assert google == []
+
+
+def test_google_calendars_stale_entry_revalidated_with_etag(client, user, auth_headers, google_one_page):
+    client.get("/api/auth/google-calendars", headers=auth_headers)
+    _expire(user)
+    google_one_page.clear()
+
+    r = client.get("/api/auth/google-calendars", headers=auth_headers)
+    assert r.status_code == 200
+    assert len(r.json()) == 2
+    # Background revalidation sent the ETag, got 304 and marked the entry fresh again
+    assert len(google_one_page) == 1
+    assert google_one_page[0].headers["If-None-Match"] == '"v1"'
+    assert calendar_list_cache.is_fresh(calendar_list_cache.get_cached(user.id))
+
+
+def test_google_calendars_stale_multi_page_list_refetched(client, user, auth_headers, google):
+    client.get("/api/auth/google-calendars", headers=auth_headers)
+    _expire(user)
+    google.clear()
+
+    r = client.get("/api/auth/google-calendars", headers=auth_headers)
+    assert r.status_code == 200
+    # The first page's ETag says nothing about page two, so every page is fetched again
+    assert len(google) == 2
+    assert all("If-None-Match" not in request.headers for request in google)
+    assert calendar_list_cache.is_fresh(calendar_list_cache.get_cached(user.id))
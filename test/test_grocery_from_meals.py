@@ -0,0 +1,140 @@
+"""Tests for grocery items from planned meals: ingredient parsing and POST /api/grocery-list-items/from-meals."""
+
+import uuid
+from datetime import date, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from src.api.main import app
+from src.api.routes.auth import create_access_token
+from src.db.session import async_engine
+from src.models.database import GroceryList, GroceryListItem, Household, MealSlot, Member, PlannedMeal, User
+from src.services import meal_ingredients
+
+MONDAY = date(2030, 3, 4)
+
+
+def test_parse_description():
+    parsed = meal_ingredients.parse_description("Chili: 500g beef mince, 2 onions; 1 tin tomatoes, salt")
+    assert [(i.name, i.quantity, i.unit) for i in parsed] == [
+        ("beef mince", 500, "g"), ("onions", 2, None), ("tomatoes", 1, "tin"), ("salt", None, None),
+    ]
+    parsed = meal_ingredients.parse_description("Pancakes\n- 1/2 l milk\n- 2 eggs")
+    assert [(i.name, i.quantity, i.unit) for i in parsed] == [("milk", 500, "ml"), ("eggs", 2, None)]
+    assert meal_ingredients.parse_description("Leftovers") == []
+    assert meal_ingredients.parse_description(None) == []
+
+
+def test_parse_description_keeps_times_and_decimal_commas():
+    assert meal_ingredients.parse_description("Dinner out 7:30") == []
+    parsed = meal_ingredients.parse_description("Bread at 18:00: 1,5 kg flour, 2 tsp salt")
+    assert [(i.name, i.quantity, i.unit) for i in parsed] == [("flour", 1500, "g"), ("salt", 2, "tsp")]
+    parsed = meal_ingredients.parse_description("Bread\n1,5 kg flour,water")
+    assert [(i.name, i.quantity, i.unit) for i in parsed] == [("flour", 1500, "g"), ("water", None, None)]
+
+
+def test_merge_adds_quantities_of_the_same_name_and_unit():
+    ingredients = meal_ingredients.parse_description("x: 1 Onion, 700g beef mince, 2 onions, 1 kg beef mince, 1 tin tomatoes, 400 g tomatoes")
+    assert [i.content for i in meal_ingredients.merge(ingredients)] == [
+        "Onion (3)", "beef mince (1.7 kg)", "tomatoes (1 tin)", "tomatoes (400 g)",
+    ]
+
+
+# ----- API -----
+
+
+@pytest.fixture
+def household(db):
+    uid = uuid.uuid4().hex[:12]
+    user = User(google_sub=f"groc-{uid}", email=f"groc-{uid}@example.com", display_name="Grocery User")
+    h = Household(name="Grocery Household")
+    db.add_all([user, h])
+    db.commit()
+    member = Member(user_id=user.id, household_id=h.id)
+    slot = MealSlot(household_id=h.id, name="Dinner", position=0)
+    grocery_list = GroceryList(household_id=h.id, name="Groceries")
+    db.add_all([member, slot, grocery_list])
+    db.commit()
+    db.add(GroceryListItem(grocery_list_id=grocery_list.id, content="Salt", rank="i", member_id=member.id))
+    db.commit()
+    h.member, h.slot, h.list = member, slot, grocery_list
+    h.headers = {"Authorization": f"Bearer {create_access_token(user.id, user.email)}"}
+    return h
+
+
+@pytest.fixture
+def client(db):
+    with TestClient(app) as c:
+        yield c
+
+
+def _plan(db, household, meals: dict[int, str]) -> None:
+    db.add_all([
+        PlannedMeal(household_id=household.id, meal_date=MONDAY + timedelta(days=d), meal_slot_id=household.slot.id, member_id=household.member.id, description=text)
+        for d, text in meals.items()
+    ])
+    db.commit()
+
+
+def _from_meals(client, household, days: int, dry_run: bool = False) -> tuple[dict, list[str]]:
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", record)
+    try:
+        r = client.post(
+            "/api/grocery-list-items/from-meals",
+            json={
+                "grocery_list_id": household.list.id,
+                "start_date": MONDAY.isoformat(),
+                "end_date": (MONDAY + timedelta(days=days - 1)).isoformat(),
+                "dry_run": dry_run,
+            },
+            headers=household.headers,
+        )
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", record)
+    assert r.status_code == 200, r.text
+    return r.json(), statements
+
+
+def test_adds_merged_items_after_the_existing_ones(client, db, household):
+    _plan(db, household, {0: "Chili: 500g beef mince, 2 onions, salt", 1: "Curry: 1 onion, 400 ml coconut milk", 2: "Takeaway", 9: "Soup: leeks"})
+    data, _ = _from_meals(client, household, 7, dry_run=True)
+    assert data["added"] == ["beef mince (500 g)", "onions (3)", "coconut milk (400 ml)"]
+    assert data["already_on_list"] == ["salt"]
+    assert data["meals_without_ingredients"] == 1
+    assert data["items"] == []
+    assert db.query(GroceryListItem).filter_by(grocery_list_id=household.list.id).count() == 1
+
+    data, _ = _from_meals(client, household, 7)
+    assert [item["content"] for item in data["items"]] == data["added"]
+    assert all(item["member_id"] == household.member.id for item in data["items"])
+    r = client.get("/api/grocery-list-items", params={"grocery_list_id": household.list.id}, headers=household.headers)
+    assert [item["content"] for item in r.json()] == ["Salt", "beef mince (500 g)", "onions (3)", "coconut milk (400 ml)"]
+
+    data, _ = _from_meals(client, household, 7)  # everything is on the list now
+    assert data["added"] == [] and data["already_on_list"] == ["beef mince", "onions", "salt", "coconut milk"]
+
+
+def test_statement_count_does_not_grow_with_the_range(client, db, household):
+    _plan(db, household, {d: f"Meal {d}: {d + 1} tins item{d}, rice, {d}00 g cheese" for d in range(31)})
+    _, day = _from_meals(client, household, 1)
+    db.query(GroceryListItem).filter(GroceryListItem.grocery_list_id == household.list.id, GroceryListItem.content != "Salt").delete()
+    db.commit()
+    data, month = _from_meals(client, household, 31)
+    assert len(data["items"]) == 33
+    assert len(month) == len(day)
+
+
+def test_range_is_limited(client, household):
+    r = client.post(
+        "/api/grocery-list-items/from-meals",
+        json={"grocery_list_id": household.list.id, "start_date": MONDAY.isoformat(), "end_date": (MONDAY - timedelta(days=1)).isoformat()},
+        headers=household.headers,
+    )
+    assert r.status_code == 400
@@ -0,0 +1,188 @@
+"""Tests for delta sync: the per-household change log and GET /api/households/{id}/changes."""
+
+import uuid
+from datetime import date, datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from src.api.main import app
+from src.api.routes.auth import create_access_token
+from src.db.session import async_engine
+from src.models.database import GroceryList, Household, HouseholdChange, MealSlot, Member, TodoItem, User
+from src.services import change_log, ranking, todo_retention
+
+
+@pytest.fixture
+def user(db):
+    uid = uuid.uuid4().hex[:12]
+    u = User(google_sub=f"sync-{uid}", email=f"sync-{uid}@example.com", display_name="Sync User")
+    db.add(u)
+    db.commit()
+    db.refresh(u)
+    return u
+
+
+@pytest.fixture
+def household(db, user):
+    h = Household(name="Sync Household")
+    db.add(h)
+    db.commit()
+    db.add_all([
+        Member(user_id=user.id, household_id=h.id, role="owner"),
+        GroceryList(household_id=h.id, name="Groceries"),
+        MealSlot(household_id=h.id, name="Dinner", position=0),
+    ])
+    db.commit()
+    db.refresh(h)
+    return h
+
+
+@pytest.fixture
+def auth_headers(user):
+    return {"Authorization": f"Bearer {create_access_token(user.id, user.email)}"}
+
+
+@pytest.fixture
+def client(db):
+    with TestClient(app) as c:
+        yield c
+
+
+def _changes(client, household, headers, since, **params):
+    r = client.get(f"/api/households/{household.id}/changes", params={"since": since, **params}, headers=headers)
+    assert r.status_code == 200
+    return r.json()
+
+
+def test_changes_since_snapshot_return_only_written_rows(client, db, household, auth_headers):
+    for i in range(20):
+        client.post("/api/todos", json={"household_id": household.id, "content": f"Task {i}"}, headers=auth_headers)
+    snap = client.get(f"/api/households/{household.id}/snapshot", params={"fields": "todos"}, headers=auth_headers).json()
+    assert set(snap) == {"todos", "seq"}
+    seq = snap["seq"]
+    assert _changes(client, household, auth_headers, seq)["todos"] == []
+
+    todos = snap["todos"]
+    client.patch(f"/api/todos/{todos[3]['id']}", json={"is_checked": True}, headers=auth_headers)
+    client.delete(f"/api/todos/{todos[5]['id']}", headers=auth_headers)
+    gl = db.query(GroceryList).filter(GroceryList.household_id == household.id).first()
+    item = client.post("/api/grocery-list-items", json={"grocery_list_id": gl.id, "content": "Milk"}, headers=auth_headers).json()
+
+    changes = _changes(client, household, auth_headers, seq)
+    assert changes["seq"] > seq and not changes["reset"] and not changes["has_more"]
+    assert [t["id"] for t in changes["todos"]] == [todos[3]["id"]] and changes["todos"][0]["is_checked"]
+    assert changes["todos"][0]["member_display_name"] == "Sync User"
+    assert [i["content"] for i in changes["grocery_items"]] == ["Milk"]
+    assert changes["deleted"] == [{"entity": "todos", "id": todos[5]["id"]}]
+    assert changes["members"] == changes["planned_meals"] == []
+
+    # Caught up: nothing new, same seq
+    assert _changes(client, household, auth_headers, changes["seq"]) == {**changes, "todos": [], "grocery_items": [], "deleted": []}
+
+    client.patch(f"/api/grocery-list-items/{item['id']}", json={"content": "Oat milk"}, headers=auth_headers)
+    later = _changes(client, household, auth_headers, changes["seq"])
+    assert [i["content"] for i in later["grocery_items"]] == ["Oat milk"] and later["todos"] == []
+
+
+def test_core_writes_are_logged(client, db, household, auth_headers):
+    ids = [
+        client.post("/api/todos", json={"household_id": household.id, "content": f"Task {i}"}, headers=auth_headers).json()["id"]
+        for i in range(4)
+    ]
+    seq = _changes(client, household, auth_headers, 0)["seq"]
+
+    client.put("/api/todos/order", json={"household_id": household.id, "ids": ids[::-1]}, headers=auth_headers)
+    reordered = _changes(client, household, auth_headers, seq)
+    assert sorted(t["id"] for t in reordered["todos"]) == sorted(ids)
+
+    body = {"household_id": household.id, "items": [{"id": ids[0], "is_checked": True}]}
+    client.patch("/api/todos", json=body, headers=auth_headers)
+    checked = _changes(client, household, auth_headers, reordered["seq"])
+    assert [t["id"] for t in checked["todos"]] == [ids[0]]
+
+    # The sweeper's Core DELETE leaves tombstones
+    db.get(TodoItem, ids[0]).checked_at = datetime.utcnow() - timedelta(days=30)
+    db.commit()
+    assert todo_retention.purge_expired_todos(db) >= 1
+    swept = _changes(client, household, auth_headers, checked["seq"])
+    assert swept["deleted"] == [{"entity": "todos", "id": ids[0]}] and swept["todos"] == []
+
+
+def test_limit_cuts_at_seq_boundaries_and_poll_cost_follows_changes(client, db, household, auth_headers):
+    seq = _changes(client, household, auth_headers, 0)["seq"]
+    client.post("/api/todos", json={"household_id": household.id, "content": "Single 0"}, headers=auth_headers)
+    db.add_all([TodoItem(household_id=household.id, content=f"Seeded {i}", rank=r) for i, r in enumerate(ranking.evenly_spaced(5))])
+    db.commit()  # one flush: five rows share one seq
+    for i in (1, 2):
+        client.post("/api/todos", json={"household_id": household.id, "content": f"Single {i}"}, headers=auth_headers)
+
+    pages = []
+    while True:
+        page = _changes(client, household, auth_headers, seq, limit=3)
+        pages.append(sorted(t["content"] for t in page["todos"]))
+        seq = page["seq"]
+        if not page["has_more"]:
+            break
+    # Cut before the five-row write, which then comes whole although it exceeds the limit
+    assert pages == [["Single 0"], [f"Seeded {i}" for i in range(5)], ["Single 1", "Single 2"]]
+
+    # Same statement count for a household with 5 or 300 unchanged rows
+    counts = []
+    for extra in (0, 300):
+        db.add_all([TodoItem(household_id=household.id, content="Filler", rank="z") for _ in range(extra)])
+        db.commit()
+        since = _changes(client, household, auth_headers, 0, limit=2000)["seq"]
+        client.post("/api/todos", json={"household_id": household.id, "content": "New"}, headers=auth_headers)
+        statements = []
+
+        def record(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        event.listen(async_engine.sync_engine, "before_cursor_execute", record)
+        try:
+            assert len(_changes(client, household, auth_headers, since)["todos"]) == 1
+        finally:
+            event.remove(async_engine.sync_engine, "before_cursor_execute", record)
+        counts.append(len(statements))
+    assert counts[0] == counts[1]
+
+
+def test_prune_tombstones_forces_reset_for_stale_clients(client, db, household, auth_headers):
+    todo = client.post("/api/todos", json={"household_id": household.id, "content": "Gone"}, headers=auth_headers).json()
+    seq = _changes(client, household, auth_headers, 0)["seq"]
+    client.delete(f"/api/todos/{todo['id']}", headers=auth_headers)
+    after_delete = _changes(client, household, auth_headers, seq)["seq"]
+
+    assert change_log.prune_tombstones(db, now=datetime.utcnow() + timedelta(days=31)) >= 1
+    assert db.query(HouseholdChange).filter(HouseholdChange.household_id == household.id, HouseholdChange.deleted.is_(True)).count() == 0
+    stale = _changes(client, household, auth_headers, seq)
+    assert stale["reset"] and stale["seq"] == after_delete
+    assert not _changes(client, household, auth_headers, after_delete)["reset"]
+
+
+def test_changes_require_membership_and_log_member_and_meal_writes(client, db, household, auth_headers, user):
+    outsider = User(google_sub=f"sync-{uuid.uuid4().hex[:12]}", email=f"sync-{uuid.uuid4().hex[:12]}@example.com")
+    db.add(outsider)
+    db.commit()
+    r = client.get(f"/api/households/{household.id}/changes", headers={"Authorization": f"Bearer {create_access_token(outsider.id, outsider.email)}"})
+    assert r.status_code == 404
+
+    seq = _changes(client, household, auth_headers, 0)["seq"]
+    member = db.query(Member).filter(Member.household_id == household.id).one()
+    slot = db.query(MealSlot).filter(MealSlot.household_id == household.id).one()
+    client.patch(f"/api/members/{member.id}", json={"event_color": "#abcdef"}, headers=auth_headers)
+    meal = client.post(
+        "/api/planned-meals",
+        json={
+            "household_id": household.id, "meal_date": date.today().isoformat(), "meal_slot_id": slot.id,
+            "member_id": member.id, "description": "Soup",
+        },
+        headers=auth_headers,
+    )
+    assert meal.status_code == 201
+    changes = _changes(client, household, auth_headers, seq)
+    assert [m["event_color"] for m in changes["members"]] == ["#abcdef"]
+    assert [m["description"] for m in changes["planned_meals"]] == ["Soup"]
+    assert changes["planned_meals"][0]["member_display_name"] == "Sync User"
@@ -0,0 +1,140 @@
+"""Tests for GET /api/households/{id}/snapshot: parity with the per-list endpoints, field selection
+and a query count that does not grow with list sizes."""
+
+import uuid
+from datetime import date, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from src.api.main import app
+from src.api.routes.auth import create_access_token
+from src.db.session import async_engine
+from src.models.database import (
+    Calendar,
+    GroceryList,
+    GroceryListItem,
+    Household,
+    MealSlot,
+    Member,
+    PlannedMeal,
+    TodoItem,
+    User,
+)
+from src.services import ranking
+
+
+@pytest.fixture
+def household(db):
+    """Household with two members, a calendar and one grocery list / meal slot."""
+    h = Household(name="Snapshot Household", meal_planner_weeks=1)
+    users = [
+        User(google_sub=f"hs-{uuid.uuid4().hex[:12]}", email=f"hs-{uuid.uuid4().hex[:12]}@example.com", display_name=f"User {i}")
+        for i in range(2)
+    ]
+    db.add_all([h, *users])
+    db.commit()
+    members = [Member(user_id=u.id, household_id=h.id, event_color=f"#00000{i}") for i, u in enumerate(users)]
+    db.add_all(members)
+    db.commit()
+    db.add(Calendar(member_id=members[0].id, google_calendar_id=f"cal-{h.id}", name="Family"))
+    db.add_all([GroceryList(household_id=h.id, name="Groceries"), MealSlot(household_id=h.id, name="Dinner", position=0)])
+    db.commit()
+    return h, users, members
+
+
+@pytest.fixture
+def client(db):
+    with TestClient(app) as c:
+        yield c
+
+
+def _headers(user):
+    return {"Authorization": f"Bearer {create_access_token(user.id, user.email)}"}
+
+
+def _add_rows(db, h, members, count):
+    gl = db.query(GroceryList).filter(GroceryList.household_id == h.id).first()
+    slot = db.query(MealSlot).filter(MealSlot.household_id == h.id).first()
+    monday = date.today() - timedelta(days=date.today().weekday())
+    existing = db.query(TodoItem).filter(TodoItem.household_id == h.id).count()
+    for i, rank in enumerate(ranking.evenly_spaced(count)[existing:], start=existing):
+        member = members[i % 2]
+        db.add(TodoItem(household_id=h.id, member_id=member.id, content=f"Todo {i}", rank=rank))
+        db.add(GroceryListItem(grocery_list_id=gl.id, member_id=member.id, content=f"Item {i}", rank=rank))
+    db.query(PlannedMeal).filter(PlannedMeal.household_id == h.id).delete()
+    for day in range(min(count, 7)):
+        db.add(PlannedMeal(
+            household_id=h.id, meal_date=monday + timedelta(days=day), meal_slot_id=slot.id,
+            member_id=members[day % 2].id, description=f"Meal {day}",
+        ))
+    db.commit()
+    return gl, monday
+
+
+def test_snapshot_matches_per_list_endpoints(client, db, household):
+    h, users, members = household
+    gl, monday = _add_rows(db, h, members, 5)
+    headers = _headers(users[0])
+
+    r = client.get(f"/api/households/{h.id}/snapshot", headers=headers)
+    assert r.status_code == 200
+    snap = r.json()
+    sunday = (monday + timedelta(days=6)).isoformat()
+    assert (snap["planned_meals_start"], snap["planned_meals_end"]) == (monday.isoformat(), sunday)
+
+    def get(url, **params):
+        return client.get(url, params=params, headers=headers).json()
+
+    assert snap["household"] == get(f"/api/households/{h.id}")
+    assert snap["members"] == get("/api/members", household_id=h.id)
+    assert snap["calendars"] == get("/api/calendars", household_id=h.id)
+    assert snap["todos"] == get("/api/todos", household_id=h.id)
+    assert snap["grocery_lists"] == get("/api/grocery-lists", household_id=h.id)
+    assert snap["grocery_items"] == get("/api/grocery-list-items", grocery_list_id=gl.id)
+    assert snap["meal_slots"] == get("/api/meal-slots", household_id=h.id)
+    meals = get("/api/planned-meals", household_id=h.id, start_date=monday.isoformat(), end_date=sunday)
+    assert sorted(snap["planned_meals"], key=lambda m: m["id"]) == sorted(meals, key=lambda m: m["id"])
+
+
+def test_snapshot_field_selection_and_errors(client, db, household):
+    h, users, members = household
+    _add_rows(db, h, members, 3)
+    headers = _headers(users[0])
+
+    r = client.get(f"/api/households/{h.id}/snapshot", params={"fields": "todos,meal_slots"}, headers=headers)
+    assert r.status_code == 200
+    assert set(r.json()) == {"todos", "meal_slots", "seq"}
+    assert [t["member_display_name"] for t in r.json()["todos"]] == ["User 0", "User 1", "User 0"]
+
+    r = client.get(f"/api/households/{h.id}/snapshot", params={"fields": "todos,secrets"}, headers=headers)
+    assert r.status_code == 400
+
+    outsider = User(google_sub=f"hs-{uuid.uuid4().hex[:12]}", email=f"hs-{uuid.uuid4().hex[:12]}@example.com")
+    db.add(outsider)
+    db.commit()
+    assert client.get(f"/api/households/{h.id}/snapshot", headers=_headers(outsider)).status_code == 404
+
+
+def test_snapshot_query_count_does_not_grow_with_lists(client, db, household):
+    h, users, members = household
+    headers = _headers(users[0])
+    counts = []
+    for size in (2, 60):
+        _add_rows(db, h, members, size)
+        statements = []
+
+        def record(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        event.listen(async_engine.sync_engine, "before_cursor_execute", record)
+        try:
+            r = client.get(f"/api/households/{h.id}/snapshot", headers=headers)
+        finally:
+            event.remove(async_engine.sync_engine, "before_cursor_execute", record)
+        assert r.status_code == 200
+        assert len(r.json()["todos"]) == size
+        counts.append(len(statements))
+    assert counts[0] == counts[1]
+    assert counts[1] <= 10  # auth + household + one query per list
@@ -0,0 +1,353 @@
+"""Tests for ICS subscription calendars: incremental parsing, conditional GET against a local HTTP
+server, the public-address guard, and merging stored events into /api/events."""
+
+import asyncio
+import threading
+import uuid
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import AsyncMock, patch
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from src.api.main import app
+from src.api.routes.auth import create_access_token
+from src.models.database import Calendar, Household, IcsEvent, Member, User
+from src.config import settings
+from src.services import ics, ics_subscriptions
+
+NOW = datetime(2024, 6, 1, tzinfo=timezone.utc)
+
+SCHOOL_ICS = (
+    "BEGIN:VCALENDAR\r\n"
+    "VERSION:2.0\r\n"
+    "BEGIN:VEVENT\r\n"
+    "UID:piano@school\r\n"
+    "DTSTART;TZID=America/New_York:20240603T160000\r\n"
+    "DTEND;TZID=America/New_York:20240603T170000\r\n"
+    "RRULE:FREQ=WEEKLY;BYDAY=MO,WE;COUNT=4\r\n"
+    "EXDATE;TZID=America/New_York:20240605T160000\r\n"
+    "SUMMARY:Piano lesson\\, room 4 with a summary long enough to be folded by the\r\n"
+    "  publisher\r\n"
+    "BEGIN:VALARM\r\n"
+    "TRIGGER:-PT15M\r\n"
+    "SUMMARY:Alarm\r\n"
+    "END:VALARM\r\n"
+    "END:VEVENT\r\n"
+    "BEGIN:VEVENT\r\n"
+    "UID:piano@school\r\n"
+    "RECURRENCE-ID;TZID=America/New_York:20240610T160000\r\n"
+    "DTSTART;TZID=America/New_York:20240610T180000\r\n"
+    "DTEND;TZID=America/New_York:20240610T190000\r\n"
+    "SUMMARY:Piano lesson (moved)\r\n"
+    "END:VEVENT\r\n"
+    "BEGIN:VEVENT\r\n"
+    "UID:closed@school\r\n"
+    "DTSTART;VALUE=DATE:20240619\r\n"
+    "SUMMARY:School closed\r\n"
+    "LOCATION:Main building\r\n"
+    "END:VEVENT\r\n"
+    "END:VCALENDAR\r\n"
+)
+
+
+class _IcsHandler(BaseHTTPRequestHandler):
+    body = SCHOOL_ICS
+    etag = '"v1"'
+    requests: list = []
+
+    def do_GET(self):
+        type(self).requests.append(dict(self.headers))
+        if self.headers.get("If-None-Match") == self.etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+        data = self.body.encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/calendar")
+        self.send_header("ETag", self.etag)
+        self.send_header("Last-Modified", "Sat, 01 Jun 2024 00:00:00 GMT")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def ics_server(monkeypatch):
+    """Local HTTP stand-in for a published school calendar (private addresses allowed)."""
+    monkeypatch.setattr(settings, "ICS_ALLOW_PRIVATE_URLS", True)
+    _IcsHandler.requests = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _IcsHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/school.ics"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def user(db):
+    uid = uuid.uuid4().hex[:12]
+    u = User(google_sub=f"ics-{uid}", email=f"ics-{uid}@example.com", display_name="ICS User")
+    db.add(u)
+    db.commit()
+    db.refresh(u)
+    return u
+
+
+@pytest.fixture
+def member(db, user):
+    h = Household(name="ICS Household")
+    db.add(h)
+    db.commit()
+    m = Member(user_id=user.id, household_id=h.id, event_color="#ff8800")
+    db.add(m)
+    db.commit()
+    db.refresh(m)
+    return m
+
+
+@pytest.fixture
+def ics_calendar(db, member, ics_server):
+    cal = Calendar(member_id=member.id, source_type="ics", ics_url=ics_server, name="School", is_visible=True)
+    db.add(cal)
+    db.commit()
+    db.refresh(cal)
+    return cal
+
+
+@pytest.fixture
+def auth_headers(user):
+    return {"Authorization": f"Bearer {create_access_token(user.id, user.email)}"}
+
+
+@pytest.fixture
+def client(db):
+    with TestClient(app) as c:
+        yield c
+
+
+def _sync(db, cal, client: httpx.AsyncClient | None = None) -> bool:
+    async def run():
+        async with client or httpx.AsyncClient() as c:
+            return await ics_subscriptions.sync_calendar(db, cal.id, c, now=NOW)
+
+    return asyncio.run(run())
+
+
+def test_parser_unfolds_lines_and_expands_recurrence():
+    parser = ics.IcsParser()
+    events = []
+    # Feed in arbitrary chunks of lines, as they arrive from the network
+    for line in SCHOOL_ICS.splitlines(keepends=True):
+        events.extend(parser.feed(line))
+    events.extend(parser.close())
+
+    assert [e["uid"] for e in events] == ["piano@school", "piano@school", "closed@school"]
+    series = events[0]
+    assert series["summary"] == (
+        "Piano lesson, room 4 with a summary long enough to be folded by the publisher"
+    )
+    window = (datetime(2024, 1, 1, tzinfo=timezone.utc), datetime(2025, 1, 1, tzinfo=timezone.utc))
+    starts = [ics.format_google_style(s) for s, _ in ics.expand_instances(series, *window)]
+    # COUNT=4 counts the EXDATE'd Wednesday; New York is UTC-4 in June
+    assert starts == ["2024-06-03T20:00:00Z", "2024-06-10T20:00:00Z", "2024-06-12T20:00:00Z"]
+    assert events[1]["recurrence_id"] == "2024-06-10T20:00:00Z"
+    assert events[2]["all_day"] is True
+
+
+def test_sync_stores_instances_then_revalidates_with_304(db, ics_calendar):
+    assert _sync(db, ics_calendar) is True
+    rows = (
+        db.query(IcsEvent)
+        .filter(IcsEvent.calendar_id == ics_calendar.id)
+        .order_by(IcsEvent.start_at)
+        .all()
+    )
+    assert [(r.start, r.summary) for r in rows] == [
+        ("2024-06-03T20:00:00Z", rows[0].summary),
+        ("2024-06-10T22:00:00Z", "Piano lesson (moved)"),  # override replaced the series instance
+        ("2024-06-12T20:00:00Z", rows[0].summary),
+        ("2024-06-19", "School closed"),
+    ]
+    assert ics_calendar.ics_etag == '"v1"'
+
+    assert _sync(db, ics_calendar) is False
+    assert _IcsHandler.requests[-1]["If-None-Match"] == '"v1"'
+    assert _IcsHandler.requests[-1]["If-Modified-Since"] == "Sat, 01 Jun 2024 00:00:00 GMT"
+    assert db.query(IcsEvent).filter(IcsEvent.calendar_id == ics_calendar.id).count() == 4
+
+
+def test_events_endpoint_merges_stored_ics_events_without_fetching(client, db, ics_calendar, auth_headers):
+    _sync(db, ics_calendar)
+    fetches = len(_IcsHandler.requests)
+
+    resp = client.get(
+        "/api/events",
+        params={"start_date": "2024-06-15T00:00:00Z", "end_date": "2024-06-30T00:00:00Z"},
+        headers=auth_headers,
+    )
+    assert resp.status_code == 200
+    events = resp.json()["events"]
+    assert [(e["title"], e["start"], e["color"]) for e in events] == [
+        ("School closed", "2024-06-19", "#ff8800"),
+    ]
+    assert events[0]["calendar_name"] == "School"
+
+    resp = client.get(
+        "/api/events",
+        params={"start_date": "2024-06-01T00:00:00Z", "end_date": "2024-06-30T00:00:00Z", "q": "moved"},
+        headers=auth_headers,
+    )
+    assert [e["title"] for e in resp.json()["events"]] == ["Piano lesson (moved)"]
+    assert len(_IcsHandler.requests) == fetches  # no request-time fetching
+
+
+def test_create_ics_calendar_validates_url_and_syncs_in_background(client, member, auth_headers):
+    with patch(
+        "src.api.routes.calendars.ics_subscriptions.sync_calendar_in_background", new_callable=AsyncMock
+    ) as sync:
+        resp = client.post(
+            "/api/calendars",
+            json={"member_id": member.id, "name": "Holidays", "source_type": "ics", "ics_url": "ftp://x/h.ics"},
+            headers=auth_headers,
+        )
+        assert resp.status_code == 400
+        resp = client.post(
+            "/api/calendars",
+            json={
+                "member_id": member.id,
+                "name": "Holidays",
+                "source_type": "ics",
+                "ics_url": "webcal://example.com/holidays.ics",
+            },
+            headers=auth_headers,
+        )
+    assert resp.status_code == 201
+    data = resp.json()
+    assert data["ics_url"] == "https://example.com/holidays.ics"
+    assert data["google_calendar_id"] is None
+    sync.assert_awaited_once_with(data["id"])
+
+    resp = client.get(f"/api/events/writable-calendars?household_id={member.household_id}", headers=auth_headers)
+    assert all(c["id"] != data["id"] for c in resp.json())
+
+
+def test_long_running_series_still_expands_in_the_window():
+    window = (datetime(2024, 6, 1, tzinfo=timezone.utc), datetime(2024, 6, 15, tzinfo=timezone.utc))
+    daily = {
+        "uid": "d", "start": datetime(1990, 1, 1, 8, tzinfo=timezone.utc), "end": datetime(1990, 1, 1, 9, tzinfo=timezone.utc),
+        "rrule": {"FREQ": "DAILY"}, "exdates": set(), "recurrence_id": None,
+    }
+    assert len(list(ics.expand_instances(daily, *window))) == 14
+    weekly = {**daily, "rrule": {"FREQ": "WEEKLY", "BYDAY": "MO,TH", "COUNT": "2000"}}
+    # 2000 instances from 1990-01-01 (a Monday) run until 2009, before the window
+    assert list(ics.expand_instances(weekly, *window)) == []
+    weekly["rrule"]["COUNT"] = "2000000"
+    starts = [s.date().isoformat() for s, _ in ics.expand_instances(weekly, *window)]
+    assert starts == ["2024-06-03", "2024-06-06", "2024-06-10", "2024-06-13"]
+
+
+def test_rules_with_unsupported_parts_are_skipped():
+    window = (datetime(2024, 1, 1, tzinfo=timezone.utc), datetime(2025, 1, 1, tzinfo=timezone.utc))
+    event = {
+        "uid": "m", "start": datetime(2024, 1, 9, 18, tzinfo=timezone.utc), "end": datetime(2024, 1, 9, 19, tzinfo=timezone.utc),
+        "rrule": {"FREQ": "MONTHLY", "BYDAY": "2TU"}, "exdates": set(), "recurrence_id": None,
+    }
+    assert list(ics.expand_instances(event, *window)) == []
+    # BYMONTHDAY restating DTSTART's day changes nothing
+    event["rrule"] = {"FREQ": "MONTHLY", "BYMONTHDAY": "9", "COUNT": "3"}
+    assert [s.month for s, _ in ics.expand_instances(event, *window)] == [1, 2, 3]
+
+
+def test_normalize_rejects_non_public_hosts():
+    for url in ("http://localhost/c.ics", "http://10.0.0.5/c.ics", "http://[::1]/c.ics", "webcal://169.254.169.254/x"):
+        assert ics_subscriptions.normalize_ics_url(url) is None
+    assert ics_subscriptions.normalize_ics_url("webcal://cal.example.com/c.ics") == "https://cal.example.com/c.ics"
+
+
+def test_sync_refuses_private_addresses(db, ics_calendar, monkeypatch):
+    monkeypatch.setattr(settings, "ICS_ALLOW_PRIVATE_URLS", False)
+    with pytest.raises(ics_subscriptions.IcsUrlError):
+        _sync(db, ics_calendar)
+    assert _IcsHandler.requests == []
+
+
+def test_redirects_are_checked_and_connections_pinned(db, ics_calendar, monkeypatch):
+    monkeypatch.setattr(settings, "ICS_ALLOW_PRIVATE_URLS", False)
+    addresses = {"calendar.example": ["93.184.216.34"], "metadata.example": ["169.254.169.254"]}
+
+    async def resolve(host, port):
+        return addresses.get(host, [host])
+
+    monkeypatch.setattr(ics_subscriptions, "_resolve", resolve)
+    seen = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append((request.url.host, request.headers["host"]))
+        if request.url.path == "/school.ics":
+            return httpx.Response(302, headers={"Location": "/moved.ics"})
+        if request.url.path == "/moved.ics":
+            return httpx.Response(200, text=SCHOOL_ICS, headers={"ETag": '"v2"'})
+        return httpx.Response(302, headers={"Location": "http://metadata.example/latest/meta-data"})
+
+    ics_calendar.ics_url = "https://calendar.example/school.ics"
+    db.commit()
+    assert _sync(db, ics_calendar, httpx.AsyncClient(transport=httpx.MockTransport(handler))) is True
+    assert seen == [("93.184.216.34", "calendar.example"), ("93.184.216.34", "calendar.example")]
+    assert ics_calendar.ics_etag == '"v2"'
+
+    ics_calendar.ics_url = "https://calendar.example/elsewhere.ics"
+    db.commit()
+    seen.clear()
+    with pytest.raises(ics_subscriptions.IcsUrlError):
+        _sync(db, ics_calendar, httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+    assert seen == [("93.184.216.34", "calendar.example")]  # the metadata address was never contacted
+
+
+def test_oversized_feed_is_refused_and_rows_kept(db, ics_calendar, monkeypatch):
+    _sync(db, ics_calendar)
+    _IcsHandler.etag = '"v2"'
+    monkeypatch.setattr(ics_subscriptions, "MAX_FEED_BYTES", 100)
+    try:
+        with pytest.raises(ics_subscriptions.IcsLimitError):
+            _sync(db, ics_calendar)
+    finally:
+        _IcsHandler.etag = '"v1"'
+    db.rollback()
+    assert db.query(IcsEvent).filter(IcsEvent.calendar_id == ics_calendar.id).count() == 4
+
+
+def test_no_transaction_is_open_during_the_download(db, ics_calendar, monkeypatch):
+    fetch = ics_subscriptions.fetch_calendar
+    during = []
+
+    async def watched_fetch(*args, **kwargs):
+        during.append(db.in_transaction())
+        return await fetch(*args, **kwargs)
+
+    monkeypatch.setattr(ics_subscriptions, "fetch_calendar", watched_fetch)
+    assert _sync(db, ics_calendar) is True
+    assert during == [False]
+
+
+def test_sync_all_continues_after_a_failing_calendar(db, member, ics_calendar, monkeypatch):
+    later = Calendar(member_id=member.id, source_type="ics", ics_url=ics_calendar.ics_url, name="Later", is_visible=True)
+    db.add(later)
+    db.commit()
+    synced = []
+
+    async def sync(session, calendar_id, client, now=None):
+        synced.append(calendar_id)
+        if calendar_id == ics_calendar.id:
+            raise ValueError("malformed feed")
+        return True
+
+    monkeypatch.setattr(ics_subscriptions, "sync_calendar", sync)
+    asyncio.run(ics_subscriptions.sync_all_ics_calendars())
+    assert synced.index(ics_calendar.id) < synced.index(later.id)
@@ -0,0 +1,176 @@
+"""Tests for household list revisions: weak ETags and 304s on the list endpoints."""
+
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event, update
+
+from src.api.main import app
+from src.api.routes.auth import create_access_token
+from src.db.session import async_engine
+from src.models.database import Calendar, GroceryList, Household, Member, TodoItem, User
+from src.services import revisions
+
+
+@pytest.fixture
+def user(db):
+    uid = uuid.uuid4().hex[:12]
+    u = User(google_sub=f"etag-{uid}", email=f"etag-{uid}@example.com", display_name="Etag User")
+    db.add(u)
+    db.commit()
+    db.refresh(u)
+    return u
+
+
+@pytest.fixture
+def household(db, user):
+    h = Household(name="Etag Household")
+    db.add(h)
+    db.commit()
+    db.add_all([Member(user_id=user.id, household_id=h.id, role="owner"), GroceryList(household_id=h.id, name="Groceries")])
+    db.commit()
+    db.refresh(h)
+    return h
+
+
+@pytest.fixture
+def member(db, household):
+    return db.query(Member).filter(Member.household_id == household.id).one()
+
+
+@pytest.fixture
+def auth_headers(user):
+    return {"Authorization": f"Bearer {create_access_token(user.id, user.email)}"}
+
+
+@pytest.fixture
+def client(db):
+    with TestClient(app) as c:
+        yield c
+
+
+def _etag(client, path, headers, **params):
+    r = client.get(path, params=params, headers=headers)
+    assert r.status_code == 200
+    assert r.headers["etag"].startswith('W/"') and r.headers["cache-control"] == "no-cache"
+    return r.headers["etag"]
+
+
+def _revalidate(client, path, headers, tag, **params):
+    return client.get(path, params=params, headers={**headers, "If-None-Match": tag})
+
+
+def test_every_list_endpoint_answers_304_while_unchanged(client, db, household, member, auth_headers):
+    grocery_list = db.query(GroceryList).filter(GroceryList.household_id == household.id).one()
+    today = datetime.utcnow().date().isoformat()
+    endpoints = [
+        ("/api/members", {"household_id": household.id}),
+        ("/api/calendars", {}),
+        ("/api/invitations", {}),
+        ("/api/todos", {"household_id": household.id}),
+        ("/api/grocery-lists", {"household_id": household.id}),
+        ("/api/grocery-list-items", {"grocery_list_id": grocery_list.id}),
+        ("/api/meal-slots", {"household_id": household.id}),
+        ("/api/planned-meals", {"household_id": household.id, "start_date": today, "end_date": today}),
+    ]
+    client.get("/api/meal-slots", params={"household_id": household.id}, headers=auth_headers)  # creates defaults
+    for path, params in endpoints:
+        tag = _etag(client, path, auth_headers, **params)
+        r = _revalidate(client, path, auth_headers, tag, **params)
+        assert r.status_code == 304, path
+        assert r.content == b"" and r.headers["etag"] == tag
+        # Any of several tags, weak or strong form, matches
+        assert _revalidate(client, path, auth_headers, f'"other", {tag.removeprefix("W/")}', **params).status_code == 304
+        assert _revalidate(client, path, auth_headers, 'W/"other"', **params).status_code == 200
+
+
+def test_writes_change_the_tag_of_their_lists_only(client, db, household, member, auth_headers):
+    todos = _etag(client, "/api/todos", auth_headers, household_id=household.id)
+    lists = _etag(client, "/api/grocery-lists", auth_headers, household_id=household.id)
+
+    r = client.post("/api/todos", json={"household_id": household.id, "content": "New"}, headers=auth_headers)
+    assert r.status_code == 201
+    assert _revalidate(client, "/api/todos", auth_headers, todos, household_id=household.id).status_code == 200
+    assert _revalidate(client, "/api/grocery-lists", auth_headers, lists, household_id=household.id).status_code == 304
+
+    # To-dos show member names and colors, so a member edit changes their tag too
+    todos = _etag(client, "/api/todos", auth_headers, household_id=household.id)
+    client.patch(f"/api/members/{member.id}", json={"event_color": "#123456"}, headers=auth_headers)
+    assert _revalidate(client, "/api/todos", auth_headers, todos, household_id=household.id).status_code == 200
+
+    # Another household's writes do not
+    other = Household(name="Other Household")
+    db.add(other)
+    db.commit()
+    todos = _etag(client, "/api/todos", auth_headers, household_id=household.id)
+    db.add(TodoItem(household_id=other.id, content="Elsewhere", rank="i"))
+    db.commit()
+    assert _revalidate(client, "/api/todos", auth_headers, todos, household_id=household.id).status_code == 304
+
+
+def test_calendar_invitation_and_user_writes_change_their_tags(client, db, household, member, user, auth_headers):
+    calendars = _etag(client, "/api/calendars", auth_headers)
+    invitations = _etag(client, "/api/invitations", auth_headers)
+    members = _etag(client, "/api/members", auth_headers, household_id=household.id)
+
+    db.add(Calendar(member_id=member.id, name="Work", google_calendar_id="work@example.com"))
+    db.commit()
+    assert _revalidate(client, "/api/calendars", auth_headers, calendars).status_code == 200
+    assert _revalidate(client, "/api/invitations", auth_headers, invitations).status_code == 304
+
+    r = client.post(
+        "/api/invitations",
+        json={"household_id": household.id, "email": "friend@example.com", "invited_by_member_id": member.id},
+        headers=auth_headers,
+    )
+    assert r.status_code in (200, 201)
+    assert _revalidate(client, "/api/invitations", auth_headers, invitations).status_code == 200
+
+    # A token refresh leaves member lists alone; a new display name does not
+    user.access_token = "refreshed"
+    db.commit()
+    assert _revalidate(client, "/api/members", auth_headers, members, household_id=household.id).status_code == 304
+    user.display_name = "Renamed"
+    db.commit()
+    r = _revalidate(client, "/api/members", auth_headers, members, household_id=household.id)
+    assert r.status_code == 200 and r.json()[0]["user"]["display_name"] == "Renamed"
+
+
+def test_checked_items_expiring_change_the_todo_tag(client, db, household, auth_headers):
+    item = client.post("/api/todos", json={"household_id": household.id, "content": "Done"}, headers=auth_headers).json()
+    client.patch(f"/api/todos/{item['id']}", json={"is_checked": True}, headers=auth_headers)
+    tag = _etag(client, "/api/todos", auth_headers, household_id=household.id)
+    # Time passing, no write: the item drops out of the list, so the tag must change
+    db.execute(update(TodoItem).where(TodoItem.id == item["id"]).values(checked_at=datetime.utcnow() - timedelta(days=8)))
+    db.commit()
+    r = _revalidate(client, "/api/todos", auth_headers, tag, household_id=household.id)
+    assert r.status_code == 200 and r.json() == []
+
+
+def test_not_modified_costs_one_lookup_and_no_row_reads(client, db, household, auth_headers):
+    for i in range(50):
+        client.post("/api/todos", json={"household_id": household.id, "content": f"Task {i}"}, headers=auth_headers)
+    tag = _etag(client, "/api/todos", auth_headers, household_id=household.id)
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", record)
+    try:
+        r = _revalidate(client, "/api/todos", auth_headers, tag, household_id=household.id)
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", record)
+    assert r.status_code == 304
+    # The auth context query and the revision lookup; the to-do rows are never read
+    assert len(statements) == 2 and "household_revisions" in statements[1]
+
+
+def test_weak_comparison():
+    assert revisions.matches('W/"h1r2"', 'W/"h1r2"')
+    assert revisions.matches('"h1r2"', 'W/"h1r2"')
+    assert revisions.matches("*", 'W/"h1r2"')
+    assert not revisions.matches('W/"h1r3"', 'W/"h1r2"')
+    assert not revisions.matches(None, 'W/"h1r2"')
@@ -0,0 +1,88 @@
+"""Regression tests: list endpoints run a constant number of queries regardless of list length."""
+
+import uuid
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from src.api.main import app
+from src.api.routes.auth import create_access_token
+from src.db.session import async_engine
+from src.models.database import GroceryList, GroceryListItem, Household, Member, TodoItem, User
+
+
+@pytest.fixture
+def household(db):
+    """Household with two members (items alternate between them)."""
+    h = Household(name="Query Count Household")
+    users = [
+        User(google_sub=f"qc-{uuid.uuid4().hex[:12]}", email=f"qc-{uuid.uuid4().hex[:12]}@example.com", display_name=f"User {i}")
+        for i in range(2)
+    ]
+    db.add_all([h, *users])
+    db.commit()
+    members = [Member(user_id=u.id, household_id=h.id, event_color=f"#00000{i}") for i, u in enumerate(users)]
+    db.add_all(members)
+    db.commit()
+    return h, users, members
+
+
+@pytest.fixture
+def client(db):
+    with TestClient(app) as c:
+        yield c
+
+
+def _count_queries(client, url, params, headers) -> tuple[int, list]:
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", record)
+    try:
+        r = client.get(url, params=params, headers=headers)
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", record)
+    assert r.status_code == 200
+    return len(statements), r.json()
+
+
+def test_todo_list_query_count_is_constant(client, db, household):
+    h, users, members = household
+    headers = {"Authorization": f"Bearer {create_access_token(users[0].id, users[0].email)}"}
+    counts = []
+    for total in (2, 40):
+        existing = db.query(TodoItem).filter(TodoItem.household_id == h.id).count()
+        db.add_all([
+            TodoItem(household_id=h.id, member_id=members[i % 2].id, content=f"Todo {i}", rank=f"{i:03d}1")
+            for i in range(existing, total)
+        ])
+        db.commit()
+        count, body = _count_queries(client, "/api/todos", {"household_id": h.id}, headers)
+        assert len(body) == total
+        counts.append(count)
+    assert counts[0] == counts[1]
+    assert {(t["member_display_name"], t["member_color"]) for t in body} == {("User 0", "#000000"), ("User 1", "#000001")}
+
+
+def test_grocery_item_list_query_count_is_constant(client, db, household):
+    h, users, members = household
+    headers = {"Authorization": f"Bearer {create_access_token(users[0].id, users[0].email)}"}
+    gl = GroceryList(household_id=h.id, name="Groceries")
+    db.add(gl)
+    db.commit()
+    counts = []
+    for total in (2, 40):
+        existing = db.query(GroceryListItem).filter(GroceryListItem.grocery_list_id == gl.id).count()
+        db.add_all([
+            GroceryListItem(grocery_list_id=gl.id, member_id=members[i % 2].id, content=f"Item {i}", rank=f"{i:03d}1")
+            for i in range(existing, total)
+        ])
+        db.commit()
+        count, body = _count_queries(client, "/api/grocery-list-items", {"grocery_list_id": gl.id}, headers)
+        assert len(body) == total
+        counts.append(count)
+    assert counts[0] == counts[1]
+    assert {(i["member_display_name"], i["member_color"]) for i in body} == {("User 0", "#000000"), ("User 1", "#000001")}
@@ -1,14 +1,17 @@
 """Tests for meal planner API: meal slots and planned meals."""
 
+import threading
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date, timedelta
 
 import pytest
 from fastapi.testclient import TestClient
+from sqlalchemy import event
 
 from src.api.main import app
 from src.api.routes.auth import create_access_token
-from src.db.session import get_db
+from src.db.session import SessionLocal, async_engine
 from src.models.database import Household, MealSlot, Member, PlannedMeal, User
 
 
@@ -53,13 +56,8 @@ def auth_headers(user):
 
 @pytest.fixture
 def client(db):
-    def override_get_db():
-        yield db
-
-    app.dependency_overrides[get_db] = override_get_db
     with TestClient(app) as c:
         yield c
-    app.dependency_overrides.clear()
 
 
 # ----- Meal slots -----
@@ -551,3 +549,267 @@ def test_swap_planned_meals_403_when_not_member(client, user, auth_headers, db):
         headers=auth_headers,
     )
     assert r.status_code == 403
+
+
+# ----- Week grid -----
+
+
+def test_meal_grid(client, household, member, slots, auth_headers, db):
+    monday = date(2030, 1, 7)
+    db.add_all([
+        PlannedMeal(household_id=household.id, meal_date=monday, meal_slot_id=slots[1].id, member_id=member.id, description="Pasta"),
+        PlannedMeal(household_id=household.id, meal_date=monday + timedelta(days=9), meal_slot_id=slots[0].id, member_id=member.id),
+        PlannedMeal(household_id=household.id, meal_date=monday + timedelta(days=14), meal_slot_id=slots[0].id, member_id=member.id),
+    ])
+    db.commit()
+    r = client.get("/api/planned-meals/grid", params={"household_id": household.id, "start_date": _date_str(monday)}, headers=auth_headers)
+    assert r.status_code == 200
+    grid = r.json()
+    # meal_planner_weeks=2: 14 days, the meal on day 14 is outside
+    assert (grid["start_date"], grid["end_date"]) == (_date_str(monday), _date_str(monday + timedelta(days=13)))
+    assert [s["name"] for s in grid["slots"]] == ["Lunch", "Dinner"]
+    assert grid["members"] == {str(member.id): {"display_name": "Meal User", "color": "#abc"}}
+    assert len(grid["cells"]) == 14 and all(len(day) == 2 for day in grid["cells"])
+    filled = {(d, s): cell for d, day in enumerate(grid["cells"]) for s, cell in enumerate(day) if cell}
+    assert set(filled) == {(0, 1), (9, 0)}
+    assert filled[(0, 1)]["description"] == "Pasta" and filled[(0, 1)]["member_id"] == member.id
+
+    r2 = client.get(
+        "/api/planned-meals/grid",
+        params={"household_id": household.id, "start_date": _date_str(monday)},
+        headers={**auth_headers, "If-None-Match": r.headers["etag"]},
+    )
+    assert r2.status_code == 304
+    db.add(PlannedMeal(household_id=household.id, meal_date=monday, meal_slot_id=slots[0].id, member_id=member.id))
+    db.commit()
+    r3 = client.get(
+        "/api/planned-meals/grid",
+        params={"household_id": household.id, "start_date": _date_str(monday)},
+        headers={**auth_headers, "If-None-Match": r.headers["etag"]},
+    )
+    assert r3.status_code == 200 and r3.json()["cells"][0][0] is not None
+
+
+def test_meal_grid_defaults_to_this_week(client, household, member, auth_headers):
+    r = client.get("/api/planned-meals/grid", params={"household_id": household.id}, headers=auth_headers)
+    assert r.status_code == 200
+    monday = date.today() - timedelta(days=date.today().weekday())
+    assert r.json()["start_date"] == _date_str(monday)
+    assert [s["name"] for s in r.json()["slots"]] == ["Breakfast", "Lunch", "Dinner"]  # defaults created
+
+
+def test_meal_grid_403_when_not_member(client, household, auth_headers):
+    r = client.get("/api/planned-meals/grid", params={"household_id": household.id}, headers=auth_headers)
+    assert r.status_code == 403
+
+
+# ----- Copy and rotation -----
+
+
+@pytest.fixture
+def slots(db, household):
+    slots = [MealSlot(household_id=household.id, name=name, position=i) for i, name in enumerate(["Lunch", "Dinner"])]
+    db.add_all(slots)
+    db.commit()
+    return slots
+
+
+@pytest.fixture
+def week(db, household, member, slots):
+    """Meals on Monday (both slots) and Wednesday (dinner) of a past week; returns that Monday."""
+    monday = date(2030, 1, 7)
+    db.add_all([
+        PlannedMeal(household_id=household.id, meal_date=monday, meal_slot_id=slots[0].id, member_id=member.id, description="Soup"),
+        PlannedMeal(household_id=household.id, meal_date=monday, meal_slot_id=slots[1].id, member_id=member.id, description="Pasta"),
+        PlannedMeal(household_id=household.id, meal_date=monday + timedelta(days=2), meal_slot_id=slots[1].id, member_id=member.id, description="Curry"),
+    ])
+    db.commit()
+    return monday
+
+
+def _meals(db, household) -> dict:
+    db.expire_all()
+    return {
+        (m.meal_date, m.meal_slot_id): m.description
+        for m in db.query(PlannedMeal).filter(PlannedMeal.household_id == household.id)
+    }
+
+
+def test_copy_week_dry_run_previews_without_writing(client, household, member, slots, week, auth_headers, db):
+    target = week + timedelta(days=7)
+    db.add(PlannedMeal(household_id=household.id, meal_date=target, meal_slot_id=slots[1].id, member_id=member.id, description="Old"))
+    db.commit()
+    before = _meals(db, household)
+    body = {
+        "household_id": household.id,
+        "source_start": _date_str(week),
+        "source_end": _date_str(week + timedelta(days=6)),
+        "target_start": _date_str(target),
+        "dry_run": True,
+    }
+    r = client.post("/api/planned-meals/copy", json=body, headers=auth_headers)
+    assert r.status_code == 200
+    data = r.json()
+    assert (data["dry_run"], data["created"], data["replaced"]) == (True, 2, 1)
+    assert [(m["meal_date"], m["description"]) for m in data["meals"]] == [
+        (_date_str(target), "Soup"), (_date_str(target), "Pasta"), (_date_str(target + timedelta(days=2)), "Curry"),
+    ]
+    assert data["meals"][1]["replaces_id"] is not None and data["meals"][1]["member_display_name"] == "Meal User"
+    assert _meals(db, household) == before
+
+    body["dry_run"] = False
+    r = client.post("/api/planned-meals/copy", json=body, headers=auth_headers)
+    assert r.status_code == 200 and (r.json()["created"], r.json()["replaced"]) == (2, 1)
+    meals = _meals(db, household)
+    assert meals[(target, slots[1].id)] == "Pasta"
+    assert meals[(target + timedelta(days=2), slots[1].id)] == "Curry"
+    assert len(meals) == 6
+
+
+def test_rotation_repeats_template_weeks(client, household, slots, week, auth_headers, db):
+    start = week + timedelta(days=14)
+    r = client.post(
+        "/api/planned-meals/rotation",
+        json={"household_id": household.id, "template_start": _date_str(week), "template_weeks": 2, "start_date": _date_str(start), "weeks": 4},
+        headers=auth_headers,
+    )
+    assert r.status_code == 200
+    assert (r.json()["created"], r.json()["replaced"]) == (6, 0)
+    meals = _meals(db, household)
+    # Template week 1 has the meals, week 2 is empty: weeks 1 and 3 of the rotation get them
+    for offset in (0, 14):
+        assert meals[(start + timedelta(days=offset), slots[0].id)] == "Soup"
+        assert meals[(start + timedelta(days=offset + 2), slots[1].id)] == "Curry"
+    assert not any(start + timedelta(days=7) <= d < start + timedelta(days=14) for d, _ in meals)
+
+
+def test_copy_runs_constant_statements(client, household, member, slots, auth_headers, db):
+    """A month of meals is copied with the same handful of statements as a single day."""
+    first = date(2031, 3, 1)
+    db.add_all([
+        PlannedMeal(household_id=household.id, meal_date=first + timedelta(days=d), meal_slot_id=slot.id, member_id=member.id, description=f"Day {d}")
+        for d in range(28)
+        for slot in slots
+    ])
+    db.commit()
+    counts = []
+    for days in (1, 28):
+        statements = []
+
+        def record(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        event.listen(async_engine.sync_engine, "before_cursor_execute", record)
+        try:
+            r = client.post(
+                "/api/planned-meals/copy",
+                json={
+                    "household_id": household.id,
+                    "source_start": _date_str(first),
+                    "source_end": _date_str(first + timedelta(days=days - 1)),
+                    "target_start": _date_str(first + timedelta(days=35 * days)),
+                },
+                headers=auth_headers,
+            )
+        finally:
+            event.remove(async_engine.sync_engine, "before_cursor_execute", record)
+        assert r.status_code == 200 and r.json()["created"] == 2 * days
+        counts.append(len(statements))
+    assert counts[0] == counts[1]
+
+
+def test_copy_and_rotation_validate_ranges(client, household, member, auth_headers):
+    r = client.post(
+        "/api/planned-meals/copy",
+        json={"household_id": household.id, "source_start": "2030-01-10", "source_end": "2030-01-01", "target_start": "2030-02-01"},
+        headers=auth_headers,
+    )
+    assert r.status_code == 400
+    r = client.post(
+        "/api/planned-meals/rotation",
+        json={"household_id": household.id, "template_start": "2030-01-01", "start_date": "2030-02-01", "weeks": 60},
+        headers=auth_headers,
+    )
+    assert r.status_code == 400
+
+
+def test_copy_403_when_not_member(client, household, auth_headers):
+    r = client.post(
+        "/api/planned-meals/copy",
+        json={"household_id": household.id, "source_start": "2030-01-01", "source_end": "2030-01-07", "target_start": "2030-02-01"},
+        headers=auth_headers,
+    )
+    assert r.status_code == 403
+
+
+# ----- Concurrency -----
+
+
+def test_concurrent_upserts_of_one_slot(client, household, member, auth_headers, db):
+    """Parallel writes to the same day/slot all succeed (no unique-constraint errors) and leave one meal."""
+    slot = MealSlot(household_id=household.id, name="Dinner", position=0)
+    db.add(slot)
+    db.commit()
+    today = _date_str(date.today())
+
+    def put(n: int):
+        return client.post(
+            "/api/planned-meals",
+            json={
+                "household_id": household.id,
+                "meal_date": today,
+                "meal_slot_id": slot.id,
+                "member_id": member.id,
+                "description": f"Dish {n}",
+            },
+            headers=auth_headers,
+        )
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        responses = list(pool.map(put, range(40)))
+    assert [r.status_code for r in responses] == [201] * 40
+    assert len({r.json()["id"] for r in responses}) == 1
+    meals = db.query(PlannedMeal).filter(PlannedMeal.household_id == household.id).all()
+    assert len(meals) == 1 and meals[0].description in {f"Dish {n}" for n in range(40)}
+
+
+def test_swap_never_leaves_a_slot_empty(client, household, member, auth_headers, db):
+    """Readers running alongside repeated swaps always see both meals."""
+    slot = MealSlot(household_id=household.id, name="Lunch", position=0)
+    db.add(slot)
+    db.commit()
+    meals = [
+        PlannedMeal(household_id=household.id, meal_date=date.today() + timedelta(days=i), meal_slot_id=slot.id,
+                    member_id=member.id, description=name)
+        for i, name in enumerate(["Soup", "Salad"])
+    ]
+    db.add_all(meals)
+    db.commit()
+    ids = {"meal_id_a": meals[0].id, "meal_id_b": meals[1].id}
+    done = threading.Event()
+    seen: list[list[str]] = []
+
+    def read():
+        reader = SessionLocal()
+        try:
+            while not done.is_set():
+                rows = reader.query(PlannedMeal.description).filter(PlannedMeal.household_id == household.id).all()
+                seen.append(sorted(r[0] for r in rows))
+                reader.rollback()
+        finally:
+            reader.close()
+
+    readers = [threading.Thread(target=read) for _ in range(2)]
+    for t in readers:
+        t.start()
+    try:
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            responses = list(pool.map(lambda _: client.post("/api/planned-meals/swap", json=ids, headers=auth_headers), range(20)))
+    finally:
+        done.set()
+        for t in readers:
+            t.join()
+    assert [r.status_code for r in responses] == [204] * 20
+    assert seen and all(s == ["Salad", "Soup"] for s in seen)
+    db.expire_all()
+    assert sorted(m.id for m in db.query(PlannedMeal).filter(PlannedMeal.household_id == household.id)) == sorted(ids.values())
@@ -0,0 +1,153 @@
+"""Tests for meal suggestions: the in-memory history index and GET /api/planned-meals/suggestions."""
+
+import uuid
+from datetime import date, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from src.api.main import app
+from src.api.routes.auth import create_access_token
+from src.config import settings
+from src.db.session import async_engine
+from src.models.database import Household, MealSlot, Member, PlannedMeal, User
+from src.services import meal_suggestions
+from src.services.meal_suggestions import MealIndex, Suggestion
+
+MONDAY = date(2030, 1, 7)
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    meal_suggestions.clear()
+    yield
+    meal_suggestions.clear()
+
+
+def _index(*entries) -> MealIndex:
+    return MealIndex(Suggestion(text, count, MONDAY + timedelta(days=day)) for text, count, day in entries)
+
+
+def test_search_matches_the_start_of_any_word():
+    index = _index(("Pesto pasta", 3, 0), ("Pasta bake", 1, 0), ("Soup", 5, 0))
+    assert [s.description for s in index.search("pa")] == ["Pesto pasta", "Pasta bake"]
+    assert [s.description for s in index.search("PESTO P")] == ["Pesto pasta"]
+    assert [s.description for s in index.search("asta")] == []
+    assert [s.description for s in index.search("")] == ["Soup", "Pesto pasta", "Pasta bake"]
+
+
+def test_ties_rank_by_recency_and_limit_applies():
+    index = _index(("Tacos", 2, 1), ("Tagine", 2, 5), ("Tapas", 1, 9))
+    assert [s.description for s in index.search("ta", limit=2)] == ["Tagine", "Tacos"]
+
+
+def test_add_merges_case_and_spacing():
+    index = _index(("Fish pie", 1, 0))
+    index.add("  fish   PIE ", MONDAY + timedelta(days=3))
+    index.add(None, MONDAY)
+    index.add("Curry", MONDAY)
+    assert len(index) == 2
+    [fish] = index.search("fish")
+    assert (fish.count, fish.last_planned) == (2, MONDAY + timedelta(days=3))
+
+
+def test_index_keeps_most_planned_entries(monkeypatch):
+    monkeypatch.setattr(meal_suggestions, "MAX_ENTRIES", 3)
+    index = _index(("A", 5, 0), ("B", 4, 0), ("C", 3, 0), ("D", 1, 0))
+    assert sorted(s.description for s in index.search("")) == ["A", "B", "C"]
+    index.add("E", MONDAY)
+    assert sorted(s.description for s in index.search("")) == ["A", "B", "C"]
+
+
+def test_least_recently_used_household_is_evicted(monkeypatch):
+    monkeypatch.setattr(settings, "MEAL_SUGGESTIONS_HOUSEHOLDS", 2)
+    for household_id in (1, 2):
+        meal_suggestions.store(household_id, MealIndex())
+    assert meal_suggestions.cached_index(1) is not None  # 1 is now the most recently used
+    meal_suggestions.store(3, MealIndex())
+    assert meal_suggestions.cached_index(2) is None
+    assert meal_suggestions.cached_index(1) is not None and meal_suggestions.cached_index(3) is not None
+
+
+def test_stale_index_is_dropped(monkeypatch):
+    meal_suggestions.store(1, MealIndex())
+    monkeypatch.setattr(settings, "MEAL_SUGGESTIONS_TTL_SECONDS", 0)
+    assert meal_suggestions.cached_index(1) is None
+
+
+# ----- API -----
+
+
+@pytest.fixture
+def household(db):
+    uid = uuid.uuid4().hex[:12]
+    user = User(google_sub=f"suggest-{uid}", email=f"suggest-{uid}@example.com", display_name="Suggest User")
+    h = Household(name="Suggestion Household")
+    db.add_all([user, h])
+    db.commit()
+    member = Member(user_id=user.id, household_id=h.id)
+    slot = MealSlot(household_id=h.id, name="Dinner", position=0)
+    db.add_all([member, slot])
+    db.commit()
+    db.add_all([
+        PlannedMeal(household_id=h.id, meal_date=MONDAY + timedelta(days=d), meal_slot_id=slot.id, member_id=member.id, description=text)
+        for d, text in enumerate(["Chili", "Chicken curry", "chili", "Lasagne"])
+    ])
+    db.commit()
+    h.member, h.slot = member, slot
+    h.headers = {"Authorization": f"Bearer {create_access_token(user.id, user.email)}"}
+    return h
+
+
+@pytest.fixture
+def client(db):
+    with TestClient(app) as c:
+        yield c
+
+
+def _suggest(client, household, q) -> tuple[list, list[str]]:
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", record)
+    try:
+        r = client.get("/api/planned-meals/suggestions", params={"household_id": household.id, "q": q}, headers=household.headers)
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", record)
+    assert r.status_code == 200
+    return r.json(), [s for s in statements if "planned_meals" in s]
+
+
+def test_suggestions_endpoint(client, household):
+    data, meal_queries = _suggest(client, household, "ch")
+    assert [(s["description"], s["count"]) for s in data] == [("chili", 2), ("Chicken curry", 1)]
+    assert len(meal_queries) == 1  # the index is built once
+
+    r = client.post(
+        "/api/planned-meals",
+        json={
+            "household_id": household.id,
+            "meal_date": (MONDAY + timedelta(days=10)).isoformat(),
+            "meal_slot_id": household.slot.id,
+            "member_id": household.member.id,
+            "description": "Chicken curry",
+        },
+        headers=household.headers,
+    )
+    assert r.status_code == 201
+    data, meal_queries = _suggest(client, household, "cur")
+    assert [(s["description"], s["count"]) for s in data] == [("Chicken curry", 2)]
+    assert meal_queries == []  # answered from memory, updated by the save
+
+
+def test_suggestions_403_when_not_member(client, household, db):
+    uid = uuid.uuid4().hex[:12]
+    other = User(google_sub=f"suggest-{uid}", email=f"suggest-{uid}@example.com")
+    db.add(other)
+    db.commit()
+    headers = {"Authorization": f"Bearer {create_access_token(other.id, other.email)}"}
+    r = client.get("/api/planned-meals/suggestions", params={"household_id": household.id}, headers=headers)
+    assert r.status_code == 403
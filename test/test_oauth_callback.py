@@ -0,0 +1,78 @@
+"""Tests for GET /api/auth/callback: code exchange with Google, user upsert, one-time code redirect."""
+
+import uuid
+from unittest.mock import patch
+from urllib.parse import parse_qs, urlparse
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+
+from src.api import main
+from src.api.main import app
+from src.api.routes import auth
+from src.config import settings
+from src.models.database import User
+from src.services import google_tokens, token_encryption
+
+_RealAsyncClient = httpx.AsyncClient
+
+
+@pytest.fixture
+def client(db):
+    main._auth_rate_store.clear()
+    with TestClient(app) as c:
+        yield c
+
+
+@pytest.fixture
+def google():
+    """Stand-in for Google's token and userinfo endpoints."""
+    sub = f"cb-{uuid.uuid4().hex[:12]}"
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        if str(request.url) == google_tokens.GOOGLE_TOKEN_URL:
+            return httpx.Response(200, json={"access_token": "new-access", "refresh_token": "new-refresh", "expires_in": 3600})
+        if request.headers.get("Authorization") == "Bearer new-access":
+            return httpx.Response(200, json={"id": sub, "email": f"{sub}@example.com", "name": "Callback User"})
+        return httpx.Response(401)
+
+    async def no_warmup(user_id, access_token):
+        return None
+
+    transport = httpx.MockTransport(handler)
+    with (
+        patch("src.api.routes.auth.httpx.AsyncClient", side_effect=lambda *a, **kw: _RealAsyncClient(transport=transport)),
+        patch("src.api.routes.auth.calendar_list_cache.refresh_in_background", no_warmup),
+        patch.object(settings, "GOOGLE_CLIENT_ID", "client-id"),
+        patch.object(settings, "GOOGLE_CLIENT_SECRET", "client-secret"),
+    ):
+        yield sub, requests
+
+
+def test_callback_exchanges_code_and_creates_user(client, db, google):
+    sub, requests = google
+    client.cookies.set(auth.OAUTH_STATE_COOKIE, "state-1")
+    client.cookies.set(auth.OAUTH_VERIFIER_COOKIE, "verifier-1")
+    r = client.get("/api/auth/callback", params={"code": "auth-code", "state": "state-1"}, follow_redirects=False)
+
+    assert r.status_code in (302, 307)
+    assert parse_qs(urlparse(r.headers["location"]).query)["code"][0] in auth._exchange_codes
+    token_request = parse_qs(requests[0].content.decode())
+    assert token_request["code"] == ["auth-code"]
+    assert token_request["code_verifier"] == ["verifier-1"]
+    assert token_request["grant_type"] == ["authorization_code"]
+    user = db.scalar(select(User).where(User.google_sub == sub))
+    assert token_encryption.decrypt_token(user.access_token) == "new-access"
+    assert token_encryption.decrypt_token(user.refresh_token) == "new-refresh"
+
+
+def test_callback_rejects_state_mismatch(client, google):
+    client.cookies.set(auth.OAUTH_STATE_COOKIE, "state-1")
+    client.cookies.set(auth.OAUTH_VERIFIER_COOKIE, "verifier-1")
+    r = client.get("/api/auth/callback", params={"code": "auth-code", "state": "other"}, follow_redirects=False)
+    assert r.status_code == 400
+    assert google[1] == []
@@ -0,0 +1,149 @@
+"""Tests for push updates: the pub/sub bus, publishing on commit and the household event stream."""
+
+import asyncio
+import json
+import threading
+import time
+import uuid
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.api.main import app
+from src.api.routes import households as household_routes
+from src.api.routes.auth import create_access_token
+from src.config import settings
+from src.models.database import Household, Member, TodoItem, User
+from src.services import pubsub
+
+
+@pytest.fixture
+def household(db):
+    uid = uuid.uuid4().hex[:12]
+    user = User(google_sub=f"push-{uid}", email=f"push-{uid}@example.com", display_name="Push User")
+    h = Household(name="Push Household")
+    db.add_all([user, h])
+    db.commit()
+    db.add(Member(user_id=user.id, household_id=h.id))
+    db.commit()
+    return h
+
+
+@pytest.fixture
+def client(db):
+    with TestClient(app) as c:
+        yield c
+
+
+def test_commit_publishes_new_seq_to_household_subscribers_only(db, household):
+    other = Household(name="Quiet Household")
+    db.add(other)
+    db.commit()
+
+    def write(commit: bool):
+        db.add(TodoItem(household_id=household.id, content="Pushed", rank="i"))
+        db.commit() if commit else db.rollback()
+
+    async def run():
+        subscription = pubsub.bus.subscribe(household.id)
+        quiet = pubsub.bus.subscribe(other.id)
+        try:
+            await asyncio.to_thread(write, False)  # rolled back: nothing published
+            await asyncio.to_thread(write, True)  # committed from a worker thread, as in sync routes
+            message = await asyncio.wait_for(subscription.get(), 1)
+            await asyncio.sleep(0.01)
+            return message, subscription._queue.qsize(), quiet._queue.qsize()
+        finally:
+            pubsub.bus.unsubscribe(subscription)
+            pubsub.bus.unsubscribe(quiet)
+
+    message, pending, quiet_pending = asyncio.run(run())
+    db.refresh(household)
+    assert message == {"seq": household.change_seq}
+    assert pending == 0 and quiet_pending == 0
+    assert pubsub.bus.subscriber_count(household.id) == 0
+
+
+def test_slow_subscriber_keeps_only_the_newest_messages():
+    bus = pubsub.LocalBackend(queue_size=3)
+
+    async def run():
+        slow, other = bus.subscribe(1), bus.subscribe(1)
+        for seq in range(1, 11):
+            bus.publish(1, {"seq": seq})
+        await asyncio.sleep(0)  # deliveries are scheduled on the loop
+        return [(await s.get())["seq"] for s in (slow, slow, slow)], slow.dropped, other._queue.qsize()
+
+    received, dropped, other_pending = asyncio.run(run())
+    assert received == [8, 9, 10] and dropped == 7
+    assert other_pending == 3
+
+
+def test_event_stream_sends_ready_changes_and_keep_alives(monkeypatch):
+    monkeypatch.setattr(settings, "PUSH_HEARTBEAT_SECONDS", 0.05)
+
+    async def run():
+        stream = household_routes._event_stream(424242)
+        ready = await stream.__anext__()
+        pubsub.bus.publish(424242, {"seq": 7})
+        change = await stream.__anext__()
+        keep_alive = await stream.__anext__()
+        subscribed = pubsub.bus.subscriber_count(424242)
+        await stream.aclose()
+        return ready, change, keep_alive, subscribed
+
+    ready, change, keep_alive, subscribed = asyncio.run(run())
+    assert "event: ready" in ready
+    assert change == 'id: 7\nevent: change\ndata: {"seq": 7}\n\n'
+    assert keep_alive.startswith(":")
+    assert subscribed == 1 and pubsub.bus.subscriber_count(424242) == 0
+
+
+def test_event_stream_requires_membership(client, db, household):
+    outsider = User(google_sub=f"push-{uuid.uuid4().hex[:12]}", email=f"push-{uuid.uuid4().hex[:12]}@example.com")
+    db.add(outsider)
+    db.commit()
+    headers = {"Authorization": f"Bearer {create_access_token(outsider.id, outsider.email)}"}
+    assert client.get(f"/api/households/{household.id}/events", headers=headers).status_code == 404
+    assert client.get(f"/api/households/{household.id}/events").status_code == 401
+
+
+def test_unknown_backend_is_rejected():
+    assert isinstance(pubsub.create_backend("local"), pubsub.LocalBackend)
+    with pytest.raises(ValueError):
+        pubsub.create_backend("carrier-pigeon")
+
+
+def test_postgres_publish_does_not_wait_for_the_database(monkeypatch):
+    backend = pubsub.PostgresBackend("postgresql://unused")
+    database_free = threading.Event()
+    sent = []
+
+    class Cursor:
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+        def execute(self, statement, params):
+            database_free.wait(5)  # a slow round trip
+            sent.append(json.loads(params[1]))
+
+    class Connection:
+        closed = False
+
+        def cursor(self):
+            return Cursor()
+
+        def close(self):
+            self.closed = True
+
+    monkeypatch.setattr(backend, "_connect", Connection)
+    started = time.monotonic()
+    for seq in (1, 2, 3):
+        backend.publish(7, {"seq": seq})
+    assert time.monotonic() - started < 1
+    database_free.set()
+    backend.stop()
+    assert sent == [{"household_id": 7, "message": {"seq": seq}} for seq in (1, 2, 3)]
@@ -0,0 +1,158 @@
+"""Query-plan regression tests: the hot queries must be served by indexes, never by full table scans.
+
+Runs a tour of the API, records every SELECT/UPDATE/DELETE it sends, and EXPLAINs each one. On SQLite
+(the default test database) a plan step "SCAN <table>" is a full scan of the table or of one of its
+indexes; on PostgreSQL (TEST_DATABASE_URL) the plans are taken with enable_seqscan off, so a
+"Seq Scan" means no index can serve the query. Scanning a partial index is allowed: it reads only the
+rows of its predicate (checked to-do items, tombstones), which is what the sweeper jobs want.
+"""
+
+import re
+import uuid
+from datetime import date, datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from src.api.main import app
+from src.api.routes.auth import create_access_token
+from src.db.session import async_engine, engine
+from src.models.database import Base, Household, Member, TodoItem, User
+from src.services import change_log, todo_retention
+
+TABLES = set(Base.metadata.tables)
+PARTIAL_INDEXES = {
+    index.name
+    for table in Base.metadata.tables.values()
+    for index in table.indexes
+    if index.dialect_options["sqlite"]["where"] is not None
+}
+
+
+@pytest.fixture
+def client(db):
+    with TestClient(app) as c:
+        yield c
+
+
+class Recorder:
+    """Collects the distinct statements (with their parameters) sent to the API and job engines."""
+
+    def __init__(self):
+        self.statements: dict[str, object] = {}
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        if not executemany and statement.lstrip().upper().startswith(("SELECT", "UPDATE", "DELETE")):
+            self.statements.setdefault(statement, parameters)
+
+    def __enter__(self):
+        for target in (async_engine.sync_engine, engine):
+            event.listen(target, "before_cursor_execute", self)
+        return self
+
+    def __exit__(self, *exc):
+        for target in (async_engine.sync_engine, engine):
+            event.remove(target, "before_cursor_execute", self)
+
+
+def _full_scans(statement: str, parameters) -> list[str]:
+    """Tables the statement reads by full scan."""
+    raw = engine.raw_connection()
+    try:
+        cursor = raw.cursor()
+        if engine.dialect.name == "postgresql":
+            cursor.execute("SET enable_seqscan = off")
+            cursor.execute("EXPLAIN " + statement, parameters)
+            plan = [row[0] for row in cursor.fetchall()]
+            cursor.execute("RESET enable_seqscan")
+            scanned = [m.group(1) for line in plan if (m := re.search(r"Seq Scan on (\w+)", line))]
+        else:
+            cursor.execute("EXPLAIN QUERY PLAN " + statement, parameters)
+            plan = [row[3] for row in cursor.fetchall()]
+            scanned = [
+                m.group(1) for line in plan
+                if (m := re.match(r"SCAN (\w+)(?: USING (?:COVERING )?INDEX (\w+))?", line))
+                and m.group(2) not in PARTIAL_INDEXES
+            ]
+    finally:
+        raw.rollback()
+        raw.close()
+    return [table for table in scanned if table in TABLES]
+
+
+def _assert_indexed(recorder: Recorder) -> None:
+    assert recorder.statements
+    failures = {}
+    for statement, parameters in recorder.statements.items():
+        scans = _full_scans(statement, parameters)
+        if scans:
+            failures[" ".join(statement.split())] = scans
+    assert not failures, "full table scans:\n" + "\n".join(f"{t}: {s}" for s, t in failures.items())
+
+
+def _headers(user: User) -> dict:
+    return {"Authorization": f"Bearer {create_access_token(user.id, user.email)}"}
+
+
+def test_api_tour_uses_indexes_only(client, db):
+    uid = uuid.uuid4().hex[:12]
+    owner = User(google_sub=f"plan-{uid}", email=f"plan-{uid}@example.com", display_name="Owner")
+    guest = User(google_sub=f"plan-g-{uid}", email=f"plan-g-{uid}@example.com", display_name="Guest")
+    household = Household(name="Plan Household")
+    db.add_all([owner, guest, household])
+    db.commit()
+    db.add_all([Member(user_id=owner.id, household_id=household.id, role="owner"), Member(user_id=guest.id, household_id=household.id)])
+    db.commit()
+    headers, hid = _headers(owner), household.id
+    owner_member = db.query(Member).filter(Member.user_id == owner.id).one()
+    guest_member = db.query(Member).filter(Member.user_id == guest.id).one()
+    today = date.today().isoformat()
+
+    with Recorder() as recorder:
+        client.get("/api/households", headers=headers)
+        client.get("/api/members", params={"household_id": hid}, headers=headers)
+        client.patch(f"/api/members/{owner_member.id}", json={"event_color": "#123456"}, headers=headers)
+        client.get("/api/calendars", params={"household_id": hid}, headers=headers)
+        client.get("/api/calendars", params={"member_id": owner_member.id}, headers=headers)
+
+        todo = client.post("/api/todos", json={"household_id": hid, "content": "Task"}, headers=headers).json()
+        client.post("/api/todos", json={"household_id": hid, "content": "Other"}, headers=headers)
+        client.patch(f"/api/todos/{todo['id']}", json={"is_checked": True}, headers=headers)
+        client.get("/api/todos", params={"household_id": hid}, headers=headers)
+
+        gl = client.get("/api/grocery-lists", params={"household_id": hid}, headers=headers).json()[0]
+        item = client.post("/api/grocery-list-items", json={"grocery_list_id": gl["id"], "content": "Milk"}, headers=headers).json()
+        client.post("/api/grocery-list-items", json={"grocery_list_id": gl["id"], "content": "Eggs"}, headers=headers)
+        client.patch(f"/api/grocery-list-items/{item['id']}", json={"content": "Oat milk"}, headers=headers)
+        client.get("/api/grocery-list-items", params={"grocery_list_id": gl["id"]}, headers=headers)
+
+        slot = client.get("/api/meal-slots", params={"household_id": hid}, headers=headers).json()[0]
+        meal = {"household_id": hid, "meal_date": today, "meal_slot_id": slot["id"], "member_id": owner_member.id, "description": "Soup"}
+        client.post("/api/planned-meals", json=meal, headers=headers)
+        client.get("/api/planned-meals", params={"household_id": hid, "start_date": today, "end_date": today}, headers=headers)
+
+        invite = {"household_id": hid, "email": f"friend-{uid}@example.com", "invited_by_member_id": owner_member.id}
+        client.post("/api/invitations", json=invite, headers=headers)
+        client.post("/api/invitations", json=invite, headers=headers)  # duplicate check
+        client.get("/api/invitations", params={"household_id": hid, "status": "pending"}, headers=headers)
+
+        client.get(f"/api/households/{hid}/snapshot", headers=headers)
+        client.get(f"/api/households/{hid}/changes", params={"since": 0}, headers=headers)
+        client.delete(f"/api/members/{guest_member.id}", headers=headers)
+
+    _assert_indexed(recorder)
+
+
+def test_background_jobs_use_indexes_only(db):
+    household = Household(name="Plan Jobs Household")
+    db.add(household)
+    db.commit()
+    db.add(TodoItem(household_id=household.id, content="Old", rank="i", is_checked=True, checked_at=datetime.utcnow() - timedelta(days=30)))
+    db.commit()
+
+    with Recorder() as recorder:
+        todo_retention.purge_expired_todos(db)
+        change_log.prune_tombstones(db, now=datetime.utcnow() + timedelta(days=31))
+
+    _assert_indexed(recorder)
@@ -0,0 +1,186 @@
+"""Tests for lexicographic rank keys: key generation, single-row moves and the rebalance job."""
+
+import random
+import uuid
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from src.api.main import app
+from src.api.routes.auth import create_access_token
+from src.db.session import async_engine
+from src.models.database import GroceryList, GroceryListItem, Household, Member, TodoItem, User
+from src.services import ranking
+
+
+@pytest.fixture
+def user(db):
+    uid = uuid.uuid4().hex[:12]
+    u = User(google_sub=f"rank-{uid}", email=f"rank-{uid}@example.com", display_name="Rank User")
+    db.add(u)
+    db.commit()
+    db.refresh(u)
+    return u
+
+
+@pytest.fixture
+def household(db, user):
+    h = Household(name="Rank Household")
+    db.add(h)
+    db.commit()
+    db.add(Member(user_id=user.id, household_id=h.id))
+    db.commit()
+    db.refresh(h)
+    return h
+
+
+@pytest.fixture
+def auth_headers(user):
+    return {"Authorization": f"Bearer {create_access_token(user.id, user.email)}"}
+
+
+@pytest.fixture
+def client(db):
+    with TestClient(app) as c:
+        yield c
+
+
+def test_rank_between_random_inserts_keep_order():
+    rng = random.Random(7)
+    keys = []
+    for _ in range(500):
+        i = rng.randint(0, len(keys))
+        key = ranking.rank_between(keys[i - 1] if i else None, keys[i] if i < len(keys) else None)
+        assert not key.endswith("0")
+        keys.insert(i, key)
+    assert keys == sorted(keys)
+    assert len(set(keys)) == len(keys)
+    with pytest.raises(ranking.RankConflict):
+        ranking.rank_between("b", "a")
+
+
+def test_evenly_spaced_keys_are_short_and_ordered():
+    for count in (1, 35, 36, 1000):
+        keys = ranking.evenly_spaced(count)
+        assert keys == sorted(keys) and len(set(keys)) == count
+        assert all(k and not k.endswith("0") for k in keys)
+    assert max(len(k) for k in ranking.evenly_spaced(1000)) == 2
+
+
+def test_spaced_between_fits_keys_in_the_gap():
+    for before, after, count in (("i", None, 100), ("z", None, 5), ("a", "b", 40), (None, "01", 3), ("zzz", None, 1)):
+        keys = ranking.spaced_between(before, after, count)
+        assert keys == sorted(keys) and len(set(keys)) == count
+        assert all(not k.endswith("0") for k in keys)
+        assert (before is None or before < keys[0]) and (after is None or keys[-1] < after)
+    with pytest.raises(ranking.RankConflict):
+        ranking.spaced_between("b", "a", 1)
+
+
+def test_appended_keys_stay_short():
+    keys, last = [], None
+    for _ in range(1000):
+        last = ranking.ranks_after(last, 1)[0]
+        keys.append(last)
+    assert keys == sorted(keys) and len(set(keys)) == len(keys)
+    assert max(len(k) for k in keys) == ranking.APPEND_WIDTH
+    assert ranking.ranks_after("i", 3) == ["i01", "i02", "i03"]
+    # Only at the end of the key space do they grow
+    keys = ranking.ranks_after("zzy", 3)
+    assert keys == sorted(keys) and keys[0] > "zzy" and len(keys[-1]) == 4
+
+
+def test_move_between_tied_neighbours_respaces(client, db, household, auth_headers):
+    ids = []
+    for content in ("A", "B", "C"):
+        r = client.post("/api/todos", json={"household_id": household.id, "content": content}, headers=auth_headers)
+        ids.append(r.json()["id"])
+    # Two items appended at the same moment get the same key
+    for item in db.query(TodoItem).filter(TodoItem.id.in_(ids[:2])):
+        item.rank = "k"
+    db.commit()
+    r = client.patch(f"/api/todos/{ids[2]}", json={"after_id": ids[0], "before_id": ids[1]}, headers=auth_headers)
+    assert r.status_code == 200
+    order = [t["content"] for t in client.get("/api/todos", params={"household_id": household.id}, headers=auth_headers).json()]
+    assert order == ["A", "C", "B"]
+
+
+def test_move_is_a_single_row_update(client, db, household, auth_headers):
+    for i in range(30):
+        r = client.post("/api/todos", json={"household_id": household.id, "content": f"Task {i}"}, headers=auth_headers)
+        assert r.status_code == 201
+    items = client.get("/api/todos", params={"household_id": household.id}, headers=auth_headers).json()
+    assert [t["content"] for t in items] == [f"Task {i}" for i in range(30)]
+    moved, after, before = items[25]["id"], items[2]["id"], items[3]["id"]
+
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", record)
+    try:
+        r = client.patch(f"/api/todos/{moved}", json={"after_id": after, "before_id": before}, headers=auth_headers)
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", record)
+    assert r.status_code == 200
+    # One row update, plus the household's change log entry and list revision (seq bump and upserts)
+    writes = [s.lstrip().upper() for s in statements if not s.lstrip().upper().startswith("SELECT")]
+    assert len(writes) == 4 and writes[0].startswith("UPDATE TODO_ITEMS")
+    assert writes[1].startswith("UPDATE HOUSEHOLDS") and writes[2].startswith("INSERT INTO HOUSEHOLD_CHANGES")
+    assert writes[3].startswith("INSERT INTO HOUSEHOLD_REVISIONS")
+
+    order = [t["content"] for t in client.get(
+        "/api/todos", params={"household_id": household.id}, headers=auth_headers
+    ).json()]
+    assert order[:5] == ["Task 0", "Task 1", "Task 2", "Task 25", "Task 3"]
+
+    # One neighbour is enough: to the top, then to the end
+    r = client.patch(f"/api/todos/{moved}", json={"before_id": items[0]["id"]}, headers=auth_headers)
+    assert r.json()["rank"] < items[0]["rank"]
+    r = client.patch(f"/api/todos/{moved}", json={"after_id": items[29]["id"]}, headers=auth_headers)
+    assert r.json()["rank"] > items[29]["rank"]
+
+    r = client.patch(f"/api/todos/{moved}", json={"after_id": before, "before_id": after}, headers=auth_headers)
+    assert r.status_code == 400
+
+
+def test_grocery_move_rejects_neighbour_from_another_list(client, db, household, auth_headers):
+    lists = [GroceryList(household_id=household.id, name=name) for name in ("Food", "Hardware")]
+    db.add_all(lists)
+    db.commit()
+    ids = []
+    for gl in lists:
+        r = client.post("/api/grocery-list-items", json={"grocery_list_id": gl.id, "content": gl.name}, headers=auth_headers)
+        ids.append(r.json()["id"])
+    r = client.post("/api/grocery-list-items", json={"grocery_list_id": lists[0].id, "content": "Milk"}, headers=auth_headers)
+    milk = r.json()["id"]
+
+    r = client.patch(f"/api/grocery-list-items/{milk}", json={"after_id": ids[1]}, headers=auth_headers)
+    assert r.status_code == 400
+    r = client.patch(f"/api/grocery-list-items/{milk}", json={"before_id": ids[0]}, headers=auth_headers)
+    assert r.status_code == 200
+    items = client.get("/api/grocery-list-items", params={"grocery_list_id": lists[0].id}, headers=auth_headers).json()
+    assert [i["content"] for i in items] == ["Milk", "Food"]
+
+
+def test_rebalance_shortens_long_keys_and_keeps_order(db, household):
+    gl = GroceryList(household_id=household.id, name="Rebalance")
+    db.add(gl)
+    db.commit()
+    # Always inserting at the top makes keys grow
+    rank = None
+    for i in range(100):
+        rank = ranking.rank_between(None, rank)
+        db.add(GroceryListItem(grocery_list_id=gl.id, content=f"Item {i}", rank=rank))
+    db.commit()
+    items = db.query(GroceryListItem).filter(GroceryListItem.grocery_list_id == gl.id)
+    before = [i.content for i in items.order_by(GroceryListItem.rank)]
+    assert max(len(i.rank) for i in items) > 10
+
+    assert ranking.rebalance_long_ranks(db, max_length=10) >= 1
+    db.expire_all()
+    assert [i.content for i in items.order_by(GroceryListItem.rank)] == before
+    assert max(len(i.rank) for i in items) <= 2
+    assert ranking.rebalance_long_ranks(db, max_length=10) == 0
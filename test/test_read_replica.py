@@ -0,0 +1,122 @@
+"""Tests for read-replica routing: GET requests read from the replica, writes and read-your-writes from the primary.
+
+The replica is a second SQLite file: a copy of the test database taken after seeding, which then lags
+behind everything written to the primary.
+"""
+
+import asyncio
+import sqlite3
+import uuid
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.api.main import app
+from src.api.routes import auth
+from src.api.routes.auth import create_access_token
+from src.config import settings
+from src.db import replica, session
+from src.models.database import GroceryList, Household, Member, TodoItem, User
+
+pytestmark = pytest.mark.skipif(session.engine.dialect.name != "sqlite", reason="SQLite files as primary and replica")
+
+
+def _user(db) -> User:
+    uid = uuid.uuid4().hex[:12]
+    u = User(google_sub=f"replica-{uid}", email=f"replica-{uid}@example.com", display_name="Replica User")
+    db.add(u)
+    return u
+
+
+@pytest.fixture
+def household(db):
+    h = Household(name="Replica Household")
+    users = [_user(db), _user(db)]
+    db.add(h)
+    db.flush()
+    db.add_all([Member(user_id=u.id, household_id=h.id) for u in users])
+    db.add(TodoItem(household_id=h.id, content="Seeded", rank="n"))
+    db.commit()
+    h.headers = [{"Authorization": f"Bearer {create_access_token(u.id, u.email)}"} for u in users]
+    return h
+
+
+@pytest.fixture
+def replica_db(tmp_path, monkeypatch, household):
+    path = tmp_path / "replica.db"
+    primary = sqlite3.connect(session.engine.url.database)
+    copy = sqlite3.connect(path)
+    primary.backup(copy)
+    primary.close()
+    copy.close()
+    engine = session.create_async_db_engine(f"sqlite:///{path}")
+    monkeypatch.setattr(session, "replica_engine", engine)
+    replica.recent_writers.clear()
+    yield engine
+    replica.recent_writers.clear()
+    asyncio.run(engine.dispose())
+
+
+@pytest.fixture
+def client(db):
+    with TestClient(app) as c:
+        yield c
+
+
+def _todos(client, household, headers) -> list[str]:
+    r = client.get("/api/todos", params={"household_id": household.id}, headers=headers)
+    assert r.status_code == 200
+    return [t["content"] for t in r.json()]
+
+
+def test_reads_go_to_replica(client, db, household, replica_db):
+    db.add(TodoItem(household_id=household.id, content="Primary only", rank="t"))
+    db.commit()
+    assert _todos(client, household, household.headers[0]) == ["Seeded"]
+
+
+def test_read_your_writes(client, household, replica_db):
+    writer, other = household.headers
+    r = client.post("/api/todos", json={"household_id": household.id, "content": "Mine"}, headers=writer)
+    assert r.status_code == 201
+    # The writer reads from the primary for a while; other clients keep reading from the replica
+    assert _todos(client, household, writer) == ["Seeded", "Mine"]
+    assert _todos(client, household, other) == ["Seeded"]
+    replica.recent_writers.clear()  # window over
+    assert _todos(client, household, writer) == ["Seeded"]
+
+
+def test_read_your_writes_with_session_cookie(client, household, replica_db):
+    # The web app signs in with the HttpOnly cookie and sends no Authorization header
+    writer, other = household.headers
+    client.cookies.set(auth.COOKIE_NAME, writer["Authorization"].removeprefix("Bearer "))
+    r = client.post("/api/todos", json={"household_id": household.id, "content": "Mine"})
+    assert r.status_code == 201
+    assert _todos(client, household, {}) == ["Seeded", "Mine"]
+    client.cookies.clear()
+    assert _todos(client, household, writer) == ["Seeded", "Mine"]  # same user, bearer token
+    assert _todos(client, household, other) == ["Seeded"]
+
+
+def test_window_length_is_configurable(client, household, replica_db, monkeypatch):
+    monkeypatch.setattr(settings, "READ_YOUR_WRITES_SECONDS", 0)
+    writer = household.headers[0]
+    client.post("/api/todos", json={"household_id": household.id, "content": "Mine"}, headers=writer)
+    assert _todos(client, household, writer) == ["Seeded"]
+
+
+def test_get_that_writes_checks_primary_first(client, db, household, replica_db):
+    # Defaults created on the primary after the replica copy: a GET must not create them a second time
+    db.add(GroceryList(household_id=household.id, name="Groceries"))
+    db.commit()
+    r = client.get("/api/grocery-lists", params={"household_id": household.id}, headers=household.headers[0])
+    assert r.status_code == 200 and len(r.json()) == 1
+    db.expire_all()
+    assert db.query(GroceryList).filter(GroceryList.household_id == household.id).count() == 1
+
+
+def test_no_replica_reads_primary(client, db, household):
+    assert session.replica_engine is None
+    db.add(TodoItem(household_id=household.id, content="Primary only", rank="t"))
+    db.commit()
+    assert _todos(client, household, household.headers[0]) == ["Seeded", "Primary only"]
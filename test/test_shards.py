@@ -0,0 +1,168 @@
+"""Tests for household sharding: placement, id blocks, request routing and fan-out across shards.
+
+Shard 0 is the test database; shards 1 and 2 are temporary SQLite files set up like DATABASE_SHARD_URLS.
+"""
+
+import asyncio
+import uuid
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import func, select
+
+from src.api.main import app
+from src.api.routes.auth import create_access_token
+from src.db import session, shards, write_queue
+from src.models.database import Household, Invitation, Member, TodoItem, User
+
+pytestmark = pytest.mark.skipif(session.engine.dialect.name != "sqlite", reason="SQLite files as shards")
+
+
+@pytest.fixture
+def sharded(tmp_path, monkeypatch, db_engine):
+    engines, async_engines = [session.engine], [session.async_engine]
+    for index in (1, 2):
+        url = f"sqlite:///{tmp_path / f'shard{index}.db'}"
+        engines.append(session.create_db_engine(url))
+        async_engines.append(session.create_async_db_engine(url))
+        shards.init_shard(engines[index], index, users_from=session.engine)
+    monkeypatch.setattr(session, "shard_engines", engines)
+    monkeypatch.setattr(session, "async_shard_engines", async_engines)
+    yield engines
+    for shard_engine, async_shard_engine in zip(engines[1:], async_engines[1:]):
+        shard_engine.dispose()
+        asyncio.run(async_shard_engine.dispose())
+
+
+@pytest.fixture
+def user(db, sharded):
+    uid = uuid.uuid4().hex[:12]
+    u = User(google_sub=f"shard-{uid}", email=f"shard-{uid}@example.com", display_name="Shard User")
+    db.add(u)
+    db.commit()
+    db.refresh(u)
+    session.copy_user_sync(u)
+    u.headers = {"Authorization": f"Bearer {create_access_token(u.id, u.email)}"}
+    return u
+
+
+@pytest.fixture
+def client(db):
+    with TestClient(app) as c:
+        yield c
+
+
+def _household_counts(engines) -> list[int]:
+    counts = []
+    for shard_engine in engines:
+        with session.SessionLocal(bind=shard_engine) as db:
+            counts.append(db.scalar(select(func.count()).select_from(Household)))
+    return counts
+
+
+def _create_household(client, user, name: str) -> dict:
+    r = client.post("/api/households", json={"name": name}, headers=user.headers)
+    assert r.status_code == 201
+    h = r.json()
+    r = client.post("/api/members", json={"household_id": h["id"], "user_id": user.id}, headers=user.headers)
+    assert r.status_code == 201
+    return h
+
+
+def test_new_households_go_to_the_emptiest_shard(client, user, sharded):
+    before = _household_counts(sharded)
+    h = _create_household(client, user, "Placed")
+    after = _household_counts(sharded)
+    shard = session.shard_index(h["id"])
+    assert before[shard] == min(before)
+    assert after[shard] == before[shard] + 1
+
+
+def test_ids_come_from_the_shard_block(sharded):
+    for index in (1, 2):
+        with session.SessionLocal(bind=sharded[index]) as db:
+            h = Household(name="Block")
+            db.add(h)
+            db.commit()
+            assert shards.shard_for_id(h.id) == index
+            assert h.id > index * shards.SHARD_ID_BLOCK
+
+
+def test_requests_are_routed_by_household_id(client, user, sharded):
+    homes = [_create_household(client, user, f"Home {i}") for i in range(3)]
+    # Shard 0 already holds the other tests' households, so new ones land on the empty shards
+    assert {session.shard_index(h["id"]) for h in homes} == {1, 2}
+    for h in homes:
+        r = client.post("/api/todos", json={"household_id": h["id"], "content": h["name"]}, headers=user.headers)
+        assert r.status_code == 201
+        assert session.shard_index(r.json()["id"]) == session.shard_index(h["id"])
+        r = client.get("/api/todos", params={"household_id": h["id"]}, headers=user.headers)
+        assert [t["content"] for t in r.json()] == [h["name"]]
+    with session.shard_session(homes[1]["id"]) as db:
+        assert db.scalar(select(TodoItem.content).where(TodoItem.household_id == homes[1]["id"])) == "Home 1"
+
+
+def test_write_queue_writes_on_the_todos_shard(client, user, sharded, monkeypatch):
+    writers = [write_queue.create_queue(str(shard_engine.url), force=True) for shard_engine in sharded]
+    monkeypatch.setattr(write_queue, "writers", writers)
+    try:
+        home = _create_household(client, user, "Queued")
+        shard = session.shard_index(home["id"])
+        assert shard != 0
+        todo = client.post("/api/todos", json={"household_id": home["id"], "content": "Queued"}, headers=user.headers).json()
+        r = client.patch(f"/api/todos/{todo['id']}", json={"is_checked": True}, headers=user.headers)
+        assert r.status_code == 200 and r.json()["is_checked"]
+        assert [writer.batches for writer in writers] == [1 if index == shard else 0 for index in range(len(writers))]
+        with session.shard_session(home["id"]) as db:
+            assert db.get(TodoItem, todo["id"]).is_checked
+    finally:
+        for writer in writers:
+            writer.stop()
+
+
+def test_user_level_lists_span_shards(client, user, sharded):
+    homes = [_create_household(client, user, f"Home {i}") for i in range(3)]
+    r = client.get("/api/households", headers=user.headers)
+    assert r.status_code == 200
+    assert sorted(h["id"] for h in r.json()) == sorted(h["id"] for h in homes)
+    r = client.get("/api/members", headers=user.headers)
+    assert sorted(m["household_id"] for m in r.json()) == sorted(h["id"] for h in homes)
+    etag = r.headers["etag"]
+    assert client.get("/api/members", headers={**user.headers, "If-None-Match": etag}).status_code == 304
+
+
+def test_invitation_token_is_found_on_its_shard(client, db, user, sharded):
+    homes = [_create_household(client, user, f"Home {i}") for i in range(3)]
+    home = next(h for h in homes if session.shard_index(h["id"]) == 2)
+    with session.shard_session(home["id"]) as shard_db:
+        inviter = shard_db.scalar(select(Member).where(Member.household_id == home["id"]))
+        shard_db.add(
+            Invitation(
+                household_id=home["id"], email="guest@example.com", invited_by_member_id=inviter.id, token="shard-token"
+            )
+        )
+        shard_db.commit()
+    r = client.get("/api/invitations/by-token/shard-token")
+    assert r.status_code == 200 and r.json()["household_id"] == home["id"]
+
+    uid = uuid.uuid4().hex[:12]
+    guest = User(google_sub=f"guest-{uid}", email=f"guest-{uid}@example.com", display_name="Guest")
+    db.add(guest)
+    db.commit()
+    session.copy_user_sync(guest)
+    headers = {"Authorization": f"Bearer {create_access_token(guest.id, guest.email)}"}
+    r = client.post("/api/invitations/accept", json={"token": "shard-token", "user_id": guest.id}, headers=headers)
+    assert r.status_code == 200 and r.json()["status"] == "accepted"
+    r = client.get("/api/households", headers=headers)
+    assert [h["id"] for h in r.json()] == [home["id"]]
+
+
+def test_each_shard_runs_job_on_every_shard(sharded):
+    seen = []
+
+    async def job():
+        with session.SessionLocal() as db:
+            seen.append(db.get_bind().url.database)
+
+    asyncio.run(session.each_shard(job)())
+    assert seen == [shard_engine.url.database for shard_engine in sharded]
@@ -0,0 +1,114 @@
+"""Tests for the SQLite profile: connection pragmas, enforced foreign keys and the single-writer queue."""
+
+import threading
+import uuid
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import delete, func, select
+
+from src.api.main import app
+from src.api.routes.auth import create_access_token
+from src.db import write_queue
+from src.db.session import engine
+from src.models.database import Household, Member, TodoItem, User
+
+pytestmark = pytest.mark.skipif(engine.dialect.name != "sqlite", reason="SQLite profile only")
+
+
+@pytest.fixture
+def household(db):
+    uid = uuid.uuid4().hex[:12]
+    user = User(google_sub=f"lite-{uid}", email=f"lite-{uid}@example.com", display_name="Lite User")
+    h = Household(name="Lite Household")
+    db.add_all([user, h])
+    db.commit()
+    db.add(Member(user_id=user.id, household_id=h.id))
+    db.commit()
+    return h
+
+
+@pytest.fixture
+def writer():
+    queue = write_queue.create_queue(force=True)
+    yield queue
+    queue.stop()
+
+
+@pytest.fixture
+def client(db):
+    with TestClient(app) as c:
+        yield c
+
+
+def test_connections_get_the_profile(db_engine):
+    with engine.connect() as conn:
+        pragma = lambda name: conn.exec_driver_sql(f"PRAGMA {name}").scalar()  # noqa: E731
+        assert pragma("journal_mode") == "wal"
+        assert pragma("foreign_keys") == 1
+        assert pragma("busy_timeout") == 5000
+        assert pragma("synchronous") == 1  # NORMAL
+
+
+def test_on_delete_cascade_fires(db, household):
+    db.add(TodoItem(household_id=household.id, content="Orphan?", rank="i"))
+    db.commit()
+    db.execute(delete(Household).where(Household.id == household.id))  # Core delete: no ORM cascade
+    db.commit()
+    assert db.scalar(select(func.count()).select_from(TodoItem).where(TodoItem.household_id == household.id)) == 0
+
+
+def test_writer_batches_queued_jobs_and_isolates_failures(db, household, writer):
+    running, release = threading.Event(), threading.Event()
+
+    def blocker(session):
+        running.set()
+        release.wait(5)
+        return "first"
+
+    def add(content):
+        def job(session):
+            item = TodoItem(household_id=household.id, content=content, rank="i")
+            session.add(item)
+            session.flush()
+            return item.id
+
+        return job
+
+    def broken(session):
+        session.add(TodoItem(household_id=household.id, content="Broken", rank="i"))
+        raise ValueError("bad job")
+
+    first = writer.submit(blocker)
+    assert running.wait(5)
+    futures = [writer.submit(add(f"Queued {i}")) for i in range(10)]
+    failed = writer.submit(broken)
+    last = writer.submit(add("After the failure"))
+    release.set()
+
+    assert first.result(5) == "first"
+    ids = [f.result(5) for f in futures] + [last.result(5)]
+    with pytest.raises(ValueError):
+        failed.result(5)
+    # The blocker ran alone; everything queued behind it shared one transaction
+    assert writer.batches == 2
+    contents = db.scalars(select(TodoItem.content).where(TodoItem.id.in_(ids))).all()
+    assert sorted(contents) == sorted([f"Queued {i}" for i in range(10)] + ["After the failure"])
+    assert db.scalar(select(func.count()).select_from(TodoItem).where(TodoItem.content == "Broken", TodoItem.household_id == household.id)) == 0
+    # The change log hooks run on the writer's sessions too
+    db.refresh(household)
+    assert household.change_seq >= 1
+
+
+def test_todo_update_goes_through_the_writer(client, db, household, writer, monkeypatch):
+    monkeypatch.setattr(write_queue, "writers", [writer])
+    member = db.query(Member).filter(Member.household_id == household.id).one()
+    headers = {"Authorization": f"Bearer {create_access_token(member.user_id, member.user.email)}"}
+    todo = client.post("/api/todos", json={"household_id": household.id, "content": "Check me"}, headers=headers).json()
+
+    r = client.patch(f"/api/todos/{todo['id']}", json={"is_checked": True}, headers=headers)
+    assert r.status_code == 200 and r.json()["is_checked"] and r.json()["checked_at"]
+    assert writer.batches == 1
+    assert client.patch("/api/todos/999999999", json={"is_checked": True}, headers=headers).status_code == 404
+    r = client.patch(f"/api/todos/{todo['id']}", json={"after_id": 999999999}, headers=headers)
+    assert r.status_code == 400 and writer.batches == 2
@@ -1,14 +1,15 @@
 """Tests for household to-do list API and model."""
 
 import uuid
+from datetime import datetime, timedelta
 
 import pytest
 from fastapi.testclient import TestClient
 
 from src.api.main import app
 from src.api.routes.auth import create_access_token
-from src.db.session import get_db
 from src.models.database import Household, Member, TodoItem, User
+from src.services import todo_retention
 
 
 @pytest.fixture
@@ -52,13 +53,8 @@ def auth_headers(user):
 
 @pytest.fixture
 def client(db):
-    def override_get_db():
-        yield db
-
-    app.dependency_overrides[get_db] = override_get_db
     with TestClient(app) as c:
         yield c
-    app.dependency_overrides.clear()
 
 
 def test_list_todos_empty(client, user, household, member, auth_headers):
@@ -151,3 +147,37 @@ def test_delete_todo_403_when_other_household(client, user, auth_headers, db):
 
     r = client.delete(f"/api/todos/{item.id}", headers=auth_headers)
     assert r.status_code == 403
+
+
+def test_list_hides_expired_checked_items_without_deleting(client, household, member, auth_headers, db):
+    old = datetime.utcnow() - timedelta(days=todo_retention.DAYS_TO_KEEP_CHECKED + 1)
+    db.add_all([
+        TodoItem(household_id=household.id, content="Open", is_checked=False),
+        TodoItem(household_id=household.id, content="Recently done", is_checked=True, checked_at=datetime.utcnow()),
+        TodoItem(household_id=household.id, content="Long done", is_checked=True, checked_at=old),
+    ])
+    db.commit()
+
+    r = client.get("/api/todos", params={"household_id": household.id}, headers=auth_headers)
+    assert r.status_code == 200
+    assert sorted(x["content"] for x in r.json()) == ["Open", "Recently done"]
+    # The GET no longer writes; the expired row stays until the sweeper runs
+    assert db.query(TodoItem).filter(TodoItem.household_id == household.id).count() == 3
+
+
+def test_sweeper_purges_expired_items_in_batches(household, db):
+    other = Household(name="Other sweep household")
+    db.add(other)
+    db.commit()
+    old = datetime.utcnow() - timedelta(days=todo_retention.DAYS_TO_KEEP_CHECKED + 1)
+    for h in (household, other):
+        db.add_all([
+            TodoItem(household_id=h.id, content=f"Done {i}", is_checked=True, checked_at=old) for i in range(5)
+        ])
+        db.add(TodoItem(household_id=h.id, content="Keep", is_checked=True, checked_at=datetime.utcnow()))
+    db.commit()
+
+    assert todo_retention.purge_expired_todos(db, batch_size=2) >= 10  # plus leftovers of earlier tests
+    for h in (household, other):
+        assert [t.content for t in db.query(TodoItem).filter(TodoItem.household_id == h.id)] == ["Keep"]
+    assert todo_retention.purge_expired_todos(db, batch_size=2) == 0